@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from companies.stats import reconcile_company_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the dashboard aggregates of the companies from the projects and "
+        "calculation runs, run it periodically to repair drift of the incremental updates."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, default=None,
+                            help="Id of the company, all companies if not given.")
+
+    def handle(self, *args, **options):
+        count = reconcile_company_stats(options['company'])
+        self.stdout.write(self.style.SUCCESS(f"Reconciled the aggregates of {count} companies."))
@@ -0,0 +1,42 @@
+# Generated by Django 5.1 on 2026-10-19 19:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0005_alter_company_logo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyStats',
+            fields=[
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='companies.company', verbose_name='Company')),
+                ('projects_active', models.IntegerField(default=0, help_text='Number of active projects.', verbose_name='Active projects')),
+                ('projects_deleted', models.IntegerField(default=0, help_text='Number of soft deleted projects.', verbose_name='Deleted projects')),
+                ('calculations', models.IntegerField(default=0, help_text='Number of finished calculations.', verbose_name='Calculations')),
+                ('calculations_failed', models.IntegerField(default=0, help_text='Number of failed calculations.', verbose_name='Failed calculations')),
+                ('last_calculation_date', models.DateTimeField(blank=True, help_text='Time the last calculation finished.', null=True, verbose_name='Last calculation')),
+                ('reconciled_date', models.DateTimeField(blank=True, help_text='Time the aggregates were last recomputed from the tables.', null=True, verbose_name='Reconciled')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CompanyCalculationDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text='Day the calculations finished (local time).', verbose_name='Day')),
+                ('calculations', models.IntegerField(default=0, help_text='Number of finished calculations.', verbose_name='Calculations')),
+                ('failed', models.IntegerField(default=0, help_text='Number of failed calculations.', verbose_name='Failed')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='calculation_days', to='companies.company', verbose_name='Company')),
+                ('user', models.ForeignKey(blank=True, help_text='User who started the calculations.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='calculation_days', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['company', 'day'], name='company_calc_day_idx')],
+            },
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.auth.models import User
 from django.core.validators import RegexValidator, EmailValidator
 
 from shared.models import BaseModel
@@ -84,3 +85,95 @@ class Company(BaseModel):
 
     def __str__(self):
         return self.name
+
+
+class CompanyStats(models.Model):
+    """
+    Aggregates of the projects and calculations of a company, updated
+    by the write paths (see companies.stats).
+    """
+    company = models.OneToOneField(
+        Company,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+        verbose_name="Company"
+    )
+    projects_active = models.IntegerField(
+        default=0,
+        verbose_name="Active projects",
+        help_text="Number of active projects."
+    )
+    projects_deleted = models.IntegerField(
+        default=0,
+        verbose_name="Deleted projects",
+        help_text="Number of soft deleted projects."
+    )
+    calculations = models.IntegerField(
+        default=0,
+        verbose_name="Calculations",
+        help_text="Number of finished calculations."
+    )
+    calculations_failed = models.IntegerField(
+        default=0,
+        verbose_name="Failed calculations",
+        help_text="Number of failed calculations."
+    )
+    last_calculation_date = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Last calculation",
+        help_text="Time the last calculation finished."
+    )
+    reconciled_date = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Reconciled",
+        help_text="Time the aggregates were last recomputed from the tables."
+    )
+
+    def __str__(self):
+        return f"Stats of {self.company}"
+
+
+class CompanyCalculationDay(models.Model):
+    """
+    Finished calculations of a company per day and user.
+    """
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name="calculation_days",
+        verbose_name="Company"
+    )
+    day = models.DateField(
+        verbose_name="Day",
+        help_text="Day the calculations finished (local time)."
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="calculation_days",
+        verbose_name="User",
+        help_text="User who started the calculations."
+    )
+    calculations = models.IntegerField(
+        default=0,
+        verbose_name="Calculations",
+        help_text="Number of finished calculations."
+    )
+    failed = models.IntegerField(
+        default=0,
+        verbose_name="Failed",
+        help_text="Number of failed calculations."
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'day'], name='company_calc_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"Calculations of {self.company} on {self.day}"
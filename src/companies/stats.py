@@ -0,0 +1,218 @@
+"""
+Company dashboard aggregates.
+
+The dashboard doesn't scan the projects and the calculation history of
+a company. The write paths update two small tables in the transaction
+of the write, so a rolled back write isn't counted:
+
+    - CompanyStats: projects by status (active, deleted), finished and
+      failed calculations, time of the last calculation
+        - projects_changed: project create, copy, soft and hard delete
+        - calculation_finished: fail_run, store_output
+    - CompanyCalculationDay: finished and failed calculations per day and
+      user, the calculations per day, failure rates and the busiest
+      users of the dashboard are summed from these rows
+
+The CompanyStats row is locked by the update, so the writes of a company
+are serialized. A company without a row is reconciled on its first
+write or dashboard query.
+
+reconcile_company_stats (command reconcile_company_stats) recomputes the
+aggregates from the tables and repairs drift. The project counts are
+recomputed. The calculation history is pruned (CALCULATION_RUNS_KEEP,
+CALCULATION_RUNS_MAX_AGE_DAYS), so the runs are only a lower bound of
+the calculation counters, a counter is raised to the number of runs but
+never lowered.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, TruncDate
+from django.utils.timezone import localdate, now
+
+from projects.models import CalculationRun, Project
+from .models import Company, CompanyCalculationDay, CompanyStats
+
+# Users listed as the busiest of the dashboard
+BUSIEST_USERS = 10
+
+
+def _rate(failed: int, calculations: int):
+    return failed / calculations if calculations else None
+
+
+def projects_changed(company_id: int, active: int = 0, deleted: int = 0) -> None:
+    """
+    The function updates the project counts of a company after projects
+    were written.
+
+    Attributes:
+        - company_id: id of the company
+        - active: change of the number of active projects
+        - deleted: change of the number of soft deleted projects
+    """
+    updated = CompanyStats.objects.filter(company_id=company_id).update(
+        projects_active=F('projects_active') + active,
+        projects_deleted=F('projects_deleted') + deleted,
+    )
+    if not updated:
+        reconcile_company_stats(company_id)
+
+
+def calculation_finished(run: CalculationRun) -> None:
+    """
+    The function counts a finished (succeeded or failed) calculation run,
+    call it in the transaction which marks the run as finished.
+    """
+    company_id = run.project.company_id
+    failed = int(run.status == CalculationRun.STATUS_FAILED)
+    updated = CompanyStats.objects.filter(company_id=company_id).update(
+        calculations=F('calculations') + 1,
+        calculations_failed=F('calculations_failed') + failed,
+        # GREATEST is NULL with a NULL argument except on PostgreSQL
+        last_calculation_date=Greatest(
+            Coalesce('last_calculation_date', Value(run.finished_date)), Value(run.finished_date)
+        ),
+    )
+    if not updated:
+        # The reconciliation counts the run
+        reconcile_company_stats(company_id)
+        return
+
+    day = CompanyCalculationDay.objects.filter(
+        company_id=company_id, day=localdate(run.finished_date), user_id=run.created_by_id
+    )
+    if not day.update(calculations=F('calculations') + 1, failed=F('failed') + failed):
+        CompanyCalculationDay.objects.create(
+            company_id=company_id, day=localdate(run.finished_date), user_id=run.created_by_id,
+            calculations=1, failed=failed
+        )
+
+
+def _reconcile(company_id: int) -> None:
+    stats, _ = CompanyStats.objects.select_for_update().get_or_create(company_id=company_id)
+
+    projects = Project.all_objects.filter(company_id=company_id).aggregate(
+        active=Count('id', filter=Q(is_active=True)),
+        deleted=Count('id', filter=Q(is_active=False)),
+    )
+    stats.projects_active = projects['active']
+    stats.projects_deleted = projects['deleted']
+
+    days = {
+        (day.day, day.user_id): day
+        for day in CompanyCalculationDay.objects.filter(company_id=company_id)
+    }
+    created, changed = [], []
+    runs = (
+        CalculationRun.objects.filter(project__company_id=company_id, finished_date__isnull=False)
+        .annotate(day=TruncDate('finished_date'))
+        .values('day', 'created_by_id')
+        .annotate(
+            calculations=Count('id'),
+            failed=Count('id', filter=Q(status=CalculationRun.STATUS_FAILED)),
+            last=Max('finished_date'),
+        )
+    )
+    for row in runs:
+        day = days.get((row['day'], row['created_by_id']))
+        if day is None:
+            created.append(CompanyCalculationDay(
+                company_id=company_id, day=row['day'], user_id=row['created_by_id'],
+                calculations=row['calculations'], failed=row['failed']
+            ))
+        elif day.calculations < row['calculations'] or day.failed < row['failed']:
+            day.calculations = max(day.calculations, row['calculations'])
+            day.failed = max(day.failed, row['failed'])
+            changed.append(day)
+        if stats.last_calculation_date is None or stats.last_calculation_date < row['last']:
+            stats.last_calculation_date = row['last']
+    CompanyCalculationDay.objects.bulk_create(created)
+    CompanyCalculationDay.objects.bulk_update(changed, ['calculations', 'failed'])
+
+    totals = CompanyCalculationDay.objects.filter(company_id=company_id).aggregate(
+        calculations=Sum('calculations', default=0),
+        failed=Sum('failed', default=0),
+    )
+    stats.calculations = totals['calculations']
+    stats.calculations_failed = totals['failed']
+    stats.reconciled_date = now()
+    stats.save()
+
+
+def reconcile_company_stats(company_id: int = None) -> int:
+    """
+    The function recomputes the aggregates of a company, or of all
+    companies if company_id is None, from the projects and calculation runs.
+
+    Return: number of reconciled companies
+    """
+    company_ids = [company_id] if company_id is not None else Company.objects.values_list('id', flat=True)
+    count = 0
+    for company_id in company_ids:
+        with transaction.atomic():
+            _reconcile(company_id)
+        count += 1
+    return count
+
+
+def company_dashboard(company, days: int) -> dict:
+    """
+    The function returns the dashboard of a company.
+
+    Attributes:
+        - company: Company model object
+        - days: days of the calculations per day and the busiest users,
+          today included
+    Return: dict with the projects by status, the calculation totals, the
+        calculations per day and the busiest users of the period
+    """
+    stats = CompanyStats.objects.filter(company=company).first()
+    if stats is None:
+        reconcile_company_stats(company.id)
+        stats = CompanyStats.objects.get(company=company)
+
+    period = CompanyCalculationDay.objects.filter(
+        company=company, day__gt=localdate() - timedelta(days=days)
+    )
+    per_day = list(
+        period.values('day')
+        .annotate(calculations=Sum('calculations'), failed=Sum('failed'))
+        .order_by('day')
+    )
+    users = list(
+        period.values('user_id', 'user__username')
+        .annotate(calculations=Sum('calculations'), failed=Sum('failed'))
+        .order_by('-calculations', 'user_id')[:BUSIEST_USERS]
+    )
+    calculations = sum(day['calculations'] for day in per_day)
+    failed = sum(day['failed'] for day in per_day)
+
+    return {
+        'projects': {'active': stats.projects_active, 'deleted': stats.projects_deleted},
+        'calculations': {
+            'total': stats.calculations,
+            'failed': stats.calculations_failed,
+            'failure_rate': _rate(stats.calculations_failed, stats.calculations),
+            'last_date': stats.last_calculation_date,
+        },
+        'days': days,
+        'period': {
+            'calculations': calculations,
+            'failed': failed,
+            'failure_rate': _rate(failed, calculations),
+        },
+        'calculations_per_day': per_day,
+        'busiest_users': [
+            {
+                'user': user['user_id'],
+                'username': user['user__username'],
+                'calculations': user['calculations'],
+                'failed': user['failed'],
+                'failure_rate': _rate(user['failed'], user['calculations']),
+            }
+            for user in users
+        ],
+        'reconciled_date': stats.reconciled_date,
+    }
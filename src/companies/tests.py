@@ -1,3 +1,95 @@
-from django.test import TestCase
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from conftest import Endpoint, PROJECT_SIZES, logo_upload
+from projects.calculation_runs import fail_run, start_run, store_output
+from projects.dhpd_serializer.mapper import CalculationOutput
+from projects.models import CalculationRun, Project
+from .models import CompanyCalculationDay, CompanyStats
+
+COMPANY = '/v1/companies/{company_id}/'
+
+ENDPOINTS = [
+    Endpoint('company update', 'put', COMPANY, queries=6, data={'name': 'Renamed Company'}),
+    Endpoint('company upload-company-logo', 'post', COMPANY + 'upload-company-logo/', queries=5,
+             data=logo_upload, format='multipart', dhpd_response=lambda context: {'file_name': 'logo.png'}),
+    Endpoint('company dashboard', 'get', COMPANY + 'dashboard/', queries=5),
+]
+
+
+@pytest.mark.parametrize('size', PROJECT_SIZES)
+@pytest.mark.parametrize('endpoint', ENDPOINTS, ids=lambda endpoint: endpoint.name)
+def test_company_endpoint_budget(endpoint, size, endpoint_budget):
+    endpoint_budget(endpoint)
+
+
+@pytest.mark.parametrize('size', ['small'])
+def test_dashboard_follows_writes_and_reconciles(budget_context):
+    company, admin, employee = budget_context['company'], budget_context['admin'], budget_context['employees'][0]
+    project = budget_context['project']
+    client = APIClient()
+    client.defaults['SERVER_NAME'] = 'localhost'
+    client.force_authenticate(admin)
+    path = COMPANY.format(**budget_context) + 'dashboard/'
+    projects = len(budget_context['projects'])
+
+    assert client.post(f'/v1/companies/{company.id}/projects/', {'name': 'Dashboard'}).status_code == 201
+    assert client.delete(f'/v1/companies/{company.id}/projects/{project.id}/delete-project/').status_code == 200
+    for user, failed in [(admin, False), (employee, True), (employee, False), (employee, True)]:
+        run = start_run(project, user, 'server', '<xml/>')
+        if failed:
+            fail_run(run, 'error')
+        else:
+            store_output(run, CalculationOutput(piles={}, soil_layers={}, horizontal_loads={}, error_text=None))
+
+    dashboard = client.get(path).json()
+    assert dashboard['projects'] == {'active': projects, 'deleted': 1}
+    assert dashboard['calculations'] == {
+        'total': 4, 'failed': 2, 'failure_rate': 0.5,
+        'last_date': dashboard['calculations']['last_date'],
+    }
+    assert dashboard['calculations']['last_date'] is not None
+    assert [(day['calculations'], day['failed']) for day in dashboard['calculations_per_day']] == [(4, 2)]
+    assert [(user['user'], user['calculations'], user['failed']) for user in dashboard['busiest_users']] == [
+        (employee.id, 3, 2), (admin.id, 1, 0),
+    ]
+    assert client.get(path, {'days': 0}).status_code == 400
+
+    # The reconciliation repairs drift, the pruned history isn't lost
+    CompanyStats.objects.filter(company=company).update(projects_active=0, calculations=0)
+    CompanyCalculationDay.objects.filter(company=company, user=admin).delete()
+    CalculationRun.objects.filter(project=project, created_by=employee).delete()
+    call_command('reconcile_company_stats', company=company.id)
+    dashboard = client.get(path).json()
+    assert dashboard['projects']['active'] == projects
+    assert (dashboard['calculations']['total'], dashboard['calculations']['failed']) == (4, 2)
+    assert dashboard['reconciled_date'] is not None
+
+    # Employees don't see the dashboard
+    client.force_authenticate(employee)
+    assert client.get(path).status_code == 403
+
+
+@pytest.mark.parametrize('size', ['small'])
+def test_dashboard_counts_only_committed_project_writes(budget_context, mocker):
+    company = budget_context['company']
+    client = APIClient()
+    client.defaults['SERVER_NAME'] = 'localhost'
+    client.force_authenticate(budget_context['admin'])
+    copy_project = Project.copy_project
+    calls = []
+
+    def failing_copy(project, user=None):
+        calls.append(project.id)
+        if len(calls) == 2:
+            raise ValueError("Copy failed")
+        return copy_project(project, user)
+
+    mocker.patch.object(Project, 'copy_project', failing_copy)
+    project_ids = [project.id for project in budget_context['projects']]
+    response = client.post(f'/v1/companies/{company.id}/projects/copy-multi-projects/', {'project_ids': project_ids}, format='json')
+    assert response.status_code == 400
+
+    stats = CompanyStats.objects.get(company=company)
+    assert stats.projects_active == Project.objects.filter(company=company).count() == len(project_ids) + 1
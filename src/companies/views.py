@@ -1,5 +1,3 @@
-import requests
-
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework.decorators import action
@@ -12,12 +10,18 @@ from piledesigner.settings import (
 )
 from projects.services import (
     resize_image,
-    remove_old_image
+    remove_old_image,
+    http_session
 )
 from shared.permissions import IsAdmin
 from projects.serializers import ProjectCompanyLogoSerializer
 from .models import Company
 from .serializers import CompanyUpdateWithoutLogoSerializer
+from .stats import company_dashboard
+
+# Days of the dashboard by default and at most
+DASHBOARD_DAYS = 30
+DASHBOARD_MAX_DAYS = 366
 
 class CompanyViewSet(ViewSet):
     permission_classes = [IsAuthenticated, IsAdmin]
@@ -44,6 +48,31 @@ class CompanyViewSet(ViewSet):
         except Company.DoesNotExist:
             return Response({"error": "Company not found."}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=True, methods=['get'], url_path='dashboard')
+    def dashboard(self, request, pk=None):
+        """
+        Get the project counts by status, the calculation totals and
+        failure rate, and the calculations per day and busiest users of
+        the last ?days (default 30).
+        """
+        try:
+            company = Company.objects.get(id=pk)
+        except Company.DoesNotExist:
+            return Response({"error": "Company not found."}, status=status.HTTP_404_NOT_FOUND)
+        self.check_object_permissions(request, company)
+
+        try:
+            days = int(request.query_params.get('days', DASHBOARD_DAYS))
+        except ValueError:
+            return Response({"error": "days must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= days <= DASHBOARD_MAX_DAYS:
+            return Response(
+                {"error": f"days must be between 1 and {DASHBOARD_MAX_DAYS}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(company_dashboard(company, days), status=status.HTTP_200_OK)
+
     @action(detail=True, methods=['post'], url_path='upload-company-logo')
     def upload_project_company_logo(self, request, pk=None):
         """
@@ -67,7 +96,7 @@ class CompanyViewSet(ViewSet):
                 file = resize_image(file)
 
                 files = {"image": file}
-                response = requests.post(fastapi_url, files=files, timeout=10)
+                response = http_session().post(fastapi_url, files=files, timeout=10)
                 company.logo = response.json()["file_name"]
             
             else:
@@ -0,0 +1,275 @@
+"""
+Fixtures of the endpoint budget tests.
+
+Every app lists its router endpoints with a query budget and a time
+ceiling (see Endpoint). The tests call the endpoints for projects of
+several sizes (PROJECT_SIZES), the number of queries must not grow with
+the size of the project unless the endpoint has a budget per size. The
+measurements are printed as table at the end of the run and written as
+JSON with --endpoint-report.
+"""
+import copy
+import json
+import time
+import uuid
+from functools import lru_cache
+from io import BytesIO
+from typing import NamedTuple, Callable, Optional
+
+import pytest
+import requests
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User, Group
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from companies.models import Company
+from companies.stats import reconcile_company_stats
+from users.models import UserProfile
+from projects.benchmark import ProjectSize, generate_project
+from projects.models import Project, ProjectSettings, UserProjectRel
+from projects.table_upsert import replace_project_table_data
+
+# Other projects and employees of the company, the project under test
+# has the tables of the project size.
+PROJECT_SIZES = {
+    'small': {'projects': 2, 'employees': 2, 'tables': ProjectSize(5, 2, 3, 1)},
+    'large': {'projects': 20, 'employees': 15, 'tables': ProjectSize(200, 5, 10, 3)},
+}
+
+# Password of the users of the budget context.
+PASSWORD = 'password'
+
+_endpoint_results = []
+
+
+class Endpoint(NamedTuple):
+    """
+    Attributes:
+        - name: name in the report
+        - method: get, post, put, patch or delete
+        - path: URL, formatted with the ids of the budget context
+          (company_id, project_id, user_id, employee_id, job_id)
+        - queries: maximum number of SQL queries, {size: queries} for
+          endpoints whose queries grow with the project size
+        - ms: maximum time of the request in milliseconds, or {size: ms}
+        - data: request data or function(context) -> data, not measured
+        - format: json or multipart
+        - status: expected status codes
+        - dhpd_response: function(context) -> json of the mocked FastAPI
+          server (requests.Session.post), None if the endpoint doesn't call it
+        - authenticated: send the request as the company admin
+    """
+    name: str
+    method: str
+    path: str
+    queries: int | dict
+    ms: int | dict = 500
+    data: object = None
+    format: str = 'json'
+    status: tuple = (200,)
+    dhpd_response: Optional[Callable] = None
+    authenticated: bool = True
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--endpoint-report', default=None,
+        help="Write the queries, time and response size of every endpoint to this JSON file."
+    )
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix):
+    """
+    The tests run with two local databases, the second one is the
+    "replica" of shared/db_router.py. It isn't a mirror of default, the
+    replica tests see which database a read went to. The router only
+    uses it in tests which set DATABASE_REPLICA. Its tables are created
+    from the models, a replica isn't migrated.
+    """
+    from django.conf import settings
+
+    default = settings.DATABASES['default']
+    test_name = default['TEST'].get('NAME') or f"test_{default['NAME']}"
+    settings.DATABASES['replica'] = {
+        **default,
+        'TEST': {**default['TEST'], 'NAME': f"{test_name}_replica", 'MIRROR': None, 'MIGRATE': False},
+    }
+
+
+def _budget(budget, size: str) -> int:
+    return budget[size] if isinstance(budget, dict) else budget
+
+
+@lru_cache
+def _password_hash() -> str:
+    # Hashing takes a few hundred milliseconds, hash the password once.
+    return make_password(PASSWORD)
+
+
+def _create_user(company, role: str) -> User:
+    email = f"{role.lower()}-{uuid.uuid4().hex[:8]}@example.com"
+    user = User.objects.create(username=email, email=email, password=_password_hash())
+    user.groups.add(Group.objects.get_or_create(name=role)[0])
+    UserProfile.objects.create(user=user, company=company, is_admin=role == 'Admin')
+    return user
+
+
+@lru_cache
+def _project_data(size: ProjectSize) -> dict:
+    return generate_project(size)
+
+
+def build_company(size: str) -> dict:
+    """
+    The function creates a company with an admin, employees and projects.
+    The first project has the tables of the size, all employees are
+    assigned to all projects.
+
+    Return: budget context with the model objects and their ids
+    """
+    size_options = PROJECT_SIZES[size]
+    company = Company.objects.create(name=f"Company {uuid.uuid4().hex[:8]}")
+    admin = _create_user(company, 'Admin')
+    employees = [_create_user(company, 'Employee') for _ in range(size_options['employees'])]
+
+    project_data = copy.deepcopy(_project_data(size_options['tables']))
+    projects = []
+    for index in range(size_options['projects']):
+        project = Project.objects.create(
+            name=f"{project_data['name'][:40]} {index}", company=company,
+            created_by=admin, modified_by=admin
+        )
+        ProjectSettings.objects.create(
+            project=project, **{**project_data['settings'], 'name': project.name}
+        )
+        projects.append(project)
+
+    replace_project_table_data(
+        projects[0],
+        project_data['piles'],
+        project_data['soil_profiles'],
+        project_data['horizontal_loadcases']
+    )
+    UserProjectRel.objects.bulk_create([
+        UserProjectRel(user=employee, project=project)
+        for employee in employees for project in projects
+    ])
+    reconcile_company_stats(company.id)
+
+    return {
+        'size': size,
+        'company': company,
+        'admin': admin,
+        'employees': employees,
+        'projects': projects,
+        'project': projects[0],
+        'company_id': company.id,
+        'project_id': projects[0].id,
+        'user_id': admin.id,
+        'employee_id': employees[0].id,
+    }
+
+
+def logo_upload(context) -> dict:
+    """
+    Request data with a small PNG image as file.
+    """
+    from PIL import Image
+
+    content = BytesIO()
+    Image.new('RGB', (64, 64), 'white').save(content, format='PNG')
+    return {'file': SimpleUploadedFile('logo.png', content.getvalue(), content_type='image/png')}
+
+
+@pytest.fixture
+def budget_context(db, size):
+    return build_company(size)
+
+
+def proxy_response(status_code: int, payload=None) -> requests.Response:
+    """
+    Response of the DHPD proxy for a mocked requests.Session.post.
+    """
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    return response
+
+
+@pytest.fixture
+def endpoint_budget(budget_context, mocker):
+    """
+    Call an endpoint, record its queries, time and response size
+    and check them against the budget.
+    """
+    def call(endpoint: Endpoint):
+        context = budget_context
+        client = APIClient()
+        client.defaults['SERVER_NAME'] = 'localhost'
+        if endpoint.authenticated:
+            client.force_authenticate(context['admin'])
+
+        data = endpoint.data(context) if callable(endpoint.data) else endpoint.data
+        if endpoint.dhpd_response:
+            response_json = endpoint.dhpd_response(context)
+            mocker.patch('requests.Session.post', return_value=proxy_response(200, response_json))
+        path = endpoint.path.format(**context)
+        query_budget = _budget(endpoint.queries, context['size'])
+        ms_budget = _budget(endpoint.ms, context['size'])
+
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = getattr(client, endpoint.method)(path, data, format=endpoint.format)
+            if response.streaming:
+                content = b''.join(response.streaming_content)
+            else:
+                content = response.content
+            ms = (time.perf_counter() - start) * 1000
+
+        _endpoint_results.append({
+            'endpoint': endpoint.name,
+            'size': context['size'],
+            'status': response.status_code,
+            'queries': len(queries),
+            'query_budget': query_budget,
+            'ms': round(ms, 1),
+            'ms_budget': ms_budget,
+            'bytes': len(content),
+        })
+
+        assert response.status_code in endpoint.status, content[:500]
+        assert len(queries) <= query_budget, (
+            f"{endpoint.name}: {len(queries)} queries, budget {query_budget}\n"
+            + "\n".join(query['sql'][:200] for query in queries.captured_queries)
+        )
+        assert ms <= ms_budget, f"{endpoint.name}: {ms:.0f} ms, ceiling {ms_budget} ms"
+        return response
+
+    return call
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    if not _endpoint_results:
+        return
+
+    terminalreporter.section('endpoint budgets')
+    terminalreporter.write_line(
+        f"{'endpoint':<36}{'size':<8}{'status':>7}{'queries':>9}{'budget':>8}"
+        f"{'ms':>9}{'ceiling':>9}{'bytes':>10}"
+    )
+    for result in sorted(_endpoint_results, key=lambda result: (result['endpoint'], result['size'])):
+        terminalreporter.write_line(
+            f"{result['endpoint']:<36}{result['size']:<8}{result['status']:>7}"
+            f"{result['queries']:>9}{result['query_budget']:>8}"
+            f"{result['ms']:>9.1f}{result['ms_budget']:>9}{result['bytes']:>10}"
+        )
+
+    report_path = config.getoption('--endpoint-report')
+    if report_path:
+        with open(report_path, 'w', encoding='utf-8') as file:
+            json.dump(_endpoint_results, file, indent=2)
+        terminalreporter.write_line(f"Endpoint report written to {report_path}")
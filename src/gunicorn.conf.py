@@ -0,0 +1,26 @@
+"""
+gunicorn settings, read from the working directory (src).
+
+WARM_UP=True warms up every process before its first request, see
+projects/warm_up.py. With GUNICORN_PRELOAD_APP=True the master loads
+the application and warms up once, the workers are forked from it.
+
+PRELOAD_HEAVY_IMPORTS=True only imports the conversion libraries in
+every worker before it accepts requests, see piledesigner/startup.py.
+"""
+from decouple import config
+
+wsgi_app = 'piledesigner.wsgi:application'
+preload_app = config('GUNICORN_PRELOAD_APP', default=False, cast=bool)
+
+
+def post_fork(server, worker):
+    if not config('PRELOAD_HEAVY_IMPORTS', default=False, cast=bool):
+        return
+
+    from piledesigner.startup import preload_heavy_modules
+
+    seconds = preload_heavy_modules()
+    server.log.info(
+        "Worker %s preloaded %d modules in %.0f ms", worker.pid, len(seconds), sum(seconds.values()) * 1000
+    )
@@ -46,6 +46,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework_simplejwt',
     'rest_framework',
     'rest_framework_simplejwt.token_blacklist',
@@ -72,20 +73,63 @@ DHPD_TOOL_DOMAIN = config('CDN_DOMAIN')
 WINDOW_SERVER_IMAGES_DIRECTORY = config('WINDOW_SERVER_IMAGES_DIRECTORY')
 DHPD_SERVER_1 = config('DHPD_SERVER_1')
 DHPD_SERVER_2 = config('DHPD_SERVER_2')
+# Validate the calculation XML against xml_calculate_template.xsd before sending
+DHPD_VALIDATE_CALCULATE_XML = config('DHPD_VALIDATE_CALCULATE_XML', default=False, cast=bool)
 # Points to out FastAPI-DHPD proxy server
 FASTAPI_SERVER_DOMAIN = config(
     'FASTAPI_SERVER_DOMAIN',
     default='http://192.168.10.91:8000/')  # FIXME: always explicitly set URL!
 
+# Seconds until a calculation is cancelled, connections of an ASGI worker
+# to the proxy (see projects/async_calculate.py)
+CALCULATE_TIMEOUT = config('CALCULATE_TIMEOUT', default=500, cast=float)
+CALCULATE_MAX_CONNECTIONS = config('CALCULATE_MAX_CONNECTIONS', default=500, cast=int)
+# Calculation runs kept per project and their maximum age in days, the
+# latest run is always kept, 0 = no limit (see projects/calculation_runs.py)
+CALCULATION_RUNS_KEEP = config('CALCULATION_RUNS_KEEP', default=10, cast=int)
+CALCULATION_RUNS_MAX_AGE_DAYS = config('CALCULATION_RUNS_MAX_AGE_DAYS', default=180, cast=int)
+# Compression of the raw proxy responses, gzip or zstd (needs zstandard), and
+# their maximum age in days, 0 = no limit (see projects/calculation_snapshots.py)
+CALCULATION_SNAPSHOT_CODEC = config('CALCULATION_SNAPSHOT_CODEC', default='gzip')
+CALCULATION_SNAPSHOTS_MAX_AGE_DAYS = config('CALCULATION_SNAPSHOTS_MAX_AGE_DAYS', default=90, cast=int)
+# Seconds a result summary is cached, it is keyed by the project tables
+# version and the latest run (see projects/result_summary.py)
+PROJECT_SUMMARY_CACHE_TIMEOUT = config('PROJECT_SUMMARY_CACHE_TIMEOUT', default=86400, cast=int)
+
+# Background project imports (see projects/imports.py)
+IMPORT_JOB_WORKERS = config('IMPORT_JOB_WORKERS', default=2, cast=int)
+# Uploads are stored here until the import job is done, defaults to the system temp dir.
+# Must be on storage shared by all servers when there is more than one.
+IMPORT_JOB_DIR = config('IMPORT_JOB_DIR', default=None)
+# Pending or running jobs without progress for this long were lost with their
+# worker, expire_import_jobs fails them
+IMPORT_JOB_TIMEOUT_MINUTES = config('IMPORT_JOB_TIMEOUT_MINUTES', default=60, cast=int)
+
+# Warm up schemas, serializers and caches before the first request (see projects/warm_up.py)
+WARM_UP = config('WARM_UP', default=False, cast=bool)
+
+# Request metrics (see shared/metrics.py), scraped from /internal/metrics/
+# by staff users or with "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+# Requests slower than this are logged with their SQL, only a part of them (0 - 1)
+SLOW_REQUEST_MS = config('SLOW_REQUEST_MS', default=1000, cast=int)
+SLOW_REQUEST_SAMPLE_RATE = config('SLOW_REQUEST_SAMPLE_RATE', default=0.1, cast=float)
+# Requests of staff users with ?profile=1 are profiled (see shared/profiling.py)
+PROFILE_SAMPLE_INTERVAL_MS = config('PROFILE_SAMPLE_INTERVAL_MS', default=5, cast=float)
+
 
 MIDDLEWARE = [
+    'shared.metrics.RequestMetricsMiddleware',
+    'shared.db_router.ReplicaRoutingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'shared.static_files.StaticFilesMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'shared.profiling.RequestProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -125,6 +169,21 @@ DATABASES = {
     }
 }
 
+# Read replica of the database (optional), the reads of GET requests go
+# to it (see shared/db_router.py). The tests use it as a mirror of default.
+if config("POSTGRES_REPLICA_HOST", default=""):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        'NAME': config("POSTGRES_REPLICA_DATABASE_NAME", default=DATABASES["default"]["NAME"]),
+        'USER': config("POSTGRES_REPLICA_USER", default=DATABASES["default"]["USER"]),
+        'PASSWORD': config("POSTGRES_REPLICA_PASSWORD", default=DATABASES["default"]["PASSWORD"]),
+        'HOST': config("POSTGRES_REPLICA_HOST"),
+        'PORT': config("POSTGRES_REPLICA_PORT", default=DATABASES["default"]["PORT"]),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICA = "replica" if "replica" in DATABASES else None
+DATABASE_ROUTERS = ['shared.db_router.PrimaryReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
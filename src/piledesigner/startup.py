@@ -0,0 +1,50 @@
+"""
+Startup cost of the API processes.
+
+The conversion libraries (NumPy, xmlschema, Pillow, openpyxl, ...) are
+imported by the functions which use them, so a worker, a manage.py
+command or a test run only pays for the libraries it needs. The first
+request which needs one of them pays for its import instead.
+
+Latency sensitive deployments import them after the fork of a gunicorn
+worker (PRELOAD_HEAVY_IMPORTS, see gunicorn.conf.py), before the worker
+accepts requests. With preload_app they would be imported once in the
+master and shared by the workers.
+"""
+import importlib
+import time
+
+# Imported on demand, not by piledesigner.wsgi, the URLs or manage.py check
+HEAVY_MODULES = (
+    'numpy',
+    'xmlschema',
+    'xmltojson',
+    'JsonToXML',
+    'PIL.Image',
+    'PIL.ImageOps',
+    'openpyxl',
+    'xlsxwriter',
+    'pyarrow',
+    'pyarrow.parquet',
+    'pandas',
+)
+
+# Imported on demand by the API, pandas is only used by the benchmarks
+PRELOAD_MODULES = tuple(module for module in HEAVY_MODULES if module != 'pandas')
+
+
+def preload_heavy_modules(modules: tuple = PRELOAD_MODULES) -> dict:
+    """
+    The function imports the conversion libraries.
+
+    Return: {module: seconds}, missing modules are left out
+    """
+    seconds = {}
+    for module in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            continue
+        seconds[module] = time.perf_counter() - start
+    return seconds
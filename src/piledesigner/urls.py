@@ -22,9 +22,10 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 
-from shared.views import DefaultViewSet
+from shared.views import DefaultViewSet, MetricsView, RequestProfileView
 from users import views as userViews
 from projects import views as projViews
+from projects.async_calculate import calculate_view
 from companies import views as comViews
 
 
@@ -45,6 +46,7 @@ router.register(r'v1/companies/(?P<company_id>\d+)/employees', userViews.UserVie
 # Additionally, we include login URLs for the browsable API.
 urlpatterns = [
     path('', include(router.urls)),
+    path('v1/companies/<int:company_id>/projects/<int:pk>/calculate-async/', calculate_view, name='project-calculate-async'),
 
     path('admin/', admin.site.urls),
     path('api-auth/', include('rest_framework.urls', namespace='rest_framework')),
@@ -54,6 +56,8 @@ urlpatterns = [
     path('v1/otp/resend-otp/', userViews.ResendOTPView.as_view(), name='resend-otp'),
     path('v1/otp/verify-otp/', userViews.VerifyOTPView.as_view(), name='verify-otp'),
     path('v1/otp/reset-password/', userViews.ResetPassWithOTPView.as_view(), name='reset-password'),
+    path('internal/metrics/', MetricsView.as_view(), name='metrics'),
+    path('internal/profiles/<uuid:profile_id>/', RequestProfileView.as_view(), name='request-profile'),
 ]
 
 # curl -X POST -H "Content-Type: application/json" -d '{"username": "admin", "password": "admin"}' http://localhost:8000/api/token/
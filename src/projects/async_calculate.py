@@ -0,0 +1,242 @@
+"""
+Calculation of a project without a thread per calculation (ASGI).
+
+The calculate action of ProjectViewSet blocks a thread until the
+FastAPI-DHPD proxy answers, which takes up to minutes. calculate_view
+does the same calculation as a native async view:
+
+    - the project is loaded, the calculation XML built and the result
+      stored in short sync_to_async calls, as the async ORM of Django
+      does for its queries
+    - the proxy is called with httpx.AsyncClient, waiting for it doesn't
+      hold a thread, one ASGI worker holds hundreds of calculations
+    - the calculation is cancelled after CALCULATE_TIMEOUT seconds
+      (504) or when the client disconnects, its run fails then
+
+DRF views are synchronous, the view authenticates the JWT and checks
+the permissions of the calculate action itself. Under WSGI the view
+works as well, Django runs it in an event loop per request.
+"""
+import asyncio
+import logging
+import time
+import weakref
+from types import SimpleNamespace
+
+import xmltodict
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse, Http404
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from companies.models import Company
+from shared.db_router import primary_database
+from shared.permissions import IsAdminManagerOrAssigned
+from .calculation_runs import start_run, fail_run, abort_run, store_output
+from .calculation_snapshots import save_snapshot
+from .dhpd_serializer.mapper import DhpdSerializer
+from .models import Project, UserProjectRel
+from .preflight import preflight
+from .serializers import ProjectDetailSerializer, ProjectDetailCalculateSerializer
+from .services import json_to_calculate_xml, validate_calculate_xml_file
+
+logger = logging.getLogger(__name__)
+
+CALCULATE_PATH = 'project/calculateByXMLString/'
+
+# Keys of the output removed from the response of a failed calculation
+ERROR_OUTPUT_KEYS = ["pfaehle", "hLasten", "gruppenStatiken", "Kosten", "BodenNutzung", "KostenOutput"]
+
+# One client (connection pool) per event loop, a client can't be shared between loops.
+_clients = weakref.WeakKeyDictionary()
+
+
+class CalculationInputError(Exception):
+    """
+    The calculation XML doesn't match xml_calculate_template.xsd.
+    """
+    def __init__(self, errors: list):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def http_client():
+    """
+    The function returns the httpx.AsyncClient of the running event loop.
+    """
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            base_url=settings.FASTAPI_SERVER_DOMAIN,
+            verify=False,
+            # The whole calculation is limited by CALCULATE_TIMEOUT
+            timeout=httpx.Timeout(None, connect=10),
+            limits=httpx.Limits(max_connections=settings.CALCULATE_MAX_CONNECTIONS),
+        )
+        _clients[loop] = client
+    return client
+
+
+def _authorized_project(request, company_id: int, pk: int):
+    """
+    The function authenticates the user and checks the permissions of
+    ProjectViewSet.calculate (IsAdminManagerOrAssigned).
+
+    Return: user, project
+    """
+    authenticated = JWTAuthentication().authenticate(request)
+    if authenticated is None:
+        raise AuthenticationFailed("Authentication credentials were not provided.")
+    request.user = authenticated[0]
+
+    queryset = Project.objects.filter(company__id=company_id)
+    if request.user.groups.values_list("name", flat=True).first() == 'Employee':
+        queryset = queryset.filter(
+            id__in=UserProjectRel.objects.filter(user=request.user).values_list('project', flat=True)
+        )
+    project = get_object_or_404(queryset, pk=pk)
+
+    view = SimpleNamespace(detail=True, kwargs={'pk': pk})
+    if not IsAdminManagerOrAssigned().has_object_permission(request, view, project):
+        return request.user, None
+    return request.user, project
+
+
+def _calculation_payload(project, user, company_id: int, dhpd_server: str) -> tuple:
+    """
+    The function starts the calculation run and builds the proxy request.
+
+    Return: CalculationRun, payload
+    """
+    report = preflight(project)
+    if not report['valid']:
+        raise CalculationInputError(report['errors'])
+
+    xml_data = dict(ProjectDetailCalculateSerializer(project).data)
+    xml_content = json_to_calculate_xml(xml_data, user, Company.objects.get(id=company_id))
+    run = start_run(project, user, dhpd_server, xml_content)
+
+    if settings.DHPD_VALIDATE_CALCULATE_XML:
+        errors = validate_calculate_xml_file(xml_content)
+        if errors:
+            fail_run(run, errors)
+            raise CalculationInputError(errors)
+
+    return run, {'xml_content': xmltodict.parse(xml_content), 'dhpd_server': dhpd_server}
+
+
+def _store_result(project, run, data: dict, output, proxy_ms: float, request) -> dict:
+    with transaction.atomic():
+        if 'pdf' in data:
+            project.pdf = data['pdf']
+            project.save()
+        store_output(run, output, proxy_ms)
+    project = Project.objects.get(pk=project.pk)
+    return ProjectDetailSerializer(project, context={'request': request}).data
+
+
+async def _post(payload: dict, run=None) -> dict | None:
+    """
+    The function posts to the proxy, the response is kept as snapshot of
+    the run if one is given.
+
+    Return: json of the proxy, None if it failed
+    """
+    response = await http_client().post(CALCULATE_PATH, json=payload)
+    if run is not None:
+        await sync_to_async(save_snapshot)(run, response.content)
+    if response.status_code != 200:
+        return None
+    return response.json()
+
+
+@primary_database
+async def calculate_view(request, company_id: int, pk: int):
+    """
+    Async calculation of a project, same responses as ProjectViewSet.calculate.
+    """
+    if request.method != 'GET':
+        return JsonResponse({"detail": f'Method "{request.method}" not allowed.'},
+                            status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    try:
+        user, project = await sync_to_async(_authorized_project)(request, company_id, pk)
+    except AuthenticationFailed as e:
+        return JsonResponse({"detail": str(e.detail)}, status=status.HTTP_401_UNAUTHORIZED)
+    except Http404:
+        return JsonResponse({"detail": "No Project matches the given query."}, status=status.HTTP_404_NOT_FOUND)
+    if project is None:
+        return JsonResponse({"detail": "You do not have permission to perform this action."},
+                            status=status.HTTP_403_FORBIDDEN)
+
+    dhpd_server = settings.DHPD_SERVER_2 if request.GET.get('dhpd_server', '0') == '1' else settings.DHPD_SERVER_1
+    try:
+        run, payload = await sync_to_async(_calculation_payload)(project, user, company_id, dhpd_server)
+    except CalculationInputError as e:
+        return JsonResponse({"error": e.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        return await _calculate(request, project, run, payload)
+    except Exception as e:
+        # A run left running would be the current result of the project
+        await sync_to_async(abort_run)(run, str(e))
+        raise
+
+
+async def _calculate(request, project, run, payload: dict):
+    """
+    The function sends the started run to the proxy and stores its output.
+    """
+    import httpx
+
+    failed = sync_to_async(fail_run)
+    start = time.perf_counter()
+    try:
+        async with asyncio.timeout(settings.CALCULATE_TIMEOUT):
+            data = await _post(payload, run)
+            proxy_ms = (time.perf_counter() - start) * 1000
+            if data is None:
+                await failed(run, "Failed to get data from DHPD proxy!", proxy_ms)
+                return JsonResponse({"detail": "Failed to get data from DHPD proxy!"},
+                                    status=status.HTTP_400_BAD_REQUEST)
+
+            # Error of the DHPD-WebClient program, the connection test tells
+            # if the calculation server is down or the project is the problem.
+            if data.get('error_msg') is not None and 'xml_output_data' not in data:
+                con_test = await _post({'xml_content': False})
+                error_msg = (con_test or {}).get('error_msg') or data['error_msg']
+                await failed(run, error_msg, proxy_ms)
+                return JsonResponse(error_msg, status=status.HTTP_400_BAD_REQUEST, safe=False)
+    except TimeoutError:
+        await failed(run, "The DHPD proxy did not answer in time.")
+        return JsonResponse({"detail": "The DHPD proxy did not answer in time."},
+                            status=status.HTTP_504_GATEWAY_TIMEOUT)
+    except httpx.HTTPError:
+        await failed(run, "Failed to get data from DHPD proxy!")
+        return JsonResponse({"detail": "Failed to get data from DHPD proxy!"}, status=status.HTTP_400_BAD_REQUEST)
+    except asyncio.CancelledError:
+        logger.info("Calculation of project %s cancelled, the client disconnected.", project.pk)
+        await failed(run, "Cancelled, the client disconnected.")
+        raise
+
+    xml_output_data = data['xml_output_data']
+    if 'ErrorData' in xml_output_data:
+        await failed(run, xml_output_data['ErrorData'], proxy_ms)
+        return JsonResponse(data, status=status.HTTP_400_BAD_REQUEST)
+
+    output = DhpdSerializer.unserialize_output(xml_output_data['OutputDaten'])
+    project_data = await sync_to_async(_store_result)(project, run, data, output, proxy_ms, request)
+
+    if output.error_text is not None:
+        for pop_key in ERROR_OUTPUT_KEYS:
+            xml_output_data['OutputDaten'].pop(pop_key, None)
+        return JsonResponse(data, status=status.HTTP_400_BAD_REQUEST)
+
+    return JsonResponse(project_data, status=status.HTTP_200_OK)
@@ -0,0 +1,336 @@
+"""
+Benchmark of the project data pipeline with generated projects.
+
+A project of the given size (piles x soil profiles x layers x load cases)
+is generated with Faker. Every stage of the import, export and calculate
+pipeline is timed (best of a few runs) and its peak memory is traced with
+tracemalloc in a separate run, so the tracing doesn't slow down the timing.
+The results can be stored as JSON and compared with a baseline, see the
+bench_pipeline management command.
+"""
+import copy
+import json
+import platform
+import time
+import tracemalloc
+from io import BytesIO
+from typing import NamedTuple, Callable
+
+from django.db import models
+from django.utils.timezone import now
+
+from .dhpd_serializer.mapping import PILE_TYPES_SYMBOLS
+from .key_plans import XML_IMPORT_PLAN
+from .models import ProjectSettings, Pile, SoilProfile, SoilLayer, HorizontalLoadCase, HorizontalLoadPile
+from .services import (
+    json_to_calculate_xml,
+    xml_to_json,
+    restructure_json_data,
+    input_xml_content_unit_convert,
+    json_to_xlsx_structure,
+    xlsx_to_json,
+)
+
+SOIL_TYPES = ["Sand", "Kies", "Schluff", "Ton", "Mergel", "Torf", "Auffüllung", "Fels"]
+
+# Changes below these are measurement noise and never count as regression.
+MIN_SECONDS_CHANGE = 0.02
+MIN_PEAK_KIB_CHANGE = 256
+
+
+class ProjectSize(NamedTuple):
+    piles: int
+    soil_profiles: int
+    layers: int
+    load_cases: int
+
+    @classmethod
+    def parse(cls, value: str) -> 'ProjectSize':
+        """
+        Size from "piles x soil profiles x layers x load cases", e.g. 2000x10x20x5.
+        """
+        parts = value.lower().split('x')
+        if len(parts) != 4:
+            raise ValueError(f"{value}: expected piles x soil profiles x layers x load cases")
+        size = cls(*(int(part) for part in parts))
+        if min(size) < 0 or size.soil_profiles < 1:
+            raise ValueError(f"{value}: at least one soil profile is needed")
+        return size
+
+    @property
+    def label(self) -> str:
+        return 'x'.join(str(part) for part in self)
+
+
+class Stage(NamedTuple):
+    """
+    Attributes:
+        - name: stage name in the results
+        - setup: returns the arguments of run, not measured
+        - run: the measured function
+    """
+    name: str
+    setup: Callable
+    run: Callable
+
+
+def _field_values(model, fake, overrides: dict) -> dict:
+    """
+    One row of a model as the calculate serializers return it, fields
+    without value before the calculation (default None) are None.
+    """
+    row = {}
+    for field in model._meta.concrete_fields:
+        if field.primary_key or field.is_relation:
+            continue
+        if field.name in overrides:
+            row[field.name] = overrides[field.name]
+        elif field.default is None:
+            row[field.name] = None
+        elif isinstance(field, models.FloatField):
+            row[field.name] = round(fake.random.uniform(0.1, 100), 2)
+        elif field.choices:
+            row[field.name] = fake.random.choice(field.choices)[0]
+        elif field.has_default():
+            row[field.name] = field.get_default()
+        elif isinstance(field, models.CharField):
+            row[field.name] = fake.word()
+        else:
+            row[field.name] = fake.random.randint(0, 10)
+    return row
+
+
+def generate_project(size: ProjectSize, seed: int = 0) -> dict:
+    """
+    The function generates project json data (ProjectDetailCalculateSerializer
+    structure) of the given size.
+
+    Attributes:
+        - size: ProjectSize
+        - seed: same seed, same project
+    Return: project json data with settings, piles, soil profiles and horizontal load cases
+    """
+    from faker import Faker
+
+    fake = Faker('de_DE')
+    fake.seed_instance(seed)
+
+    settings = _field_values(ProjectSettings, fake, {
+        'name': fake.catch_phrase()[:64],
+        'projektLocation': fake.city(),
+        'projektStreet': fake.street_address(),
+        'projektPostalCode': fake.postcode(),
+        'companyAltName': fake.company(),
+        'companyAltLocation': fake.city(),
+        'companyAltStreet': fake.street_address(),
+        'companyAltPostalCode': fake.postcode(),
+        'companyAltEmail': fake.company_email(),
+        'companyAltPhone': fake.phone_number(),
+        'companyAltFax': fake.phone_number(),
+        'companyAltLogo': '',
+        'default_company_info': False,
+    })
+
+    soil_profile_names = [f"BP{index + 1}" for index in range(size.soil_profiles)]
+    soil_profiles = []
+    for name in soil_profile_names:
+        soil_profile = _field_values(SoilProfile, fake, {
+            'name': name,
+            'grundwasserStand': round(-fake.random.uniform(0.5, 5), 2),
+            'startKote': 0.0,
+        })
+        end_kote = 0.0
+        soil_profile['soil_layers'] = []
+        for row_index in range(size.layers):
+            end_kote -= fake.random.uniform(0.5, 3)
+            soil_profile['soil_layers'].append(_field_values(SoilLayer, fake, {
+                'row_index': row_index,
+                'endKote': round(end_kote, 2),
+                'bodenArt': fake.random_element(SOIL_TYPES),
+                'bodenSchichtColor': fake.hex_color()[1:].upper(),
+                'phi': round(fake.random.uniform(20, 40), 1),
+                'cuk': None,
+                'qc': None,
+            }))
+        soil_profiles.append(soil_profile)
+
+    piles = [
+        _field_values(Pile, fake, {
+            'row_index': row_index,
+            'Pname': f"P{row_index + 1}",
+            'BodenProfil': fake.random_element(soil_profile_names),
+            'PfahlTyp': fake.random_element(PILE_TYPES_SYMBOLS),
+            'Hochwert': round(fake.random.uniform(5000000, 5100000), 2),
+            'Rechtswert': round(fake.random.uniform(400000, 500000), 2),
+            'SollDurchmesser': round(fake.random.uniform(0.4, 1.5), 2),
+            'PfahlAchsAbstandxD': 3,
+        })
+        for row_index in range(size.piles)
+    ]
+
+    horizontal_loadcases = []
+    for index in range(size.load_cases):
+        h_load_case = _field_values(HorizontalLoadCase, fake, {'name': f"LF{index + 1}"})
+        h_load_case['horizontal_loads'] = [
+            _field_values(HorizontalLoadPile, fake, {'row_index': row_index, 'Pname': pile['Pname']})
+            for row_index, pile in enumerate(piles)
+        ]
+        horizontal_loadcases.append(h_load_case)
+
+    return {
+        'name': settings['name'],
+        'settings': settings,
+        'piles': piles,
+        'soil_profiles': soil_profiles,
+        'horizontal_loadcases': horizontal_loadcases,
+    }
+
+
+def write_workbook(xlsx_structure: dict) -> bytes:
+    """
+    The function writes the sheets of json_to_xlsx_structure into an Excel file.
+    """
+    import xlsxwriter
+
+    output = BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'in_memory': True, 'nan_inf_to_errors': True})
+    for sheet_name, rows in xlsx_structure.items():
+        sheet = workbook.add_worksheet(sheet_name)
+        if not rows:
+            continue
+        sheet.write_row(0, 0, list(rows[0].keys()))
+        for row_index, row in enumerate(rows, start=1):
+            sheet.write_row(row_index, 0, list(row.values()))
+    workbook.close()
+    return output.getvalue()
+
+
+def pipeline_stages(project: dict, user, company) -> list:
+    """
+    The function prepares the stages, the input of every stage
+    is the output of the pipeline before it.
+    """
+    xml_content = json_to_calculate_xml(project, user, company).encode('utf-8')
+    xml_json = xml_to_json(BytesIO(xml_content))
+    imported = restructure_json_data(XML_IMPORT_PLAN.apply_nested(xml_json))
+    xlsx_content = write_workbook(json_to_xlsx_structure(project))
+
+    return [
+        Stage('json_to_calculate_xml', lambda: (project, user, company), json_to_calculate_xml),
+        Stage('xml_to_json', lambda: (BytesIO(xml_content),), xml_to_json),
+        Stage(
+            'restructure_json_data', lambda: (xml_json,),
+            lambda data: restructure_json_data(XML_IMPORT_PLAN.apply_nested(data))
+        ),
+        Stage(
+            'unit_convert_import', lambda: (copy.deepcopy(imported),),
+            lambda data: input_xml_content_unit_convert(data, reversed=True)
+        ),
+        Stage(
+            'unit_convert_calculate', lambda: (copy.deepcopy(project),),
+            input_xml_content_unit_convert
+        ),
+        Stage('json_to_xlsx_structure', lambda: (project,), json_to_xlsx_structure),
+        Stage('xlsx_to_json', lambda: (BytesIO(xlsx_content),), xlsx_to_json),
+    ]
+
+
+def measure(stage: Stage, repeat: int = 3) -> dict:
+    """
+    The function measures the best time of repeat runs
+    and the peak memory of one traced run.
+    """
+    times = []
+    for _ in range(repeat):
+        args = stage.setup()
+        start = time.perf_counter()
+        stage.run(*args)
+        times.append(time.perf_counter() - start)
+
+    args = stage.setup()
+    tracemalloc.start()
+    try:
+        stage.run(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {'seconds': round(min(times), 6), 'peak_kib': round(peak / 1024, 1)}
+
+
+def run_benchmark(sizes: list, user, company, repeat: int = 3, seed: int = 0, on_stage=None) -> dict:
+    """
+    The function runs the pipeline stages for every size.
+
+    Attributes:
+        - sizes: list of ProjectSize
+        - user, company: calculating user and company (json_to_calculate_xml)
+        - repeat: timed runs per stage, the best one counts
+        - seed: Faker seed of the generated projects
+        - on_stage: called with (size, stage name, result) after each stage
+    Return: results as json object
+    """
+    runs = {}
+    for size in sizes:
+        project = generate_project(size, seed)
+        stages = {}
+        for stage in pipeline_stages(project, user, company):
+            stages[stage.name] = measure(stage, repeat)
+            if on_stage:
+                on_stage(size, stage.name, stages[stage.name])
+        runs[size.label] = {'size': size._asdict(), 'stages': stages}
+
+    return {
+        'created': now().isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'repeat': repeat,
+        'seed': seed,
+        'runs': runs,
+    }
+
+
+def compare_results(results: dict, baseline: dict, time_tolerance: float, memory_tolerance: float) -> list:
+    """
+    The function compares the results with a baseline, sizes and stages
+    missing in one of them are skipped.
+
+    Attributes:
+        - time_tolerance, memory_tolerance: allowed relative increase, 0.25 = 25 %
+    Return: list of regression messages, empty if none
+    """
+    regressions = []
+    for label, run in results['runs'].items():
+        baseline_run = baseline.get('runs', {}).get(label)
+        if not baseline_run:
+            continue
+        for name, result in run['stages'].items():
+            expected = baseline_run['stages'].get(name)
+            if not expected:
+                continue
+
+            seconds, baseline_seconds = result['seconds'], expected['seconds']
+            if (seconds > baseline_seconds * (1 + time_tolerance)
+                    and seconds - baseline_seconds > MIN_SECONDS_CHANGE):
+                regressions.append(
+                    f"{label} {name}: {seconds * 1000:.1f} ms, baseline {baseline_seconds * 1000:.1f} ms"
+                )
+
+            peak, baseline_peak = result['peak_kib'], expected['peak_kib']
+            if (peak > baseline_peak * (1 + memory_tolerance)
+                    and peak - baseline_peak > MIN_PEAK_KIB_CHANGE):
+                regressions.append(
+                    f"{label} {name}: peak {peak:.0f} KiB, baseline {baseline_peak:.0f} KiB"
+                )
+    return regressions
+
+
+def load_results(path: str) -> dict:
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_results(results: dict, path: str):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2)
+        file.write('\n')
@@ -0,0 +1,261 @@
+"""
+Versioned calculation results.
+
+A calculation doesn't write the input rows (Pile, SoilLayer,
+HorizontalLoadPile). Each calculation is a CalculationRun with the hash
+of its input, the DHPD server and its timings, the output is inserted
+into the result tables in bulk:
+
+    - PileResult: matched to the piles by Pname
+    - SoilLayerResult: by soil profile name and position in the profile
+    - HorizontalLoadResult: by load case name and position in the case
+
+The latest run of a project is its current result, a running or failed
+run has no output (a run failed with a Fehler of the calculation server
+neither), so the output of the project is empty until the run succeeded
+(as when the output was cleared before a calculation).
+join_latest_results adds it to the serialized project tables.
+
+Older runs are kept as history, prune_runs removes them by the
+CALCULATION_RUNS_KEEP and CALCULATION_RUNS_MAX_AGE_DAYS settings.
+"""
+import hashlib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils.timezone import now
+
+from companies.stats import calculation_finished
+from .dhpd_serializer.mapper import (
+    PILE_OUTPUT_MAP,
+    SOIL_LAYER_OUTPUT_MAP,
+    HORIZONTAL_LOAD_OUTPUT_MAP,
+)
+from .models import (
+    CalculationRun,
+    PileResult,
+    SoilLayerResult,
+    HorizontalLoadResult,
+)
+
+# Rows sent to the database in one INSERT statement.
+BATCH_SIZE = 1000
+
+
+def input_hash(xml_content: str) -> str:
+    """
+    The function returns the SHA-256 of the calculation XML, runs with
+    the same hash were calculated from the same input.
+    """
+    return hashlib.sha256(xml_content.encode('utf-8')).hexdigest()
+
+
+def start_run(project, user, dhpd_server: str, xml_content: str) -> CalculationRun:
+    """
+    The function starts a run, the output of the project is empty until
+    the run succeeded.
+    """
+    return CalculationRun.objects.create(
+        project=project,
+        created_by=user if user is not None and user.is_authenticated else None,
+        input_hash=input_hash(xml_content),
+        dhpd_server=dhpd_server or '',
+    )
+
+
+def fail_run(run: CalculationRun, error, proxy_ms: float = None) -> None:
+    """
+    The function marks a run as failed.
+
+    Attributes:
+        - run: the running CalculationRun
+        - error: message or list of errors (JSON)
+        - proxy_ms: milliseconds waited for the DHPD proxy, if it answered
+    """
+    run.status = CalculationRun.STATUS_FAILED
+    run.error = error
+    run.finished_date = now()
+    run.proxy_ms = proxy_ms
+    with transaction.atomic():
+        run.save(update_fields=['status', 'error', 'finished_date', 'proxy_ms'])
+        calculation_finished(run)
+
+
+def abort_run(run: CalculationRun, error) -> None:
+    """
+    The function marks a run as failed after an unexpected error, unless
+    it was already finished (e.g. by fail_run or store_output).
+    """
+    if CalculationRun.objects.filter(pk=run.pk, status=CalculationRun.STATUS_RUNNING).exists():
+        fail_run(run, error)
+
+
+def store_output(run: CalculationRun, output, proxy_ms: float = None) -> None:
+    """
+    The function inserts the typed calculation output of a run and
+    marks it as succeeded. If the calculation server reported an error
+    (Fehler) the run is marked as failed without output, the raw
+    response is kept by its snapshot. The old runs of the project are
+    pruned.
+
+    Attributes:
+        - run: the running CalculationRun
+        - output: CalculationOutput of DhpdSerializer.unserialize_output
+        - proxy_ms: milliseconds waited for the DHPD proxy
+    """
+    start = time.perf_counter()
+    with transaction.atomic():
+        if output.error_text is None:
+            PileResult.objects.bulk_create([
+                PileResult(run=run, Pname=name, **record._asdict())
+                for name, record in output.piles.items()
+                if name is not None
+            ], batch_size=BATCH_SIZE)
+            SoilLayerResult.objects.bulk_create([
+                SoilLayerResult(run=run, soil_profile=name, position=position, **record._asdict())
+                for name, records in output.soil_layers.items()
+                for position, record in enumerate(records)
+            ], batch_size=BATCH_SIZE)
+            HorizontalLoadResult.objects.bulk_create([
+                HorizontalLoadResult(run=run, case=name, position=position, **record._asdict())
+                for name, records in output.horizontal_loads.items()
+                for position, record in enumerate(records)
+            ], batch_size=BATCH_SIZE)
+
+        run.status = CalculationRun.STATUS_SUCCEEDED if output.error_text is None else CalculationRun.STATUS_FAILED
+        run.error = output.error_text
+        run.finished_date = now()
+        run.proxy_ms = proxy_ms
+        run.store_ms = (time.perf_counter() - start) * 1000
+        run.save(update_fields=['status', 'error', 'finished_date', 'proxy_ms', 'store_ms'])
+        calculation_finished(run)
+
+    prune_runs(project=run.project)
+
+
+def latest_results(project_id: int) -> tuple:
+    """
+    The function loads the output of the latest run of a project, in
+    one query per result table. A project without runs costs one query.
+
+    Return: ({Pname: {field: value}},
+             {(soil profile name, position): {field: value}},
+             {(load case name, position): {field: value}})
+    """
+    run_id = CalculationRun.objects.filter(project_id=project_id).order_by('-id').values_list('id', flat=True).first()
+    if run_id is None:
+        return {}, {}, {}
+
+    piles = {
+        row.pop('Pname'): row
+        for row in PileResult.objects.filter(run_id=run_id).values('Pname', *PILE_OUTPUT_MAP.fields)
+    }
+    soil_layers = {
+        (row.pop('soil_profile'), row.pop('position')): row
+        for row in SoilLayerResult.objects.filter(run_id=run_id).values(
+            'soil_profile', 'position', *SOIL_LAYER_OUTPUT_MAP.fields
+        )
+    }
+    h_loads = {
+        (row.pop('case'), row.pop('position')): row
+        for row in HorizontalLoadResult.objects.filter(run_id=run_id).values(
+            'case', 'position', *HORIZONTAL_LOAD_OUTPUT_MAP.fields
+        )
+    }
+    return piles, soil_layers, h_loads
+
+
+def join_latest_results(project, data: dict) -> dict:
+    """
+    The function adds the output of the latest run to the piles, soil
+    layers and horizontal loads of a serialized project, the output
+    fields are None for rows without output.
+
+    Attributes:
+        - project: Project model object
+        - data: representation with piles, soil_profiles and
+          horizontal_loadcases (ProjectDetailSerializer, ProjectTableSerializer)
+    """
+    piles, soil_layers, h_loads = latest_results(project.id)
+
+    empty = dict.fromkeys(PILE_OUTPUT_MAP.fields)
+    for pile in data.get('piles') or []:
+        pile.update(piles.get(pile.get('Pname'), empty))
+
+    empty = dict.fromkeys(SOIL_LAYER_OUTPUT_MAP.fields)
+    for soil_profile in data.get('soil_profiles') or []:
+        for position, soil_layer in enumerate(soil_profile.get('soil_layers') or []):
+            soil_layer.update(soil_layers.get((soil_profile.get('name'), position), empty))
+
+    empty = dict.fromkeys(HORIZONTAL_LOAD_OUTPUT_MAP.fields)
+    for h_load_case in data.get('horizontal_loadcases') or []:
+        for position, h_load in enumerate(h_load_case.get('horizontal_loads') or []):
+            h_load.update(h_loads.get((h_load_case.get('name'), position), empty))
+
+    return data
+
+
+def copy_latest_run(project, new_project) -> CalculationRun | None:
+    """
+    The function copies the latest run of a project with its output to
+    a copy of the project (see Project.copy_project).
+    """
+    run = CalculationRun.objects.filter(project=project).order_by('-id').first()
+    if run is None:
+        return None
+
+    with transaction.atomic():
+        results = {
+            model: list(model.objects.filter(run=run))
+            for model in (PileResult, SoilLayerResult, HorizontalLoadResult)
+        }
+        run.pk = None
+        run.project = new_project
+        run.save()
+        for model, rows in results.items():
+            for row in rows:
+                row.pk = None
+                row.run = run
+            model.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return run
+
+
+def prune_runs(project=None, keep: int = None, max_age_days: int = None) -> int:
+    """
+    The function deletes the runs which are not kept as history: all but
+    the newest `keep` runs of a project, and the runs older than
+    `max_age_days`. The latest run of a project is always kept.
+
+    Attributes:
+        - project: only prune this project, all projects if None
+        - keep: runs kept per project, default CALCULATION_RUNS_KEEP, 0
+          keeps any number of runs
+        - max_age_days: default CALCULATION_RUNS_MAX_AGE_DAYS, 0 keeps
+          the runs of any age
+
+    Return: number of deleted runs
+    """
+    keep = settings.CALCULATION_RUNS_KEEP if keep is None else keep
+    max_age_days = settings.CALCULATION_RUNS_MAX_AGE_DAYS if max_age_days is None else max_age_days
+
+    runs = CalculationRun.objects.all()
+    if project is not None:
+        runs = runs.filter(project=project)
+
+    newer_runs = CalculationRun.objects.filter(project_id=OuterRef('project_id')).order_by('-id').values('id')
+    outdated = CalculationRun.objects.none()
+    if keep:
+        # Older than the keep-th newest run of the project
+        outdated |= runs.filter(id__lt=Subquery(newer_runs[keep - 1:keep]))
+    if max_age_days:
+        outdated |= runs.filter(
+            started_date__lt=now() - timedelta(days=max_age_days),
+            id__lt=Subquery(newer_runs[:1]),
+        )
+
+    # The results are deleted by the database without being loaded
+    _total, deleted = CalculationRun.objects.filter(id__in=outdated.values('id')).delete()
+    return deleted.get(CalculationRun._meta.label, 0)
@@ -0,0 +1,110 @@
+"""
+Compressed snapshots of the raw DHPD proxy responses.
+
+The result tables only keep the fields of the *_OUTPUT_MAP mappings,
+the rest of xml_output_data (gruppenStatiken, Kosten, KostenOutput, ...)
+would need another calculation. Every response of the proxy is stored
+as it was received in a CalculationSnapshot of its run:
+
+    - compressed with the CALCULATION_SNAPSHOT_CODEC setting, gzip or
+      zstd (needs the zstandard package)
+    - with its size, compressed size and SHA-256 checksum
+    - iter_snapshot streams it decompressed in chunks, the response is
+      never held uncompressed in memory
+
+A snapshot is deleted with its run (prune_runs) or when it is older than
+CALCULATION_SNAPSHOTS_MAX_AGE_DAYS, the snapshot of the latest run of a
+project is always kept.
+"""
+import gzip
+import hashlib
+import io
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+from django.utils.timezone import now
+
+from .models import CalculationRun, CalculationSnapshot
+
+# Bytes of the decompressed response per streamed chunk
+CHUNK_SIZE = 64 * 1024
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+
+
+def compress(content: bytes, codec: str) -> bytes:
+    if codec == CalculationSnapshot.CODEC_ZSTD:
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(content)
+    return gzip.compress(content, compresslevel=GZIP_LEVEL)
+
+
+def _reader(data: bytes, codec: str):
+    if codec == CalculationSnapshot.CODEC_ZSTD:
+        import zstandard
+
+        return zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data))
+    return gzip.GzipFile(fileobj=io.BytesIO(data))
+
+
+def save_snapshot(run: CalculationRun, content: bytes) -> CalculationSnapshot:
+    """
+    The function stores the compressed response of the proxy for a run,
+    the outdated snapshots of the project are pruned.
+
+    Attributes:
+        - run: CalculationRun the proxy answered for
+        - content: body of the proxy response, as received
+    """
+    codec = settings.CALCULATION_SNAPSHOT_CODEC
+    data = compress(content, codec)
+    snapshot = CalculationSnapshot.objects.create(
+        run=run,
+        codec=codec,
+        data=data,
+        size=len(content),
+        compressed_size=len(data),
+        checksum=hashlib.sha256(content).hexdigest(),
+    )
+    prune_snapshots(project=run.project)
+    return snapshot
+
+
+def iter_snapshot(snapshot: CalculationSnapshot, chunk_size: int = CHUNK_SIZE):
+    """
+    The function yields the decompressed response of a snapshot in chunks.
+    """
+    with _reader(bytes(snapshot.data), snapshot.codec) as reader:
+        while chunk := reader.read(chunk_size):
+            yield chunk
+
+
+def prune_snapshots(project=None, max_age_days: int = None) -> int:
+    """
+    The function deletes the snapshots older than `max_age_days`, except
+    the snapshot of the latest run of a project. The runs are kept.
+
+    Attributes:
+        - project: only prune this project, all projects if None
+        - max_age_days: default CALCULATION_SNAPSHOTS_MAX_AGE_DAYS, 0
+          keeps the snapshots of any age
+
+    Return: number of deleted snapshots
+    """
+    max_age_days = settings.CALCULATION_SNAPSHOTS_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    if not max_age_days:
+        return 0
+
+    snapshots = CalculationSnapshot.objects.all()
+    if project is not None:
+        snapshots = snapshots.filter(run__project=project)
+
+    latest_run = CalculationRun.objects.filter(project_id=OuterRef('run__project_id')).order_by('-id').values('id')
+    deleted, _ = snapshots.filter(
+        created_date__lt=now() - timedelta(days=max_age_days),
+        run_id__lt=Subquery(latest_run[:1]),
+    ).delete()
+    return deleted
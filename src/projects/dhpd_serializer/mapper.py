@@ -1,181 +1,380 @@
-# from logging import Logger
-# from types import NoneType, FunctionType
-# from xmltodict import parse, unparse
-
-# class DhpdDataMap:
-#     '''Serializer class for DHPD specific object values. Handles both
-#     serialization and deserialization by using mapping lists as defined in the
-#     mapping module.
-
-#     When serializing data to XML, a preset XML template (as text) is expected,
-#     serializer will not create extra fields and will raise exception if any of
-#     the map fields are missing in the template.
-#     '''
-#     mapping = None  # List of tuples as described in mapping.py
-#     log = None  # Logger instance to emit warnings
-
-#     def __init__(self, mapping):
-#         self.mapping = mapping
-#         self.log = Logger('DhpdDataMap')
-
-#     def map(self, model):
-#         '''Map method expects dict-encoded Django model that matches mapping
-#         definition. It will emit xmltodict subtree to be used for XML
-#         generation.
-
-#         This function assumes all default/fallback values are already
-#         substituted!
-#         '''
-
-#         out_data = {}
-
-#         for key, value in self.mapping.items():
-#             # Let's trust type defined in the model and ignore that step
-#             model_type, xml_type, null_value, transform = value
-
-#             # Special case: there are some hardcoded objects which we do not
-#             # store in our model but need to pass into XML. Use None type for
-#             # the model to determine that.
-#             if model_type is None:
-#                 self.log.info(
-#                     f'Skipping encoding of field {key}. '
-#                     'Will encode hardcoded value {null_value}')
-#                 out_data[key] = null_value
-
-#             if xml_type is None:
-#                 raise NotImplementedError(
-#                     f'Unable to encode field {key}. Unknown XML type.')
-
-#             # We do not expect container data for a serialized model, so noop
-
-#             # Forbid serializing null values unless something better than
-#             # None is specified
-#             if model[key] is None and null_value is None:
-#                 raise ValueError(f'No rule to cast None to XML node for {key}')
-
-#             # Explicitly set null value as instructed and skip processing
-#             if model[key] is None:
-#                 out_data[key] = null_value
-#                 continue
-
-#             # Now, transform model data for XML output
-#             # dicts are used for enums other 1:1 data mappings
-#             if isinstance(transform, dict):
-#                 in_data = transform[model[key]]
-
-#             # Numbers are used for simple linear mathematic conversions.
-#             elif isinstance(transform, float):
-#                 in_data = model[key] * transform
-
-#             # Functions are used for complex conversion logic, seconf arg tells
-#             # is we are mapping value to XML or unmapping it back to model.
-#             elif isinstance(transform, FunctionType):
-#                 in_data = transform(model[key], True)
-
-#             # Do nothing for None
-#             elif isinstance(transform, NoneType):
-#                 in_data = model[key]
-
-#             else:
-#                 raise ValueError('Unexpected transform object: {transform}')
-
-#             out_data[key] = xml_type(in_data)
-
-#         return out_data
-
-
-
-#     def unmap(self, tree):
-#         '''Unmap method expects xmltodict subtree with mapped items inside
-#         the root element. It will produce python dictionary with normalized
-#         data as per specified rules.
-
-#         This assumes XML contains all of the required fields!
-#         '''
-#         out_data = {}
-
-#         for key, value in self.mapping.items():
-#             # Retrieve map values from external definitions
-#             model_type, xml_type, null_value, transform = value
-
-#             # Special case, if model type is undefined, do not store this value
-#             # at all. When mapping the value from null_value column will be
-#             # directly encoded into XML.
-#             if model_type is None:
-#                 self.log.warning(
-#                     f'Skipping decoding of field {key}. '
-#                     f'Will hardcode {null_value} when serializing.')
-#                 continue
-
-#             # Emit warning on unknown XML object type
-#             if xml_type is None:
-#                 raise NotImplementedError(
-#                     f'Got known XML element with unknown type. '
-#                     f'Data: {key}: {tree[key]}')
-#                 continue
-
-#             # And on NoneType, unless we expect that
-#             if xml_type is not None and isinstance(tree[key], NoneType):
-#                 raise ValueError('Null value is not expected for input data.')
-
-#             # If our transform object is a dict, inverse it now.
-#             if isinstance(transform, dict):
-#                 transform = {v: k for k, v in transform.items()}
-
-#             # First, serialize into known data type from XML, except for None,
-#             # None is taken directly to be transformed later, if possible
-#             if not isinstance(tree[key], NoneType):
-#                 in_data = xml_type(tree[key])
-#             else:
-#                 in_data = None
-
-#             # Now, transform input data for model
-#             # dicts are used to map XML-specific string into model-specific enum
-#             # We inversed dict before, so no need to do it now.
-#             if isinstance(transform, dict):
-#                 in_data = transform[in_data]
-
-#             # Numbers are used for simple mathematic conversions. We calculate
-#             # reverse value of the function for unmap method
-#             elif isinstance(transform, float):
-#                 in_data = in_data / transform
-
-#             # Functions are used for complex conversion logic, second arg tells
-#             # is we are mapping value to XML or unmapping it back to model.
-#             elif isinstance(transform, FunctionType):
-#                 in_data = transform(tree[key], False)
-
-#             # Do nothing for None
-#             elif isinstance(transform, NoneType):
-#                 in_data = tree[key]
-
-#             else:
-#                 raise NotImplemented('Unexpected transform method: {transform}')
-
-#             # Finally, cast and store output
-#             out_data[key] = model_type(in_data)
-
-#         return out_data
-
-
-# class DhpdSerializer:
-#     ''' Class to handle serialization and deserialization of XML documents used
-#     within DHPD-Webclient application.
-
-#     Following cases are supported:
-#     1. Unserialize Input XML (as string) into xmltodict dictionary
-#     2. Serialize Input data into XML from xmltodict dictionary
-#     3. Unserialize Output XML (as string) into xmltodict dictionary
-#     '''
-
-#     @staticmethod
-#     def unserialize_input(xml):
-#         pass
-
-#     @staticmethod
-#     def serialize_input(data):
-#         pass
-
-#     @staticmethod
-#     def unserialize_output(xml):
-#         pass
+from math import isnan
+from typing import NamedTuple, Optional
+
+import xmltodict
+
+from ..mapping import (
+    PROJECT_SETTING_KEYS_MAPPING,
+    PILE_INPUT_KEYS_MAPPING,
+    PILE_OUTPUT_KEYS_MAPPING,
+    SOIL_LAYER_INPUT_KEYS_MAPPING,
+    SOIL_LAYER_OUTPUT_KEYS_MAPPING,
+    HORIZONTAL_LOAD_POINT_INPUT_KEYS_MAPPING,
+    HORIZONTAL_LOAD_POINT_OUTPUT_KEYS_MAPPING,
+)
+from .mapping import (
+    DRIVEN_PILE_TYPES_SYMBOLS,
+    PROJECT_SETTINGS,
+    SOIL_PROFILE_INPUT,
+    SOIL_PROFILE_INPUT_KEYS,
+    SOIL_LAYER_INPUT,
+    SOIL_LAYER_OUTPUT,
+    LOAD_POINT_INPUT,
+    LOAD_POINT_OUTPUT,
+    HORIZONTAL_LOAD_CASE_INPUT,
+    HORIZONTAL_LOAD_CASE_INPUT_KEYS,
+    HORIZONTAL_LOAD_POINT_INPUT,
+    HORIZONTAL_LOAD_POINT_OUTPUT,
+)
+
+XML_NAMESPACE = "http://schemas.datacontract.org/2004/07/DHPD"
+XML_SCHEMA_INSTANCE_NAMESPACE = "http://www.w3.org/2001/XMLSchema-instance"
+
+# Output values are stored with 2 decimal digits.
+OUTPUT_DECIMAL_DIGITS = 2
+
+
+def _xml_float(value):
+    value = float(value)
+    # .NET writes and reads not a number as 'NaN'
+    return 'NaN' if isnan(value) else value
+
+
+def _parse_float(text: str):
+    value = float(text)
+    return None if isnan(value) else value
+
+
+def _parse_int(text: str) -> int:
+    return int(float(text))
+
+
+def _parse_bool(text: str) -> bool:
+    if text in ('true', 'True', '1'):
+        return True
+    if text in ('false', 'False', '0'):
+        return False
+    raise ValueError(f'Unexpected boolean value: {text}')
+
+
+# Cast of a converted value into the XML value
+XML_CASTS = {
+    float: _xml_float,
+}
+
+# Parser of an XML text into the XML type
+XML_PARSERS = {
+    float: _parse_float,
+    int: _parse_int,
+    bool: _parse_bool,
+}
+
+
+def _keep(value):
+    return value
+
+
+def _compile_encoder(key, model_type, xml_type, null_value, transform):
+    """
+    Build the function encoding one model value into its XML value.
+    """
+    # Hardcoded objects which we do not store in our model
+    if model_type is None:
+        return lambda _value: null_value
+
+    if xml_type is None:
+        raise NotImplementedError(f'Unable to encode field {key}. Unknown XML type.')
+
+    # Containers are encoded separately
+    cast = _keep if xml_type is dict else XML_CASTS.get(xml_type, xml_type)
+
+    if transform is None:
+        convert = cast
+    elif isinstance(transform, dict):
+        convert = lambda value: cast(transform[value])
+    elif isinstance(transform, float):
+        convert = lambda value: cast(float(value) * transform)
+    elif callable(transform):
+        convert = lambda value: cast(transform(value, True))
+    else:
+        raise ValueError(f'Unexpected transform object: {transform}')
+
+    def encode(value):
+        # Explicitly set null value as instructed and skip processing
+        if value is None:
+            return null_value
+        return convert(value)
+
+    return encode
+
+
+def _compile_decoder(key, model_type, xml_type, transform, digits):
+    """
+    Build the function decoding one XML text into its model value.
+    Empty, nil and NaN values and values which can't be parsed are None.
+    """
+    if xml_type is None or xml_type is dict:
+        raise NotImplementedError(f'Unable to decode field {key}. Unknown XML type.')
+
+    parse = XML_PARSERS.get(xml_type, xml_type)
+
+    if transform is None:
+        convert = _keep
+    elif isinstance(transform, dict):
+        # Inverse the dict to map XML-specific values back to the model
+        inverse = {v: k for k, v in transform.items()}
+        convert = inverse.__getitem__
+    elif isinstance(transform, float):
+        convert = lambda value: value / transform
+    elif callable(transform):
+        convert = lambda value: transform(value, False)
+    else:
+        raise ValueError(f'Unexpected transform object: {transform}')
+
+    round_value = digits is not None and model_type is float
+
+    def decode(text):
+        # Empty elements are None, nil elements ({'@i:nil': 'true'}) a dict
+        if text is None or isinstance(text, dict):
+            return None
+        try:
+            value = parse(text)
+            if value is None:
+                return None
+            value = model_type(convert(value))
+        except (TypeError, ValueError, KeyError):
+            return None
+        if round_value:
+            value = round(value, digits)
+        return value
+
+    return decode
+
+
+class DhpdDataMap:
+    '''Codec of one DHPD entity (project settings, pile, soil layer, ...).
+
+    The mapping is compiled once into one encoder and one decoder function
+    per XML element, so encoding a row is a single pass over the elements
+    without looking at the mapping rules again.
+
+    Attributes:
+        - mapping (dict): map of the entity as described in mapping.py
+        - keys (dict): model field name -> XML element name
+        - name (str): name of the typed record returned by decode
+        - digits (int): decoded floats are rounded to these digits
+    '''
+    def __init__(self, mapping: dict, keys: dict, name: str = 'DhpdRecord', digits: int = None):
+        self.mapping = mapping
+        model_names = {xml_key: model_key for model_key, xml_key in keys.items()}
+
+        self._encoders = tuple(
+            (xml_key, model_names.get(xml_key), _compile_encoder(xml_key, *value))
+            for xml_key, value in mapping.items()
+        )
+
+        # Fields without model type are not decoded
+        decoded = [
+            (xml_key, model_names[xml_key], model_type, xml_type, transform)
+            for xml_key, (model_type, xml_type, _null_value, transform) in mapping.items()
+            if model_type is not None and xml_type is not dict
+        ]
+        self._decoders = tuple(
+            (xml_key, _compile_decoder(xml_key, model_type, xml_type, transform, digits))
+            for xml_key, _model_key, model_type, xml_type, transform in decoded
+        )
+        self.record = NamedTuple(name, [
+            (model_key, Optional[model_type])
+            for _xml_key, model_key, model_type, _xml_type, _transform in decoded
+        ])
+
+    @property
+    def fields(self) -> tuple:
+        """
+        Model field names of the decoded record.
+        """
+        return self.record._fields
+
+    def map(self, model: dict) -> dict:
+        '''Map dict-encoded Django model to the xmltodict subtree of the
+        entity, the elements are in the order of the mapping.
+        '''
+        return {
+            xml_key: encode(model.get(model_key))
+            for xml_key, model_key, encode in self._encoders
+        }
+
+    def map_many(self, models: list) -> list:
+        return [self.map(model) for model in models]
+
+    def unmap(self, tree: dict):
+        '''Unmap xmltodict subtree of the entity into the typed record,
+        missing elements are None.
+        '''
+        return self.record._make(
+            decode(tree.get(xml_key)) for xml_key, decode in self._decoders
+        )
+
+
+SETTINGS_MAP = DhpdDataMap(PROJECT_SETTINGS, PROJECT_SETTING_KEYS_MAPPING)
+PILE_INPUT_MAP = DhpdDataMap(LOAD_POINT_INPUT, PILE_INPUT_KEYS_MAPPING)
+SOIL_PROFILE_INPUT_MAP = DhpdDataMap(SOIL_PROFILE_INPUT, SOIL_PROFILE_INPUT_KEYS)
+SOIL_LAYER_INPUT_MAP = DhpdDataMap(SOIL_LAYER_INPUT, SOIL_LAYER_INPUT_KEYS_MAPPING)
+HORIZONTAL_LOAD_CASE_INPUT_MAP = DhpdDataMap(HORIZONTAL_LOAD_CASE_INPUT, HORIZONTAL_LOAD_CASE_INPUT_KEYS)
+HORIZONTAL_LOAD_INPUT_MAP = DhpdDataMap(HORIZONTAL_LOAD_POINT_INPUT, HORIZONTAL_LOAD_POINT_INPUT_KEYS_MAPPING)
+
+PILE_OUTPUT_MAP = DhpdDataMap(
+    LOAD_POINT_OUTPUT, PILE_OUTPUT_KEYS_MAPPING, 'PileOutput', OUTPUT_DECIMAL_DIGITS
+)
+SOIL_LAYER_OUTPUT_MAP = DhpdDataMap(
+    SOIL_LAYER_OUTPUT, SOIL_LAYER_OUTPUT_KEYS_MAPPING, 'SoilLayerOutput', OUTPUT_DECIMAL_DIGITS
+)
+HORIZONTAL_LOAD_OUTPUT_MAP = DhpdDataMap(
+    HORIZONTAL_LOAD_POINT_OUTPUT, HORIZONTAL_LOAD_POINT_OUTPUT_KEYS_MAPPING, 'HorizontalLoadOutput'
+)
+
+
+class CalculationOutput(NamedTuple):
+    """
+    Typed result of a calculation.
+
+    Attributes:
+        - piles: {Pname: PileOutput}
+        - soil_layers: {soil profile name: [SoilLayerOutput, ...]} in layer order
+        - horizontal_loads: {load case name: [HorizontalLoadOutput, ...]} in row order
+        - error_text: message of the calculation server or None
+    """
+    piles: dict
+    soil_layers: dict
+    horizontal_loads: dict
+    error_text: Optional[str]
+
+
+def _as_list(value) -> list:
+    # DHPD-Web tool unpacks singular items from list into dict.
+    if value is None:
+        return []
+    return [value] if isinstance(value, dict) else value
+
+
+def _path(tree, *keys):
+    for key in keys:
+        if not isinstance(tree, dict):
+            return None
+        tree = tree.get(key)
+    return tree
+
+
+def _driven_soil_profiles(piles: list) -> set:
+    return {
+        pile.get('BodenProfil') for pile in piles
+        if pile.get('PfahlTyp') in DRIVEN_PILE_TYPES_SYMBOLS
+    }
+
+
+class DhpdSerializer:
+    ''' Class to handle serialization and deserialization of XML documents used
+    within DHPD-Webclient application.
+
+    Following cases are supported:
+    1. Serialize Input data into XML from the project calculate serializer data
+    2. Unserialize Output XML (as string or xmltodict dictionary) into typed
+       row records
+    '''
+
+    @staticmethod
+    def serialize_input(data: dict, credentials: dict, user_info: dict, customer_info: dict) -> str:
+        '''
+        Attributes:
+            - data: ProjectDetailCalculateSerializer data
+            - credentials: userMailAddress, userKey and userKeyHorizontal
+            - user_info, customer_info: _userInfo and _customerInfo elements
+        Return: calculation XML content
+        '''
+        piles = data.get('piles', [])
+        driven_soil_profiles = _driven_soil_profiles(piles)
+
+        soil_profiles = []
+        for soil_profile in data.get('soil_profiles', []):
+            soil_layers = soil_profile.get('soil_layers', [])
+            # Soil profiles used by driven piles need qskStern instead of qsk
+            if driven_soil_profiles:
+                if soil_profile.get('name') in driven_soil_profiles:
+                    soil_layers = [
+                        {**soil_layer, 'qskStern': soil_layer.get('qsk'), 'qsk': 0}
+                        for soil_layer in soil_layers
+                    ]
+                else:
+                    soil_layers = [{**soil_layer, 'qskStern': 0} for soil_layer in soil_layers]
+
+            soil_profiles.append(SOIL_PROFILE_INPUT_MAP.map({
+                **soil_profile,
+                'soil_layers': {'BodenSchichtDaten': SOIL_LAYER_INPUT_MAP.map_many(soil_layers)},
+            }))
+
+        horizontal_loadcases = [
+            HORIZONTAL_LOAD_CASE_INPUT_MAP.map({
+                **h_load_case,
+                'horizontal_loads': {
+                    'HLastPunktInput': HORIZONTAL_LOAD_INPUT_MAP.map_many(
+                        h_load_case.get('horizontal_loads', [])
+                    )
+                },
+            })
+            for h_load_case in data.get('horizontal_loadcases', [])
+        ]
+
+        document = {
+            '@xmlns': XML_NAMESPACE,
+            '@xmlns:i': XML_SCHEMA_INSTANCE_NAMESPACE,
+            'projektInfo': SETTINGS_MAP.map(data.get('settings') or {}),
+            **credentials,
+            'boden': {'alleBodenProfile': {'BodenProfilDaten': soil_profiles}},
+            'pfaehle': {'LastPunktInputList': {'LastPunktInput': PILE_INPUT_MAP.map_many(piles)}},
+            'hLasten': {'hTabellen': {'HLastInputTabelle': horizontal_loadcases}},
+            '_userInfo': user_info,
+            '_customerInfo': customer_info,
+        }
+        return xmltodict.unparse({'InputDaten': document}, pretty=True)
+
+    @staticmethod
+    def unserialize_output(output) -> CalculationOutput:
+        '''
+        Attributes:
+            - output: output XML as string or the OutputDaten dict
+              of the DHPD proxy response
+        Return: CalculationOutput
+        '''
+        if isinstance(output, (str, bytes)):
+            output = xmltodict.parse(output)['OutputDaten']
+
+        piles = {}
+        for pile in _as_list(_path(output, 'pfaehle', 'LastPunktOutputList', 'LastPunktOutput')):
+            piles[pile.get('_Pname')] = PILE_OUTPUT_MAP.unmap(pile)
+
+        soil_layers = {}
+        for item in _as_list(_path(
+            output, 'BodenNutzung', 'BodenNutzungDict', 'a:KeyValueOfstringBodenNutzungOutputDB_PsWP3v'
+        )):
+            soil_layers[item.get('a:Key')] = [
+                SOIL_LAYER_OUTPUT_MAP.unmap(soil_layer)
+                for soil_layer in _as_list(_path(item, 'a:Value', '_schichten', 'BodenSchichtNutzung'))
+            ]
+
+        horizontal_loads = {}
+        for item in _as_list(_path(
+            output, 'hLasten', 'LastPunktOutputDict', 'a:KeyValueOfstringArrayOfHLastPunktHorOutputDB_PsWP3v'
+        )):
+            horizontal_loads[item.get('a:Key')] = [
+                HORIZONTAL_LOAD_OUTPUT_MAP.unmap(h_load)
+                for h_load in _as_list(_path(item, 'a:Value', 'HLastPunktHorOutput'))
+            ]
+
+        # Empty _fehlerText becomes a dict, an error message a string
+        error_text = output.get('_fehlerText') if isinstance(output, dict) else None
+        return CalculationOutput(
+            piles=piles,
+            soil_layers=soil_layers,
+            horizontal_loads=horizontal_loads,
+            error_text=error_text if isinstance(error_text, str) else None,
+        )
@@ -90,9 +90,11 @@ format:
        Specifying "None" in this column changes behavior: NULL Field value is
        always encoded into XML as-is, when unmapping to model, the field is
        never deserialized and is ignored.
-    3. Type of data in the XML document
-    3. NULL Field value (raises exception if set None and)
-    4. Unit converion for encoding element. Can be one of these:
+    3. Type of data in the XML document. dict marks a container element,
+       its content is encoded separately and passed as-is.
+    4. NULL Field value, written to the XML when the model value is None.
+       None leaves the XML element empty.
+    5. Unit converion for encoding element. Can be one of these:
        * Float number. Value will be multiplied by this factor when converting
          to XML and divided when reading from XML.
        * None: Skip conversion
@@ -105,67 +107,74 @@ format:
     casting the xml type, again. In some cases just type casting is enough
     to get the proper data type (e.g. boolean to int), but for more complex
     cases conversion is here to make sure type casting at the end is successful.
+
+    The element order of the input maps is the order of the calculation XML.
+    The model field names are taken from the key mappings in projects/mapping.py.
 '''
 
 PROJECT_SETTINGS = {
     #                            Model,   XML, Null, Converter
     '_ProjektName':               (str,   str, None, None),
     '_runHorBemessung':          (bool,  bool, None, None),
-    # This one says "Rad" but actually stores value in degrees.
-    # Change to pi/180 when webclient is updated for this.
-    '_AbtreppungsWinkelRad':    (float, float, None, None),
+    # The model stores degrees, the calculation expects radians.
+    '_AbtreppungsWinkelRad':    (float, float, None, pi/180),
     '_AchsabstandGleicherTiefe':(float, float, None, None),
     '_AuslastungProzent':       (float, float, None, None),
     '_Beeinflussungsweite':     (float, float, None, None),
     '_EAErhoehungProzent':      (float, float, None, None),
     '_Exzentrizitaet':          (float, float, None, None),
     # Ohne=0, AA=1, RR=2; defined in the Model
-    # Consider adding direct mapper to the model record id
     '_FuszBeeinfluszung':         (int,   int, None, None),
     '_FuszErhoehungProzent':    (float, float, None, None),
-    # Hardcoded as per-PO request
-    '_Knicklaenge':              (None, float, 0.0,  None),
     '_MantelErhoehungProzent':  (float, float, None, None),
     '_MindestEinbindung':       (float, float, None, None),
     '_MindestPfahllaenge':      (float, float, None, None),
-    # 1054=0, EAP=1; hardcoded as per-request
-    '_Norm':                     (None,   int, 1,    None),
-    # TODO: This is supposed to be ≥ 1.0 for cheap version of the software
+    # Stored in 0-100 range, 0-1 is expected
+    '_MvonMaxfuerSchub':        (float, float, None, 0.01),
+    # 1054=0, EAP=1
+    '_Norm':                      (int,   int, None, None),
     '_Schrittweite':            (float, float, None, None),
     '_SpitzendruckMittelung':    (bool,  bool, None, None),
     '_WinkelAusProfilen':        (bool,  bool, None, None),
+    '_bemesseHorizontal':        (bool,  bool, None, None),
     '_gammaDruck':              (float, float, None, None),
     '_gammaStaendig':           (float, float, None, None),
     '_gammaVeraenderlich':      (float, float, None, None),
     '_gammaZug':                (float, float, None, None),
     '_gegenRaeumlichenEP':       (bool,  bool, None, None),
     '_ksNichtReduzieren':        (bool,  bool, None, None),
+    '_qbkCukAb0':                (bool,  bool, None, None),
+    '_qbkQcAb0':                 (bool,  bool, None, None),
+    '_qskCukAb0':                (bool,  bool, None, None),
+    '_qskQcAb0':                 (bool,  bool, None, None),
     # All=0, qc und cu=1, Nein=2; defined in the Model
-    # Consider adding direct mapper to the model record id
     '_useErhoehung':              (int,   int, None, None),
     '_zulaessigeSetzungCm':     (float, float, None, None),
     # 'C25/30'=25, 'C30/37'=30, 'C35/40'=35; defined in the Model
-    # Consider adding direct mapper to the model record id
     '_BetonZyl':                  (int,   int, None, None),
+    # These fields are shown in mm but stored in m in XML
+    '_Betondeckung':            (float, float, None, 0.001),
     '_KopfEinbindung':          (float, float, None, None),
-    # FIXME: Unknown value, hardcoded for now
-    '_MaxLaenge':                (None,  None, 100,  None),
-    # Extra from testAxel.xml file. Store empty string for null in XML
+    '_MaxBuegel':               (float, float, None, 0.001),
+    '_MaxLaenge':                 (int,   int, None, None),
+    '_MaxLaengs':               (float, float, None, 0.001),
+    '_MinLaengsAbstand':        (float, float, None, 0.001),
+    '_MindestEindringung':      (float, float, None, None),
+    '_Stahlsorte':                (str,   str, None, None),
+    # Short name from PILE_TYPES
+    '_StandardPfahlTyp':          (str,   str, 'bp', None),
+    # Store empty string for null in XML
     '_projektLocation':           (str,   str, '',   None),
-    '_projektPostalCode':         (str,   str, '',   None),
     '_projektStreet':             (str,   str, '',   None),
-    '_companyAltEmail':           (str,   str, '',   None),
-    # Deprecated, don't set
-    '_companyAltFax':            (None,   str, '',   None),
-    '_companyAltLocation':        (str,   str, '',   None),
+    '_projektPostalCode':         (str,   str, '',   None),
     '_companyAltName':            (str,   str, '',   None),
-    '_companyAltPhone':           (str,   str, '',   None),
-    '_companyAltPostalCode':      (str,   str, '',   None),
+    '_companyAltLocation':        (str,   str, '',   None),
     '_companyAltStreet':          (str,   str, '',   None),
-    # Workaround: Pass image data encoded as base64 to decode it in dhpd-proxy
-    '_companyAltLogo':          (bytes,   str, None, binary_mapper),
-    '_nameAnlageAuszen':          (str,   str, None, None),
-    '_seitenBezeichnung':         (str,   str, None, None),
+    '_companyAltPostalCode':      (str,   str, '',   None),
+    # Path of the logo on the calculation server
+    '_companyAltLogo':            (str,   str, '',   None),
+    '_nameAnlageAuszen':          (str,   str, '',   None),
+    '_seitenBezeichnung':         (str,   str, '',   None),
     '_seitenStartNummer':         (int,   int, None, None),
     '_SeiteVonSeiten':           (bool,   int, None, None),
     '_erstelleUebersichtAuszen': (bool,   int, None, None),
@@ -175,17 +184,16 @@ PROJECT_SETTINGS = {
     '_UKKotenInTabelle':         (bool,   int, None, None),
     '_erstellegrafikAuszen':     (bool,   int, None, None),
     '_erstellegrafikInnen':      (bool,   int, None, None),
-
 }
 
 
 SOIL_PROFILE_INPUT = {
     '_profilName':                 (str,  str, None, None),
     # key from PILE_TYPES dictionary
-    '_PfahlTyp':                    (int, int, None, None),
+    '_pfahlTyp':                    (int, int, 4,    None),
     '_grundwasserStand':        (float, float, None, None),
     '_startKote':               (float, float, None, None),
-    # Dict is to be passed as-is, don't bother with recursion here
+    # Encoded soil layers, passed as-is
     'alleBodenSchichten':        (dict,  dict, None, None),
 }
 
@@ -200,36 +208,40 @@ SOIL_PROFILE_OUTPUT = {
 
 SOIL_LAYER_INPUT = {
     '_endKote':                 (float, float, None, None),
-    '_bodenArt':                  (str,   str, None, None),
+    '_bodenArt':                  (str,   str, '',   None),
     # These fields are stored as kilo- in XML but shown as mega- units
-    '_ESoben':                  (float, float, None, 1000.0),
-    '_ESunten':                 (float, float, None, 1000.0),
-    '_FuszAbsetzbar':            (bool,   int, None, None),
-    '_IstEindringRelevant':      (bool,   int, None, None),
-    # Hardcoded as per PO request.
-    '_MaxElementWeite':          (None, float, 0.1,  100.0),
-    '_cuEP':                    (float, float, None, None),
-    '_cuk':                     (float, float, 0,    None),
-    '_deltaVonPhi':             (float, float, None, None),
-    '_gammaBoden':              (float, float, None, None),
-    '_gammaStrichBoden':        (float, float, None, None),
+    '_ESoben':                  (float, float, 0.0,  1000.0),
+    '_ESunten':                 (float, float, 0.0,  1000.0),
+    '_FuszAbsetzbar':            (bool,  bool, False, None),
+    '_IstEindringRelevant':      (bool,  bool, False, None),
+    # Shown in cm, stored in m
+    '_MaxElementWeite':         (float, float, 0.001, 0.01),
+    '_cuEP':                    (float, float, 0.0,  None),
+    '_cuk':                     (float, float, 'NaN', None),
+    '_deltaVonPhi':             (float, float, 0.67, None),
+    '_gammaBoden':              (float, float, 19.0, None),
+    '_gammaStrichBoden':        (float, float, 19.0, None),
     # UI shows degrees, but we need to store radians
-    '_phi':                     (float, float, 0,    pi/180),
+    '_phi':                     (float, float, 0.0,  pi/180),
     # These values can be empty. Serialize empty as 0
-    '_qbk002':                  (float, float, 0,    1000.0),
-    '_qbk003':                  (float, float, 0,    1000.0),
-    '_qbk01':                   (float, float, 0,    1000.0),
-    '_qc':                      (float, float, 0,    None),
-    '_qsk':                     (float, float, 0,    1000.0),
-    # Custom value converter from RRGGBBAA to AARRGGBB
-    '_bodenSchichtColor':         (str,   str, None, color_mapper),
+    '_qbk002':                  (float, float, 0.0,  1000.0),
+    '_qbk003':                  (float, float, 0.0,  1000.0),
+    '_qbk01':                   (float, float, 0.0,  1000.0),
+    '_qc':                      (float, float, 'NaN', None),
+    '_qsk':                     (float, float, 0.0,  1000.0),
+    # qsk of the soil profiles used by driven piles
+    '_qskStern':                (float, float, 0.0,  1000.0),
+    # Already in AARRGGBB format, see SoilLayerCalculateSerializer
+    '_bodenSchichtColor':         (str,   str, 'FFD8D8D8', None),
+    '_tauNk':                   (float, float, 0.0,  None),
+    '_qskZug':                  (float, float, 0.0,  None),
 }
 
 
 SOIL_LAYER_OUTPUT = {
     # Is this value even supposed to go to the soil layer? Seems to be buggy.
     # First layer outputs 'Borderpfahl', but from second and on it is '"' char
-    '_Pfahltyp':                 (None,   str, None, None),  # Unknown
+    '_Pfahltyp':                  (str,   str, None, None),
     # The conversion value might look confusing. But we normally READ the data,
     # which means we are going to UNMAP, thus divide by this factor.
     '_usedQsk':                 (float, float, None, 1000.0),
@@ -243,32 +255,28 @@ LOAD_POINT_INPUT = {
     '_Pname'                              : (str,    str, None, None),
     '_AEHoehe'                            : (float, float, None, None),
     '_AlternativeCharakteristischeLastZ'  : (float, float, None, None),
-    'AlternativeCharakteristischeMinLastZ': (float, float, None, None),
+    '_AlternativeCharakteristischeMinLastZ': (float, float, 0.0, None),
     '_AlternativeDesignLastZ'             : (float, float, None, None),
-    'AlternativeDesignMinLastZ'           : (float, float, None, None),
-    # Hidden in the application, actual type and enum is unknown
-    '_BetonZyl': (None,    int, 25,   None), # Unknown
+    '_AlternativeDesignMinLastZ'          : (float, float, 0.0,  None),
+    '_BetonZyl'          : (int,      int, 25,   None),
     # Consider adding direct mapper to the model record id
-    '_BodenProfil'       : (str,    str, None, None),
+    '_BodenProfil'       : (str,      str, None, None),
     '_Hochwert'          : (float, float, None, None),
     '_PfahlAchsAbstandxD': (float, float, 3.0,  None),
-    '_PfahlAnzahl'       : (float, float, 1,    None),
-    # Consider adding direct mapper to the model record id
-    # WARNING    : Shorthands detected from investigation
-      '_PfahlTyp': (int,    str, 'bp', {k: v[0] for k, v
-                                                      in PILE_TYPES.items()}),
+    '_PfahlAnzahl'       : (int,      int, 1,    None),
+    # Short name from PILE_TYPES
+    '_PfahlTyp'          : (str,      str, 'bp', None),
     '_Rechtswert'        : (float, float, None, None),
     '_SollDurchmesser'   : (float, float, None, None),
     '_SollPfahlOberKante': (float, float, None, None),
-    # Following 4 values are taken from export file, their purpose is unknown
-    '_einzelAusnutzung'         : (None, float, 1.0,  None), # Unknown
-    '_einzelExzentrizitaet'     : (None, float, 0.1,  None), # Unknown
-    '_einzelKnickLaenge'        : (None, float, 0.0,  None), # Unknown
-    '_einzelMaximaleBohrtiefe'  : (None, float, 100.0,None), # Unknown
-    '_einzelMindestEindringung' : (float, float, 0.0,None),
-    '_einzelzulaessigeSetzungCm': (float, float, 0.0,None),
+    '_einzelAusnutzung'         : (int,     int, 1,     None),
+    '_einzelExzentrizitaet'     : (float, float, 0.1,   None),
+    '_einzelKnickLaenge'        : (int,     int, 0,     None),
+    '_einzelMaximaleBohrtiefe'  : (int,     int, 100,   None),
+    '_einzelMindestEindringung' : (float, float, 2.5,   None),
+    '_einzelzulaessigeSetzungCm': (float, float, 0.0,   None),
     # Should be stored in 0-100 range, 0-1 is expected, though
-    '_prozentualerMantelAnteil': (float, float, 1.0, 0.01),
+    '_prozentualerMantelAnteil' : (float, float, 1.0,   0.01),
 }
 
 
@@ -278,7 +286,7 @@ LOAD_POINT_OUTPUT = {
     '_Federsteifigkeit':        (float, float, None, None),
     '_MinFedersteifigkeit':      (None, float, None, None),  # Unknown
     '_MinSetzung':               (None, float, None, None),  # Unknown
-    '_Nachweisgruppe':            (int,   int, None, None),
+    '_Nachweisgruppe':          (float, float, None, None),
     '_R_d':                     (float, float, None, None),
     '_R_d_Min':                 (float, float, None, None),
     '_Rb_k':                    (float, float, None, None),
@@ -296,15 +304,15 @@ LOAD_POINT_OUTPUT = {
     '_hatWasserAuflast':         (None,  bool, None, None),  # Unknown
     '_laengeImWasser':           (None, float, None, None),  # Unknown
     '_ASQuer':                   (None, float, None, None),  # Unknown
-    '_AsLaengs':                 (None, float, None, None),  # Unknown
+    '_AsLaengs':                (float, float, None, None),
     '_AsLaengsCalc':             (None, float, None, None),  # Unknown
     '_AsQuerCalc':               (None, float, None, None),  # Unknown
     '_BetonGuete':               (None,   str, None, None),  # Unknown
-    '_BewBZWLieferlaenge':       (None, float, None, None),  # Unknown
+    '_BewBZWLieferlaenge':      (float, float, None, None),
     # This specific value is known to return -1 in case of HLC calculation error
     '_BewTyp':                   (None, float, None, None),  # Unknown
-    '_BohrLaenge':               (None, float, None, None),  # Unknown
-    '_EindringTiefe':            (None, float, None, None),  # Unknown
+    '_BohrLaenge':              (float, float, None, None),
+    '_EindringTiefe':           (float, float, None, None),
     '_EindringTiefeZug':         (None, float, None, None),  # Unknown
     # Called _nachweisER in old dataset. Should be stored in 0-100 range, 0-1
     '_EzuR':                    (float, float, None, 0.01),
@@ -315,7 +323,7 @@ LOAD_POINT_OUTPUT = {
     '_MMax':                     (None, float, None, None),  # Unknown
     '_PfahlVolumen':            (float, float, None, None),
     '_QMax':                     (None, float, None, None),  # Unknown
-    '_Soll_UK_Pfahl':            (None, float, None, None),  # Unknown
+    '_Soll_UK_Pfahl':           (float, float, None, None),
     # Called _deltaL in old dataset
     '_delta_Laenge':            (float, float, None, None),
 }
@@ -323,6 +331,7 @@ LOAD_POINT_OUTPUT = {
 
 HORIZONTAL_LOAD_CASE_INPUT = {
     'hTabelleName':                (str,  str, None, None),
+    # Encoded horizontal load points, passed as-is
     'hLastPunkte':                (dict, dict, None, None),
 }
 
@@ -344,6 +353,7 @@ HORIZONTAL_LOAD_POINT_INPUT = {
     '_Mqky':                    (float, float, 0.0,  None),
     '_OKBodenBiegung':          (float, float, 0.0,  None),
     '_gkz':                     (float, float, None, None),
+    '_pAnOberkante':            (float, float, 1.9,  None),
     '_qkz':                     (float, float, None, None),
 }
 
@@ -357,15 +367,16 @@ HORIZONTAL_LOAD_POINT_OUTPUT = {
     '_AsSchubMin':               (None, float, None, None),  # Unknown
     '_Berechnung':               (None,  bool, None, None),  # Unknown
     '_BerechnungOK':             (None, float, None, None),  # Unknown
-    '_BewTyp':                    (str,   str, None, None),
-    # These 2 values are %, but it is unknown if range is 0-1 or 0-100
-    '_EpsO':                    (float, float, None, 0.01),  # O, not 0
-    '_Eps1':                    (float, float, None, 0.01),
+    '_BewTyp':                  (float, float, None, None),
+    # These 2 values are %, but it is unknown if range is 0-1 or 0-100,
+    # they are stored as they come.
+    '_EpsO':                    (float, float, None, None),  # O, not 0
+    '_Eps1':                    (float, float, None, None),
     '_KoteUeberdrueckt':        (float, float, None, None),
     '_MMax':                    (float, float, None, None),
     '_MxMax':                   (float, float, None, None),
     '_MyMax':                   (float, float, None, None),
-    '_Nachweisgruppe':            (int,   int, None, None),
+    '_Nachweisgruppe':          (float, float, None, None),
     '_QMax':                    (float, float, None, None),
     '_QxMax':                   (float, float, None, None),
     '_QyMax':                   (float, float, None, None),
@@ -381,159 +392,17 @@ HORIZONTAL_LOAD_POINT_OUTPUT = {
 }
 
 
-# Additional key mapping that store name translations between XML and model…
-PROJECT_SETTING_KEYS = {
-    'name': '_ProjektName',
-    'runHorBemessung': '_runHorBemessung',
-    'AbtreppungsWinkelRad': '_AbtreppungsWinkelRad',
-    'AchsabstandGleicherTiefe': '_AchsabstandGleicherTiefe',
-    'AuslastungProzent': '_AuslastungProzent',
-    'Beeinflussungsweite': '_Beeinflussungsweite',
-    'EAErhoehungProzent': '_EAErhoehungProzent',
-    'Exzentrizitaet': '_Exzentrizitaet',
-    'FuszBeeinfluszung': '_FuszBeeinfluszung',
-    'FuszErhoehungProzent': '_FuszErhoehungProzent',
-    'Knicklaenge': '_Knicklaenge',
-    'MantelErhoehungProzent': '_MantelErhoehungProzent',
-    'MindestEinbindung': '_MindestEinbindung',
-    'MindestPfahllaenge': '_MindestPfahllaenge',
-    'Norm': '_Norm',
-    'Schrittweite': '_Schrittweite',
-    'SpitzendruckMittelung': '_SpitzendruckMittelung',
-    'WinkelAusProfilen': '_WinkelAusProfilen',
-    'gammaDruck': '_gammaDruck',
-    'gammaStaendig': '_gammaStaendig',
-    'gammaVeraenderlich': '_gammaVeraenderlich',
-    'gammaZug': '_gammaZug',
-    'gegenRaeumlichenEP': '_gegenRaeumlichenEP',
-    'ksNichtReduzieren': '_ksNichtReduzieren',
-    'useErhoehung': '_useErhoehung',
-    'zulaessigeSetzungCm': '_zulaessigeSetzungCm',
-    'BetonZyl': '_BetonZyl',
-    'KopfEinbindung': '_KopfEinbindung',
-    'MaxLaenge': '_MaxLaenge',
-    'ProjektOrt': '_projektLocation',
-    'ProjektPLZ': '_projektPostalCode',
-    'ProjektStrasze': '_projektStreet',
-    'companyAltEmail': '_companyAltEmail',
-    'companyAltFax': '_companyAltFax',
-    'companyAltLocation': '_companyAltLocation',
-    'companyAltName': '_companyAltName',
-    'companyAltPhone': '_companyAltPhone',
-    'companyAltPostalCode': '_companyAltPostalCode',
-    'companyAltStreet': '_companyAltStreet',
-    'companyAltLogo': '_companyAltLogo',
-    'nameAnlageAuszen': '_nameAnlageAuszen',
-    'seitenBezeichnung': '_seitenBezeichnung',
-    'seitenStartNummer': '_seitenStartNummer',
-    'SeiteVonSeiten': '_SeiteVonSeiten',
-    'erstelleUebersichtAuszen': '_erstelleUebersichtAuszen',
-    'UebersichtQuer': '_UebersichtQuer',
-    'erstelleEinzelnachweise': '_erstelleEinzelnachweise',
-    'zeichneNachweislinien': '_zeichneNachweislinien',
-    'UKKotenInTabelle': '_UKKotenInTabelle',
-    'erstellegrafikAuszen': '_erstellegrafikAuszen',
-    'erstellegrafikInnen': '_erstellegrafikInnen',
-}
-
-
+# Key mappings of the containers which are not in projects/mapping.py
 SOIL_PROFILE_INPUT_KEYS = {
-    'soil_table_name': '_profilName',
-    'pfahlTyp': '_PfahlTyp',
+    'name': '_profilName',
+    'pfahlTyp': '_pfahlTyp',
     'grundwasserStand': '_grundwasserStand',
     'startKote': '_startKote',
-    'list_soil_layers': 'alleBodenSchichten',
-}
-
-
-SOIL_PROFILE_OUTPUT_KEYS = {
-    'pfahlTyp': '_PfahlTyp',
-    'list_soil_layers': '_schichten',
-}
-
-
-SOIL_LAYER_INPUT_KEYS = {
-    'endKote': '_endKote',
-    'bodenArt': '_bodenArt',
-    'ESoben': '_ESoben',
-    'ESunten': '_ESunten',
-    'FuszAbsetzbar': '_FuszAbsetzbar',
-    'IstEindringRelevant': '_IstEindringRelevant',
-    'MaxElementWeite': '_MaxElementWeite',
-    'cuEP': '_cuEP',
-    'cuk': '_cuk',
-    'deltaVonPhi': '_deltaVonPhi',
-    'gammaBoden': '_gammaBoden',
-    'gammaStrichBoden': '_gammaStrichBoden',
-    'phi': '_phi',
-    'qbk002': '_qbk002',
-    'qbk003': '_qbk003',
-    'qbk01': '_qbk01',
-    'qc': '_qc',
-    'qsk': '_qsk',
-    'bodenSchichtColor': '_bodenSchichtColor'
-}
-
-
-SOIL_LAYER_OUTPUT_KEYS = {
-    'PfahlTyp': '_Pfahltyp',
-    'usedQsk': '_usedQsk',
-    'usedQbk002': '_usedQbk002',
-    'usedQbk003': '_usedQbk003',
-    'usedQbk01': '_usedQbk01'
+    'soil_layers': 'alleBodenSchichten',
 }
 
 
 HORIZONTAL_LOAD_CASE_INPUT_KEYS = {
-    'hlc_table_name': 'hTabelleName',
-    'list_hlcs': 'hLastPunkte',
-}
-
-
-HORIZONTAL_LOAD_POINT_INPUT_KEYS = {
-    'Pname': '_Pname',
-    'Grundwasser': '_Grundwasser',
-    'Hgkx': '_Hgkx',
-    'Hgky': '_Hgky',
-    'Hqkx': '_Hqkx',
-    'Hqky': '_Hqky',
-    'Mgkx': '_Mgkx',
-    'Mgky': '_Mgky',
-    'Mqkx': '_Mqkx',
-    'Mqky': '_Mqky',
-    'OKBodenBiegung': '_OKBodenBiegung',
-    'gkz': '_gkz',
-    'qkz': '_qkz',
-}
-
-
-HORIZONTAL_LOAD_POINT_OUTPUT_KEYS = {
-    'AsLaengs': '_AsLaengs',
-    'AsLaengsCalc': '_AsLaengsCalc',
-    'AsLaengsMin': '_AsLaengsMin',
-    'AsQuer': '_AsQuer',
-    'AsQuerCalc': '_AsQuerCalc',
-    'AsSchubMin': '_AsSchubMin',
-    'Berechnung': '_Berechnung',
-    'BerechnungOK': '_BerechnungOK',
-    'BewTyp': '_BewTyp',
-    'Eps0': '_EpsO',
-    'Eps1': '_Eps1',
-    'KoteUeberdrueckt': '_KoteUeberdrueckt',
-    'MMax': '_MMax',
-    'MxMax': '_MxMax',
-    'MyMax': '_MyMax',
-    'Nachweisgruppe': '_Nachweisgruppe',
-    'QMax': '_QMax',
-    'QxMax': '_QxMax',
-    'QyMax': '_QyMax',
-    'wOben': '_wOben',
-    'wxOben': '_wxOben',
-    'wyOben': '_wyOben',
-    'MdKopf': '_MdKopf',
-    'MdKopfx': '_MdKopfx',
-    'MdKopfy': '_MdKopfy',
-    'wStrichKopf': '_wStrichKopf',
-    'wStrichKopfx': '_wStrichKopfx',
-    'wStrichKopfy': '_wStrichKopfy',
+    'name': 'hTabelleName',
+    'horizontal_loads': 'hLastPunkte',
 }
@@ -0,0 +1,236 @@
+"""
+Local stand-in of the FastAPI-DHPD proxy for load tests.
+
+The server implements the endpoints the API calls on the proxy
+(FASTAPI_SERVER_DOMAIN):
+
+    - project/calculateByXMLString/: calculation result (OutputDaten)
+    - user/uploadImage/: stores nothing, returns a new file name
+    - user/removeOldImage/: removes nothing
+
+Calculation results are synthetic, built from the piles, soil profiles
+and horizontal load cases of the request, or recorded proxy responses
+(JSON files) which are returned in turn. Every request waits for the
+configured latency, a part of the requests fails (error rate) like the
+proxy does: HTTP 500 or an error message of the DHPD server.
+
+Only the standard library is used, see the dhpd_standin command.
+"""
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import NamedTuple
+
+from .dhpd_serializer.mapper import _as_list, _path
+from .dhpd_serializer.mapping import (
+    LOAD_POINT_OUTPUT,
+    SOIL_LAYER_OUTPUT,
+    HORIZONTAL_LOAD_POINT_OUTPUT,
+)
+
+CALCULATE_PATH = '/project/calculateByXMLString/'
+UPLOAD_IMAGE_PATH = '/user/uploadImage/'
+REMOVE_IMAGE_PATH = '/user/removeOldImage/'
+
+
+class StandinOptions(NamedTuple):
+    """
+    Attributes:
+        - latency: mean latency of a request in seconds
+        - calculate_latency: mean latency of a calculation in seconds
+        - jitter: the latency varies by +- this part, 0.2 = 20 %
+        - error_rate: part of the requests which fail, 0 - 1
+        - recorded: recorded calculate responses (json objects), synthetic if empty
+        - seed: seed of latency, errors and synthetic values
+    """
+    latency: float = 0.0
+    calculate_latency: float = 0.0
+    jitter: float = 0.2
+    error_rate: float = 0.0
+    recorded: tuple = ()
+    seed: int = None
+
+
+def load_recorded(directory: str) -> tuple:
+    """
+    The function loads recorded proxy responses, one JSON file each.
+    """
+    return tuple(
+        json.loads(path.read_text(encoding='utf-8'))
+        for path in sorted(Path(directory).glob('*.json'))
+    )
+
+
+def _output_values(mapping: dict, rnd: random.Random) -> dict:
+    values = {}
+    for xml_key, (_model_type, xml_type, _null_value, _transform) in mapping.items():
+        if xml_type is float:
+            values[xml_key] = f"{rnd.uniform(0, 1000):.4f}"
+        elif xml_type is int:
+            values[xml_key] = str(rnd.randint(1, 10))
+        elif xml_type is bool:
+            values[xml_key] = 'true'
+        elif xml_type is str:
+            values[xml_key] = ''
+    return values
+
+
+def synthetic_output(input_document: dict, rnd: random.Random) -> dict:
+    """
+    The function builds an OutputDaten document with random values
+    for the piles, soil layers and horizontal loads of the input.
+
+    Attributes:
+        - input_document: calculation XML as dict ({'InputDaten': ...})
+        - rnd: random.Random
+    Return: OutputDaten as dict
+    """
+    input_data = (input_document or {}).get('InputDaten', {})
+
+    piles = [
+        {'_Pname': pile.get('_Pname'), **_output_values(LOAD_POINT_OUTPUT, rnd)}
+        for pile in _as_list(_path(input_data, 'pfaehle', 'LastPunktInputList', 'LastPunktInput'))
+    ]
+
+    soil_profiles = [
+        {
+            'a:Key': soil_profile.get('_profilName'),
+            'a:Value': {'_schichten': {'BodenSchichtNutzung': [
+                _output_values(SOIL_LAYER_OUTPUT, rnd)
+                for _ in _as_list(_path(soil_profile, 'alleBodenSchichten', 'BodenSchichtDaten'))
+            ]}},
+        }
+        for soil_profile in _as_list(_path(input_data, 'boden', 'alleBodenProfile', 'BodenProfilDaten'))
+    ]
+
+    h_load_cases = [
+        {
+            'a:Key': h_load_case.get('hTabelleName'),
+            'a:Value': {'HLastPunktHorOutput': [
+                _output_values(HORIZONTAL_LOAD_POINT_OUTPUT, rnd)
+                for _ in _as_list(_path(h_load_case, 'hLastPunkte', 'HLastPunktInput'))
+            ]},
+        }
+        for h_load_case in _as_list(_path(input_data, 'hLasten', 'hTabellen', 'HLastInputTabelle'))
+    ]
+
+    return {
+        'pfaehle': {'LastPunktOutputList': {'LastPunktOutput': piles}},
+        'BodenNutzung': {'BodenNutzungDict': {'a:KeyValueOfstringBodenNutzungOutputDB_PsWP3v': soil_profiles}},
+        'hLasten': {'LastPunktOutputDict': {'a:KeyValueOfstringArrayOfHLastPunktHorOutputDB_PsWP3v': h_load_cases}},
+        '_fehlerText': {},
+    }
+
+
+class StandinState:
+    """
+    Options and counters shared by the request handler threads.
+    """
+    def __init__(self, options: StandinOptions):
+        self.options = options
+        self._random = random.Random(options.seed)
+        self._lock = threading.Lock()
+        self._recorded_index = 0
+        self.requests = {}
+        self.errors = {}
+
+    def random(self) -> random.Random:
+        # One generator per request, random.Random isn't shared between threads.
+        with self._lock:
+            return random.Random(self._random.random())
+
+    def next_recorded(self) -> dict:
+        with self._lock:
+            response = self.options.recorded[self._recorded_index % len(self.options.recorded)]
+            self._recorded_index += 1
+        return response
+
+    def count(self, path: str, failed: bool):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+            if failed:
+                self.errors[path] = self.errors.get(path, 0) + 1
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    server_version = 'DhpdStandin/1.0'
+    state: StandinState = None
+
+    def log_message(self, format, *args):
+        # The load test would be slowed down by the request log.
+        ...
+
+    def _send_json(self, data, status: int = 200):
+        content = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _wait(self, latency: float, rnd: random.Random):
+        jitter = self.state.options.jitter
+        if latency > 0:
+            time.sleep(max(0.0, latency * rnd.uniform(1 - jitter, 1 + jitter)))
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        rnd = self.state.random()
+        options = self.state.options
+        failed = rnd.random() < options.error_rate
+        self.state.count(self.path, failed)
+
+        if self.path == CALCULATE_PATH:
+            self._wait(options.calculate_latency or options.latency, rnd)
+            self._calculate(body, failed, rnd)
+        elif self.path == UPLOAD_IMAGE_PATH:
+            self._wait(options.latency, rnd)
+            if failed:
+                return self._send_json({'detail': 'Upload failed.'}, 500)
+            self._send_json({'file_name': f"{uuid.uuid4().hex}.png"})
+        elif self.path == REMOVE_IMAGE_PATH:
+            self._wait(options.latency, rnd)
+            if failed:
+                return self._send_json({'detail': 'Remove failed.'}, 500)
+            self._send_json({'message': 'The image is removed.'})
+        else:
+            self._send_json({'detail': 'Not found.'}, 404)
+
+    def _calculate(self, body: bytes, failed: bool, rnd: random.Random):
+        try:
+            request_data = json.loads(body or b'{}')
+        except ValueError:
+            return self._send_json({'detail': 'Invalid JSON.'}, 422)
+
+        # Connection test of the API, xml_content is False
+        if request_data.get('xml_content') is False:
+            return self._send_json({'error_msg': None})
+
+        if failed:
+            # Half of the failures are proxy errors, half DHPD server errors.
+            if rnd.random() < 0.5:
+                return self._send_json({'detail': 'Internal Server Error'}, 500)
+            return self._send_json({'error_msg': 'DHPD server did not answer.'})
+
+        if self.state.options.recorded:
+            return self._send_json(self.state.next_recorded())
+
+        self._send_json({
+            'error_msg': None,
+            'pdf': f"{uuid.uuid4().hex}.pdf",
+            'xml_output_data': {'OutputDaten': synthetic_output(request_data.get('xml_content'), rnd)},
+        })
+
+
+def create_server(host: str, port: int, options: StandinOptions) -> ThreadingHTTPServer:
+    """
+    The function creates the stand-in server, call serve_forever() to run it.
+    """
+    handler = type('Handler', (StandinHandler,), {'state': StandinState(options)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,199 @@
+"""
+Preview of what an import would change in a project.
+
+The rows of the file are matched with the stored rows by their name
+(Pname, soil profile name, load case name, soil layers by position in
+their profile). Each row is reduced to a tuple of its normalized
+values, only rows with different tuples are compared field by field.
+Only the columns given in the file are compared.
+"""
+import math
+
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Pile, SoilProfile, SoilLayer, HorizontalLoadCase, HorizontalLoadPile
+from .table_upsert import (
+    PILE_FIELDS,
+    SOIL_PROFILE_FIELDS,
+    SOIL_LAYER_FIELDS,
+    HORIZONTAL_LOAD_PILE_FIELDS,
+)
+from .xlsx_import import FIELD_CONVERTERS
+
+# Fields which are not compared: keys, positions and the
+# soil profile pile type which is hard coded on import.
+IGNORED_FIELDS = frozenset(('row_index', 'name', 'Pname', 'pfahlTyp'))
+
+
+def _normalizers(model, fields) -> dict:
+    normalizers = {}
+    for field_name in fields:
+        field = model._meta.get_field(field_name)
+        normalizers[field_name] = next(
+            (converter for field_class, converter in FIELD_CONVERTERS.items()
+             if isinstance(field, field_class)),
+            None
+        )
+    return normalizers
+
+
+def _normalize(value, converter):
+    if value is None or value == "NaN":
+        return None
+    if converter is not None:
+        try:
+            value = converter(value)
+        except (TypeError, ValueError):
+            return value
+    if isinstance(value, float):
+        if math.isnan(value):
+            return None
+        # Values are shown with 2 decimal digits, tiny float noise is no change.
+        return round(value, 9)
+    return value
+
+
+class TableDiff:
+    """
+    Diff of one table.
+
+    Attributes:
+        - model: Django model of the table
+        - allowed_fields (frozenset): fields which can be imported
+    """
+    def __init__(self, model, allowed_fields: frozenset):
+        self.model = model
+        self.allowed_fields = allowed_fields - IGNORED_FIELDS
+
+    def compare(self, new_rows: dict, queryset, key_fields: tuple) -> dict:
+        """
+        Attributes:
+            - new_rows: {key: row dict} of the file
+            - queryset: stored rows of the table
+            - key_fields: lookups building the key of a stored row
+        Return: dict with added, removed and changed rows
+        """
+        fields = sorted({
+            field for row in new_rows.values() for field in row
+            if field in self.allowed_fields
+        })
+        normalizers = _normalizers(self.model, fields)
+
+        new_values = {
+            key: tuple(_normalize(row.get(field), normalizers[field]) for field in fields)
+            for key, row in new_rows.items()
+        }
+
+        old_values = {}
+        for values in queryset.values_list(*key_fields, *fields).iterator():
+            key = values[0] if len(key_fields) == 1 else tuple(values[:len(key_fields)])
+            old_values[key] = tuple(
+                _normalize(value, normalizers[field])
+                for field, value in zip(fields, values[len(key_fields):])
+            )
+
+        changed = []
+        unchanged = 0
+        for key in new_values.keys() & old_values.keys():
+            new, old = new_values[key], old_values[key]
+            if new == old:
+                unchanged += 1
+                continue
+            changed.append({
+                'key': key,
+                'fields': {
+                    field: {'old': old_value, 'new': new_value}
+                    for field, old_value, new_value in zip(fields, old, new)
+                    if old_value != new_value
+                },
+            })
+
+        return {
+            'added': sorted(new_values.keys() - old_values.keys(), key=str),
+            'removed': sorted(old_values.keys() - new_values.keys(), key=str),
+            'changed': sorted(changed, key=lambda row: str(row['key'])),
+            'unchanged': unchanged,
+        }
+
+
+PILE_DIFF = TableDiff(Pile, PILE_FIELDS)
+SOIL_PROFILE_DIFF = TableDiff(SoilProfile, SOIL_PROFILE_FIELDS)
+SOIL_LAYER_DIFF = TableDiff(SoilLayer, SOIL_LAYER_FIELDS)
+HORIZONTAL_LOAD_DIFF = TableDiff(HorizontalLoadPile, HORIZONTAL_LOAD_PILE_FIELDS)
+
+
+def _soil_profile_name(soil_profile: dict):
+    return soil_profile.get('name', soil_profile.get('soil_table_name'))
+
+
+def _h_load_case_name(h_load_case: dict):
+    return h_load_case.get('name', h_load_case.get('hlc_table_name'))
+
+
+def diff_project_data(project, project_data: dict) -> dict:
+    """
+    The function compares the imported project data json object
+    with the stored tables of the project without writing anything.
+
+    Attributes:
+        - project: Project model object
+        - project_data: dict with piles, soil_profiles, horizontal_loadcases
+    Return: dict with the diff per table
+    """
+    piles = {pile.get('Pname'): pile for pile in project_data.get('piles', [])}
+
+    soil_profiles = {}
+    soil_layers = {}
+    for soil_profile in project_data.get('soil_profiles', []):
+        name = _soil_profile_name(soil_profile)
+        soil_profiles[name] = soil_profile
+        for position, soil_layer in enumerate(soil_profile.get('soil_layers', [])):
+            soil_layers[(name, position)] = soil_layer
+
+    h_load_cases = {}
+    h_loads = {}
+    for h_load_case in project_data.get('horizontal_loadcases', []):
+        name = _h_load_case_name(h_load_case)
+        h_load_cases[name] = h_load_case
+        for h_load in h_load_case.get('horizontal_loads', []):
+            h_loads[(name, h_load.get('Pname'))] = h_load
+
+    stored_case_names = set(
+        HorizontalLoadCase.objects.filter(project=project).values_list('name', flat=True)
+    )
+
+    return {
+        'piles': PILE_DIFF.compare(
+            piles, Pile.objects.filter(project=project), ('Pname',)
+        ),
+        'soil_profiles': SOIL_PROFILE_DIFF.compare(
+            soil_profiles, SoilProfile.objects.filter(project=project), ('name',)
+        ),
+        'soil_layers': SOIL_LAYER_DIFF.compare(
+            soil_layers,
+            _with_position(SoilLayer.objects.filter(project=project)),
+            ('soil_profile__name', 'position')
+        ),
+        'horizontal_loadcases': {
+            'added': sorted(h_load_cases.keys() - stored_case_names, key=str),
+            'removed': sorted(stored_case_names - h_load_cases.keys(), key=str),
+        },
+        'horizontal_loads': HORIZONTAL_LOAD_DIFF.compare(
+            h_loads, HorizontalLoadPile.objects.filter(project=project), ('case__name', 'Pname')
+        ),
+    }
+
+
+def _with_position(queryset):
+    """
+    Soil layers have no name, they are matched by their
+    position (0, 1, ...) in the soil profile.
+    """
+    return queryset.annotate(
+        position=Window(
+            RowNumber(),
+            partition_by=[F('soil_profile_id')],
+            order_by=[F('row_index').asc(), F('id').asc()]
+        ) - 1
+    )
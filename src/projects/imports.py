@@ -0,0 +1,298 @@
+"""
+Background import of project files.
+
+The upload is stored to a temporary file and the import runs in a thread
+pool, the request returns the job id at once. The job goes through the
+phases validate, parse, convert and persist. Persisting (settings and
+tables) happens in one transaction, a failing job leaves the existing
+project data untouched.
+
+The progress is written from a separate thread, it has its own database
+connection and autocommit, so the progress is visible while the import
+transaction is still open.
+
+The thread pool lives in the web worker process. A job whose worker is
+recycled, killed or redeployed is lost: expire_import_jobs (command
+expire_import_jobs, run periodically) marks the pending and running jobs
+without progress for IMPORT_JOB_TIMEOUT_MINUTES as failed and removes
+their uploads. With several servers IMPORT_JOB_DIR must be on storage
+shared by all of them, so the sweep of any server can remove the upload.
+"""
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import transaction, close_old_connections, connection
+from django.utils.timezone import now
+
+from piledesigner.settings import IMPORT_JOB_WORKERS, IMPORT_JOB_DIR, IMPORT_JOB_TIMEOUT_MINUTES
+from .models import ImportJob
+from .services import (
+    xml_to_json,
+    validate_input_xml_file,
+    update_project_setting_data,
+    restructure_json_data,
+    process_import_driven_pile,
+    input_xml_content_unit_convert,
+)
+from .key_plans import XML_IMPORT_PLAN
+from .table_upsert import replace_project_table_data
+from .xlsx_import import XlsxProjectReader
+
+# The progress is written every this many rows.
+PROGRESS_EVERY = 500
+
+_job_executor = ThreadPoolExecutor(
+    max_workers=IMPORT_JOB_WORKERS, thread_name_prefix='import-job'
+)
+# One thread only, progress updates are written in order.
+_progress_executor = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix='import-progress'
+)
+
+
+class ImportValidationError(Exception):
+    def __init__(self, errors: list):
+        super().__init__("The file is not valid.")
+        self.errors = errors
+
+
+def _update_job(job_id, **fields):
+    close_old_connections()
+    ImportJob.objects.filter(pk=job_id).update(modified_date=now(), **fields)
+
+
+class JobProgress:
+    """
+    Progress reporter of one import job.
+    """
+    def __init__(self, job: ImportJob):
+        self.job_id = job.pk
+        self.rows = 0
+        self._reported_rows = 0
+
+    def update(self, wait: bool = False, **fields):
+        future = _progress_executor.submit(_update_job, self.job_id, **fields)
+        if wait:
+            future.result()
+
+    def phase(self, phase: str):
+        self.update(phase=phase)
+
+    def add_row(self):
+        self.rows += 1
+        if self.rows - self._reported_rows >= PROGRESS_EVERY:
+            self._reported_rows = self.rows
+            self.update(rows_processed=self.rows)
+
+    def count(self, rows):
+        """
+        Pass the rows through and count them.
+        """
+        for row in rows:
+            self.add_row()
+            yield row
+
+    def count_project_rows(self, piles, soil_profiles, horizontal_loadcases) -> tuple:
+        """
+        Wrap the table rows of a project so they are counted while persisted.
+        """
+        def count_soil_profiles():
+            for soil_profile in soil_profiles:
+                soil_profile['soil_layers'] = self.count(soil_profile.get('soil_layers', []))
+                yield soil_profile
+
+        def count_horizontal_loadcases():
+            for h_load_case in horizontal_loadcases:
+                h_load_case['horizontal_loads'] = self.count(h_load_case.get('horizontal_loads', []))
+                yield h_load_case
+
+        return self.count(piles), count_soil_profiles(), count_horizontal_loadcases()
+
+
+def _validate_xml(file):
+    errors = validate_input_xml_file(file)
+    if errors:
+        raise ImportValidationError(errors)
+
+
+def _convert_xml(file_json_content: dict) -> dict:
+    file_json_content = XML_IMPORT_PLAN.apply_nested(file_json_content)
+    file_json_content = restructure_json_data(file_json_content)
+
+    # Ignore Project name and Company Logo when import data
+    file_json_content["settings"].pop("name")
+    file_json_content["settings"].pop("companyAltLogo")
+
+    file_json_content = process_import_driven_pile(file_json_content)
+    return input_xml_content_unit_convert(file_json_content, reversed=True)
+
+
+def parse_import_file(file) -> dict:
+    """
+    The function validates, parses and converts an uploaded file
+    into the project data json object without storing anything.
+    """
+    if file.name.endswith('.xml'):
+        _validate_xml(file)
+        file.seek(0)
+        return _convert_xml(xml_to_json(file))
+
+    with XlsxProjectReader(file) as reader:
+        errors = reader.validate()
+        if errors:
+            raise ImportValidationError(errors)
+        return reader.to_json()
+
+
+def _import_xml(project, file_path: str, progress: JobProgress) -> dict:
+    progress.phase(ImportJob.PHASE_VALIDATE)
+    with open(file_path, 'rb') as file:
+        _validate_xml(file)
+
+        progress.phase(ImportJob.PHASE_PARSE)
+        file.seek(0)
+        file_json_content = xml_to_json(file)
+
+    progress.phase(ImportJob.PHASE_CONVERT)
+    file_json_content = _convert_xml(file_json_content)
+
+    progress.phase(ImportJob.PHASE_PERSIST)
+    piles, soil_profiles, horizontal_loadcases = progress.count_project_rows(
+        file_json_content.get('piles', []),
+        file_json_content.get('soil_profiles', []),
+        file_json_content.get('horizontal_loadcases', [])
+    )
+    with transaction.atomic():
+        update_project_setting_data(file_json_content, project)
+        return replace_project_table_data(
+            project, piles, soil_profiles, horizontal_loadcases
+        )
+
+
+def _import_xlsx(project, file_path: str, progress: JobProgress) -> dict:
+    progress.phase(ImportJob.PHASE_VALIDATE)
+    with XlsxProjectReader(file_path) as reader:
+        errors = reader.validate()
+        if errors:
+            raise ImportValidationError(errors)
+
+        # The rows are parsed and converted while they are persisted.
+        progress.phase(ImportJob.PHASE_PERSIST)
+        piles, soil_profiles, horizontal_loadcases = progress.count_project_rows(
+            reader.piles(), reader.soil_profiles(), reader.horizontal_loadcases()
+        )
+        return replace_project_table_data(
+            project, piles, soil_profiles, horizontal_loadcases
+        )
+
+
+def run_import_job(job_id):
+    """
+    The function runs an import job, it is called in the job thread pool.
+    """
+    progress = None
+    file_path = None
+    try:
+        job = ImportJob.objects.select_related('project').get(pk=job_id)
+        file_path = job.file_path
+        progress = JobProgress(job)
+        progress.update(status=ImportJob.STATUS_RUNNING)
+
+        if job.file_name.endswith('.xml'):
+            result = _import_xml(job.project, file_path, progress)
+        else:
+            result = _import_xlsx(job.project, file_path, progress)
+
+        progress.update(
+            wait=True,
+            status=ImportJob.STATUS_SUCCEEDED,
+            rows_processed=progress.rows,
+            result=result,
+            file_path='',
+            finished_date=now()
+        )
+
+    except ImportValidationError as e:
+        _finish_failed(job_id, progress, e.errors)
+
+    except Exception as e:
+        _finish_failed(job_id, progress, str(e))
+
+    finally:
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
+        connection.close()
+
+
+def _finish_failed(job_id, progress, error):
+    fields = {
+        'status': ImportJob.STATUS_FAILED,
+        'error': error,
+        'file_path': '',
+        'finished_date': now(),
+    }
+    if progress is None:
+        _update_job(job_id, **fields)
+    else:
+        # Nothing was stored, the transaction was rolled back.
+        progress.update(wait=True, rows_processed=0, **fields)
+
+
+def start_import_job(project, uploaded_file, user=None) -> ImportJob:
+    """
+    The function stores the uploaded file to a temporary file
+    and queues the import job.
+
+    Attributes:
+        - project: Project model object
+        - uploaded_file: file from request.FILES
+        - user: User who started the import
+    Return: ImportJob model object
+    """
+    suffix = os.path.splitext(uploaded_file.name)[1]
+    with tempfile.NamedTemporaryFile(
+        suffix=suffix, prefix='import-', dir=IMPORT_JOB_DIR, delete=False
+    ) as temp_file:
+        for chunk in uploaded_file.chunks():
+            temp_file.write(chunk)
+
+    job = ImportJob.objects.create(
+        project=project,
+        created_by=user if user and user.is_authenticated else None,
+        file_name=uploaded_file.name,
+        file_path=temp_file.name
+    )
+    transaction.on_commit(lambda: _job_executor.submit(run_import_job, job.pk))
+    return job
+
+
+def expire_import_jobs(timeout_minutes: int = IMPORT_JOB_TIMEOUT_MINUTES) -> int:
+    """
+    The function fails the pending and running import jobs without
+    progress for timeout_minutes, their worker is gone, and removes
+    their uploads.
+
+    Return: number of failed jobs
+    """
+    active = (ImportJob.STATUS_PENDING, ImportJob.STATUS_RUNNING)
+    cutoff = now() - timedelta(minutes=timeout_minutes)
+    expired = 0
+    for job_id, file_path in ImportJob.objects.filter(
+        status__in=active, modified_date__lt=cutoff
+    ).values_list('pk', 'file_path'):
+        # A job which reported progress meanwhile is still running
+        updated = ImportJob.objects.filter(pk=job_id, status__in=active, modified_date__lt=cutoff).update(
+            status=ImportJob.STATUS_FAILED,
+            error=f"The import job was lost, it made no progress for {timeout_minutes} minutes.",
+            file_path='',
+            finished_date=now(),
+            modified_date=now(),
+        )
+        if not updated:
+            continue
+        expired += 1
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
+    return expired
@@ -0,0 +1,100 @@
+"""
+Key plans compiled once from the mapping tables in mapping.py.
+
+A plan renames, filters and orders the keys of one entity (pile, soil
+layer, ...) in a single pass per row. It gives the same result as
+chaining services.map_keys, remove_all_unneccessary_keys and
+sort_dict_by_keys, without walking the row three times and without
+the list membership tests.
+"""
+from .mapping import (
+    XML_TO_JSON_KEYS_MAPPING,
+    CUSTOMER_INFO_COMPANY_KEYS_MAPPING,
+    USER_INFO_KEYS_MAPPING,
+    PILE_KEY_XLSX_2_JSON_MAPPING,
+    SOIL_KEY_XLSX_2_JSON_MAPPING,
+    H_LOAD_KEY_XLSX_2_JSON_MAPPING,
+    PILE_KEY_JSON_2_XLSX_MAPPING,
+    SOIL_KEY_JSON_2_XLSX_MAPPING,
+    H_LOAD_KEY_JSON_2_XLSX_MAPPING,
+)
+
+
+class KeyPlan:
+    """
+    Compiled key transformation of one entity.
+
+    Attributes:
+        - rename (dict): old key -> new key, other keys are kept as they are
+        - keep (iterable): keys (after renaming) to keep, None keeps all keys
+        - order (list): keys put first in this order, missing ones are
+          set to None, the other kept keys follow in their input order
+    """
+    def __init__(self, rename: dict = None, keep=None, order: list = None):
+        self.rename = dict(rename or {})
+        self.keep = None if keep is None else frozenset(keep)
+        self.order = tuple(order or ())
+        self._template = dict.fromkeys(self.order)
+
+    def apply(self, row: dict) -> dict:
+        """
+        Transform the keys of one flat row.
+        """
+        rename = self.rename
+        keep = self.keep
+        result = self._template.copy()
+        for key, value in row.items():
+            key = rename.get(key, key)
+            if keep is None or key in keep:
+                result[key] = value
+        return result
+
+    def apply_many(self, rows: list) -> list:
+        return [self.apply(row) for row in rows]
+
+    def apply_nested(self, data):
+        """
+        Transform the keys on every level of a nested dict / list
+        (without ordering), like map_keys + remove_all_unneccessary_keys.
+        """
+        if isinstance(data, dict):
+            rename = self.rename
+            keep = self.keep
+            result = {}
+            for key, value in data.items():
+                key = rename.get(key, key)
+                if keep is None or key in keep:
+                    result[key] = self.apply_nested(value)
+            return result
+        if isinstance(data, list):
+            return [self.apply_nested(item) for item in data]
+        return data
+
+
+# _userInfo / _customerInfo of the calculation XML
+USER_INFO_PLAN = KeyPlan(rename=USER_INFO_KEYS_MAPPING, keep=USER_INFO_KEYS_MAPPING.values())
+CUSTOMER_INFO_PLAN = KeyPlan(
+    rename=CUSTOMER_INFO_COMPANY_KEYS_MAPPING,
+    keep=CUSTOMER_INFO_COMPANY_KEYS_MAPPING.values()
+)
+
+# XML import
+XML_IMPORT_PLAN = KeyPlan(rename=XML_TO_JSON_KEYS_MAPPING)
+
+# Excel export
+PILE_XLSX_PLAN = KeyPlan(
+    rename=PILE_KEY_JSON_2_XLSX_MAPPING,
+    keep=PILE_KEY_XLSX_2_JSON_MAPPING.keys(),
+    order=list(PILE_KEY_XLSX_2_JSON_MAPPING.keys())
+)
+SOIL_LAYER_XLSX_PLAN = KeyPlan(
+    rename=SOIL_KEY_JSON_2_XLSX_MAPPING,
+    keep=SOIL_KEY_XLSX_2_JSON_MAPPING.keys(),
+    # The first four keys belong to the soil profile itself.
+    order=list(SOIL_KEY_XLSX_2_JSON_MAPPING.keys())[4:]
+)
+H_LOAD_XLSX_PLAN = KeyPlan(
+    rename=H_LOAD_KEY_JSON_2_XLSX_MAPPING,
+    keep=H_LOAD_KEY_XLSX_2_JSON_MAPPING.keys(),
+    order=list(H_LOAD_KEY_XLSX_2_JSON_MAPPING.keys())
+)
@@ -0,0 +1,196 @@
+"""
+Load test of the API.
+
+A pool of threads sends requests to a running API (runserver, gunicorn,
+...) for a number of requests or seconds, every thread picks the next
+endpoint of the scenario in turn. The report has the throughput and the
+latency percentiles of every endpoint.
+
+The endpoints which call the FastAPI-DHPD proxy (calculate,
+upload-company-logo with remove_old_image) need the proxy or its local
+stand-in, see the dhpd_standin command.
+"""
+import itertools
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import NamedTuple, Callable, Optional
+
+import requests
+
+PROJECTS = 'v1/companies/{company_id}/projects/'
+PROJECT = PROJECTS + '{project_id}/'
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class LoadEndpoint(NamedTuple):
+    """
+    Attributes:
+        - name: name in the report
+        - method: get, post, put, patch or delete
+        - path: URL without host, formatted with company_id and project_id
+        - files: function() -> files of a multipart request
+    """
+    name: str
+    method: str
+    path: str
+    files: Optional[Callable] = None
+
+
+def _logo_file() -> dict:
+    from PIL import Image
+
+    content = BytesIO()
+    Image.new('RGB', (64, 64), 'white').save(content, format='PNG')
+    return {'file': ('logo.png', content.getvalue(), 'image/png')}
+
+
+ENDPOINTS = {
+    'project-list': LoadEndpoint('project list', 'get', PROJECTS),
+    'project-retrieve': LoadEndpoint('project retrieve', 'get', PROJECT),
+    'project-xml': LoadEndpoint('project xml', 'get', PROJECT + 'xml/'),
+    'project-xlsx': LoadEndpoint('project xlsx', 'get', PROJECT + 'xlsx/'),
+    'calculate': LoadEndpoint('project calculate', 'get', PROJECT + 'calculate/'),
+    'calculate-async': LoadEndpoint('project calculate-async', 'get', PROJECT + 'calculate-async/'),
+    'project-logo': LoadEndpoint('project upload-company-logo', 'post',
+                                 PROJECT + 'upload-company-logo/', files=_logo_file),
+    'company-logo': LoadEndpoint('company upload-company-logo', 'post',
+                                 'v1/companies/{company_id}/upload-company-logo/', files=_logo_file),
+}
+
+
+def percentile(sorted_values: list, percent: float) -> float:
+    """
+    The function returns the percentile of sorted values (nearest rank).
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def login(base_url: str, email: str, password: str) -> tuple:
+    """
+    The function logs in and returns the access token and the company id of the user.
+    """
+    response = requests.post(
+        f"{base_url}v1/auth/login/", json={'email': email, 'password': password}, timeout=30
+    )
+    response.raise_for_status()
+    data = response.json()
+    return data['access_token'], data['user']['company']['id']
+
+
+def first_project_id(base_url: str, session: requests.Session, company_id: int) -> int:
+    """
+    The function returns the id of the first project of the company.
+    """
+    response = session.get(f"{base_url}{PROJECTS.format(company_id=company_id)}", timeout=60)
+    response.raise_for_status()
+    data = response.json()
+    projects = data['results'] if isinstance(data, dict) else data
+    if not projects:
+        raise ValueError(f"Company {company_id} has no project.")
+    return projects[0]['id']
+
+
+class LoadTest:
+    """
+    Requests of a scenario sent by a thread pool.
+
+    Attributes:
+        - base_url: URL of the API with trailing slash
+        - token: access token of the user
+        - endpoints: LoadEndpoint list, sent in turn
+        - ids: company_id and project_id for the paths
+        - concurrency: number of threads
+        - timeout: timeout of a request in seconds
+    """
+    def __init__(self, base_url: str, token: str, endpoints: list, ids: dict,
+                 concurrency: int = 10, timeout: float = 600):
+        self.base_url = base_url
+        self.token = token
+        self.endpoints = endpoints
+        self.ids = ids
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._scenario = itertools.cycle(endpoints)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._sent = 0
+        self.latencies = {endpoint.name: [] for endpoint in endpoints}
+        self.errors = {endpoint.name: {} for endpoint in endpoints}
+
+    def _session(self) -> requests.Session:
+        # requests.Session isn't thread safe, one session (connection pool) per thread.
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.Session()
+            self._local.session.headers['Authorization'] = f"Bearer {self.token}"
+        return self._local.session
+
+    def _next(self, max_requests: Optional[int], deadline: Optional[float]) -> Optional[LoadEndpoint]:
+        with self._lock:
+            if max_requests is not None and self._sent >= max_requests:
+                return None
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+            self._sent += 1
+            return next(self._scenario)
+
+    def _send(self, endpoint: LoadEndpoint):
+        url = self.base_url + endpoint.path.format(**self.ids)
+        files = endpoint.files() if endpoint.files else None
+        start = time.perf_counter()
+        try:
+            response = getattr(self._session(), endpoint.method)(url, files=files, timeout=self.timeout)
+            # Read streamed exports completely.
+            response.content
+            error = None if response.status_code < 400 else str(response.status_code)
+        except requests.RequestException as e:
+            error = type(e).__name__
+        seconds = time.perf_counter() - start
+
+        with self._lock:
+            self.latencies[endpoint.name].append(seconds)
+            if error:
+                self.errors[endpoint.name][error] = self.errors[endpoint.name].get(error, 0) + 1
+
+    def _worker(self, max_requests: Optional[int], deadline: Optional[float]):
+        while endpoint := self._next(max_requests, deadline):
+            self._send(endpoint)
+
+    def run(self, max_requests: Optional[int] = None, duration: Optional[float] = None) -> dict:
+        """
+        The function sends the requests until the number of requests
+        or the duration in seconds is reached.
+
+        Return: report, see report()
+        """
+        start = time.perf_counter()
+        deadline = start + duration if duration else None
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            workers = [executor.submit(self._worker, max_requests, deadline) for _ in range(self.concurrency)]
+            for worker in workers:
+                worker.result()
+        return self.report(time.perf_counter() - start)
+
+    def report(self, seconds: float) -> dict:
+        """
+        Return: {'seconds', 'concurrency', 'endpoints': {name: {'requests',
+            'errors', 'rps', 'p50', 'p90', 'p95', 'p99', 'max'}}}, latencies
+            in milliseconds
+        """
+        endpoints = {}
+        for name, latencies in self.latencies.items():
+            latencies = sorted(latencies)
+            endpoints[name] = {
+                'requests': len(latencies),
+                'errors': self.errors[name],
+                'rps': len(latencies) / seconds if seconds else 0.0,
+                **{f"p{percent}": percentile(latencies, percent) * 1000 for percent in PERCENTILES},
+                'max': latencies[-1] * 1000 if latencies else 0.0,
+            }
+        return {'seconds': seconds, 'concurrency': self.concurrency, 'endpoints': endpoints}
@@ -0,0 +1,185 @@
+import json
+import os
+import shlex
+import socket
+import subprocess
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from projects.dhpd_standin import StandinOptions, create_server
+from projects.load_test import ENDPOINTS, LoadTest, login, first_project_id
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Server -> (command, calculate endpoint), formatted with port and threads
+SERVERS = {
+    'wsgi': (
+        'gunicorn piledesigner.wsgi:application -k gthread --workers 1 --threads {threads} '
+        '--bind 127.0.0.1:{port}',
+        'calculate',
+    ),
+    'asgi': (
+        'uvicorn piledesigner.asgi:application --workers 1 --host 127.0.0.1 --port {port}',
+        'calculate-async',
+    ),
+}
+
+
+def _process_tree(pid: int) -> list:
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as file:
+                parent = int(file.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+
+    pids = [pid]
+    for current in pids:
+        pids.extend(children.get(current, []))
+    return pids
+
+
+def _memory(pid: int) -> tuple:
+    """
+    Return: RSS in KiB and number of threads of the process and its children
+    """
+    rss = threads = 0
+    for process in _process_tree(pid):
+        try:
+            with open(f'/proc/{process}/status') as file:
+                for line in file:
+                    if line.startswith('VmRSS:'):
+                        rss += int(line.split()[1])
+                    elif line.startswith('Threads:'):
+                        threads += int(line.split()[1])
+        except OSError:
+            continue
+    return rss, threads
+
+
+def _wait_for_port(port: int, process: subprocess.Popen, seconds: float = 30):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError(f"Server exited with {process.returncode}.")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"Server didn't listen on port {port} within {seconds:.0f} s.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare concurrent calculations under WSGI (gunicorn, threads) and ASGI (uvicorn, "
+        "async calculate) against the DHPD stand-in: throughput, latency, memory and threads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', required=True)
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--project', type=int)
+        parser.add_argument('--server', action='append', dest='servers', choices=sorted(SERVERS),
+                            help="Servers to compare (repeatable), default: all.")
+        parser.add_argument('--concurrency', type=int, default=200,
+                            help="Calculations in flight at the same time.")
+        parser.add_argument('--requests', type=int, default=None,
+                            help="Calculations per server, default: twice the concurrency.")
+        parser.add_argument('--threads', type=int, default=8, help="Threads of the WSGI worker.")
+        parser.add_argument('--calculate-latency', type=float, default=5.0,
+                            help="Seconds the stand-in takes for a calculation.")
+        parser.add_argument('--port', type=int, default=8200)
+        parser.add_argument('--standin-port', type=int, default=8201)
+        parser.add_argument('--output', help="Write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        standin = create_server('127.0.0.1', options['standin_port'], StandinOptions(
+            calculate_latency=options['calculate_latency'], seed=0
+        ))
+        threading.Thread(target=standin.serve_forever, daemon=True).start()
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': 'piledesigner.settings',
+            'FASTAPI_SERVER_DOMAIN': f"http://127.0.0.1:{options['standin_port']}/",
+        }
+        requests_count = options['requests'] or options['concurrency'] * 2
+
+        results = {}
+        try:
+            for name in options['servers'] or sorted(SERVERS):
+                command, endpoint = SERVERS[name]
+                args = shlex.split(command.format(port=options['port'], threads=options['threads']))
+                self.stdout.write(f"{name}: {' '.join(args)}")
+                try:
+                    process = subprocess.Popen(args, cwd=SRC_DIR, env=env,
+                                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                except FileNotFoundError:
+                    raise CommandError(f"{args[0]} is not installed (requirements/prod.txt).")
+                try:
+                    _wait_for_port(options['port'], process)
+                    results[name] = self._run(name, process, endpoint, requests_count, options)
+                finally:
+                    process.terminate()
+                    process.wait(timeout=30)
+        finally:
+            standin.shutdown()
+            standin.server_close()
+
+        self.stdout.write(
+            f"{'server':<8}{'requests':>9}{'errors':>8}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}"
+            f"{'max ms':>9}{'peak MiB':>10}{'threads':>9}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<8}{result['requests']:>9}{sum(result['errors'].values()):>8}{result['rps']:>8.1f}"
+                f"{result['p50']:>9.0f}{result['p95']:>9.0f}{result['max']:>9.0f}"
+                f"{result['peak_rss_kib'] / 1024:>10.1f}{result['peak_threads']:>9}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def _run(self, name: str, process: subprocess.Popen, endpoint: str, requests_count: int, options) -> dict:
+        base_url = f"http://127.0.0.1:{options['port']}/"
+        token, company_id = login(base_url, options['email'], options['password'])
+        project_id = options['project']
+        if project_id is None:
+            import requests
+
+            session = requests.Session()
+            session.headers['Authorization'] = f"Bearer {token}"
+            project_id = first_project_id(base_url, session, company_id)
+
+        # Memory and threads of the server while the calculations are in flight
+        peak = {'rss': 0, 'threads': 0}
+        stop = threading.Event()
+
+        def sample():
+            while not stop.wait(0.2):
+                rss, threads = _memory(process.pid)
+                peak['rss'] = max(peak['rss'], rss)
+                peak['threads'] = max(peak['threads'], threads)
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        try:
+            report = LoadTest(
+                base_url, token, [ENDPOINTS[endpoint]],
+                {'company_id': company_id, 'project_id': project_id},
+                concurrency=options['concurrency'],
+            ).run(max_requests=requests_count)
+        finally:
+            stop.set()
+            sampler.join()
+
+        result = report['endpoints'][ENDPOINTS[endpoint].name]
+        return {**result, 'peak_rss_kib': peak['rss'], 'peak_threads': peak['threads']}
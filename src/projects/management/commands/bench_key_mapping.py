@@ -0,0 +1,74 @@
+import timeit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from projects.mapping import (
+    PILE_INPUT_KEYS_MAPPING,
+    PILE_KEY_XLSX_2_JSON_MAPPING,
+    PILE_KEY_JSON_2_XLSX_MAPPING,
+)
+from projects.key_plans import PILE_XLSX_PLAN, XML_IMPORT_PLAN
+from projects.models import Pile
+from projects.services import map_keys, remove_all_unneccessary_keys, sort_dict_by_keys
+
+
+def build_piles(rows: int) -> list:
+    """
+    Pile rows as they come from the pile serializer.
+    """
+    field_names = [field.name for field in Pile._meta.concrete_fields]
+    return [
+        {name: (f"P{index}" if name == 'Pname' else float(index)) for name in field_names}
+        for index in range(rows)
+    ]
+
+
+def old_xlsx(piles):
+    output = []
+    for pile in piles:
+        pile = map_keys(pile, PILE_KEY_JSON_2_XLSX_MAPPING)
+        pile = remove_all_unneccessary_keys(pile, list(PILE_KEY_XLSX_2_JSON_MAPPING.keys()))
+        pile = sort_dict_by_keys(pile, list(PILE_KEY_XLSX_2_JSON_MAPPING.keys()))
+        output.append(pile)
+    return output
+
+
+def old_import(document):
+    return map_keys(document)
+
+
+class Command(BaseCommand):
+    help = "Micro benchmark of the compiled key plans against map_keys / remove_all_unneccessary_keys / sort_dict_by_keys."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        piles = build_piles(options['rows'])
+        xml_piles = [
+            {PILE_INPUT_KEYS_MAPPING.get(key, key): value for key, value in pile.items()}
+            for pile in piles
+        ]
+        document = {'pfaehle': {'LastPunktInputList': {'LastPunktInput': xml_piles}}}
+
+        cases = [
+            ('xlsx pile rows', lambda: old_xlsx(piles), lambda: PILE_XLSX_PLAN.apply_many(piles)),
+            ('xml import document', lambda: old_import(document), lambda: XML_IMPORT_PLAN.apply_nested(document)),
+        ]
+
+        self.stdout.write(f"{'case':<22}{'old ms':>10}{'plan ms':>10}{'speedup':>10}")
+        for name, old, new in cases:
+            # Same keys, same order, same values.
+            if [list(row.items()) for row in _rows(old())] != [list(row.items()) for row in _rows(new())]:
+                raise CommandError(f"{name}: the plan output differs")
+
+            old_time = min(timeit.repeat(old, number=1, repeat=options['repeat']))
+            new_time = min(timeit.repeat(new, number=1, repeat=options['repeat']))
+            self.stdout.write(
+                f"{name:<22}{old_time * 1000:>10.1f}{new_time * 1000:>10.1f}{old_time / new_time:>9.1f}x"
+            )
+
+
+def _rows(result):
+    return result if isinstance(result, list) else [result]
@@ -0,0 +1,96 @@
+import os
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from companies.models import Company
+from users.models import UserProfile
+from projects.benchmark import (
+    ProjectSize,
+    run_benchmark,
+    compare_results,
+    load_results,
+    save_results,
+)
+
+DEFAULT_SIZES = ['100x3x10x1', '2000x10x20x5']
+DEFAULT_BASELINE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'benchmark_baseline.json'
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the project pipeline stages with generated projects, "
+        "compare with the baseline and fail on regressions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size', action='append', dest='sizes',
+            help="piles x soil profiles x layers x load cases, e.g. 2000x10x20x5 (repeatable)."
+        )
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write the results to this JSON file.")
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+        parser.add_argument('--update-baseline', action='store_true',
+                            help="Store the results as new baseline instead of comparing.")
+        parser.add_argument('--time-tolerance', type=float, default=0.25,
+                            help="Allowed relative slow down, 0.25 = 25 %%.")
+        parser.add_argument('--memory-tolerance', type=float, default=0.10,
+                            help="Allowed relative increase of the peak memory.")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [ProjectSize.parse(size) for size in options['sizes'] or DEFAULT_SIZES]
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        baseline = None
+        if not options['update_baseline'] and os.path.exists(options['baseline']):
+            baseline = load_results(options['baseline'])
+
+        def on_stage(size, name, result):
+            expected = (baseline or {}).get('runs', {}).get(size.label, {}).get('stages', {}).get(name)
+            line = (f"{size.label:<16}{name:<26}{result['seconds'] * 1000:>10.1f}"
+                    f"{result['peak_kib'] / 1024:>10.1f}")
+            if expected:
+                change = (result['seconds'] / expected['seconds'] - 1) * 100 if expected['seconds'] else 0
+                line += f"{expected['seconds'] * 1000:>12.1f}{change:>+9.0f}%"
+            self.stdout.write(line)
+
+        self.stdout.write(
+            f"{'size':<16}{'stage':<26}{'ms':>10}{'peak MiB':>10}{'baseline ms':>12}{'change':>10}"
+        )
+        # The calculating user and company only exist during the benchmark.
+        with transaction.atomic():
+            tag = uuid.uuid4().hex[:8]
+            company = Company.objects.create(name=f"Benchmark {tag}")
+            user = User.objects.create_user(f"benchmark-{tag}", email=f"benchmark-{tag}@example.com")
+            UserProfile.objects.create(user=user, company=company)
+
+            results = run_benchmark(sizes, user, company, options['repeat'], options['seed'], on_stage)
+            transaction.set_rollback(True)
+
+        if options['output']:
+            save_results(results, options['output'])
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options['update_baseline']:
+            save_results(results, options['baseline'])
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}"))
+            return
+
+        if baseline is None:
+            self.stdout.write(self.style.WARNING(f"No baseline at {options['baseline']}, nothing compared."))
+            return
+
+        regressions = compare_results(
+            results, baseline, options['time_tolerance'], options['memory_tolerance']
+        )
+        if regressions:
+            raise CommandError("Performance regressions:\n" + "\n".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
@@ -0,0 +1,97 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from piledesigner.startup import HEAVY_MODULES
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Import of the WSGI application with the URLs, what a worker does before the first request
+WSGI_IMPORT = f"""
+import json, sys, time
+start = time.perf_counter()
+import piledesigner.wsgi
+from django.urls import get_resolver
+get_resolver().url_patterns
+seconds = time.perf_counter() - start
+print(json.dumps({{
+    'seconds': seconds,
+    'heavy_modules': [module for module in {HEAVY_MODULES!r} if module in sys.modules],
+}}))
+"""
+
+
+def _run(args: list) -> tuple:
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, *args], cwd=SRC_DIR, capture_output=True, text=True,
+        env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'piledesigner.settings'}
+    )
+    seconds = time.perf_counter() - start
+    if result.returncode != 0:
+        raise CommandError(f"{' '.join(args)} failed:\n{result.stderr[-2000:]}")
+    return seconds, result.stdout
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the startup of a worker (import of piledesigner.wsgi with the URLs) "
+        "and of manage.py check in new processes, fail if over budget or if a heavy "
+        "library is imported at startup."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--wsgi-budget-ms', type=float, default=750,
+                            help="Budget of the WSGI import, best of the runs.")
+        parser.add_argument('--check-budget-ms', type=float, default=1000,
+                            help="Budget of manage.py check (process start to exit), best of the runs.")
+        parser.add_argument('--output', help="Write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        wsgi_runs = []
+        check_runs = []
+        heavy_modules = set()
+        for _ in range(options['repeat']):
+            _seconds, output = _run(['-c', WSGI_IMPORT])
+            result = json.loads(output.strip().splitlines()[-1])
+            wsgi_runs.append(result['seconds'])
+            heavy_modules.update(result['heavy_modules'])
+
+            seconds, _output = _run(['manage.py', 'check'])
+            check_runs.append(seconds)
+
+        results = {
+            'wsgi_ms': min(wsgi_runs) * 1000,
+            'check_ms': min(check_runs) * 1000,
+            'heavy_modules': sorted(heavy_modules),
+        }
+        self.stdout.write(f"{'':<24}{'best ms':>10}{'worst ms':>10}{'budget ms':>11}")
+        self.stdout.write(
+            f"{'piledesigner.wsgi':<24}{results['wsgi_ms']:>10.0f}"
+            f"{max(wsgi_runs) * 1000:>10.0f}{options['wsgi_budget_ms']:>11.0f}"
+        )
+        self.stdout.write(
+            f"{'manage.py check':<24}{results['check_ms']:>10.0f}"
+            f"{max(check_runs) * 1000:>10.0f}{options['check_budget_ms']:>11.0f}"
+        )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        failures = []
+        if results['heavy_modules']:
+            failures.append(f"Imported at startup: {', '.join(results['heavy_modules'])}")
+        if results['wsgi_ms'] > options['wsgi_budget_ms']:
+            failures.append(f"piledesigner.wsgi: {results['wsgi_ms']:.0f} ms, budget {options['wsgi_budget_ms']:.0f} ms")
+        if results['check_ms'] > options['check_budget_ms']:
+            failures.append(f"manage.py check: {results['check_ms']:.0f} ms, budget {options['check_budget_ms']:.0f} ms")
+        if failures:
+            raise CommandError("\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("Startup within budget."))
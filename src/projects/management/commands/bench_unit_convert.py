@@ -0,0 +1,99 @@
+import copy
+import math
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from projects.services import scale_float_value, input_xml_content_unit_convert
+from projects.unit_convert import SETTING_SCALES, PILE_SCALES, SOIL_LAYER_SCALES
+
+
+def build_project(piles: int, soil_layers: int, seed: int = 0) -> dict:
+    """
+    Project json data with numbers, "NaN" strings and empty values.
+    """
+    rnd = random.Random(seed)
+
+    def value():
+        choice = rnd.random()
+        if choice < 0.05:
+            return None
+        if choice < 0.1:
+            return "NaN"
+        return round(rnd.uniform(-1000, 1000), rnd.randint(0, 5))
+
+    return {
+        'settings': {key: value() for key in SETTING_SCALES},
+        'piles': [{key: value() for key in PILE_SCALES} for _ in range(piles)],
+        'soil_profiles': [
+            {'soil_layers': [{key: value() for key in SOIL_LAYER_SCALES} for _ in range(10)]}
+            for _ in range(soil_layers // 10)
+        ],
+    }
+
+
+def value_by_value(xml_content: dict, reversed: bool = False) -> dict:
+    """
+    Conversion of one value at a time with scale_float_value.
+    """
+    tables = [([xml_content['settings']], SETTING_SCALES), (xml_content['piles'], PILE_SCALES)]
+    tables.append((
+        [layer for profile in xml_content['soil_profiles'] for layer in profile.get('soil_layers', [])],
+        SOIL_LAYER_SCALES
+    ))
+    for rows, scales in tables:
+        for row in rows:
+            for key, scale in scales.items():
+                try:
+                    row[key] = scale_float_value(row[key], scale, reversed)
+                except Exception:
+                    ...
+    return xml_content
+
+
+def _same(old, new) -> bool:
+    if isinstance(old, dict):
+        return old.keys() == new.keys() and all(_same(old[key], new[key]) for key in old)
+    if isinstance(old, list):
+        return len(old) == len(new) and all(map(_same, old, new))
+    if isinstance(old, float) and math.isnan(old):
+        return isinstance(new, float) and math.isnan(new)
+    return type(old) is type(new) and old == new
+
+
+def _best_time(convert, project: dict, reversed: bool, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        data = copy.deepcopy(project)
+        start = time.perf_counter()
+        convert(data, reversed)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+class Command(BaseCommand):
+    help = "Micro benchmark of the columnar unit conversion against scale_float_value per value."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--piles', type=int, default=20000)
+        parser.add_argument('--soil-layers', type=int, default=20000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        project = build_project(options['piles'], options['soil_layers'])
+        rows = options['piles'] + options['soil_layers']
+
+        self.stdout.write(f"{'case':<14}{'old us/row':>12}{'new us/row':>12}{'speedup':>10}")
+        for reversed in (False, True):
+            name = 'revert' if reversed else 'scale'
+            if not _same(value_by_value(copy.deepcopy(project), reversed),
+                         input_xml_content_unit_convert(copy.deepcopy(project), reversed)):
+                raise CommandError(f"{name}: the columnar conversion differs")
+
+            old_time = _best_time(value_by_value, project, reversed, options['repeat'])
+            new_time = _best_time(input_xml_content_unit_convert, project, reversed, options['repeat'])
+            self.stdout.write(
+                f"{name:<14}{old_time / rows * 1e6:>12.2f}{new_time / rows * 1e6:>12.2f}"
+                f"{old_time / new_time:>9.1f}x"
+            )
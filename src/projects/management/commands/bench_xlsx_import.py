@@ -0,0 +1,103 @@
+import time
+import tracemalloc
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+
+from projects.mapping import (
+    PILE_KEY_XLSX_2_JSON_MAPPING,
+    SOIL_KEY_XLSX_2_JSON_MAPPING,
+    H_LOAD_KEY_XLSX_2_JSON_MAPPING,
+)
+from projects.xlsx_import import XlsxProjectReader
+
+
+def build_workbook(rows: int, soil_profiles: int = 3, layers: int = 20) -> bytes:
+    """
+    The function builds a project Excel file in memory with
+    the given number of piles and horizontal loads.
+    """
+    import xlsxwriter
+
+    output = BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+
+    pile_headers = list(PILE_KEY_XLSX_2_JSON_MAPPING.keys())
+    sheet = workbook.add_worksheet('Pfahltabelle')
+    sheet.write_row(0, 0, pile_headers)
+    for row in range(1, rows + 1):
+        values = [f"P{row}", 1, 1, 3.0, 10.5, 9.5, 1000.0 + row, 2000.0 + row, 0.9,
+                  1200.0, 1650.0, "BP1", 2.0, 2.0, 50.0]
+        sheet.write_row(row, 0, values[:len(pile_headers)])
+
+    layer_headers = list(SOIL_KEY_XLSX_2_JSON_MAPPING.keys())[4:]
+    for index in range(soil_profiles):
+        name = f"BP{index + 1}"
+        sheet = workbook.add_worksheet(name)
+        sheet.write_row(0, 0, layer_headers)
+        for row in range(1, layers + 1):
+            values = [-row * 1.5, "Sand", "#FFCC00"] + [1.0] * (len(layer_headers) - 3)
+            sheet.write_row(row, 0, values)
+
+        sheet = workbook.add_worksheet(f"{name}-Info")
+        sheet.write_row(0, 0, ["Grundwasserstand", "Startkote"])
+        sheet.write_row(1, 0, [-2.5, 0.0])
+
+    h_load_headers = list(H_LOAD_KEY_XLSX_2_JSON_MAPPING.keys())
+    sheet = workbook.add_worksheet('LF1')
+    sheet.write_row(0, 0, h_load_headers)
+    for row in range(1, rows + 1):
+        sheet.write_row(row, 0, [f"P{row}"] + [10.0] * (len(h_load_headers) - 1))
+
+    workbook.close()
+    return output.getvalue()
+
+
+def read_with_pandas(content: bytes) -> dict:
+    """
+    Reference: the former import, every sheet loaded as DataFrame.
+    """
+    import pandas as pd
+
+    all_sheets = pd.read_excel(BytesIO(content), sheet_name=None)
+    return {
+        sheet_name: df.astype(object).where(pd.notnull(df), None).to_dict(orient="records")
+        for sheet_name, df in all_sheets.items()
+    }
+
+
+def read_with_stream(content: bytes) -> dict:
+    with XlsxProjectReader(BytesIO(content)) as reader:
+        return reader.to_json()
+
+
+class Command(BaseCommand):
+    help = "Benchmark the Excel import (pandas vs. streaming read-only workbook)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help="Number of piles.")
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def measure(self, function, content: bytes, repeat: int):
+        timings = []
+        peak = 0
+        for _ in range(repeat):
+            tracemalloc.start()
+            start = time.perf_counter()
+            function(content)
+            timings.append(time.perf_counter() - start)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        return min(timings), peak
+
+    def handle(self, *args, **options):
+        content = build_workbook(options['rows'])
+        self.stdout.write(
+            f"Workbook: {options['rows']} piles, {len(content) / 1024:.0f} KiB"
+        )
+
+        for name, function in (('pandas', read_with_pandas), ('stream', read_with_stream)):
+            seconds, peak = self.measure(function, content, options['repeat'])
+            self.stdout.write(
+                f"{name:<8} {seconds * 1000:10.1f} ms {peak / 1024 / 1024:10.1f} MiB peak"
+            )
@@ -0,0 +1,61 @@
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from projects.dhpd_standin import StandinOptions, create_server, load_recorded
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in of the FastAPI-DHPD proxy for load tests. "
+        "Set FASTAPI_SERVER_DOMAIN=http://<host>:<port>/ for the API."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8100)
+        parser.add_argument('--latency', type=float, default=0.05,
+                            help="Mean latency of a request in seconds.")
+        parser.add_argument('--calculate-latency', type=float, default=2.0,
+                            help="Mean latency of a calculation in seconds.")
+        parser.add_argument('--jitter', type=float, default=0.2,
+                            help="Relative variation of the latency, 0.2 = 20 %%.")
+        parser.add_argument('--error-rate', type=float, default=0.0,
+                            help="Part of the requests which fail, 0 - 1.")
+        parser.add_argument('--recorded', help="Directory with recorded calculate responses (*.json).")
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if not 0 <= options['error_rate'] <= 1:
+            raise CommandError("--error-rate must be between 0 and 1.")
+
+        recorded = ()
+        if options['recorded']:
+            recorded = load_recorded(options['recorded'])
+            if not recorded:
+                raise CommandError(f"No recorded responses in {options['recorded']}.")
+
+        server = create_server(options['host'], options['port'], StandinOptions(
+            latency=options['latency'],
+            calculate_latency=options['calculate_latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            recorded=recorded,
+            seed=options['seed'],
+        ))
+        self.stdout.write(
+            f"DHPD stand-in on http://{options['host']}:{options['port']}/ "
+            f"({'recorded' if recorded else 'synthetic'} results), CTRL-C to quit."
+        )
+        # Stop with the summary on CTRL-C and on kill.
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            ...
+        finally:
+            server.server_close()
+
+        state = server.RequestHandlerClass.state
+        for path, count in sorted(state.requests.items()):
+            self.stdout.write(f"{path:<32}{count:>8} requests{state.errors.get(path, 0):>8} errors")
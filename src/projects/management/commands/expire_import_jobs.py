@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from projects.imports import expire_import_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Mark the import jobs which were lost with their worker process (pending or "
+        "running without progress for IMPORT_JOB_TIMEOUT_MINUTES) as failed and remove "
+        "their uploads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--timeout-minutes', type=int, default=settings.IMPORT_JOB_TIMEOUT_MINUTES,
+                            help="Minutes without progress after which a job is lost.")
+
+    def handle(self, *args, **options):
+        expired = expire_import_jobs(options['timeout_minutes'])
+        self.stdout.write(self.style.SUCCESS(f"Failed {expired} lost import jobs."))
@@ -0,0 +1,78 @@
+import json
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from projects.load_test import ENDPOINTS, PERCENTILES, LoadTest, login, first_project_id
+
+DEFAULT_ENDPOINTS = ['project-retrieve', 'calculate', 'project-logo']
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test a running API with concurrent requests and report the "
+        "throughput and latency percentiles of every endpoint. Run the API "
+        "against the DHPD stand-in (dhpd_standin command) for calculate and logo uploads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000/', help="URL of the API.")
+        parser.add_argument('--email', required=True)
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--project', type=int, help="Project id, the first project of the company by default.")
+        parser.add_argument(
+            '--endpoint', action='append', dest='endpoints', choices=sorted(ENDPOINTS),
+            help=f"Endpoint of the scenario (repeatable), default: {', '.join(DEFAULT_ENDPOINTS)}."
+        )
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--requests', type=int, default=None, help="Total number of requests.")
+        parser.add_argument('--duration', type=float, default=None, help="Duration in seconds.")
+        parser.add_argument('--timeout', type=float, default=600, help="Timeout of a request in seconds.")
+        parser.add_argument('--output', help="Write the report to this JSON file.")
+
+    def handle(self, *args, **options):
+        if options['requests'] is None and options['duration'] is None:
+            options['requests'] = 100
+        base_url = options['url'].rstrip('/') + '/'
+
+        try:
+            token, company_id = login(base_url, options['email'], options['password'])
+            project_id = options['project']
+            if project_id is None:
+                session = requests.Session()
+                session.headers['Authorization'] = f"Bearer {token}"
+                project_id = first_project_id(base_url, session, company_id)
+        except (requests.RequestException, ValueError, KeyError) as e:
+            raise CommandError(f"Login or project lookup failed: {e}")
+
+        load_test = LoadTest(
+            base_url, token,
+            [ENDPOINTS[name] for name in options['endpoints'] or DEFAULT_ENDPOINTS],
+            {'company_id': company_id, 'project_id': project_id},
+            concurrency=options['concurrency'],
+            timeout=options['timeout'],
+        )
+        report = load_test.run(options['requests'], options['duration'])
+
+        self.stdout.write(
+            f"{report['seconds']:.1f} s, {report['concurrency']} threads, "
+            f"company {company_id}, project {project_id}"
+        )
+        self.stdout.write(
+            f"{'endpoint':<32}{'requests':>9}{'errors':>8}{'req/s':>8}"
+            + ''.join(f"{f'p{percent} ms':>10}" for percent in PERCENTILES)
+            + f"{'max ms':>10}"
+        )
+        for name, result in report['endpoints'].items():
+            self.stdout.write(
+                f"{name:<32}{result['requests']:>9}{sum(result['errors'].values()):>8}{result['rps']:>8.1f}"
+                + ''.join(f"{result[f'p{percent}']:>10.0f}" for percent in PERCENTILES)
+                + f"{result['max']:>10.0f}"
+            )
+            for error, count in result['errors'].items():
+                self.stdout.write(f"    {error}: {count}")
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from projects.calculation_runs import prune_runs
+from projects.calculation_snapshots import prune_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the calculation runs of all projects which are not kept as history "
+        "(CALCULATION_RUNS_KEEP, CALCULATION_RUNS_MAX_AGE_DAYS) and the outdated proxy "
+        "responses (CALCULATION_SNAPSHOTS_MAX_AGE_DAYS), the latest run is always kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int, default=settings.CALCULATION_RUNS_KEEP,
+                            help="Runs kept per project, 0 = any number.")
+        parser.add_argument('--max-age-days', type=int, default=settings.CALCULATION_RUNS_MAX_AGE_DAYS,
+                            help="Runs older than this are deleted, 0 = any age.")
+        parser.add_argument('--snapshot-max-age-days', type=int, default=settings.CALCULATION_SNAPSHOTS_MAX_AGE_DAYS,
+                            help="Proxy responses older than this are deleted, 0 = any age.")
+
+    def handle(self, *args, **options):
+        deleted = prune_runs(keep=options['keep'], max_age_days=options['max_age_days'])
+        snapshots = prune_snapshots(max_age_days=options['snapshot_max_age_days'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} calculation runs and {snapshots} proxy responses."
+        ))
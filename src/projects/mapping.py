@@ -458,10 +458,12 @@ JSON_TO_XML_KEYS_MAPPING = {
 }
 
 XML_TO_JSON_KEYS_MAPPING = {v: k for k, v in JSON_TO_XML_KEYS_MAPPING.items()}
-XML_KEYS = list(XML_TO_JSON_KEYS_MAPPING.keys()) \
-    + [val for _key, val in CUSTOMER_INFO_COMPANY_KEYS_MAPPING.items()] \
-    + [val for _key, val in USER_INFO_KEYS_MAPPING.items()] \
+XML_KEYS = frozenset(
+    list(XML_TO_JSON_KEYS_MAPPING.keys())
+    + [val for _key, val in CUSTOMER_INFO_COMPANY_KEYS_MAPPING.items()]
+    + [val for _key, val in USER_INFO_KEYS_MAPPING.items()]
     + STRUCTRURE_XML_ELEMENT_KEYS
+)
 
 
 PILE_KEY_XLSX_2_JSON_MAPPING = {
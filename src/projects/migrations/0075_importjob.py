@@ -0,0 +1,39 @@
+# Generated by Django 5.1 on 2026-10-19 18:29
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0074_alter_soillayer_deltavonphi'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('file_name', models.CharField(help_text='Name of the uploaded file.', max_length=255, verbose_name='File name')),
+                ('file_path', models.CharField(blank=True, default='', help_text='Temporary file of the upload, removed when the job is done.', max_length=1024, verbose_name='File path')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='pending', max_length=16, verbose_name='Status')),
+                ('phase', models.CharField(blank=True, choices=[('validate', 'Validate'), ('parse', 'Parse'), ('convert', 'Convert'), ('persist', 'Persist')], default=None, max_length=16, null=True, verbose_name='Phase')),
+                ('rows_processed', models.IntegerField(default=0, verbose_name='Rows processed')),
+                ('result', models.JSONField(blank=True, default=None, help_text='Number of stored rows per table.', null=True, verbose_name='Result')),
+                ('error', models.JSONField(blank=True, default=None, help_text='Error message or list of validation errors.', null=True, verbose_name='Error')),
+                ('created_date', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('modified_date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_date', models.DateTimeField(blank=True, default=None, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='import_jobs', to=settings.AUTH_USER_MODEL)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_jobs', to='projects.project')),
+            ],
+            options={
+                'ordering': ['-created_date'],
+            },
+        ),
+    ]
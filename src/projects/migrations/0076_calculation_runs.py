@@ -0,0 +1,351 @@
+# Generated by Django 5.1 on 2026-10-19 19:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Output of the rows -> result of a run, the same for all three tables
+PILE_OUTPUT = (
+    'Federsteifigkeit', 'Nachweisgruppe', 'R_d', 'R_d_Min', 'Rb_k', 'Rs_k', 'Setzung', 'laenge_mit',
+    'laenge_ohne', 'AsLaengs', 'BewBZWLieferlaenge', 'BohrLaenge', 'EindringTiefe', 'EzuR',
+    'GesamtBohrLaenge', 'PfahlVolumen', 'Soll_UK_Pfahl', 'delta_Laenge',
+)
+SOIL_LAYER_OUTPUT = ('PfahlTyp', 'usedQsk', 'usedQbk002', 'usedQbk003', 'usedQbk01')
+HORIZONTAL_LOAD_OUTPUT = (
+    'AsLaengs', 'AsLaengsCalc', 'AsQuer', 'AsQuerCalc', 'BewTyp', 'Eps0', 'Eps1', 'KoteUeberdrueckt',
+    'MMax', 'MxMax', 'MyMax', 'Nachweisgruppe', 'QMax', 'QxMax', 'QyMax', 'wOben', 'wxOben', 'wyOben',
+)
+
+
+def _has_output(row: dict, fields: tuple) -> bool:
+    return any(row[field] is not None for field in fields)
+
+
+def move_output_to_runs(apps, schema_editor):
+    """
+    The output stored on the input rows becomes a run per calculated project.
+    """
+    Project = apps.get_model('projects', 'Project')
+    Pile = apps.get_model('projects', 'Pile')
+    SoilLayer = apps.get_model('projects', 'SoilLayer')
+    HorizontalLoadPile = apps.get_model('projects', 'HorizontalLoadPile')
+    CalculationRun = apps.get_model('projects', 'CalculationRun')
+    PileResult = apps.get_model('projects', 'PileResult')
+    SoilLayerResult = apps.get_model('projects', 'SoilLayerResult')
+    HorizontalLoadResult = apps.get_model('projects', 'HorizontalLoadResult')
+
+    for project in Project._base_manager.all().iterator():
+        piles = [
+            row for row in Pile.objects.filter(project=project).values('Pname', *PILE_OUTPUT)
+            if row['Pname'] is not None and _has_output(row, PILE_OUTPUT)
+        ]
+
+        soil_layers = []
+        positions = {}
+        for row in SoilLayer.objects.filter(project=project).order_by('soil_profile_id', 'row_index', 'id').values(
+            'soil_profile__name', *SOIL_LAYER_OUTPUT
+        ):
+            name = row.pop('soil_profile__name')
+            position = positions[name] = positions.get(name, -1) + 1
+            if _has_output(row, SOIL_LAYER_OUTPUT):
+                soil_layers.append({'soil_profile': name, 'position': position, **row})
+
+        h_loads = []
+        positions = {}
+        for row in HorizontalLoadPile.objects.filter(project=project).order_by('case_id', 'row_index', 'id').values(
+            'case__name', *HORIZONTAL_LOAD_OUTPUT
+        ):
+            name = row.pop('case__name')
+            position = positions[name] = positions.get(name, -1) + 1
+            if _has_output(row, HORIZONTAL_LOAD_OUTPUT):
+                h_loads.append({'case': name, 'position': position, **row})
+
+        if not (piles or soil_layers or h_loads):
+            continue
+        run = CalculationRun.objects.create(
+            project=project, input_hash='', status='succeeded',
+            started_date=project.modified_date, finished_date=project.modified_date,
+        )
+        PileResult.objects.bulk_create([PileResult(run=run, **row) for row in piles], batch_size=1000)
+        SoilLayerResult.objects.bulk_create([SoilLayerResult(run=run, **row) for row in soil_layers], batch_size=1000)
+        HorizontalLoadResult.objects.bulk_create([HorizontalLoadResult(run=run, **row) for row in h_loads], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0075_importjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalculationRun',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('input_hash', models.CharField(help_text='SHA-256 of the calculation XML.', max_length=64, verbose_name='Input hash')),
+                ('dhpd_server', models.CharField(blank=True, default='', max_length=255, verbose_name='DHPD server')),
+                ('status', models.CharField(choices=[('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='running', max_length=16, verbose_name='Status')),
+                ('error', models.JSONField(blank=True, default=None, help_text='Error message of the proxy or the calculation server.', null=True, verbose_name='Error')),
+                ('started_date', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('finished_date', models.DateTimeField(blank=True, default=None, null=True)),
+                ('proxy_ms', models.FloatField(blank=True, default=None, help_text='Milliseconds waited for the DHPD proxy.', null=True, verbose_name='Proxy time')),
+                ('store_ms', models.FloatField(blank=True, default=None, help_text='Milliseconds to store the output.', null=True, verbose_name='Store time')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='calculation_runs', to=settings.AUTH_USER_MODEL)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='calculation_runs', to='projects.project')),
+            ],
+            options={
+                'ordering': ['-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='HorizontalLoadResult',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('case', models.CharField(max_length=128, verbose_name='Case Name')),
+                ('position', models.IntegerField(help_text='Index of the load in the load case.', verbose_name='Position')),
+                ('AsLaengs', models.FloatField(default=None, null=True, verbose_name='AsLaengs')),
+                ('AsLaengsCalc', models.FloatField(default=None, null=True, verbose_name='AsLaengsCalc')),
+                ('AsQuer', models.FloatField(default=None, null=True, verbose_name='AsQuer')),
+                ('AsQuerCalc', models.FloatField(default=None, null=True, verbose_name='AsQuerCalc')),
+                ('BewTyp', models.FloatField(default=None, null=True, verbose_name='BewTyp')),
+                ('Eps0', models.FloatField(default=None, null=True, verbose_name='Eps0')),
+                ('Eps1', models.FloatField(default=None, null=True, verbose_name='Eps1')),
+                ('KoteUeberdrueckt', models.FloatField(default=None, null=True, verbose_name='KoteUeberdrueckt')),
+                ('MMax', models.FloatField(default=None, null=True, verbose_name='MMax')),
+                ('MxMax', models.FloatField(default=None, null=True, verbose_name='MxMax')),
+                ('MyMax', models.FloatField(default=None, null=True, verbose_name='MyMax')),
+                ('Nachweisgruppe', models.FloatField(default=None, null=True, verbose_name='Nachweisgruppe')),
+                ('QMax', models.FloatField(default=None, null=True, verbose_name='QMax')),
+                ('QxMax', models.FloatField(default=None, null=True, verbose_name='QxMax')),
+                ('QyMax', models.FloatField(default=None, null=True, verbose_name='QyMax')),
+                ('wOben', models.FloatField(default=None, null=True, verbose_name='wOben')),
+                ('wxOben', models.FloatField(default=None, null=True, verbose_name='wxOben')),
+                ('wyOben', models.FloatField(default=None, null=True, verbose_name='wyOben')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='horizontal_load_results', to='projects.calculationrun')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PileResult',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('Pname', models.CharField(max_length=64, verbose_name='Name')),
+                ('Federsteifigkeit', models.FloatField(default=None, null=True, verbose_name='Federsteifigkeit')),
+                ('Nachweisgruppe', models.FloatField(default=None, null=True, verbose_name='Nachweisgruppe')),
+                ('R_d', models.FloatField(default=None, null=True, verbose_name='R_d')),
+                ('R_d_Min', models.FloatField(default=None, null=True, verbose_name='R_d_Min')),
+                ('Rb_k', models.FloatField(default=None, null=True, verbose_name='Rb_k')),
+                ('Rs_k', models.FloatField(default=None, null=True, verbose_name='Rs_k')),
+                ('Setzung', models.FloatField(default=None, null=True, verbose_name='Setzung')),
+                ('laenge_mit', models.FloatField(default=None, null=True, verbose_name='laenge_mit')),
+                ('laenge_ohne', models.FloatField(default=None, null=True, verbose_name='laenge_ohne')),
+                ('EzuR', models.FloatField(default=None, null=True, verbose_name='EzuR')),
+                ('GesamtBohrLaenge', models.FloatField(default=None, null=True, verbose_name='GesamtBohrLaenge')),
+                ('PfahlVolumen', models.FloatField(default=None, null=True, verbose_name='PfahlVolumen')),
+                ('delta_Laenge', models.FloatField(default=None, null=True, verbose_name='delta_Laenge')),
+                ('Soll_UK_Pfahl', models.FloatField(default=None, null=True, verbose_name='Soll_UK_Pfahl')),
+                ('BohrLaenge', models.FloatField(default=None, null=True, verbose_name='BohrLaenge')),
+                ('AsLaengs', models.FloatField(default=None, null=True, verbose_name='AsLaengs')),
+                ('BewBZWLieferlaenge', models.FloatField(default=None, null=True, verbose_name='BewBZWLieferlaenge')),
+                ('EindringTiefe', models.FloatField(default=None, null=True, verbose_name='EindringTiefe')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pile_results', to='projects.calculationrun')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SoilLayerResult',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('soil_profile', models.CharField(max_length=128, verbose_name='Profile Name')),
+                ('position', models.IntegerField(help_text='Index of the layer in the soil profile.', verbose_name='Position')),
+                ('PfahlTyp', models.CharField(blank=True, default=None, max_length=16, null=True, verbose_name='PfahlTyp')),
+                ('usedQsk', models.FloatField(default=None, null=True, verbose_name='usedQsk')),
+                ('usedQbk002', models.FloatField(default=None, null=True, verbose_name='usedQbk002')),
+                ('usedQbk003', models.FloatField(default=None, null=True, verbose_name='usedQbk003')),
+                ('usedQbk01', models.FloatField(default=None, null=True, verbose_name='usedQbk01')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='soil_layer_results', to='projects.calculationrun')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='calculationrun',
+            index=models.Index(fields=['project', '-id'], name='calc_run_project_latest_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='horizontalloadresult',
+            constraint=models.UniqueConstraint(fields=('run', 'case', 'position'), name='unique_h_load_result_position'),
+        ),
+        migrations.AddConstraint(
+            model_name='pileresult',
+            constraint=models.UniqueConstraint(fields=('run', 'Pname'), name='unique_pile_result_pname'),
+        ),
+        migrations.AddConstraint(
+            model_name='soillayerresult',
+            constraint=models.UniqueConstraint(fields=('run', 'soil_profile', 'position'), name='unique_soil_layer_result_position'),
+        ),
+        migrations.RunPython(move_output_to_runs, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='horizontalloadpile',
+            name='AsLaengs',
+        ),
+        migrations.RemoveField(
+            model_name='horizontalloadpile',
+            name='AsLaengsCalc',
+        ),
+        migrations.RemoveField(
+            model_name='horizontalloadpile',
+            name='AsQuer',
+        ),
+        migrations.RemoveField(
+            model_name='horizontalloadpile',
+            name='AsQuerCalc',
+        ),
+        migrations.RemoveField(
+            model_name='horizontalloadpile',
+            name='BewTyp',
+        ),
+        migrations.RemoveField(
+            model_name='horizontalloadpile',
+            name='Eps0',
+        ),
+        migrations.RemoveField(
+            model_name='horizontalloadpile',
+            name='Eps1',
+        ),
+        migrations.RemoveField(
+            model_name='horizontalloadpile',
+            name='KoteUeberdrueckt',
+        ),
+        migrations.RemoveField(
+            model_name='horizontalloadpile',
+            name='MMax',
+        ),
+        migrations.RemoveField(
+            model_name='horizontalloadpile',
+            name='MxMax',
+        ),
+        migrations.RemoveField(
+            model_name='horizontalloadpile',
+            name='MyMax',
+        ),
+        migrations.RemoveField(
+            model_name='horizontalloadpile',
+            name='Nachweisgruppe',
+        ),
+        migrations.RemoveField(
+            model_name='horizontalloadpile',
+            name='QMax',
+        ),
+        migrations.RemoveField(
+            model_name='horizontalloadpile',
+            name='QxMax',
+        ),
+        migrations.RemoveField(
+            model_name='horizontalloadpile',
+            name='QyMax',
+        ),
+        migrations.RemoveField(
+            model_name='horizontalloadpile',
+            name='wOben',
+        ),
+        migrations.RemoveField(
+            model_name='horizontalloadpile',
+            name='wxOben',
+        ),
+        migrations.RemoveField(
+            model_name='horizontalloadpile',
+            name='wyOben',
+        ),
+        migrations.RemoveField(
+            model_name='pile',
+            name='AsLaengs',
+        ),
+        migrations.RemoveField(
+            model_name='pile',
+            name='BewBZWLieferlaenge',
+        ),
+        migrations.RemoveField(
+            model_name='pile',
+            name='BohrLaenge',
+        ),
+        migrations.RemoveField(
+            model_name='pile',
+            name='EindringTiefe',
+        ),
+        migrations.RemoveField(
+            model_name='pile',
+            name='EzuR',
+        ),
+        migrations.RemoveField(
+            model_name='pile',
+            name='Federsteifigkeit',
+        ),
+        migrations.RemoveField(
+            model_name='pile',
+            name='GesamtBohrLaenge',
+        ),
+        migrations.RemoveField(
+            model_name='pile',
+            name='Nachweisgruppe',
+        ),
+        migrations.RemoveField(
+            model_name='pile',
+            name='PfahlVolumen',
+        ),
+        migrations.RemoveField(
+            model_name='pile',
+            name='R_d',
+        ),
+        migrations.RemoveField(
+            model_name='pile',
+            name='R_d_Min',
+        ),
+        migrations.RemoveField(
+            model_name='pile',
+            name='Rb_k',
+        ),
+        migrations.RemoveField(
+            model_name='pile',
+            name='Rs_k',
+        ),
+        migrations.RemoveField(
+            model_name='pile',
+            name='Setzung',
+        ),
+        migrations.RemoveField(
+            model_name='pile',
+            name='Soll_UK_Pfahl',
+        ),
+        migrations.RemoveField(
+            model_name='pile',
+            name='delta_Laenge',
+        ),
+        migrations.RemoveField(
+            model_name='pile',
+            name='laenge_mit',
+        ),
+        migrations.RemoveField(
+            model_name='pile',
+            name='laenge_ohne',
+        ),
+        migrations.RemoveField(
+            model_name='soillayer',
+            name='PfahlTyp',
+        ),
+        migrations.RemoveField(
+            model_name='soillayer',
+            name='usedQbk002',
+        ),
+        migrations.RemoveField(
+            model_name='soillayer',
+            name='usedQbk003',
+        ),
+        migrations.RemoveField(
+            model_name='soillayer',
+            name='usedQbk01',
+        ),
+        migrations.RemoveField(
+            model_name='soillayer',
+            name='usedQsk',
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1 on 2026-10-19 19:35
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0076_calculation_runs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalculationSnapshot',
+            fields=[
+                ('run', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='snapshot', serialize=False, to='projects.calculationrun')),
+                ('codec', models.CharField(choices=[('gzip', 'gzip'), ('zstd', 'Zstandard')], max_length=8, verbose_name='Codec')),
+                ('data', models.BinaryField(help_text='Compressed response of the proxy.', verbose_name='Data')),
+                ('size', models.BigIntegerField(help_text='Bytes of the response.', verbose_name='Size')),
+                ('compressed_size', models.BigIntegerField(help_text='Bytes of the compressed response.', verbose_name='Compressed size')),
+                ('checksum', models.CharField(help_text='SHA-256 of the response.', max_length=64, verbose_name='Checksum')),
+                ('created_date', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-19 19:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0077_calculation_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='tables_version',
+            field=models.IntegerField(default=0, editable=False, help_text='Incremented on every write of the pile, soil layer and horizontal load tables.', verbose_name='Tables version'),
+        ),
+    ]
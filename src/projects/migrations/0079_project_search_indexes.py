@@ -0,0 +1,56 @@
+# Generated by Django 5.1 on 2026-10-19 20:05
+
+from django.db import migrations
+
+
+# Index -> (model, field), see projects/search.py
+TRIGRAM_INDEXES = {
+    'project_name_trgm_idx': ('project', 'name'),
+    'settings_location_trgm_idx': ('projectsettings', 'projektLocation'),
+    'settings_street_trgm_idx': ('projectsettings', 'projektStreet'),
+}
+LOWER_NAME_INDEX = 'project_name_lower_idx'
+
+
+def _trigram_available(connection) -> bool:
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def create_search_indexes(apps, schema_editor):
+    quote = schema_editor.quote_name
+    project_table = apps.get_model('projects', 'Project')._meta.db_table
+
+    # PostgreSQL servers without the contrib extensions get the plain index
+    if not _trigram_available(schema_editor.connection):
+        schema_editor.execute(
+            f"CREATE INDEX {quote(LOWER_NAME_INDEX)} ON {quote(project_table)} (LOWER({quote('name')}))"
+        )
+        return
+
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for index, (model_name, field) in TRIGRAM_INDEXES.items():
+        table = apps.get_model('projects', model_name)._meta.db_table
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {quote(index)} ON {quote(table)} USING gin ({quote(field)} gin_trgm_ops)"
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    quote = schema_editor.quote_name
+    for index in (LOWER_NAME_INDEX, *TRIGRAM_INDEXES):
+        schema_editor.execute(f"DROP INDEX IF EXISTS {quote(index)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0078_project_tables_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
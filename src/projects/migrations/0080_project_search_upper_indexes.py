@@ -0,0 +1,74 @@
+# Generated by Django 5.1 on 2026-10-19 21:40
+
+from importlib import import_module
+
+from django.db import migrations
+
+
+# Index -> (model, field), see projects/search.py. Django compares
+# UPPER(field) for icontains and istartswith.
+TRIGRAM_INDEXES = {
+    'project_name_upper_trgm_idx': ('project', 'name'),
+    'settings_location_upper_trgm_idx': ('projectsettings', 'projektLocation'),
+    'settings_street_upper_trgm_idx': ('projectsettings', 'projektStreet'),
+}
+UPPER_NAME_INDEX = 'project_name_upper_idx'
+
+# Indexes of 0079 on the bare columns, no lookup of the search uses them
+OLD_INDEXES = (
+    'project_name_trgm_idx',
+    'settings_location_trgm_idx',
+    'settings_street_trgm_idx',
+    'project_name_lower_idx',
+)
+
+
+def _trigram_available(connection) -> bool:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def create_search_indexes(apps, schema_editor):
+    quote = schema_editor.quote_name
+    for index in OLD_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {quote(index)}")
+
+    # Other databases don't compare UPPER(field)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    # PostgreSQL servers without the contrib extensions get the prefix index
+    if not _trigram_available(schema_editor.connection):
+        project_table = apps.get_model('projects', 'Project')._meta.db_table
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {quote(UPPER_NAME_INDEX)} ON {quote(project_table)} "
+            f"(UPPER({quote('name')}) varchar_pattern_ops)"
+        )
+        return
+
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for index, (model_name, field) in TRIGRAM_INDEXES.items():
+        table = apps.get_model('projects', model_name)._meta.db_table
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {quote(index)} ON {quote(table)} "
+            f"USING gin (UPPER({quote(field)}) gin_trgm_ops)"
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    quote = schema_editor.quote_name
+    for index in (UPPER_NAME_INDEX, *TRIGRAM_INDEXES):
+        schema_editor.execute(f"DROP INDEX IF EXISTS {quote(index)}")
+    import_module('projects.migrations.0079_project_search_indexes').create_search_indexes(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0079_project_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
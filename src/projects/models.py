@@ -1,3 +1,5 @@
+import uuid
+
 from django.contrib.auth.models import User
 from django.utils.timezone import now
 from django.db import models, transaction
@@ -14,6 +16,7 @@ class Project(BaseModel):
     company = models.ForeignKey( Company, related_name="projects", on_delete=models.CASCADE, verbose_name="Company", help_text="The company this project belongs to.")
     pdf = models.CharField( max_length=255, verbose_name="PDF", default="", help_text="The pdf url of the project.")
     xml = models.CharField( max_length=255, verbose_name="XML", default="", help_text="The xml url of the project.")
+    tables_version = models.IntegerField( default=0, editable=False, verbose_name="Tables version", help_text="Incremented on every write of the pile, soil layer and horizontal load tables.")
 
     objects = ActiveManager()  # Custom manager for active records
     all_objects = Manager()   # Include all records (active and inactive)
@@ -27,6 +30,14 @@ class Project(BaseModel):
     def __str__(self):
         return self.name
     
+    def tables_changed(self):
+        """
+        Increment the tables version after a write of the project tables,
+        caches of the tables (e.g. the pile spatial index) are outdated.
+        """
+        Project.all_objects.filter(pk=self.pk).update(tables_version=models.F('tables_version') + 1)
+        self.tables_version += 1
+
     def copy_project(self, user=None, new_name_suffix=" Copy"):
         """
         Create a copy of the current project with a modified name.
@@ -67,6 +78,10 @@ class Project(BaseModel):
                 for horizontal_case in original_horizontal_cases:
                     horizontal_case.copy_horizontal_cases(new_project)
 
+                # Copy the output of the latest calculation
+                from .calculation_runs import copy_latest_run
+                copy_latest_run(self, new_project)
+
                 return new_project
 
         except Exception as e:
@@ -283,26 +298,6 @@ class Pile(models.Model):
     einzelzulaessigeSetzungCm = models.FloatField('einzelzulaessigeSetzungCm',null=True,default=0,blank=True,help_text='')
     prozentualerMantelAnteil  = models.FloatField('prozentualerMantelAnteil',null=True,default=100,blank=True,help_text='')
 
-    # Calculation result fields. All unknown fields are ignored for now.
-    Federsteifigkeit   = models.FloatField('Federsteifigkeit',null=True,default=None,help_text='')
-    Nachweisgruppe     = models.FloatField('Nachweisgruppe',null=True,default=None,help_text='')
-    R_d                = models.FloatField('R_d',null=True,default=None,help_text='')
-    R_d_Min            = models.FloatField('R_d_Min',null=True,default=None,help_text='')
-    Rb_k               = models.FloatField('Rb_k',null=True,default=None,help_text='')
-    Rs_k               = models.FloatField('Rs_k',null=True,default=None,help_text='')
-    Setzung            = models.FloatField('Setzung',null=True,default=None,help_text='')
-    laenge_mit         = models.FloatField('laenge_mit',null=True,default=None,help_text='')
-    laenge_ohne        = models.FloatField('laenge_ohne',null=True,default=None,help_text='')
-    EzuR               = models.FloatField('EzuR',null=True,default=None,help_text='')
-    GesamtBohrLaenge   = models.FloatField('GesamtBohrLaenge',null=True,default=None,help_text='')
-    PfahlVolumen       = models.FloatField('PfahlVolumen',null=True,default=None,help_text='')
-    delta_Laenge       = models.FloatField('delta_Laenge',null=True,default=None,help_text='')
-    Soll_UK_Pfahl      = models.FloatField('Soll_UK_Pfahl',null=True,default=None,help_text='')
-    BohrLaenge         = models.FloatField('BohrLaenge',null=True,default=None,help_text='')
-    AsLaengs           = models.FloatField('AsLaengs',null=True,default=None,help_text='')
-    BewBZWLieferlaenge = models.FloatField('BewBZWLieferlaenge',null=True,default=None,help_text='')
-    EindringTiefe      = models.FloatField('EindringTiefe',null=True,default=None,help_text='')
-
     class Meta:
         ordering = ['row_index']
         constraints = [
@@ -345,20 +340,7 @@ class Pile(models.Model):
                 einzelMaximaleBohrtiefe              = self.einzelMaximaleBohrtiefe,
                 einzelMindestEindringung             = self.einzelMindestEindringung,
                 einzelzulaessigeSetzungCm            = self.einzelzulaessigeSetzungCm,
-                prozentualerMantelAnteil             = self.prozentualerMantelAnteil,
-                Federsteifigkeit                     = self.Federsteifigkeit,
-                Nachweisgruppe                       = self.Nachweisgruppe,
-                R_d                                  = self.R_d,
-                R_d_Min                              = self.R_d_Min,
-                Rb_k                                 = self.Rb_k,
-                Rs_k                                 = self.Rs_k,
-                Setzung                              = self.Setzung,
-                laenge_mit                           = self.laenge_mit,
-                laenge_ohne                          = self.laenge_ohne,
-                EzuR                                 = self.EzuR,
-                GesamtBohrLaenge                     = self.GesamtBohrLaenge,
-                PfahlVolumen                         = self.PfahlVolumen,
-                delta_Laenge                         = self.delta_Laenge
+                prozentualerMantelAnteil             = self.prozentualerMantelAnteil
             )
 
             return copy_pile
@@ -443,12 +425,6 @@ class SoilLayer(models.Model):
     bodenSchichtColor   = models.CharField('bodenSchichtColor',null=True,default='D8D8D8', blank=True, max_length=10, help_text='')
     tauNk               = models.FloatField('tauNk', null=True,default=0, blank=True, help_text='')
     qskZug              = models.FloatField('qskZug', null=True,default=0, blank=True, help_text='')
-    # Output Qsk/Qbk values in case Cu or Qc were used
-    PfahlTyp = models.CharField('PfahlTyp', null=True, blank=True, default=None, help_text='')
-    usedQsk    = models.FloatField('usedQsk', null=True, default=None, help_text='')
-    usedQbk002 = models.FloatField('usedQbk002', null=True, default=None, help_text='')
-    usedQbk003 = models.FloatField('usedQbk003', null=True, default=None, help_text='')
-    usedQbk01  = models.FloatField('usedQbk01', null=True, default=None, help_text='')
 
     class Meta:
         ordering = ['row_index']
@@ -492,11 +468,7 @@ class SoilLayer(models.Model):
                 qskStern            = self.qskStern,
                 tauNk               = self.tauNk,
                 qskZug              = self.qskZug,
-                bodenSchichtColor   = self.bodenSchichtColor,
-                usedQsk             = self.usedQsk,
-                usedQbk002          = self.usedQbk002,
-                usedQbk003          = self.usedQbk003,
-                usedQbk01           = self.usedQbk01
+                bodenSchichtColor   = self.bodenSchichtColor
             )
 
             return copy_soil_layer
@@ -567,26 +539,6 @@ class HorizontalLoadPile(models.Model):
     pAnOberkante        = models.FloatField('pAnOberkante', default=1.9, help_text='')
     qkz                 = models.FloatField('qkz',null=True, help_text='')
 
-    # Output fields
-    AsLaengs         = models.FloatField('AsLaengs', null=True, default=None, help_text='')
-    AsLaengsCalc     = models.FloatField('AsLaengsCalc', null=True, default=None, help_text='')
-    AsQuer           = models.FloatField('AsQuer', null=True, default=None, help_text='')
-    AsQuerCalc       = models.FloatField('AsQuerCalc', null=True, default=None, help_text='')
-    BewTyp           = models.FloatField('BewTyp', null=True, default=None, help_text='')
-    Eps0             = models.FloatField('Eps0', null=True, default=None, help_text='')
-    Eps1             = models.FloatField('Eps1', null=True, default=None, help_text='')
-    KoteUeberdrueckt = models.FloatField('KoteUeberdrueckt', null=True, default=None, help_text='')
-    MMax             = models.FloatField('MMax', null=True, default=None, help_text='')
-    MxMax            = models.FloatField('MxMax', null=True, default=None, help_text='')
-    MyMax            = models.FloatField('MyMax', null=True, default=None, help_text='')
-    Nachweisgruppe   = models.FloatField('Nachweisgruppe', null=True, default=None, help_text='')
-    QMax             = models.FloatField('QMax', null=True, default=None, help_text='')
-    QxMax            = models.FloatField('QxMax', null=True, default=None, help_text='')
-    QyMax            = models.FloatField('QyMax', null=True, default=None, help_text='')
-    wOben            = models.FloatField('wOben', null=True, default=None, help_text='')
-    wxOben           = models.FloatField('wxOben', null=True, default=None, help_text='')
-    wyOben           = models.FloatField('wyOben', null=True, default=None, help_text='')
-
     class Meta:
         ordering = ['row_index']
         constraints = [
@@ -627,28 +579,211 @@ class HorizontalLoadPile(models.Model):
                 OKBodenBiegung      = self.OKBodenBiegung,
                 gkz                 = self.gkz,
                 pAnOberkante        = self.pAnOberkante,
-                qkz                 = self.qkz,
-                AsLaengs            = self.AsLaengs,
-                AsLaengsCalc        = self.AsLaengsCalc,
-                AsQuer              = self.AsQuer,
-                AsQuerCalc          = self.AsQuerCalc,
-                BewTyp              = self.BewTyp,
-                Eps0                = self.Eps0,
-                Eps1                = self.Eps1,
-                KoteUeberdrueckt    = self.KoteUeberdrueckt,
-                MMax                = self.MMax,
-                MxMax               = self.MxMax,
-                MyMax               = self.MyMax,
-                Nachweisgruppe      = self.Nachweisgruppe,
-                QMax                = self.QMax,
-                QxMax               = self.QxMax,
-                QyMax               = self.QyMax,
-                wOben               = self.wOben,
-                wxOben              = self.wxOben,
-                wyOben              = self.wyOben
+                qkz                 = self.qkz
             )
 
             return copy_h_load
 
         except Exception as e:
             raise Exception(e) from e
+
+
+class ImportJob(models.Model):
+    """
+    Background import of a project file (see projects.imports).
+    """
+    STATUS_PENDING   = 'pending'
+    STATUS_RUNNING   = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED    = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    PHASE_VALIDATE = 'validate'
+    PHASE_PARSE    = 'parse'
+    PHASE_CONVERT  = 'convert'
+    PHASE_PERSIST  = 'persist'
+    PHASE_CHOICES = [
+        (PHASE_VALIDATE, 'Validate'),
+        (PHASE_PARSE, 'Parse'),
+        (PHASE_CONVERT, 'Convert'),
+        (PHASE_PERSIST, 'Persist'),
+    ]
+
+    id             = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    project        = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="import_jobs")
+    created_by     = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="import_jobs")
+    file_name      = models.CharField('File name', max_length=255, help_text='Name of the uploaded file.')
+    file_path      = models.CharField('File path', max_length=1024, blank=True, default='', help_text='Temporary file of the upload, removed when the job is done.')
+    status         = models.CharField('Status', max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING, help_text='')
+    phase          = models.CharField('Phase', max_length=16, choices=PHASE_CHOICES, null=True, blank=True, default=None, help_text='')
+    rows_processed = models.IntegerField('Rows processed', default=0, help_text='')
+    result         = models.JSONField('Result', null=True, blank=True, default=None, help_text='Number of stored rows per table.')
+    error          = models.JSONField('Error', null=True, blank=True, default=None, help_text='Error message or list of validation errors.')
+    created_date   = models.DateTimeField(default=now, editable=False)
+    modified_date  = models.DateTimeField(default=now)
+    finished_date  = models.DateTimeField(null=True, blank=True, default=None)
+
+    class Meta:
+        ordering = ['-created_date']
+
+    def __str__(self):
+        return f"Import {self.file_name} ({self.project.name}): {self.status}"
+
+
+class CalculationRun(models.Model):
+    """
+    One calculation of a project by the DHPD server. The output is stored
+    in PileResult, SoilLayerResult and HorizontalLoadResult, the input
+    rows are not written by a calculation. The latest run of a project
+    is its current result (see projects.calculation_runs).
+    """
+    STATUS_RUNNING   = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED    = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    id            = models.BigAutoField(primary_key=True)
+    project       = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="calculation_runs")
+    created_by    = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="calculation_runs")
+    input_hash    = models.CharField('Input hash', max_length=64, help_text='SHA-256 of the calculation XML.')
+    dhpd_server   = models.CharField('DHPD server', max_length=255, blank=True, default='', help_text='')
+    status        = models.CharField('Status', max_length=16, choices=STATUS_CHOICES, default=STATUS_RUNNING, help_text='')
+    error         = models.JSONField('Error', null=True, blank=True, default=None, help_text='Error message of the proxy or the calculation server.')
+    started_date  = models.DateTimeField(default=now, editable=False)
+    finished_date = models.DateTimeField(null=True, blank=True, default=None)
+    proxy_ms      = models.FloatField('Proxy time', null=True, blank=True, default=None, help_text='Milliseconds waited for the DHPD proxy.')
+    store_ms      = models.FloatField('Store time', null=True, blank=True, default=None, help_text='Milliseconds to store the output.')
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['project', '-id'], name='calc_run_project_latest_idx'),
+        ]
+
+    def __str__(self):
+        return f"Calculation {self.id} ({self.project.name}): {self.status}"
+
+
+class PileResult(models.Model):
+    """
+    Output of a calculation run for a pile, matched by Pname.
+    """
+    id    = models.BigAutoField(primary_key=True)
+    run   = models.ForeignKey(CalculationRun, on_delete=models.CASCADE, related_name="pile_results")
+    Pname = models.CharField('Name', max_length=64, help_text='')
+
+    Federsteifigkeit   = models.FloatField('Federsteifigkeit',null=True,default=None,help_text='')
+    Nachweisgruppe     = models.FloatField('Nachweisgruppe',null=True,default=None,help_text='')
+    R_d                = models.FloatField('R_d',null=True,default=None,help_text='')
+    R_d_Min            = models.FloatField('R_d_Min',null=True,default=None,help_text='')
+    Rb_k               = models.FloatField('Rb_k',null=True,default=None,help_text='')
+    Rs_k               = models.FloatField('Rs_k',null=True,default=None,help_text='')
+    Setzung            = models.FloatField('Setzung',null=True,default=None,help_text='')
+    laenge_mit         = models.FloatField('laenge_mit',null=True,default=None,help_text='')
+    laenge_ohne        = models.FloatField('laenge_ohne',null=True,default=None,help_text='')
+    EzuR               = models.FloatField('EzuR',null=True,default=None,help_text='')
+    GesamtBohrLaenge   = models.FloatField('GesamtBohrLaenge',null=True,default=None,help_text='')
+    PfahlVolumen       = models.FloatField('PfahlVolumen',null=True,default=None,help_text='')
+    delta_Laenge       = models.FloatField('delta_Laenge',null=True,default=None,help_text='')
+    Soll_UK_Pfahl      = models.FloatField('Soll_UK_Pfahl',null=True,default=None,help_text='')
+    BohrLaenge         = models.FloatField('BohrLaenge',null=True,default=None,help_text='')
+    AsLaengs           = models.FloatField('AsLaengs',null=True,default=None,help_text='')
+    BewBZWLieferlaenge = models.FloatField('BewBZWLieferlaenge',null=True,default=None,help_text='')
+    EindringTiefe      = models.FloatField('EindringTiefe',null=True,default=None,help_text='')
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(fields=['run', 'Pname'], name='unique_pile_result_pname'),
+        ]
+
+
+class SoilLayerResult(models.Model):
+    """
+    Output of a calculation run for a soil layer, matched by the name of
+    the soil profile and the position of the layer in the profile.
+    """
+    id           = models.BigAutoField(primary_key=True)
+    run          = models.ForeignKey(CalculationRun, on_delete=models.CASCADE, related_name="soil_layer_results")
+    soil_profile = models.CharField('Profile Name', max_length=128, help_text='')
+    position     = models.IntegerField('Position', help_text='Index of the layer in the soil profile.')
+
+    # Output Qsk/Qbk values in case Cu or Qc were used
+    PfahlTyp   = models.CharField('PfahlTyp', null=True, blank=True, default=None, max_length=16, help_text='')
+    usedQsk    = models.FloatField('usedQsk', null=True, default=None, help_text='')
+    usedQbk002 = models.FloatField('usedQbk002', null=True, default=None, help_text='')
+    usedQbk003 = models.FloatField('usedQbk003', null=True, default=None, help_text='')
+    usedQbk01  = models.FloatField('usedQbk01', null=True, default=None, help_text='')
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(fields=['run', 'soil_profile', 'position'], name='unique_soil_layer_result_position'),
+        ]
+
+
+class HorizontalLoadResult(models.Model):
+    """
+    Output of a calculation run for a horizontal load, matched by the
+    name of the load case and the position of the load in the case.
+    """
+    id       = models.BigAutoField(primary_key=True)
+    run      = models.ForeignKey(CalculationRun, on_delete=models.CASCADE, related_name="horizontal_load_results")
+    case     = models.CharField('Case Name', max_length=128, help_text='')
+    position = models.IntegerField('Position', help_text='Index of the load in the load case.')
+
+    AsLaengs         = models.FloatField('AsLaengs', null=True, default=None, help_text='')
+    AsLaengsCalc     = models.FloatField('AsLaengsCalc', null=True, default=None, help_text='')
+    AsQuer           = models.FloatField('AsQuer', null=True, default=None, help_text='')
+    AsQuerCalc       = models.FloatField('AsQuerCalc', null=True, default=None, help_text='')
+    BewTyp           = models.FloatField('BewTyp', null=True, default=None, help_text='')
+    Eps0             = models.FloatField('Eps0', null=True, default=None, help_text='')
+    Eps1             = models.FloatField('Eps1', null=True, default=None, help_text='')
+    KoteUeberdrueckt = models.FloatField('KoteUeberdrueckt', null=True, default=None, help_text='')
+    MMax             = models.FloatField('MMax', null=True, default=None, help_text='')
+    MxMax            = models.FloatField('MxMax', null=True, default=None, help_text='')
+    MyMax            = models.FloatField('MyMax', null=True, default=None, help_text='')
+    Nachweisgruppe   = models.FloatField('Nachweisgruppe', null=True, default=None, help_text='')
+    QMax             = models.FloatField('QMax', null=True, default=None, help_text='')
+    QxMax            = models.FloatField('QxMax', null=True, default=None, help_text='')
+    QyMax            = models.FloatField('QyMax', null=True, default=None, help_text='')
+    wOben            = models.FloatField('wOben', null=True, default=None, help_text='')
+    wxOben           = models.FloatField('wxOben', null=True, default=None, help_text='')
+    wyOben           = models.FloatField('wyOben', null=True, default=None, help_text='')
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(fields=['run', 'case', 'position'], name='unique_h_load_result_position'),
+        ]
+
+
+class CalculationSnapshot(models.Model):
+    """
+    Raw response of the DHPD proxy for a calculation run, compressed
+    (see projects.calculation_snapshots). Keeps the parts of the output
+    which are not stored in the result tables (gruppenStatiken, Kosten, ...).
+    """
+    CODEC_GZIP = 'gzip'
+    CODEC_ZSTD = 'zstd'
+    CODEC_CHOICES = [
+        (CODEC_GZIP, 'gzip'),
+        (CODEC_ZSTD, 'Zstandard'),
+    ]
+
+    run             = models.OneToOneField(CalculationRun, on_delete=models.CASCADE, primary_key=True, related_name="snapshot")
+    codec           = models.CharField('Codec', max_length=8, choices=CODEC_CHOICES, help_text='')
+    data            = models.BinaryField('Data', help_text='Compressed response of the proxy.')
+    size            = models.BigIntegerField('Size', help_text='Bytes of the response.')
+    compressed_size = models.BigIntegerField('Compressed size', help_text='Bytes of the compressed response.')
+    checksum        = models.CharField('Checksum', max_length=64, help_text='SHA-256 of the response.')
+    created_date    = models.DateTimeField(default=now, editable=False)
+
+    def __str__(self):
+        return f"Snapshot of calculation {self.run_id}: {self.size} bytes"
@@ -0,0 +1,164 @@
+"""
+Pre-flight validation of a project before it is sent to the DHPD server.
+
+The calculate serializers stop at the first row with a missing field and
+the DHPD server reports a broken project only after a long round trip.
+preflight checks every row of the project tables at once, with one
+values query per table:
+
+    - required fields of the piles, soil profiles, soil layers and
+      horizontal loads (the fields the calculate serializers require)
+    - BodenProfil of the piles resolves to a soil profile name
+    - endKote of the soil layers falls monotonically from the startKote
+      of their profile
+    - value ranges (RANGES)
+
+Pname is unique in the piles and in each horizontal load case by the
+constraints of the tables.
+
+The errors block a calculation. Pile pairs closer than their required
+axis distance (see projects.spatial_index) are reported as warnings.
+"""
+import math
+
+from .models import Pile, SoilProfile, SoilLayer, HorizontalLoadPile
+from .spatial_index import PileIndex
+
+PILE_REQUIRED_FIELDS = (
+    "Pname",
+    "AEHoehe",
+    "AlternativeCharakteristischeLastZ",
+    "AlternativeDesignLastZ",
+    "BetonZyl",
+    "BodenProfil",
+    "Hochwert",
+    "Rechtswert",
+    "SollDurchmesser",
+    "SollPfahlOberKante",
+)
+SOIL_PROFILE_REQUIRED_FIELDS = ("grundwasserStand", "startKote")
+SOIL_LAYER_REQUIRED_FIELDS = ("endKote",)
+HORIZONTAL_LOAD_REQUIRED_FIELDS = ("Pname", "gkz", "qkz")
+
+# Table -> {field: (minimum, maximum, minimum excluded)}, None = no limit
+RANGES = {
+    'piles': {
+        'SollDurchmesser':          (0, None, True),
+        'PfahlAchsAbstandxD':       (0, None, True),
+        'PfahlAnzahl':              (1, None, False),
+        'prozentualerMantelAnteil': (0, 100, False),
+    },
+    'soil_layers': {
+        'gammaBoden':       (0, None, True),
+        'gammaStrichBoden': (0, None, False),
+        'phi':              (0, 90, False),
+        'ESoben':           (0, None, False),
+        'ESunten':          (0, None, False),
+        'MaxElementWeite':  (0, None, True),
+    },
+}
+
+
+def _missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _error(table: str, row, field: str, message: str) -> dict:
+    return {'table': table, 'row': row, 'field': field, 'message': message}
+
+
+class _Report:
+    def __init__(self):
+        self.errors = []
+        self.warnings = []
+
+    def required(self, table: str, row, values: dict, fields: tuple):
+        for field in fields:
+            if _missing(values[field]):
+                self.errors.append(_error(table, row, field, f"{field} is missing."))
+
+    def ranges(self, table: str, row, values: dict):
+        for field, (minimum, maximum, exclusive) in RANGES[table].items():
+            value = values[field]
+            if _missing(value):
+                continue
+            if minimum is not None and (value <= minimum if exclusive else value < minimum):
+                relation = 'greater than' if exclusive else 'at least'
+                self.errors.append(_error(table, row, field, f"{field} must be {relation} {minimum}, is {value}."))
+            elif maximum is not None and value > maximum:
+                self.errors.append(_error(table, row, field, f"{field} must be at most {maximum}, is {value}."))
+
+
+def preflight(project) -> dict:
+    """
+    The function validates all table rows of a project for a calculation.
+
+    Attributes:
+        - project: Project model object
+    Return: dict with the errors (blocking) and warnings, each error with
+        table, row (Pname, soil profile name or [name, position]), field
+        and message
+    """
+    report = _Report()
+
+    # Soil profiles by name, the hash index of the BodenProfil references
+    profile_fields = ('id', 'name', *SOIL_PROFILE_REQUIRED_FIELDS)
+    profiles = {}
+    for values in SoilProfile.objects.filter(project=project).values(*profile_fields):
+        report.required('soil_profiles', values['name'], values, SOIL_PROFILE_REQUIRED_FIELDS)
+        profiles[values['id']] = values
+    profile_names = {values['name'] for values in profiles.values()}
+
+    layer_fields = ('soil_profile_id', *SOIL_LAYER_REQUIRED_FIELDS, *RANGES['soil_layers'])
+    previous = {}
+    positions = {}
+    for values in (
+        SoilLayer.objects.filter(project=project)
+        .order_by('soil_profile_id', 'row_index', 'id')
+        .values(*layer_fields)
+    ):
+        profile = profiles[values['soil_profile_id']]
+        position = positions[profile['id']] = positions.get(profile['id'], -1) + 1
+        row = [profile['name'], position]
+        report.required('soil_layers', row, values, SOIL_LAYER_REQUIRED_FIELDS)
+        report.ranges('soil_layers', row, values)
+
+        # Each layer ends below the layer above it, the first one below the startKote
+        end_kote = values['endKote']
+        if _missing(end_kote):
+            continue
+        above = previous.get(profile['id'], profile['startKote'])
+        if not _missing(above) and end_kote >= above:
+            report.errors.append(_error(
+                'soil_layers', row, 'endKote',
+                f"endKote {end_kote} must be below {'startKote' if position == 0 else 'the layer above'} ({above})."
+            ))
+        previous[profile['id']] = end_kote
+
+    pile_fields = tuple(dict.fromkeys((*PILE_REQUIRED_FIELDS, *RANGES['piles'])))
+    for position, values in enumerate(
+        Pile.objects.filter(project=project).order_by('row_index', 'id').values(*pile_fields)
+    ):
+        row = values['Pname'] if not _missing(values['Pname']) else position
+        report.required('piles', row, values, PILE_REQUIRED_FIELDS)
+        report.ranges('piles', row, values)
+        if values['BodenProfil'] is not None and values['BodenProfil'] not in profile_names:
+            report.errors.append(_error(
+                'piles', row, 'BodenProfil', f"Soil profile {values['BodenProfil']} doesn't exist."
+            ))
+
+    for values in (
+        HorizontalLoadPile.objects.filter(project=project)
+        .order_by('case_id', 'row_index', 'id')
+        .values('case__name', *HORIZONTAL_LOAD_REQUIRED_FIELDS)
+    ):
+        row = [values['case__name'], values['Pname']]
+        report.required('horizontal_loads', row, values, HORIZONTAL_LOAD_REQUIRED_FIELDS)
+
+    for spacing in PileIndex.of_project(project).invalid_spacings():
+        report.warnings.append(_error(
+            'piles', spacing['piles'], 'Hochwert/Rechtswert',
+            f"Axis distance {spacing['distance']:.2f} is below the required {spacing['required']:.2f}."
+        ))
+
+    return {'valid': not report.errors, 'errors': report.errors, 'warnings': report.warnings}
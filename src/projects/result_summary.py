@@ -0,0 +1,143 @@
+"""
+Summary of the calculation output of a project, computed in the database.
+
+The piles of the project are joined with the output of the latest
+calculation run by Pname and grouped by PfahlTyp, BodenProfil and
+Nachweisgruppe in one query. Each group has
+
+    - piles: number of piles
+    - calculated: number of piles with output
+    - PfahlVolumen, GesamtBohrLaenge: totals
+    - EzuR: maximum utilisation in %
+    - over_limit: piles whose EzuR exceeds the AuslastungProzent of the
+      project settings
+
+Coarser groupings (e.g. only PfahlTyp) and the totals are summed up from
+these groups, no pile row leaves the database.
+
+A summary is valid for one Project.tables_version, one run in one state
+and one AuslastungProzent, it is kept in the Django cache under a key of
+all four for PROJECT_SUMMARY_CACHE_TIMEOUT seconds. A refresh of an
+unchanged project reads the cache only.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, OuterRef, Q, Subquery, Sum
+
+from .models import CalculationRun, Pile, PileResult
+
+SUMMARY_GROUPS = ('PfahlTyp', 'BodenProfil', 'Nachweisgruppe')
+
+# Output field -> annotation of the joined PileResult
+_OUTPUT = {
+    'Nachweisgruppe': 'result_Nachweisgruppe',
+    'PfahlVolumen': 'result_PfahlVolumen',
+    'GesamtBohrLaenge': 'result_GesamtBohrLaenge',
+    'EzuR': 'result_EzuR',
+}
+_GROUP_FIELDS = {'PfahlTyp': 'PfahlTyp', 'BodenProfil': 'BodenProfil', 'Nachweisgruppe': _OUTPUT['Nachweisgruppe']}
+
+# Summary of a project without piles
+EMPTY_SUMMARY = {
+    'piles': 0,
+    'calculated': 0,
+    'PfahlVolumen': None,
+    'GesamtBohrLaenge': None,
+    'EzuR': None,
+    'over_limit': 0,
+}
+
+
+def _add(total, value):
+    return value if total is None else total if value is None else total + value
+
+
+def _max(maximum, value):
+    return value if maximum is None else maximum if value is None else max(maximum, value)
+
+
+def _merge(groups: list, group_by: tuple) -> list:
+    """
+    The function sums the groups up to the fields of group_by.
+    """
+    merged = {}
+    for group in groups:
+        key = tuple(group[field] for field in group_by)
+        total = merged.get(key)
+        if total is None:
+            merged[key] = {
+                **{field: group[field] for field in group_by},
+                **{field: group[field] for field in EMPTY_SUMMARY},
+            }
+            continue
+        total['piles'] += group['piles']
+        total['calculated'] += group['calculated']
+        total['over_limit'] += group['over_limit']
+        total['PfahlVolumen'] = _add(total['PfahlVolumen'], group['PfahlVolumen'])
+        total['GesamtBohrLaenge'] = _add(total['GesamtBohrLaenge'], group['GesamtBohrLaenge'])
+        total['EzuR'] = _max(total['EzuR'], group['EzuR'])
+    return list(merged.values())
+
+
+def _groups(project, run_id: int, limit: float) -> list:
+    """
+    The function aggregates the piles of the project with the output of
+    the run, grouped by all SUMMARY_GROUPS.
+    """
+    results = PileResult.objects.filter(run_id=run_id, Pname=OuterRef('Pname'))
+    rows = (
+        Pile.objects.filter(project=project)
+        .annotate(**{
+            annotation: Subquery(results.values(field)[:1])
+            for field, annotation in _OUTPUT.items()
+        })
+        .values(*_GROUP_FIELDS.values())
+        .annotate(
+            piles=Count('id'),
+            calculated=Count(_OUTPUT['EzuR']),
+            PfahlVolumen=Sum(_OUTPUT['PfahlVolumen']),
+            GesamtBohrLaenge=Sum(_OUTPUT['GesamtBohrLaenge']),
+            EzuR=Max(_OUTPUT['EzuR']),
+            over_limit=Count('id', filter=Q(**{f"{_OUTPUT['EzuR']}__gt": limit})),
+        )
+        .order_by(*_GROUP_FIELDS.values())
+    )
+    return [
+        {
+            **{field: row.pop(annotation) for field, annotation in _GROUP_FIELDS.items()},
+            **row,
+        }
+        for row in rows
+    ]
+
+
+def project_summary(project, limit: float, group_by: tuple = SUMMARY_GROUPS) -> dict:
+    """
+    The function returns the summary of the latest calculation output of
+    a project.
+
+    Attributes:
+        - project: Project model object
+        - limit: AuslastungProzent of the project settings
+        - group_by: fields of SUMMARY_GROUPS the groups are summed up to
+    Return: dict with the run, the totals and the groups
+    """
+    run = CalculationRun.objects.filter(project=project).order_by('-id').values('id', 'status').first()
+    run_id, run_status = (run['id'], run['status']) if run else (None, None)
+
+    key = f"project-summary:{project.id}:{project.tables_version}:{run_id}:{run_status}:{limit}"
+    groups = cache.get(key)
+    if groups is None:
+        groups = _groups(project, run_id, limit)
+        cache.set(key, groups, settings.PROJECT_SUMMARY_CACHE_TIMEOUT)
+
+    totals = _merge(groups, ()) or [EMPTY_SUMMARY]
+    return {
+        'run': run_id,
+        'status': run_status,
+        'tables_version': project.tables_version,
+        'limit': limit,
+        'totals': totals[0],
+        'group_by': list(group_by),
+        'groups': _merge(groups, group_by) if group_by else [],
+    }
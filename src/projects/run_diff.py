@@ -0,0 +1,136 @@
+"""
+Diff between the output of two calculation runs of a project.
+
+The result rows of both runs are read with values_list (no model
+objects) into one float matrix per run and table, rows are matched by
+their key (Pname, soil profile name and position, load case name and
+position). The deltas are computed columnwise with numpy, a value
+changed if
+
+    |target - base| > tolerance + relative_tolerance * |base|
+
+or if it is empty in only one of the runs. Only the changed rows and
+within them the changed fields are returned.
+"""
+from django.db import models
+
+from .models import PileResult, SoilLayerResult, HorizontalLoadResult
+
+
+def _numeric_fields(model) -> tuple:
+    return tuple(
+        field.name for field in model._meta.concrete_fields
+        if isinstance(field, models.FloatField)
+    )
+
+
+def _value(value: float):
+    # NaN isn't JSON, empty values are None as in the result tables
+    return None if value != value else value
+
+
+class RunDiff:
+    """
+    Diff of one result table.
+
+    Attributes:
+        - model: result model of the table
+        - key_fields: fields matching the rows of the runs
+    """
+    def __init__(self, model, key_fields: tuple):
+        self.model = model
+        self.key_fields = key_fields
+        self.fields = _numeric_fields(model)
+
+    def _matrix(self, run_id: int, fields: tuple) -> tuple:
+        """
+        Return: keys, float matrix (rows x fields), empty values are NaN
+        """
+        import numpy as np
+
+        rows = list(
+            self.model.objects.filter(run_id=run_id)
+            .order_by(*self.key_fields)
+            .values_list(*self.key_fields, *fields)
+        )
+        size = len(self.key_fields)
+        keys = [row[0] if size == 1 else row[:size] for row in rows]
+        values = np.array([row[size:] for row in rows], dtype=float).reshape(len(rows), len(fields))
+        return keys, values
+
+    def compare(self, base_run_id: int, target_run_id: int, fields: tuple = None,
+                tolerance: float = 0.0, relative_tolerance: float = 0.0) -> dict:
+        """
+        Attributes:
+            - base_run_id, target_run_id: runs to compare
+            - fields: compared output fields, default all numeric fields
+            - tolerance: absolute difference which is no change
+            - relative_tolerance: difference relative to the base value
+              which is no change
+        Return: dict with added, removed and changed rows
+        """
+        import numpy as np
+
+        fields = tuple(field for field in fields or self.fields if field in self.fields)
+        base_keys, base = self._matrix(base_run_id, fields)
+        target_keys, target = self._matrix(target_run_id, fields)
+
+        base_index = {key: index for index, key in enumerate(base_keys)}
+        common = [(base_index[key], index, key) for index, key in enumerate(target_keys) if key in base_index]
+        base_rows = np.array([row for row, _, _ in common], dtype=int)
+        target_rows = np.array([row for _, row, _ in common], dtype=int)
+
+        old = base[base_rows]
+        new = target[target_rows]
+        delta = new - old
+        with np.errstate(invalid='ignore'):
+            changed = (np.abs(delta) > tolerance + relative_tolerance * np.abs(old)) \
+                | (np.isnan(old) != np.isnan(new))
+        changed_rows = np.flatnonzero(changed.any(axis=1))
+
+        target_key_set = set(target_keys)
+        return {
+            'added': [key for key in target_keys if key not in base_index],
+            'removed': [key for key in base_keys if key not in target_key_set],
+            'changed': [
+                {
+                    'key': common[row][2],
+                    'fields': {
+                        fields[column]: {
+                            'old': _value(old[row, column].item()),
+                            'new': _value(new[row, column].item()),
+                            'delta': _value(delta[row, column].item()),
+                        }
+                        for column in np.flatnonzero(changed[row])
+                    },
+                }
+                for row in changed_rows
+            ],
+            'unchanged': len(common) - len(changed_rows),
+        }
+
+
+PILE_RUN_DIFF = RunDiff(PileResult, ('Pname',))
+SOIL_LAYER_RUN_DIFF = RunDiff(SoilLayerResult, ('soil_profile', 'position'))
+HORIZONTAL_LOAD_RUN_DIFF = RunDiff(HorizontalLoadResult, ('case', 'position'))
+
+
+def diff_runs(base_run, target_run, fields: tuple = None,
+              tolerance: float = 0.0, relative_tolerance: float = 0.0) -> dict:
+    """
+    The function compares the output of two calculation runs.
+
+    Attributes:
+        - base_run, target_run: CalculationRun model objects
+        - fields: compared output fields of all tables, default all
+        - tolerance, relative_tolerance: see RunDiff.compare
+    Return: dict with the diff per table
+    """
+    options = {'fields': fields, 'tolerance': tolerance, 'relative_tolerance': relative_tolerance}
+    return {
+        'base': base_run.id,
+        'target': target_run.id,
+        'piles': PILE_RUN_DIFF.compare(base_run.id, target_run.id, **options),
+        'soil_layers': SOIL_LAYER_RUN_DIFF.compare(base_run.id, target_run.id, **options),
+        'horizontal_loads': HORIZONTAL_LOAD_RUN_DIFF.compare(base_run.id, target_run.id, **options),
+    }
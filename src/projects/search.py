@@ -0,0 +1,97 @@
+"""
+Server-side search of the projects of a company.
+
+The name of a project and the address of its settings (projektLocation,
+projektStreet) are searched, ranked by
+
+    1. prefix matches of the name
+    2. similarity: trigram word similarity of the name and the address
+       (PostgreSQL), 1 for a substring match on other databases
+    3. name
+
+On PostgreSQL Django renders icontains and istartswith as
+UPPER("field"::text) LIKE UPPER(...). The fields have GIN trigram indexes
+on UPPER(field) (pg_trgm, migration 0080), the fuzzy lookup is filtered
+on the same expression (word similarity ignores the case), so one index
+per field serves the substring (LIKE) and the fuzzy (%>) lookup. The
+name is matched on the projects, the address on the settings of the
+projects in a subquery, each table with its own indexes.
+
+PostgreSQL servers without pg_trgm have a btree index on UPPER(name)
+(varchar_pattern_ops) for prefix lookups (name__istartswith), a
+substring can't use it. The search matches prefixes and substrings
+without fuzzy matching there and scans the projects of the company.
+Other databases have no search index.
+"""
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Greatest, Upper
+from rest_framework.pagination import PageNumberPagination
+
+from .models import ProjectSettings
+
+# Fields of the project, of its settings
+NAME_FIELDS = ('name',)
+ADDRESS_FIELDS = ('projektLocation', 'projektStreet')
+SEARCH_FIELDS = (*NAME_FIELDS, *(f'basic_data_settings__{field}' for field in ADDRESS_FIELDS))
+
+
+class ProjectSearchPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+def trigram_available() -> bool:
+    """
+    The function checks once per connection whether pg_trgm is installed.
+    """
+    available = getattr(connection, '_trigram_available', None)
+    if available is None:
+        available = False
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                available = cursor.fetchone() is not None
+        connection._trigram_available = available
+    return available
+
+
+def search_projects(queryset, query: str):
+    """
+    The function filters and ranks the projects for a search query.
+
+    Attributes:
+        - queryset: projects the user may see (ProjectViewSet.get_queryset)
+        - query: searched text
+    Return: queryset annotated with prefix (1, 0) and similarity, best match first
+    """
+    query = query.strip()
+    trigram = trigram_available()
+
+    def matches(fields) -> Q:
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f'{field}__icontains': query})
+            if trigram:
+                from django.contrib.postgres.lookups import TrigramWordSimilar
+
+                condition |= Q(TrigramWordSimilar(Upper(field), query))
+        return condition
+
+    queryset = queryset.annotate(
+        prefix=Case(When(name__istartswith=query, then=Value(1)), default=Value(0))
+    ).filter(
+        matches(NAME_FIELDS)
+        | Q(pk__in=ProjectSettings.objects.filter(matches(ADDRESS_FIELDS)).values('project_id'))
+    )
+    if trigram:
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        queryset = queryset.annotate(
+            similarity=Greatest(*(TrigramWordSimilarity(query, field) for field in SEARCH_FIELDS))
+        )
+    else:
+        queryset = queryset.annotate(similarity=Value(1.0, output_field=FloatField()))
+
+    return queryset.order_by('-prefix', F('similarity').desc(nulls_last=True), 'name', 'id')
@@ -10,7 +10,14 @@ from piledesigner.settings import (
 from .models import (
     Project, ProjectSettings, Pile,
     SoilProfile, SoilLayer, HorizontalLoadCase,
-    HorizontalLoadPile)
+    HorizontalLoadPile, ImportJob, CalculationRun, CalculationSnapshot)
+from .calculation_runs import join_latest_results
+from .preflight import (
+    PILE_REQUIRED_FIELDS,
+    SOIL_PROFILE_REQUIRED_FIELDS,
+    SOIL_LAYER_REQUIRED_FIELDS,
+    HORIZONTAL_LOAD_REQUIRED_FIELDS,
+)
 
 
 class ProjectSerializer(serializers.ModelSerializer):
@@ -62,6 +69,20 @@ class ProjectSerializer(serializers.ModelSerializer):
         return project
 
 
+class ProjectSearchSerializer(serializers.ModelSerializer):
+    projektLocation = serializers.CharField(source='basic_data_settings.projektLocation', default=None, read_only=True)
+    projektStreet = serializers.CharField(source='basic_data_settings.projektStreet', default=None, read_only=True)
+    similarity = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Project
+        fields = [
+            'id', 'name', 'projektLocation', 'projektStreet',
+            'created_date', 'modified_date', 'similarity'
+        ]
+        read_only_fields = fields
+
+
 class ProjectSettingsSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProjectSettings
@@ -229,22 +250,8 @@ class PileCalculateSerializer(serializers.ModelSerializer):
         model_field_names = {field.name for field in self.Meta.model._meta.get_fields()}
         cleaned_attrs = {key: value for key, value in attrs.items() if key in model_field_names}
         
-        # Define a list of fields that must not be null.
-        non_nullable_fields = [
-            "Pname",
-            "AEHoehe",
-            "AlternativeCharakteristischeLastZ",
-            "AlternativeDesignLastZ",
-            "BetonZyl",
-            "BodenProfil",
-            "Hochwert",
-            "Rechtswert",
-            "SollDurchmesser",
-            "SollPfahlOberKante"
-        ]
-        
         errors = []
-        for field in non_nullable_fields:
+        for field in PILE_REQUIRED_FIELDS:
             if cleaned_attrs.get(field) is None:
                 errors.append(f"{field} be missing.")
                 
@@ -322,13 +329,8 @@ class SoilLayerCalculateSerializer(serializers.ModelSerializer):
         model_field_names = {field.name for field in self.Meta.model._meta.get_fields()}
         cleaned_attrs = {key: value for key, value in attrs.items() if key in model_field_names}
 
-        # Define a list of fields that must not be null.
-        non_nullable_fields = [
-            "endKote"
-        ]
-        
         errors = []
-        for field in non_nullable_fields:
+        for field in SOIL_LAYER_REQUIRED_FIELDS:
             if cleaned_attrs.get(field) is None:
                 errors.append(f"{field} be missing.")
         
@@ -395,14 +397,8 @@ class SoilProfileCalculateSerializer(serializers.ModelSerializer):
         model_field_names = {field.name for field in self.Meta.model._meta.get_fields()}
         cleaned_attrs = {key: value for key, value in attrs.items() if key in model_field_names}
 
-        # Define a list of fields that must not be null.
-        non_nullable_fields = [
-            "grundwasserStand",
-            "startKote"
-        ]
-
         errors = []
-        for field in non_nullable_fields:
+        for field in SOIL_PROFILE_REQUIRED_FIELDS:
             if cleaned_attrs.get(field) is None:
                 errors.append(f"{field} be missing.")
         
@@ -472,15 +468,8 @@ class HLoadPileCalculateSerializer(serializers.ModelSerializer):
         model_field_names = {field.name for field in self.Meta.model._meta.get_fields()}
         cleaned_attrs = {key: value for key, value in attrs.items() if key in model_field_names}
 
-        # Define a list of fields that must not be null.
-        non_nullable_fields = [
-            "Pname",
-            "gkz",
-            "qkz"
-        ]
-
         errors = []
-        for field in non_nullable_fields:
+        for field in HORIZONTAL_LOAD_REQUIRED_FIELDS:
             if cleaned_attrs.get(field) is None:
                 errors.append(f"{field} be missing.")
 
@@ -564,6 +553,12 @@ class ProjectDetailSerializer(serializers.ModelSerializer):
             'created_by', 'modified_by'
         ]
 
+    def to_representation(self, instance):
+        """
+        Add the output of the latest calculation run to the tables.
+        """
+        return join_latest_results(instance, super().to_representation(instance))
+
 
 class ProjectDetailCalculateSerializer(serializers.ModelSerializer):
     settings = ProjectSettingsCalculateSerializer(source='basic_data_settings', read_only=True)
@@ -592,6 +587,12 @@ class ProjectTableSerializer(serializers.ModelSerializer):
             'horizontal_loadcases',
         ]
 
+    def to_representation(self, instance):
+        """
+        Add the output of the latest calculation run to the tables.
+        """
+        return join_latest_results(instance, super().to_representation(instance))
+
 
 class ProjectTableNotValidateSerializer(serializers.ModelSerializer):
     piles = PileNotValidateSerializer(many=True)
@@ -615,6 +616,46 @@ class ProjectImportSerializer(serializers.Serializer):
         return value
     
 
+class TableImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+
+    def validate_file(self, value):
+        if not (value.name.endswith('.csv') or value.name.endswith('.parquet')):
+            raise serializers.ValidationError("Only CSV and Parquet files are supported.")
+        return value
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.UUIDField(source='id', read_only=True)
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            'job_id', 'file_name', 'status', 'phase', 'rows_processed',
+            'result', 'error', 'created_date', 'modified_date', 'finished_date'
+        ]
+        read_only_fields = fields
+
+
+class CalculationSnapshotSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CalculationSnapshot
+        fields = ['codec', 'size', 'compressed_size', 'checksum', 'created_date']
+        read_only_fields = fields
+
+
+class CalculationRunSerializer(serializers.ModelSerializer):
+    snapshot = CalculationSnapshotSerializer(read_only=True, allow_null=True)
+
+    class Meta:
+        model = CalculationRun
+        fields = [
+            'id', 'status', 'input_hash', 'dhpd_server', 'error', 'started_date',
+            'finished_date', 'proxy_ms', 'store_ms', 'snapshot'
+        ]
+        read_only_fields = fields
+
+
 class ProjectCompanyLogoSerializer(serializers.Serializer):
     file = serializers.FileField(required=False, allow_null=True)
 
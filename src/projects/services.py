@@ -1,15 +1,8 @@
 import json
-from math import pi
 import requests
-
-import xmlschema
-import xmltojson
-import JsonToXML
-import xmltodict
-import pandas as pd
-from io import BytesIO
 import io
-from PIL import Image, ImageOps
+import threading
+from functools import lru_cache
 
 from django.db import transaction
 from django.core.files.uploadedfile import InMemoryUploadedFile
@@ -17,36 +10,28 @@ from django.core.files.uploadedfile import InMemoryUploadedFile
 from piledesigner.settings import (
     BUSINESS_LOGIC_CREDENTIALS,
 )
-from .dhpd_serializer.mapping import (
-    DRIVEN_PILE_TYPES_SYMBOLS
-)
+from .dhpd_serializer.mapper import DhpdSerializer
 from .mapping import (
     XML_KEYS,
     XML_TO_JSON_KEYS_MAPPING,
-    JSON_TO_XML_KEYS_MAPPING,
-    CUSTOMER_INFO_COMPANY_KEYS_MAPPING,
-    USER_INFO_KEYS_MAPPING,
-    CALCULATION_PROJECT_SETTING_KEYS,
-    PILE_INPUT_KEYS_MAPPING,
-    SOIL_LAYER_INPUT_KEYS_MAPPING,
-    ORDER_SETTING_KEYS,
-    ORDER_PILE_KEYS,
-    ORDER_SOIL_LAYER_KEYS,
-    ORDER_SOIL_PROFILE_KEYS,
-    PILE_KEY_XLSX_2_JSON_MAPPING,
-    SOIL_KEY_XLSX_2_JSON_MAPPING,
-    H_LOAD_KEY_XLSX_2_JSON_MAPPING,
-    PILE_KEY_JSON_2_XLSX_MAPPING,
-    SOIL_KEY_JSON_2_XLSX_MAPPING,
-    H_LOAD_KEY_JSON_2_XLSX_MAPPING,
-    PILE_OUTPUT_KEYS_MAPPING,
-    SOIL_LAYER_OUTPUT_KEYS_MAPPING,
-    HORIZONTAL_LOAD_POINT_OUTPUT_KEYS_MAPPING,
-    HORIZONTAL_LOAD_POINT_INPUT_KEYS_MAPPING,
     EMPTY_XLSX_PILE,
     EMPTY_XLSX_SOIL_LAYER,
     EMPTY_XLSX_H_LOAD
 )
+from .xlsx_import import XlsxProjectReader
+from .unit_convert import (
+    SETTING_SCALES,
+    PILE_SCALES,
+    SOIL_LAYER_SCALES,
+    scale_columns
+)
+from .key_plans import (
+    USER_INFO_PLAN,
+    CUSTOMER_INFO_PLAN,
+    PILE_XLSX_PLAN,
+    SOIL_LAYER_XLSX_PLAN,
+    H_LOAD_XLSX_PLAN
+)
 from .models import (
     Project,
     ProjectSettings,
@@ -63,6 +48,45 @@ from piledesigner.settings import (
     FASTAPI_SERVER_DOMAIN
 )
 
+IMPORT_XSD = '../test_datas/xml_import_template.xsd'
+CALCULATE_XSD = '../test_datas/xml_calculate_template.xsd'
+
+# Connections to the FastAPI-DHPD proxy per worker
+HTTP_POOL_SIZE = 10
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def xml_schema(path: str):
+    """
+    The function compiles an XSD schema once per process.
+
+    Return: xmlschema.XMLSchema
+    """
+    import xmlschema
+
+    return xmlschema.XMLSchema(path)
+
+
+def http_session() -> requests.Session:
+    """
+    The function returns the HTTP session of the process, its
+    connections to the FastAPI-DHPD proxy are kept open between requests.
+    """
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _http_session = session
+    return _http_session
+
+
 def validate_input_excel_file(excel_file) -> bool:
     """
     Validates the Excel file against an master_template.xlsx 
@@ -75,7 +99,9 @@ def validate_input_xml_file(input_file) -> list:
     """
     Validates the XML file against an xml_import_template.xsd schema.
     """
-    xml_schema_validator = xmlschema.XMLSchema('../test_datas/xml_import_template.xsd')
+    import xmlschema
+
+    xml_schema_validator = xml_schema(IMPORT_XSD)
     errors = []
     try:
         xml_schema_validator.validate(input_file)
@@ -102,7 +128,9 @@ def validate_calculate_xml_file(input_file_path) -> list:
     Return:
     - the list of errors. If the list is empty -> validation is success
     """
-    xml_schema_validator = xmlschema.XMLSchema('../test_datas/xml_calculate_template.xsd')
+    import xmlschema
+
+    xml_schema_validator = xml_schema(CALCULATE_XSD)
     errors = []
     try:
         xml_schema_validator.validate(input_file_path)
@@ -125,6 +153,8 @@ def xml_to_json(input_file) -> dict|None:
     """
     Converts an XML file to a JSON object.
     """
+    import xmltojson
+
     file_content: str = input_file.read().decode('utf-8')
 
     # Convert XML to JSON
@@ -140,124 +170,47 @@ def json_to_calculate_xml(project_json_data: dict, user, company) -> str:
     """
     The function to convert project json data in database
     to xml content in order to calculate or export xml file.
-    """
-    project_json_data.pop('name')
-
-    # Settings
-    settings = project_json_data.pop('settings')
-    project_json_data['projektInfo'] = settings
-
-    if "default_company_info" in project_json_data['projektInfo'].keys()\
-        and project_json_data['projektInfo']['default_company_info']:
-        project_json_data['projektInfo']['companyAltName'] = company.name
-        project_json_data['projektInfo']['companyAltLocation'] = company.location
-        project_json_data['projektInfo']['companyAltStreet'] = company.address
-        project_json_data['projektInfo']['companyAltPostalCode'] = company.postal_code
-        project_json_data['projektInfo']['companyAltEmail'] = company.email
-        project_json_data['projektInfo']['companyAltPhone'] = company.phone
-        project_json_data['projektInfo']['companyAltFax'] = company.fax
-        project_json_data['projektInfo']['companyAltLogo'] = WINDOW_SERVER_IMAGES_DIRECTORY \
-                + company.logo
-
-    project_json_data['projektInfo'] = remove_all_unneccessary_keys(
-        project_json_data['projektInfo'],
-        CALCULATION_PROJECT_SETTING_KEYS
-    )
-
-    project_json_data["projektInfo"] = sort_dict_by_keys(
-        project_json_data["projektInfo"],
-        ORDER_SETTING_KEYS
-    )
 
+    Attributes:
+        - project_json_data: ProjectDetailCalculateSerializer data
+        - user: User who calculates the project
+        - company: Company model object
+    Return: xml content as string
+    """
+    settings = dict(project_json_data['settings'])
+    if settings.get("default_company_info"):
+        settings['companyAltName'] = company.name
+        settings['companyAltLocation'] = company.location
+        settings['companyAltStreet'] = company.address
+        settings['companyAltPostalCode'] = company.postal_code
+        settings['companyAltEmail'] = company.email
+        settings['companyAltPhone'] = company.phone
+        settings['companyAltFax'] = company.fax
+        settings['companyAltLogo'] = WINDOW_SERVER_IMAGES_DIRECTORY + company.logo
 
     # BusinessLogic Credential:
-    project_json_data['userMailAddress'] = BUSINESS_LOGIC_CREDENTIALS['userMailAddress']
-    project_json_data['userKey'] = BUSINESS_LOGIC_CREDENTIALS['userKey']
-    project_json_data['userKeyHorizontal'] = BUSINESS_LOGIC_CREDENTIALS['userKeyHorizontal']
-
-    # Soil profiles
-    soil_profiles = project_json_data.pop('soil_profiles')
-    output_soil_profiles = []
-    for soil_profile in soil_profiles:
-        soil_layers = soil_profile.pop('soil_layers')
-        soil_layers = remove_all_unneccessary_keys(
-            soil_layers,
-            list(SOIL_LAYER_INPUT_KEYS_MAPPING.keys())
-        )
-        for soil_layer in soil_layers:
-            soil_layer = sort_dict_by_keys(soil_layer, ORDER_SOIL_LAYER_KEYS)
-        soil_profile['_profilName'] = soil_profile.pop('name')
-        soil_profile['alleBodenSchichten'] = {
-            'BodenSchichtDaten': soil_layers
-        }
-        soil_profile = sort_dict_by_keys(soil_profile, ORDER_SOIL_PROFILE_KEYS)
-        output_soil_profiles.append(soil_profile)
-    project_json_data['boden'] = {
-        'alleBodenProfile': {
-            'BodenProfilDaten': output_soil_profiles
-        }
+    credentials = {
+        key: BUSINESS_LOGIC_CREDENTIALS[key]
+        for key in ('userMailAddress', 'userKey', 'userKeyHorizontal')
     }
 
-    # Piles
-    piles = project_json_data.pop('piles')
-    piles = remove_all_unneccessary_keys(piles, list(PILE_INPUT_KEYS_MAPPING.keys()))
-    output_piles = []
-    for pile in piles:
-        pile = sort_dict_by_keys(pile, ORDER_PILE_KEYS)
-        output_piles.append(pile)
-    project_json_data['pfaehle'] = {
-        'LastPunktInputList': {
-            'LastPunktInput': output_piles
-        }
-    }
+    user_info = USER_INFO_PLAN.apply(UserSerializer(user).data)
 
-    # HLoad Cases
-    hload_cases = project_json_data.pop('horizontal_loadcases')
-    for hload_case in hload_cases:
-        hloads = hload_case.pop('horizontal_loads')
-        hloads = remove_all_unneccessary_keys(hloads, list(HORIZONTAL_LOAD_POINT_INPUT_KEYS_MAPPING.keys()))
-        hload_case['hTabelleName'] = hload_case.pop('name')
-        hload_case['hLastPunkte'] = {
-            'HLastPunktInput': hloads
-        }
-    project_json_data['hLasten'] = {
-        'hTabellen': {
-            'HLastInputTabelle': hload_cases
-        }
-    }
-
-    # _userInfo
-    user_serializer = UserSerializer(user)
-    project_json_data['_userInfo'] = user_serializer.data
-    project_json_data['_userInfo'] = map_keys(
-        project_json_data['_userInfo'],
-        USER_INFO_KEYS_MAPPING
-    )
-
-    # _customerInfo
     company_serializer = CompanyCalculateSerializer(company)
-    project_json_data['_customerInfo'] = company_serializer.data
-    project_json_data['_customerInfo'] = map_keys(
-        project_json_data['_customerInfo'],
-        CUSTOMER_INFO_COMPANY_KEYS_MAPPING
-    )
-    project_json_data['_customerInfo']['_companyInvoiceStyle'] = company_serializer.data['name']
+    customer_info = CUSTOMER_INFO_PLAN.apply(company_serializer.data)
+    customer_info['_companyInvoiceStyle'] = company_serializer.data['name']
 
-
-    project_json_data = map_keys(project_json_data, JSON_TO_XML_KEYS_MAPPING)
-    project_json_data = remove_all_unneccessary_keys(project_json_data)
-    project_json_data["@xmlns"] = "http://schemas.datacontract.org/2004/07/DHPD"
-    project_json_data["@xmlns:i"] = "http://www.w3.org/2001/XMLSchema-instance"
-
-
-    xml_content = xmltodict.unparse({"InputDaten": project_json_data}, pretty=True)
-    return xml_content
+    return DhpdSerializer.serialize_input(
+        {**project_json_data, 'settings': settings}, credentials, user_info, customer_info
+    )
 
 
 def json_to_xml_file(json_object: dict, xml_file_name: str) -> bool:
     """
     Converts a JSON object to an XML file path as string.
     """
+    import JsonToXML
+
     try:
         JsonToXML.fromFiletoFile(json_object,"{xml_file_name}.xml")
         return True
@@ -289,6 +242,7 @@ def input_xml_content_unit_convert(
     ) -> dict:
     """
     Convert unit of some fields before sending to Business Logic.
+    Each table is converted column by column, see unit_convert.py.
 
     Attribute:
         - xml_content (dict): xml content as json dictionary.
@@ -298,153 +252,23 @@ def input_xml_content_unit_convert(
     Return:
         - dict
     """
-    setting_convert_scales = {
-        "AbtreppungsWinkelRad": pi/180,
-        "MaxLaengs"           : 0.001,
-        "MaxBuegel"           : 0.001,
-        "MinLaengsAbstand"    : 0.001,
-        "Betondeckung"        : 0.001,
-        "MvonMaxfuerSchub"    : 0.01
-    }
-
-    pile_convert_scales = {
-        "prozentualerMantelAnteil": 0.01
-    }
-
-    soil_layer_scales = {
-        "ESoben"         : 1000,
-        "ESunten"        : 1000,
-        "MaxElementWeite": 0.01,
-        "phi"            : pi/180,
-        "qsk"            : 1000,
-        "qskStern"       : 1000,
-        "qbk002"         : 1000,
-        "qbk003"         : 1000,
-        "qbk01"          : 1000
-    }
-
     # Project settings:
-    if "settings" in xml_content.keys():
-        for scale in setting_convert_scales.items():
-            try:
-                xml_content["settings"][scale[0]] = scale_float_value(
-                    xml_content["settings"][scale[0]], scale[1], reversed
-                )
-            except:
-                ...
+    if isinstance(xml_content.get("settings"), dict):
+        scale_columns([xml_content["settings"]], SETTING_SCALES, reversed)
 
     # Piles:
     if "piles" in xml_content.keys():
-        for pile in xml_content["piles"]:
-            for scale in pile_convert_scales.items():
-                try:
-                    pile[scale[0]] = scale_float_value(
-                        pile[scale[0]], scale[1], reversed
-                    )
-                except:
-                    ...
+        scale_columns(xml_content["piles"], PILE_SCALES, reversed)
 
     # Soil layer:
     if "soil_profiles" in xml_content.keys():
-        for soil_profile in xml_content["soil_profiles"]:
-            if "soil_layers" in soil_profile:
-                for soil_layer in soil_profile["soil_layers"]:
-                    for scale in soil_layer_scales.items():
-                        try:
-                            soil_layer[scale[0]] = scale_float_value(
-                                soil_layer[scale[0]], scale[1], reversed
-                            )
-                        except:
-                            ...
-    return xml_content
-
-
-def output_xml_content_unit_convert(
-        xml_content: dict, reversed: bool = False
-    ) -> dict:
-    """
-    Convert unit of some fields before sending to Business Logic.
-
-    Attribute:
-        - xml_content (dict): xml content as json dictionary.
-        - reversed (bool)   : if True, it's used for the case import xml,
-        we need revert unit.
-
-    Return:
-        - dict
-    """
-    soil_layer_scales = {
-        "_usedQsk"   : 0.001,
-        "_usedQbk002": 0.001,
-        "_usedQbk003": 0.001,
-        "_usedQbk01" : 0.001,
-    }
-
-    pile_convert_scales = {
-        "_EzuR": 100
-    }
-
-    # Piles:
-    try:
-        for pile in xml_content["pfaehle"]["LastPunktOutputList"]["LastPunktOutput"]:
-            for scale in pile_convert_scales.items():
-                try:
-                    pile[scale[0]] = scale_float_value(
-                        float(pile[scale[0]]), scale[1], reversed
-                    )
-                except:
-                    ...
-    except:
-        ...
-
-    # Soil layer:
-    try:
-        for soil_profile in xml_content["BodenNutzung"]["BodenNutzungDict"]["a:KeyValueOfstringBodenNutzungOutputDB_PsWP3v"]:
-            try:
-                for soil_layer in soil_profile["a:Value"]["_schichten"]["BodenSchichtNutzung"]:
-                    for scale in soil_layer_scales.items():
-                        try:
-                            soil_layer[scale[0]] = scale_float_value(
-                                float(soil_layer[scale[0]]), scale[1], reversed
-                            )
-                        except:
-                            ...
-            except:
-                ...
-    except:
-        ...
-
-    return xml_content
-
-
-def process_driven_pile(
-        xml_content: dict
-    ) -> dict:
-    """
-    Process when choosing driven pile.
-    Need to change to qsk_stern
-    """
-    try:
-        # Step 1: Get Soil profile including the driven piles.
-        driven_soil_profiles = []
-        for pile in xml_content["piles"]:
-            if pile["PfahlTyp"] in DRIVEN_PILE_TYPES_SYMBOLS:
-                driven_soil_profiles.append(pile["BodenProfil"])
-
-        # Step 2: Switch to qsk_stern for the soil profiles applied
-        # for the driven piles.
-        if driven_soil_profiles:
-            for soil_profile in xml_content["soil_profiles"]:
-                for soil_layer in soil_profile["soil_layers"]:
-                    if soil_profile["name"] in driven_soil_profiles:
-                        soil_layer["qskStern"] = soil_layer["qsk"]
-                        soil_layer["qsk"] = 0
-                    else:
-                        soil_layer["qskStern"] = 0
-
-    except:
-        ...
-
+        soil_layers = [
+            soil_layer
+            for soil_profile in xml_content["soil_profiles"]
+            for soil_layer in soil_profile.get("soil_layers", [])
+            if isinstance(soil_layer, dict)
+        ]
+        scale_columns(soil_layers, SOIL_LAYER_SCALES, reversed)
     return xml_content
 
 
@@ -468,40 +292,6 @@ def process_import_driven_pile(
     return xml_content
 
 
-def output_xml_content_round_2_decimal_digits(xml_content: dict) -> dict:
-    """
-    Function round float number in output xml content to only 2
-    decimal digits.
-    """
-    # Piles:
-    try:
-        for pile in xml_content["pfaehle"]["LastPunktOutputList"]["LastPunktOutput"]:
-            for key in pile.keys():
-                try:
-                    pile[key] = round(float(pile[key]), 2)
-                except:
-                    ...
-    except:
-        ...
-
-    # Soil layer:
-    try:
-        for soil_profile in xml_content["BodenNutzung"]["BodenNutzungDict"]["a:KeyValueOfstringBodenNutzungOutputDB_PsWP3v"]:
-            try:
-                for soil_layer in soil_profile["a:Value"]["_schichten"]["BodenSchichtNutzung"]:
-                    for key in soil_layer.keys():
-                        try:
-                            soil_layer[key] = round(float(soil_layer[key]), 2)
-                        except:
-                            ...
-            except:
-                ...
-    except:
-        ...
-
-    return xml_content
-
-
 def map_keys(data: dict, mapping: dict = XML_TO_JSON_KEYS_MAPPING) -> dict|list:
     """
     Recursively maps keys in a multi-level dictionary based on a mapping dictionary.
@@ -692,6 +482,7 @@ def update_project_table_data(
                         )
                 except:
                     ...
+            project.tables_changed()
             return True
 
     except Exception as e:
@@ -819,6 +610,12 @@ def restructure_json_data(json_data: dict) -> dict:
 
 
 def remove_all_unneccessary_keys(json_data: dict, keep_keys: list = XML_KEYS) -> dict|list:
+    """
+    Recursively removes the keys which are not in keep_keys.
+    Prefer the compiled plans in key_plans.py for known entities.
+    """
+    if not isinstance(keep_keys, (set, frozenset)):
+        keep_keys = frozenset(keep_keys)
     if isinstance(json_data, dict):
         # Process dictionary
         return {
@@ -860,114 +657,15 @@ def sort_dict_by_keys(data: dict, key_order: list, include_unlisted=True, defaul
 
 def xlsx_to_json(input_file) -> dict:
     """
-    Reads all sheets from an Excel file in-memory.
+    Reads all sheets from an Excel file row by row (read-only workbook),
+    see xlsx_import.XlsxProjectReader for the sheet layout.
 
     :param file: In-memory file (e.g., from Django request.FILES).
-    :return: Dictionary with sheet names as keys and DataFrames as values.
+    :return: Project data json object with piles, soil profiles and horizontal load cases.
     """
     try:
-        # Read all sheets into a dictionary
-        all_sheets = pd.read_excel(BytesIO(input_file.read()), sheet_name=None)
-        json_data = {sheet_name: df for sheet_name, df in all_sheets.items()}
-        sheet_names = list(json_data.keys())
-
-        project_data_json = {}
-
-        # pile data
-        project_data_json['piles'] = []
-        try:
-            pile_sheets = json_data[sheet_names[0]]
-            pile_sheets = pile_sheets.dropna(subset=['Lastpunkt'])
-            pile_sheets = pile_sheets.astype(object).where(pd.notnull(pile_sheets), None)
-            pile_sheets_json = pile_sheets.to_dict(orient="records")
-            for row_index, pile in enumerate(pile_sheets_json):
-                pile = remove_all_unneccessary_keys(pile, list(PILE_KEY_XLSX_2_JSON_MAPPING.keys()))
-                pile = map_keys(pile, PILE_KEY_XLSX_2_JSON_MAPPING)
-                pile["row_index"] = row_index
-                project_data_json['piles'].append(pile)
-        except:
-            ...
-        
-        # soil_profiles:
-        ## Get the last soil profile name:
-        end_soil_profile_index = 0
-        sheet_len = len(sheet_names)
-        for idx, sheet in enumerate(reversed(sheet_names)):
-            if sheet[-5:]=='-Info':
-                end_soil_profile_index = sheet_len-idx-1
-                break
-
-        ## Get all soil profiles:
-        project_data_json['soil_profiles'] = []
-        for sheet_index in range(1,end_soil_profile_index,2):
-            try:
-                # Soil layers
-                soil_layers = json_data[sheet_names[sheet_index]]
-                try:
-                    soil_layers = soil_layers.dropna(subset=['Endkote'])
-                    soil_layers = soil_layers.astype(object).where(pd.notnull(soil_layers), None)
-                except:
-                    ...
-                soil_layers_json = soil_layers.to_dict(orient='records')
-
-                # Soil profile
-
-                soil_profile = json_data[sheet_names[sheet_index+1]]
-                try:
-                    soil_profile = soil_profile.dropna(subset=['Grundwasserstand'])
-                    soil_profile = soil_profile.astype(object).where(pd.notnull(soil_profile), None)
-                    soil_profile = soil_profile.to_dict(orient='records')[0]
-                except:
-                    ...
-                soil_profile['soil_layers'] = soil_layers_json
-                try:
-                    soil_profile = remove_all_unneccessary_keys(soil_profile, list(SOIL_KEY_XLSX_2_JSON_MAPPING.keys()))
-                    soil_profile = map_keys(soil_profile, SOIL_KEY_XLSX_2_JSON_MAPPING)
-                except:
-                    ...
-
-                if not isinstance(soil_profile, dict):
-                    soil_profile = {
-                        'soil_layers': [],
-                        'grundwasserStand': None,
-                        'startKote': None
-                    }
-                soil_profile['pfahlTyp'] = 4 # This field is hard coded for now. Need ask Dr. Hilla to clarify.
-                soil_profile['name'] = sheet_names[sheet_index]
-                for row_index, soil_layer in enumerate(soil_profile['soil_layers']):
-                    soil_layer['row_index'] = row_index
-
-                project_data_json['soil_profiles'].append(soil_profile)
-            
-            except:
-                ...
-            # print(project_data_json['soil_profiles'])
-
-        # Horizontal Loads
-        project_data_json['horizontal_loadcases'] = []
-        for sheet_index in range(end_soil_profile_index+1,len(sheet_names)):
-            try:
-                # Horizontal loads
-                h_loads = json_data[sheet_names[sheet_index]]
-                h_loads = h_loads.dropna(subset=['Lastpunkt'])
-                h_loads = h_loads.astype(object).where(pd.notnull(h_loads), None)
-                h_loads = h_loads.to_dict(orient='records')
-                h_loads = remove_all_unneccessary_keys(h_loads, list(H_LOAD_KEY_XLSX_2_JSON_MAPPING.keys()))
-                h_loads = map_keys(h_loads, H_LOAD_KEY_XLSX_2_JSON_MAPPING)
-                for row_index, h_load in enumerate(h_loads):
-                    h_load['row_index'] = row_index
-
-                # horizontal load case
-                hload_case = {
-                    "name": sheet_names[sheet_index],
-                    "horizontal_loads": h_loads
-                }
-                project_data_json['horizontal_loadcases'].append(hload_case)
-            except:
-                ...
-
-        return project_data_json
-
+        with XlsxProjectReader(input_file) as reader:
+            return reader.to_json()
     except Exception as e:
         return None
 
@@ -989,29 +687,17 @@ def json_to_xlsx_structure(json_object: dict) -> dict:
     # pile
     if not json_object['piles']:
         output_xlsx['Pfahltabelle'].append(EMPTY_XLSX_PILE)
-    for pile in json_object['piles']:
-        pile = map_keys(pile, PILE_KEY_JSON_2_XLSX_MAPPING)
-        pile = remove_all_unneccessary_keys(pile, list(PILE_KEY_XLSX_2_JSON_MAPPING.keys()))
-        pile = sort_dict_by_keys(
-            pile,
-            list(PILE_KEY_XLSX_2_JSON_MAPPING.keys())
-        )
-        output_xlsx['Pfahltabelle'].append(pile)
+    output_xlsx['Pfahltabelle'].extend(PILE_XLSX_PLAN.apply_many(json_object['piles']))
 
     # soil
     for soil_profile in json_object['soil_profiles']:
         output_xlsx[soil_profile['name']] = []
         if not soil_profile['soil_layers']:
             output_xlsx[soil_profile['name']].append(EMPTY_XLSX_SOIL_LAYER)
-        for soil_layer in soil_profile['soil_layers']:
-            soil_layer = map_keys(soil_layer, SOIL_KEY_JSON_2_XLSX_MAPPING)
-            soil_layer = remove_all_unneccessary_keys(soil_layer, list(SOIL_KEY_XLSX_2_JSON_MAPPING.keys()))
-            soil_layer = sort_dict_by_keys(
-                soil_layer,
-                list(SOIL_KEY_XLSX_2_JSON_MAPPING.keys())[4:]
-            )
-            output_xlsx[soil_profile['name']].append(soil_layer)
-            
+        output_xlsx[soil_profile['name']].extend(
+            SOIL_LAYER_XLSX_PLAN.apply_many(soil_profile['soil_layers'])
+        )
+
         output_xlsx[soil_profile['name']+"-Info"] = [{
             "Grundwasserstand": soil_profile['grundwasserStand'],
             "Startkote": soil_profile['startKote']
@@ -1022,74 +708,19 @@ def json_to_xlsx_structure(json_object: dict) -> dict:
         output_xlsx[h_load_case['name']] = []
         if not h_load_case['horizontal_loads']:
             output_xlsx[h_load_case['name']].append(EMPTY_XLSX_H_LOAD)
-        for h_load in h_load_case['horizontal_loads']:
-            h_load = map_keys(h_load, H_LOAD_KEY_JSON_2_XLSX_MAPPING)
-            h_load = remove_all_unneccessary_keys(h_load, list(H_LOAD_KEY_XLSX_2_JSON_MAPPING.keys()))
-            h_load = sort_dict_by_keys(
-                h_load,
-                list(H_LOAD_KEY_XLSX_2_JSON_MAPPING.keys())
-            )
-            output_xlsx[h_load_case['name']].append(h_load)
+        output_xlsx[h_load_case['name']].extend(
+            H_LOAD_XLSX_PLAN.apply_many(h_load_case['horizontal_loads'])
+        )
 
     return output_xlsx
 
 
-def delete_calculation_output_data(project):
-    """
-    The function make all output data to be empty if calculation meet error.
-    """
-    try:
-        piles = Pile.objects.filter(project=project)
-        for pile in piles:
-            for key,_val in PILE_OUTPUT_KEYS_MAPPING.items():
-                try:
-                    pile.__setattr__(key, None)
-                except:
-                    ...
-            pile.save()
-    except:
-        ...
-
-    try:
-        soil_profs = SoilProfile.objects.filter(project=project)
-        for soil_prof in soil_profs:
-            current_soil_layers = SoilLayer.objects.filter(soil_profile=soil_prof).order_by("row_index")
-            for current_soil in current_soil_layers:
-                try:
-                    for key,val in SOIL_LAYER_OUTPUT_KEYS_MAPPING.items():
-                        try:
-                            current_soil.__setattr__(key, None)
-                            current_soil.save()
-                        except Exception as e:
-                            ...
-                except:
-                    ...
-    except:
-        ...
-
-    try:
-        h_cases = HorizontalLoadCase.objects.filter(project=project)
-        for h_case in h_cases:
-            hloads = HorizontalLoadPile.objects.filter(case=h_case).order_by("row_index")
-            for hload in hloads:
-                try:
-                    for key,val in HORIZONTAL_LOAD_POINT_OUTPUT_KEYS_MAPPING.items():
-                        try:
-                            hload.__setattr__(key, None)
-                            hload.save()
-                        except Exception as e:
-                            ...
-                except:
-                    ...
-    except:
-        ...
-
-
 def resize_image(uploaded_image, size=(100, 100)):
     """
     The function resize the uploaded image with fixed size
     before storing in CDN.
     """
+    from PIL import Image, ImageOps
 
     # Open the uploaded image
     img = Image.open(uploaded_image)
@@ -1138,7 +769,7 @@ def remove_old_image(old_image_file_name: str):
     headers = {"Content-Type": "application/json"}
 
     try:
-        requests.post(fastapi_url, data=json.dumps(payload), headers=headers, timeout=10)
+        http_session().post(fastapi_url, data=json.dumps(payload), headers=headers, timeout=10)
 
     except:
         ...
@@ -0,0 +1,246 @@
+"""
+Spatial index over the pile coordinates of a project.
+
+The piles are points (Rechtswert, Hochwert), the index answers in one
+pass over a uniform grid:
+
+    - neighbours: the piles within a radius of every pile (e.g. the
+      Beeinflussungsweite of the project settings)
+    - minimum axis distance: distance to the nearest pile in the radius
+    - clusters: groups of piles connected by distances within a radius
+    - invalid spacings: pairs of piles closer than the required axis
+      distance PfahlAchsAbstandxD * SollDurchmesser of either pile
+
+Grid cells have the size of the radius, so the pairs within the radius
+are in the same or an adjacent cell. The cells are joined with numpy,
+no pair of piles is compared in Python.
+
+An index is kept per process and project (INDEX_CACHE_SIZE projects),
+it is valid for one Project.tables_version. Every write of the project
+tables increments the version, the next query of any worker rebuilds
+the index from one values_list query of the piles.
+"""
+import threading
+from collections import OrderedDict
+
+from .models import Pile
+
+# Projects whose index is kept in memory by a process
+INDEX_CACHE_SIZE = 32
+# Radiuses whose pairs are kept by an index
+PAIRS_CACHE_SIZE = 4
+
+# Half of the adjacent cells (dx, dy), every pair of cells is joined once
+CELL_OFFSETS = ((0, 0), (0, 1), (1, -1), (1, 0), (1, 1))
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+def _pairs(xy, radius: float) -> tuple:
+    """
+    The function finds all pairs of points within the radius.
+
+    Return: indexes i, indexes j, distances (arrays)
+    """
+    import numpy as np
+
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0))
+    if len(xy) < 2 or not radius > 0:
+        return empty
+
+    cells = np.floor((xy - xy.min(axis=0)) / radius)
+    # Far apart piles and a tiny radius give cell numbers too large for
+    # the key below. The cells are renumbered per axis instead, adjacent
+    # cells stay 1 apart, all others are 2 apart.
+    dense = np.empty(cells.shape, dtype=np.int64)
+    for axis in range(2):
+        numbers, inverse = np.unique(cells[:, axis], return_inverse=True)
+        steps = np.minimum(np.diff(numbers), 2).astype(np.int64)
+        dense[:, axis] = np.concatenate(([0], np.cumsum(steps)))[inverse.ravel()]
+    cells = dense
+    # Room for dy = -1 and +1 without reaching the next column of cells
+    width = cells[:, 1].max() + 3
+    keys = cells[:, 0] * width + cells[:, 1] + 1
+
+    order = np.argsort(keys, kind='stable')
+    cell_keys, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+
+    found_i, found_j, found_d = [empty[0]], [empty[1]], [empty[2]]
+    for dx, dy in CELL_OFFSETS:
+        targets = cell_keys + dx * width + dy
+        positions = np.searchsorted(cell_keys, targets)
+        matches = positions < len(cell_keys)
+        matches[matches] = cell_keys[positions[matches]] == targets[matches]
+        a = np.flatnonzero(matches)
+        b = positions[matches]
+
+        # All point pairs of the joined cells
+        sizes = counts[a] * counts[b]
+        cell_pair = np.repeat(np.arange(len(a)), sizes)
+        local = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        width_b = counts[b][cell_pair]
+        local_a, local_b = local // width_b, local % width_b
+        if (dx, dy) == (0, 0):
+            # Each pair of the same cell once
+            keep = local_a < local_b
+            cell_pair, local_a, local_b = cell_pair[keep], local_a[keep], local_b[keep]
+
+        i = order[starts[a][cell_pair] + local_a]
+        j = order[starts[b][cell_pair] + local_b]
+        distances = np.hypot(*(xy[i] - xy[j]).T)
+        within = distances <= radius
+        found_i.append(i[within])
+        found_j.append(j[within])
+        found_d.append(distances[within])
+
+    return np.concatenate(found_i), np.concatenate(found_j), np.concatenate(found_d)
+
+
+class PileIndex:
+    """
+    Spatial index of the piles of a project at one tables version.
+
+    Attributes:
+        - version: Project.tables_version of the piles
+        - names: Pname of the indexed piles
+        - xy: array of the coordinates (Rechtswert, Hochwert)
+        - spacing: array of the required axis distance of each pile, NaN
+          if it can't be computed
+        - missing_coordinates: Pname of the piles without coordinates
+    """
+    def __init__(self, version: int, piles: list):
+        import numpy as np
+
+        self.version = version
+        located = [pile for pile in piles if pile[1] is not None and pile[2] is not None]
+        self.names = [pile[0] for pile in located]
+        self.xy = np.array([pile[1:3] for pile in located], dtype=float).reshape(len(located), 2)
+        spacing = np.array([pile[3:5] for pile in located], dtype=float).reshape(len(located), 2)
+        self.spacing = spacing[:, 0] * spacing[:, 1]
+        self.missing_coordinates = [pile[0] for pile in piles if pile[1] is None or pile[2] is None]
+        self._pairs = {}
+
+    @classmethod
+    def of_project(cls, project) -> 'PileIndex':
+        """
+        The function returns the index of the project, built when the
+        tables of the project changed since the last query.
+        """
+        with _lock:
+            index = _indexes.get(project.pk)
+            if index is not None and index.version == project.tables_version:
+                _indexes.move_to_end(project.pk)
+                return index
+
+        piles = list(
+            Pile.objects.filter(project=project)
+            .order_by('row_index', 'id')
+            .values_list('Pname', 'Rechtswert', 'Hochwert', 'PfahlAchsAbstandxD', 'SollDurchmesser')
+        )
+        index = cls(project.tables_version, piles)
+        with _lock:
+            _indexes[project.pk] = index
+            _indexes.move_to_end(project.pk)
+            while len(_indexes) > INDEX_CACHE_SIZE:
+                _indexes.popitem(last=False)
+        return index
+
+    def pairs(self, radius: float) -> tuple:
+        """
+        Return: indexes i, indexes j, distances of the pile pairs within the radius
+        """
+        pairs = self._pairs.get(radius)
+        if pairs is None:
+            if len(self._pairs) >= PAIRS_CACHE_SIZE:
+                self._pairs.clear()
+            pairs = self._pairs[radius] = _pairs(self.xy, radius)
+        return pairs
+
+    def neighbours(self, radius: float, names: set = None) -> list:
+        """
+        The function lists the piles within the radius of each pile,
+        nearest first.
+
+        Attributes:
+            - radius: in m
+            - names: only these piles, all if None
+        Return: [{'Pname', 'min_axis_distance', 'neighbours': [{'Pname', 'distance'}]}]
+        """
+        import numpy as np
+
+        i, j, distances = self.pairs(radius)
+        # Both directions of each pair, grouped by pile and sorted by distance
+        source = np.concatenate((i, j))
+        target = np.concatenate((j, i))
+        distances = np.concatenate((distances, distances))
+        order = np.lexsort((distances, source))
+        source, target, distances = source[order], target[order], distances[order]
+        bounds = np.searchsorted(source, np.arange(len(self.names) + 1)).tolist()
+        target_names = [self.names[neighbour] for neighbour in target.tolist()]
+        distances = distances.tolist()
+
+        result = []
+        for index, name in enumerate(self.names):
+            if names is not None and name not in names:
+                continue
+            start, end = bounds[index], bounds[index + 1]
+            result.append({
+                'Pname': name,
+                'min_axis_distance': distances[start] if end > start else None,
+                'neighbours': [
+                    {'Pname': target_names[position], 'distance': distances[position]}
+                    for position in range(start, end)
+                ],
+            })
+        return result
+
+    def clusters(self, radius: float) -> list:
+        """
+        The function groups the piles connected by distances within the
+        radius, the largest group first. Piles without a neighbour in
+        the radius are not listed.
+        """
+        import numpy as np
+
+        i, j, _ = self.pairs(radius)
+        labels = np.arange(len(self.names))
+        while True:
+            previous = labels
+            lowest = np.minimum(labels[i], labels[j])
+            labels = labels.copy()
+            np.minimum.at(labels, i, lowest)
+            np.minimum.at(labels, j, lowest)
+            labels = labels[labels]
+            if np.array_equal(labels, previous):
+                break
+
+        groups = {}
+        for index, label in enumerate(labels.tolist()):
+            groups.setdefault(label, []).append(self.names[index])
+        return sorted((group for group in groups.values() if len(group) > 1), key=len, reverse=True)
+
+    def invalid_spacings(self) -> list:
+        """
+        The function lists the pairs of piles which are closer than the
+        required axis distance of either pile.
+
+        Return: [{'piles': [Pname, Pname], 'distance', 'required'}]
+        """
+        import numpy as np
+
+        if not len(self.spacing) or np.isnan(self.spacing).all():
+            return []
+        i, j, distances = self.pairs(np.nanmax(self.spacing).item())
+        required = np.fmax(self.spacing[i], self.spacing[j])
+        with np.errstate(invalid='ignore'):
+            invalid = np.flatnonzero(distances < required)
+        invalid = invalid[np.argsort(distances[invalid], kind='stable')]
+        return [
+            {
+                'piles': [self.names[i[pair]], self.names[j[pair]]],
+                'distance': distances[pair].item(),
+                'required': required[pair].item(),
+            }
+            for pair in invalid.tolist()
+        ]
@@ -0,0 +1,242 @@
+"""
+Bulk exchange of single project tables as CSV or Parquet files.
+
+The column titles are the same as in the Excel template (e.g.
+PILE_KEY_XLSX_2_JSON_MAPPING), the model field names are accepted as
+well. Files are read in column batches and handed over to the table
+upsert, exports are read from the database cursor.
+"""
+import csv
+import io
+import tempfile
+
+from django.db import models, transaction
+
+from .mapping import (
+    PILE_KEY_XLSX_2_JSON_MAPPING,
+    SOIL_KEY_XLSX_2_JSON_MAPPING,
+    H_LOAD_KEY_XLSX_2_JSON_MAPPING,
+)
+from .models import Pile, SoilLayer, HorizontalLoadPile
+from .table_upsert import (
+    DEFAULT_BATCH_SIZE,
+    upsert_piles,
+    replace_soil_layers,
+    upsert_horizontal_loads,
+)
+from .xlsx_import import SheetPlan
+
+CSV_FORMAT = 'csv'
+PARQUET_FORMAT = 'parquet'
+FILE_FORMATS = (CSV_FORMAT, PARQUET_FORMAT)
+
+CONTENT_TYPES = {
+    CSV_FORMAT: 'text/csv',
+    PARQUET_FORMAT: 'application/vnd.apache.parquet',
+}
+
+
+class TableSpec:
+    """
+    Exchange layout of one table.
+
+    Attributes:
+        - model: Django model of the table
+        - mapping (dict): column title -> model field name
+        - key_header (str): rows with an empty key column are skipped
+        - upsert: function(project, rows, batch_size) storing the rows
+        - parent (tuple): (column title, field name, lookup) of the
+          soil profile / load case the row belongs to
+    """
+    def __init__(self, model, mapping: dict, key_header: str, upsert, parent: tuple = None):
+        self.model = model
+        self.key_header = key_header
+        self.upsert = upsert
+        self.parent = parent
+
+        model_fields = {field.name: field for field in model._meta.concrete_fields}
+        columns = [
+            (title, field_name) for title, field_name in mapping.items()
+            if field_name in model_fields
+        ]
+        if parent is not None:
+            columns.insert(0, parent[:2])
+
+        self.headers = tuple(title for title, _ in columns)
+        self.fields = tuple(field_name for _, field_name in columns)
+        self.lookups = tuple(
+            parent[2] if parent is not None and field_name == parent[1] else field_name
+            for field_name in self.fields
+        )
+        self.field_types = tuple(
+            model_fields[field_name] for field_name in self.fields
+        )
+        # Model field names are accepted as column titles too.
+        self.import_mapping = {**{name: name for name in self.fields}, **dict(columns)}
+
+    def plan(self, header) -> SheetPlan:
+        plan = SheetPlan.from_header(tuple(header), self.import_mapping, self.model, self.key_header)
+        if plan.key_field is None:
+            raise ValueError(f"Column '{self.key_header}' is missing.")
+        return plan
+
+    def queryset(self, project):
+        ordering = ('row_index',) if self.parent is None else (f"{self.parent[1]}_id", 'row_index')
+        return self.model.objects.filter(project=project).order_by(*ordering).values_list(*self.lookups)
+
+
+TABLES = {
+    'piles': TableSpec(
+        Pile, PILE_KEY_XLSX_2_JSON_MAPPING, 'Lastpunkt', upsert_piles
+    ),
+    'soil-layers': TableSpec(
+        SoilLayer,
+        # The first four keys belong to the soil profile itself.
+        dict(list(SOIL_KEY_XLSX_2_JSON_MAPPING.items())[4:]),
+        'Endkote',
+        replace_soil_layers,
+        parent=('Bodenprofil', 'soil_profile', 'soil_profile__name')
+    ),
+    'horizontal-loads': TableSpec(
+        HorizontalLoadPile,
+        H_LOAD_KEY_XLSX_2_JSON_MAPPING,
+        'Lastpunkt',
+        upsert_horizontal_loads,
+        parent=('Lastfall', 'case', 'case__name')
+    ),
+}
+
+
+def file_format_of(file_name: str) -> str | None:
+    extension = file_name.rsplit('.', 1)[-1].lower()
+    return extension if extension in FILE_FORMATS else None
+
+
+def _csv_batches(input_file, batch_size: int):
+    reader = csv.reader(io.TextIOWrapper(input_file, encoding='utf-8-sig', newline=''))
+    header = next(reader, ())
+    batch = []
+    for values in reader:
+        batch.append(values)
+        if len(batch) >= batch_size:
+            yield header, batch
+            batch = []
+    if batch:
+        yield header, batch
+
+
+def _parquet_batches(input_file, batch_size: int):
+    # Imported here, pyarrow is only needed for Parquet files.
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(input_file)
+    header = parquet_file.schema_arrow.names
+    for record_batch in parquet_file.iter_batches(batch_size=batch_size):
+        columns = [column.to_pylist() for column in record_batch.columns]
+        yield header, list(zip(*columns))
+
+
+def import_table(project, table: str, input_file, file_format: str,
+                 batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    The function reads a CSV or Parquet file in batches and upserts
+    the rows into the project table in one transaction.
+
+    Attributes:
+        - project: Project model object
+        - table: key of TABLES
+        - input_file: binary file object
+        - file_format: 'csv' or 'parquet'
+        - batch_size: int
+    Return: number of stored rows
+    """
+    spec = TABLES[table]
+    batches = (
+        _csv_batches(input_file, batch_size) if file_format == CSV_FORMAT
+        else _parquet_batches(input_file, batch_size)
+    )
+
+    def rows():
+        plan = None
+        for header, values in batches:
+            if plan is None:
+                plan = spec.plan(header)
+            yield from plan.convert_rows(values)
+
+    with transaction.atomic():
+        return spec.upsert(project, rows(), batch_size)
+
+
+class _Echo:
+    """
+    File like object returning what is written, used to stream csv rows.
+    """
+    def write(self, value):
+        return value
+
+
+def iter_csv_export(project, table: str, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Yield the CSV lines of a project table.
+    """
+    spec = TABLES[table]
+    writer = csv.writer(_Echo())
+    yield writer.writerow(spec.headers)
+    for values in spec.queryset(project).iterator(chunk_size=batch_size):
+        yield writer.writerow(values)
+
+
+def _arrow_type(field):
+    import pyarrow as pa
+
+    if isinstance(field, models.FloatField):
+        return pa.float64()
+    if isinstance(field, models.BooleanField):
+        return pa.bool_()
+    if isinstance(field, models.IntegerField):
+        return pa.int64()
+    # Text columns and the soil profile / load case (exported by name)
+    return pa.string()
+
+
+def export_parquet(project, table: str, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    The function writes a project table to a temporary Parquet file,
+    one row group per batch.
+
+    Return: file object positioned at the start
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    spec = TABLES[table]
+    schema = pa.schema([
+        (header, _arrow_type(field)) for header, field in zip(spec.headers, spec.field_types)
+    ])
+
+    output = tempfile.TemporaryFile(suffix='.parquet')
+    try:
+        with pq.ParquetWriter(output, schema) as writer:
+            batch = []
+            for values in spec.queryset(project).iterator(chunk_size=batch_size):
+                batch.append(values)
+                if len(batch) >= batch_size:
+                    writer.write_batch(_record_batch(schema, batch))
+                    batch = []
+            if batch:
+                writer.write_batch(_record_batch(schema, batch))
+    except Exception:
+        output.close()
+        raise
+    output.seek(0)
+    return output
+
+
+def _record_batch(schema, rows: list):
+    import pyarrow as pa
+
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+        schema=schema
+    )
@@ -0,0 +1,415 @@
+from functools import lru_cache
+from itertools import islice
+
+from django.db import connection, transaction
+from django.db.models import Max
+
+from .models import (
+    Project,
+    Pile,
+    SoilProfile,
+    SoilLayer,
+    HorizontalLoadCase,
+    HorizontalLoadPile
+)
+
+# Number of rows sent to the database in one INSERT statement.
+DEFAULT_BATCH_SIZE = 1000
+
+TRUE_VALUES = {"true", "True", "TRUE", "1", "1.0"}
+
+
+def model_field_names(model) -> frozenset:
+    """
+    The function returns the concrete field names of a model
+    which can be written by the table upsert.
+    """
+    return frozenset(
+        field.name for field in model._meta.concrete_fields
+        if field.name not in ('id', 'project', 'soil_profile', 'case')
+    )
+
+
+PILE_FIELDS = model_field_names(Pile)
+SOIL_PROFILE_FIELDS = model_field_names(SoilProfile)
+SOIL_LAYER_FIELDS = model_field_names(SoilLayer)
+HORIZONTAL_LOAD_CASE_FIELDS = model_field_names(HorizontalLoadCase)
+HORIZONTAL_LOAD_PILE_FIELDS = model_field_names(HorizontalLoadPile)
+
+
+def to_bool(value) -> bool:
+    """
+    Convert the cell value of a boolean column in the same way
+    as the table upsert always did ("true", "True", "1" are True).
+    """
+    if isinstance(value, bool):
+        return value
+    return str(value) in TRUE_VALUES
+
+
+def _iter_batches(iterable, batch_size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+def _clean_row(row: dict, allowed_fields: frozenset) -> dict:
+    return {
+        key: None if value == "NaN" else value
+        for key, value in row.items()
+        if key in allowed_fields
+    }
+
+
+@lru_cache(maxsize=None)
+def _insert_columns(model) -> tuple:
+    """
+    Columns of an INSERT with the database value of their default
+    and the value cast, computed once per model.
+    """
+    return tuple(
+        (
+            field.attname,
+            field.column,
+            field.get_db_prep_save(field.get_default(), connection),
+            field.cast_db_type(connection),
+        )
+        for field in model._meta.concrete_fields
+        if not field.primary_key
+    )
+
+
+def _bulk_insert(model, rows: list, unique_fields: tuple = (), update_fields: tuple = ()):
+    """
+    Insert rows (dicts keyed by field attname, missing fields get their
+    default) with one statement. Rows conflicting on unique_fields
+    update the update_fields only (no update_fields: they are skipped).
+
+    On PostgreSQL the statement is rendered with psycopg2 execute_values,
+    building model instances and compiling the ORM insert costs far more
+    than the query itself for wide tables like Pile.
+    """
+    if not rows:
+        return
+
+    if connection.vendor != 'postgresql':
+        options = {}
+        if unique_fields and update_fields:
+            options = {
+                'update_conflicts': True,
+                'unique_fields': unique_fields,
+                'update_fields': update_fields,
+            }
+        elif unique_fields:
+            options = {'ignore_conflicts': True}
+        model.objects.bulk_create([model(**row) for row in rows], **options)
+        return
+
+    from psycopg2.extras import execute_values
+
+    quote = connection.ops.quote_name
+    columns = _insert_columns(model)
+    sql = (
+        f"INSERT INTO {quote(model._meta.db_table)} "
+        f"({', '.join(quote(column) for _, column, _, _ in columns)}) VALUES %s"
+    )
+    if unique_fields:
+        conflict = ', '.join(quote(model._meta.get_field(name).column) for name in unique_fields)
+        if update_fields:
+            updates = ', '.join(
+                f"{quote(column)} = EXCLUDED.{quote(column)}"
+                for column in (model._meta.get_field(name).column for name in update_fields)
+            )
+            sql += f" ON CONFLICT ({conflict}) DO UPDATE SET {updates}"
+        else:
+            sql += f" ON CONFLICT ({conflict}) DO NOTHING"
+
+    # Casts keep the column types when a whole column is given as text (XML import).
+    template = f"({', '.join(f'%s::{cast}' for _, _, _, cast in columns)})"
+    values = [
+        tuple(row.get(attname, default) for attname, _, default, _ in columns)
+        for row in rows
+    ]
+    with connection.cursor() as cursor:
+        execute_values(cursor, sql, values, template=template, page_size=len(values))
+
+
+def _check_unique_names(rows: list, name_key: str, table: str, seen: set):
+    """
+    Names must be unique per table, fail with a readable message
+    instead of an IntegrityError in the middle of the batch.
+    """
+    duplicates = set()
+    for row in rows:
+        name = row.get(name_key)
+        if name is None:
+            continue
+        if name in seen:
+            duplicates.add(name)
+        seen.add(name)
+    if duplicates:
+        raise ValueError(
+            f"Duplicate {name_key} in {table}: {', '.join(sorted(map(str, duplicates)))}"
+        )
+
+
+def bulk_create_piles(project: Project, piles, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Insert the pile rows in batches.
+
+    Attributes:
+        - project: Project model object
+        - piles: iterable of pile dicts (model field names)
+        - batch_size: int
+    Return: number of stored rows
+    """
+    count = 0
+    names = set()
+    for batch in _iter_batches(piles, batch_size):
+        batch = [_clean_row(pile, PILE_FIELDS) for pile in batch]
+        _check_unique_names(batch, 'Pname', 'piles', names)
+        _bulk_insert(Pile, [{**pile, 'project_id': project.pk} for pile in batch])
+        count += len(batch)
+    return count
+
+
+def bulk_create_soil_profiles(
+        project: Project,
+        soil_profiles,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> int:
+    """
+    Insert the soil profiles one by one and their layers in batches.
+
+    Return: number of stored soil layers
+    """
+    count = 0
+    for soil_profile in soil_profiles:
+        soil_profile = dict(soil_profile)
+        soil_layers = soil_profile.pop('soil_layers', [])
+        if 'soil_table_name' in soil_profile:
+            soil_profile['name'] = soil_profile.pop('soil_table_name')
+        profile = SoilProfile.objects.create(
+            project=project, **_clean_row(soil_profile, SOIL_PROFILE_FIELDS)
+        )
+
+        for batch in _iter_batches(soil_layers, batch_size):
+            layers = []
+            for layer in batch:
+                layer = _clean_row(layer, SOIL_LAYER_FIELDS)
+                for key in ('FuszAbsetzbar', 'IstEindringRelevant'):
+                    if key in layer:
+                        layer[key] = to_bool(layer[key])
+                layer['project_id'] = project.pk
+                layer['soil_profile_id'] = profile.pk
+                layers.append(layer)
+            _bulk_insert(SoilLayer, layers)
+            count += len(layers)
+    return count
+
+
+def bulk_create_horizontal_loadcases(
+        project: Project,
+        horizontal_loadcases,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> int:
+    """
+    Insert the horizontal load cases one by one and their loads in batches.
+
+    Return: number of stored horizontal loads
+    """
+    count = 0
+    for h_load_case in horizontal_loadcases:
+        h_load_case = dict(h_load_case)
+        horizontal_loads = h_load_case.pop('horizontal_loads', [])
+        if 'hlc_table_name' in h_load_case:
+            h_load_case['name'] = h_load_case.pop('hlc_table_name')
+        case = HorizontalLoadCase.objects.create(
+            project=project, **_clean_row(h_load_case, HORIZONTAL_LOAD_CASE_FIELDS)
+        )
+
+        names = set()
+        for batch in _iter_batches(horizontal_loads, batch_size):
+            batch = [_clean_row(h_load, HORIZONTAL_LOAD_PILE_FIELDS) for h_load in batch]
+            _check_unique_names(batch, 'Pname', case.name, names)
+            _bulk_insert(
+                HorizontalLoadPile,
+                [{**h_load, 'project_id': project.pk, 'case_id': case.pk} for h_load in batch]
+            )
+            count += len(batch)
+    return count
+
+
+def replace_project_table_data(
+        project: Project,
+        piles=(),
+        soil_profiles=(),
+        horizontal_loadcases=(),
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> dict:
+    """
+    The function replaces all table data of a project in one transaction.
+    Rows may be given as generators, they are consumed batch by batch
+    and written with bulk inserts instead of one query per row.
+
+    Attributes:
+        - project: Project model object
+        - piles: iterable of pile dicts
+        - soil_profiles: iterable of soil profile dicts with 'soil_layers'
+        - horizontal_loadcases: iterable of load case dicts with 'horizontal_loads'
+        - batch_size: int
+    Return: dict with the number of stored rows per table
+    """
+    with transaction.atomic():
+        Pile.objects.filter(project=project).delete()
+        SoilLayer.objects.filter(project=project).delete()
+        SoilProfile.objects.filter(project=project).delete()
+        HorizontalLoadPile.objects.filter(project=project).delete()
+        HorizontalLoadCase.objects.filter(project=project).delete()
+
+        counts = {
+            'piles': bulk_create_piles(project, piles, batch_size),
+            'soil_layers': bulk_create_soil_profiles(project, soil_profiles, batch_size),
+            'horizontal_loads': bulk_create_horizontal_loadcases(
+                project, horizontal_loadcases, batch_size
+            ),
+        }
+        project.tables_changed()
+        return counts
+
+
+def _next_row_index(queryset) -> int:
+    row_index = queryset.aggregate(row_index=Max('row_index'))['row_index']
+    return 0 if row_index is None else row_index + 1
+
+
+def _bulk_upsert(model, rows: list, unique_fields: tuple):
+    """
+    Insert the rows, rows which exist already (unique_fields) are
+    updated with the given columns only. The row_index of existing
+    rows is kept.
+    """
+    update_fields = set()
+    for row in rows:
+        update_fields.update(row.keys())
+    update_fields -= set(unique_fields) | {'row_index', 'project_id', 'case_id'}
+    _bulk_insert(model, rows, unique_fields, tuple(sorted(update_fields)))
+
+
+def upsert_piles(project: Project, piles, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Insert new piles and update the existing ones (matched by Pname)
+    in batches. New piles are appended after the existing rows.
+
+    Attributes:
+        - project: Project model object
+        - piles: iterable of pile dicts (model field names)
+        - batch_size: int
+    Return: number of stored rows
+    """
+    count = 0
+    names = set()
+    row_index = _next_row_index(Pile.objects.filter(project=project))
+    for batch in _iter_batches(piles, batch_size):
+        batch = [_clean_row(pile, PILE_FIELDS) for pile in batch]
+        _check_unique_names(batch, 'Pname', 'piles', names)
+
+        rows = []
+        for pile in batch:
+            rows.append({**pile, 'project_id': project.pk, 'row_index': row_index})
+            row_index += 1
+
+        _bulk_upsert(Pile, rows, ('project', 'Pname'))
+        count += len(batch)
+    project.tables_changed()
+    return count
+
+
+def replace_soil_layers(project: Project, soil_layers, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Replace the layers of every soil profile given in the rows, the
+    profile name is given in 'soil_profile'. Missing soil profiles are
+    created, profiles which are not in the rows are kept as they are.
+
+    Return: number of stored soil layers
+    """
+    profiles = {profile.name: profile for profile in SoilProfile.objects.filter(project=project)}
+    row_indexes = {}
+    count = 0
+    for batch in _iter_batches(soil_layers, batch_size):
+        layers = []
+        for layer in batch:
+            name = layer.get('soil_profile')
+            if name in (None, ''):
+                raise ValueError("The soil profile of a soil layer is missing.")
+            name = str(name)
+
+            if name not in row_indexes:
+                if name not in profiles:
+                    profiles[name] = SoilProfile.objects.create(project=project, name=name)
+                SoilLayer.objects.filter(soil_profile=profiles[name]).delete()
+                row_indexes[name] = 0
+
+            layer = _clean_row(layer, SOIL_LAYER_FIELDS)
+            for key in ('FuszAbsetzbar', 'IstEindringRelevant'):
+                if key in layer:
+                    layer[key] = to_bool(layer[key])
+            layer['row_index'] = row_indexes[name]
+            layer['project_id'] = project.pk
+            layer['soil_profile_id'] = profiles[name].pk
+            row_indexes[name] += 1
+            layers.append(layer)
+
+        _bulk_insert(SoilLayer, layers)
+        count += len(layers)
+    project.tables_changed()
+    return count
+
+
+def upsert_horizontal_loads(project: Project, horizontal_loads, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Insert new horizontal loads and update the existing ones (matched by
+    load case and Pname) in batches. The load case name is given in
+    'case', missing load cases are created.
+
+    Return: number of stored rows
+    """
+    cases = {case.name: case for case in HorizontalLoadCase.objects.filter(project=project)}
+    row_indexes = {}
+    names = set()
+    count = 0
+    for batch in _iter_batches(horizontal_loads, batch_size):
+        rows = []
+        duplicates = set()
+        for h_load in batch:
+            name = h_load.get('case')
+            if name in (None, ''):
+                raise ValueError("The load case of a horizontal load is missing.")
+            name = str(name)
+
+            if name not in cases:
+                cases[name] = HorizontalLoadCase.objects.create(project=project, name=name)
+            case = cases[name]
+            if name not in row_indexes:
+                row_indexes[name] = _next_row_index(HorizontalLoadPile.objects.filter(case=case))
+
+            h_load = _clean_row(h_load, HORIZONTAL_LOAD_PILE_FIELDS)
+            if (name, h_load.get('Pname')) in names:
+                duplicates.add(f"{h_load.get('Pname')} ({name})")
+            names.add((name, h_load.get('Pname')))
+
+            rows.append({
+                **h_load,
+                'project_id': project.pk,
+                'case_id': case.pk,
+                'row_index': row_indexes[name]
+            })
+            row_indexes[name] += 1
+
+        if duplicates:
+            raise ValueError(f"Duplicate Pname in horizontal loads: {', '.join(sorted(duplicates))}")
+
+        _bulk_upsert(HorizontalLoadPile, rows, ('case', 'Pname'))
+        count += len(rows)
+    project.tables_changed()
+    return count
@@ -1,3 +1,651 @@
-from django.test import TestCase
+import copy
+import hashlib
+import json
+import math
+import random
+import sys
+import warnings
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
 
-# Create your tests here.
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from conftest import Endpoint, PROJECT_SIZES, build_company, logo_upload, proxy_response
+from shared.metrics import REGISTRY
+from .dhpd_serializer.mapper import DhpdSerializer
+from .calculation_runs import prune_runs
+from .calculation_snapshots import prune_snapshots
+from .dhpd_standin import synthetic_output
+from .import_diff import diff_project_data
+from .management.commands.bench_unit_convert import _same, build_project, value_by_value
+from .mapping import PILE_OUTPUT_KEYS_MAPPING
+from .models import (
+    ImportJob, CalculationRun, CalculationSnapshot, PileResult, SoilLayerResult, HorizontalLoadPile,
+    Pile, Project, ProjectSettings, UserProjectRel,
+)
+from .services import http_session, input_xml_content_unit_convert, json_to_calculate_xml
+from .search import trigram_available
+from .serializers import ProjectSettingsWithoutCompLogoSerializer, ProjectTableSerializer
+from .spatial_index import _pairs as spatial_pairs
+from .table_exchange import iter_csv_export
+from .table_upsert import upsert_piles
+from .warm_up import warm_up
+from .xlsx_export import export_project_xlsx
+
+PROJECTS = '/v1/companies/{company_id}/projects/'
+PROJECT = PROJECTS + '{project_id}/'
+
+
+def _settings(context):
+    return {'settings': ProjectSettingsWithoutCompLogoSerializer(context['project'].basic_data_settings).data}
+
+
+def _tables(context):
+    return ProjectTableSerializer(context['project']).data
+
+
+def _csv_file(context):
+    content = ''.join(iter_csv_export(context['project'], 'piles')).encode('utf-8')
+    return {'file': SimpleUploadedFile('piles.csv', content, content_type='text/csv')}
+
+
+def _xlsx_file(context):
+    with export_project_xlsx(context['project']) as file:
+        content = file.read()
+    return {'file': SimpleUploadedFile('project.xlsx', content)}
+
+
+def _import_job(context):
+    context['job_id'] = ImportJob.objects.create(project=context['project'], file_name='project.xlsx').pk
+
+
+def _project_ids(context):
+    return {'project_ids': [project.id for project in context['projects'][1:]]}
+
+
+def _calculation_result(context):
+    piles = [
+        {'_Pname': pile.Pname, **{xml_key: '1.5' for xml_key in PILE_OUTPUT_KEYS_MAPPING.values()}}
+        for pile in context['project'].piles.all()
+    ]
+    return {
+        'error_msg': None,
+        'pdf': 'project.pdf',
+        'xml_output_data': {
+            'OutputDaten': {'pfaehle': {'LastPunktOutputList': {'LastPunktOutput': piles}}}
+        },
+    }
+
+
+def _employee_ids(context):
+    return {'user_ids': [employee.id for employee in context['employees']]}
+
+
+# The queries of the endpoints with a budget per size grow with the number
+# of projects, users or table rows (one or more queries per row).
+ENDPOINTS = [
+    Endpoint('project list', 'get', PROJECTS, queries={'small': 8, 'large': 44}),
+    Endpoint('project create', 'post', PROJECTS, queries=9, data={'name': 'New project'}, status=(201,)),
+    Endpoint('project retrieve', 'get', PROJECT, queries={'small': 12, 'large': 17}),
+    Endpoint('project partial update', 'patch', PROJECT, queries=6, data={'name': 'Renamed project'}),
+    Endpoint('project destroy', 'delete', PROJECT, queries=19, status=(204,)),
+    Endpoint('project pdf', 'get', PROJECT + 'pdf/', queries=8),
+    Endpoint('project xml', 'get', PROJECT + 'xml/', queries={'small': 17, 'large': 22}),
+    Endpoint('project xlsx', 'get', PROJECT + 'xlsx/', queries={'small': 14, 'large': 19}),
+    Endpoint('project assigned-users', 'get', PROJECT + 'assigned-users/',
+             queries={'small': 16, 'large': 68}),
+    Endpoint('project unassigned-users', 'get', PROJECT + 'unassigned-users/', queries=11),
+    Endpoint('project delete-project', 'delete', PROJECT + 'delete-project/', queries=11),
+    Endpoint('project delete-multi-projects', 'delete', PROJECTS + 'delete-multi-projects/',
+             queries={'small': 9, 'large': 45}, data=_project_ids),
+    Endpoint('project copy-multi-projects', 'post', PROJECTS + 'copy-multi-projects/',
+             queries={'small': 45, 'large': 920}, ms={'small': 500, 'large': 1500},
+             data=lambda context: {'project_ids': [context['project_id']]}),
+    Endpoint('project assign-users', 'post', PROJECT + 'assign-users/',
+             queries={'small': 15, 'large': 54}, data=_employee_ids),
+    Endpoint('project unassign-users', 'post', PROJECT + 'unassign-users/',
+             queries={'small': 17, 'large': 69}, data=_employee_ids),
+    Endpoint('project assign-user', 'post', PROJECT + 'assign-user/', queries=12,
+             data=lambda context: {'user_id': context['user_id']}),
+    Endpoint('project unassign-user', 'post', PROJECT + 'unassign-user/', queries=10,
+             data=lambda context: {'user_id': context['employee_id']}),
+    Endpoint('project reset-default-settings', 'post', PROJECT + 'reset-default-settings/', queries=12),
+    Endpoint('project update-settings', 'put', PROJECT + 'update-settings/', queries=15, data=_settings),
+    Endpoint('project update-table-datas', 'put', PROJECT + 'update-table-datas/',
+             queries={'small': 135, 'large': 5200}, ms={'small': 500, 'large': 5000}, data=_tables),
+    Endpoint('project upload-company-logo', 'post', PROJECT + 'upload-company-logo/', queries=10,
+             data=logo_upload, format='multipart', dhpd_response=lambda context: {'file_name': 'logo.png'}),
+    Endpoint('project import-file dry run', 'post', PROJECT + 'import-file/?dry_run=true', queries=13,
+             data=_xlsx_file, format='multipart'),
+    Endpoint('project import-jobs', 'get', PROJECT + 'import-jobs/{job_id}/', queries=9, data=_import_job),
+    Endpoint('project tables export', 'get', PROJECT + 'tables/piles/', queries=9),
+    Endpoint('project tables import', 'post', PROJECT + 'tables/piles/', queries=12,
+             data=_csv_file, format='multipart'),
+    Endpoint('project calculate', 'get', PROJECT + 'calculate/',
+             queries={'small': 50, 'large': 60}, ms={'small': 500, 'large': 2000},
+             dhpd_response=_calculation_result),
+    Endpoint('project preflight', 'get', PROJECT + 'preflight/', queries=11),
+    Endpoint('project summary', 'get', PROJECT + 'summary/', queries=11),
+    Endpoint('project calculation-runs', 'get', PROJECT + 'calculation-runs/', queries=9),
+    Endpoint('project search', 'get', PROJECTS + 'search/?q=0', queries=4),
+]
+
+
+@pytest.mark.parametrize('size', PROJECT_SIZES)
+@pytest.mark.parametrize('endpoint', ENDPOINTS, ids=lambda endpoint: endpoint.name)
+def test_project_endpoint_budget(endpoint, size, endpoint_budget):
+    endpoint_budget(endpoint)
+
+
+def test_dhpd_standin_output_matches_input():
+    input_document = {'InputDaten': {
+        'pfaehle': {'LastPunktInputList': {'LastPunktInput': [{'_Pname': 'P1'}, {'_Pname': 'P2'}]}},
+        'boden': {'alleBodenProfile': {'BodenProfilDaten': {
+            '_profilName': 'BP1', 'alleBodenSchichten': {'BodenSchichtDaten': [{}, {}]}
+        }}},
+        'hLasten': {'hTabellen': {'HLastInputTabelle': {
+            'hTabelleName': 'LF1', 'hLastPunkte': {'HLastPunktInput': {}}
+        }}},
+    }}
+    output = DhpdSerializer.unserialize_output(synthetic_output(input_document, random.Random(0)))
+
+    assert set(output.piles) == {'P1', 'P2'}
+    assert len(output.soil_layers['BP1']) == 2
+    assert len(output.horizontal_loads['LF1']) == 1
+    assert output.error_text is None
+
+
+# Recorded with the former calculate: process_driven_pile,
+# input_xml_content_unit_convert and json_to_calculate_xml for the XML,
+# the output unit convert, rounding and per-key mapping for the output
+CODEC_REFERENCE = Path(__file__).parent / 'test_data'
+
+
+def test_dhpd_codec_matches_the_former_mapping(mocker):
+    reference = json.loads((CODEC_REFERENCE / 'dhpd_codec_reference.json').read_text(encoding='utf-8'))
+    mocker.patch('projects.services.WINDOW_SERVER_IMAGES_DIRECTORY', reference['window_server_images_directory'])
+    mocker.patch('projects.services.UserSerializer', return_value=SimpleNamespace(data=reference['user']))
+    mocker.patch(
+        'projects.services.CompanyCalculateSerializer', return_value=SimpleNamespace(data=reference['company'])
+    )
+
+    xml_content = json_to_calculate_xml(reference['project'], None, SimpleNamespace(**reference['company']))
+    assert xml_content == (CODEC_REFERENCE / 'dhpd_calculate_reference.xml').read_text(encoding='utf-8')
+
+    output = DhpdSerializer.unserialize_output(reference['output'])
+    decoded = reference['decoded']
+
+    def fields(records, expected):
+        return [{key: getattr(record, key) for key in row} for record, row in zip(records, expected)]
+
+    assert {
+        name: fields([pile], [decoded['piles'][name]])[0] for name, pile in output.piles.items()
+    } == decoded['piles']
+    assert {
+        name: fields(layers, decoded['soil_layers'][name]) for name, layers in output.soil_layers.items()
+    } == decoded['soil_layers']
+    assert {
+        name: fields(loads, decoded['horizontal_loads'][name]) for name, loads in output.horizontal_loads.items()
+    } == decoded['horizontal_loads']
+    # _EzuR and _usedQ* are scaled, 'NaN' is stored as None
+    assert output.piles['P1'].EzuR is None
+    assert output.piles['P2'].EzuR == 20320.19
+    assert output.soil_layers['BP1'][0].usedQsk is None
+    assert output.soil_layers['BP1'][0].usedQbk002 == 0.63
+    assert output.horizontal_loads['LF1'][0].MMax is None
+
+
+def test_warm_up_reports_steps():
+    seconds = warm_up()
+
+    assert {'imports', 'serializers', 'key_plans', 'http_pool'} <= set(seconds)
+    assert http_session() is http_session()
+    assert 'process_warm_up_seconds{step="serializers"}' in REGISTRY.render()
+
+
+@pytest.mark.parametrize('size', ['small'])
+def test_calculate_async_checks_permissions(budget_context):
+    path = f"/v1/companies/{budget_context['company_id']}/projects/{budget_context['project_id']}/calculate-async/"
+    client = Client(SERVER_NAME='localhost')
+    assert client.get(path).status_code == 401
+
+    outsider = build_company('small')['admin']
+    token = RefreshToken.for_user(outsider).access_token
+    assert client.get(path, HTTP_AUTHORIZATION=f"Bearer {token}").status_code == 403
+
+
+@pytest.mark.parametrize('size', ['small'])
+def test_calculate_async_stores_output(budget_context, mocker):
+    httpx = pytest.importorskip('httpx')
+
+    def proxy(request):
+        return httpx.Response(200, json=_calculation_result(budget_context))
+
+    mocker.patch('projects.async_calculate.http_client', return_value=httpx.AsyncClient(
+        base_url='http://dhpd/', transport=httpx.MockTransport(proxy)
+    ))
+    path = f"/v1/companies/{budget_context['company_id']}/projects/{budget_context['project_id']}/calculate-async/"
+    token = RefreshToken.for_user(budget_context['admin']).access_token
+    response = Client(SERVER_NAME='localhost').get(path, HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    assert response.status_code == 200, response.content[:500]
+    budget_context['project'].refresh_from_db()
+    assert budget_context['project'].pdf == 'project.pdf'
+
+
+@pytest.mark.parametrize('size', ['small'])
+def test_calculate_fails_the_run_on_unexpected_errors(budget_context, mocker):
+    project = budget_context['project']
+    proxy = mocker.patch('requests.Session.post', return_value=proxy_response(200))
+    client = APIClient()
+    client.defaults['SERVER_NAME'] = 'localhost'
+    client.force_authenticate(budget_context['admin'])
+    path = PROJECT.format(**budget_context) + 'calculate/'
+
+    # A body which isn't JSON, a response without xml_output_data
+    for response in (proxy_response(200), proxy_response(200, {'pdf': 'project.pdf'})):
+        proxy.return_value = response
+        with pytest.raises((ValueError, KeyError)):
+            client.get(path)
+        run = CalculationRun.objects.filter(project=project).first()
+        assert run.status == CalculationRun.STATUS_FAILED and run.finished_date is not None
+
+
+@pytest.mark.parametrize('size', ['small'])
+def test_calculation_runs_store_output_apart_from_input(budget_context, mocker, settings):
+    settings.CALCULATION_RUNS_KEEP = 2
+    project = budget_context['project']
+    soil_profile = project.soil_profiles.first()
+    result = _calculation_result(budget_context)
+    result['xml_output_data']['OutputDaten']['BodenNutzung'] = {'BodenNutzungDict': {
+        'a:KeyValueOfstringBodenNutzungOutputDB_PsWP3v': {
+            'a:Key': soil_profile.name,
+            'a:Value': {'_schichten': {'BodenSchichtNutzung': [
+                {'_usedQsk': str(1000 * position)} for position in range(soil_profile.soil_layers.count())
+            ]}},
+        }
+    }}
+    proxy = mocker.patch('requests.Session.post', return_value=proxy_response(200, result))
+    client = APIClient()
+    client.defaults['SERVER_NAME'] = 'localhost'
+    client.force_authenticate(budget_context['admin'])
+    path = PROJECT.format(**budget_context)
+
+    for _ in range(3):
+        assert client.get(path + 'calculate/').status_code == 200
+    runs = list(CalculationRun.objects.filter(project=project))
+    assert len(runs) == 2
+    assert runs[0].status == CalculationRun.STATUS_SUCCEEDED and len(runs[0].input_hash) == 64
+    assert runs[0].input_hash == runs[1].input_hash
+    assert PileResult.objects.filter(run=runs[0]).count() == project.piles.count()
+    assert SoilLayerResult.objects.filter(run=runs[0]).count() == soil_profile.soil_layers.count()
+
+    data = client.get(path).json()
+    assert {pile['R_d'] for pile in data['piles']} == {1.5}
+    layers = next(profile for profile in data['soil_profiles'] if profile['name'] == soil_profile.name)['soil_layers']
+    assert [layer['usedQsk'] for layer in layers] == list(range(len(layers)))
+
+    # A failed calculation is the latest run, the project has no output until the next one
+    proxy.return_value = proxy_response(500)
+    assert client.get(path + 'calculate/').status_code == 400
+    assert CalculationRun.objects.filter(project=project).first().status == CalculationRun.STATUS_FAILED
+    assert {pile['R_d'] for pile in client.get(path).json()['piles']} == {None}
+
+    # A Fehler of the calculation server fails the run, its output isn't stored
+    result['xml_output_data']['OutputDaten']['_fehlerText'] = 'Pfahl P1: Boden nicht tragfaehig'
+    proxy.return_value = proxy_response(200, result)
+    assert client.get(path + 'calculate/').status_code == 400
+    run = CalculationRun.objects.filter(project=project).first()
+    assert run.status == CalculationRun.STATUS_FAILED and run.error == 'Pfahl P1: Boden nicht tragfaehig'
+    assert not PileResult.objects.filter(run=run).exists() and not SoilLayerResult.objects.filter(run=run).exists()
+    assert {pile['R_d'] for pile in client.get(path).json()['piles']} == {None}
+    assert client.get(path + 'summary/').json()['totals']['calculated'] == 0
+
+    assert prune_runs(keep=1) == 1
+    assert CalculationRun.objects.filter(project=project).count() == 1
+
+
+@pytest.mark.parametrize('size', ['small'])
+def test_calculation_snapshots_keep_the_raw_response(budget_context, mocker, settings):
+    result = _calculation_result(budget_context)
+    result['xml_output_data']['OutputDaten']['Kosten'] = {'_gesamt': '1234.5'}
+    mocker.patch('requests.Session.post', return_value=proxy_response(200, result))
+    client = APIClient()
+    client.defaults['SERVER_NAME'] = 'localhost'
+    client.force_authenticate(budget_context['admin'])
+    path = PROJECT.format(**budget_context)
+
+    assert client.get(path + 'calculate/').status_code == 200
+    runs = client.get(path + 'calculation-runs/').json()
+    snapshot = runs[0]['snapshot']
+    assert snapshot['codec'] == 'gzip' and snapshot['compressed_size'] < snapshot['size']
+
+    response = client.get(path + f"calculation-runs/{runs[0]['id']}/output/")
+    assert response.status_code == 200
+    content = b''.join(response.streaming_content)
+    assert len(content) == snapshot['size']
+    assert hashlib.sha256(content).hexdigest() == response['X-Checksum-SHA256'] == snapshot['checksum']
+    assert json.loads(content)['xml_output_data']['OutputDaten']['Kosten'] == {'_gesamt': '1234.5'}
+
+    # Outdated snapshots are deleted, the run and the snapshot of the latest run are kept
+    assert client.get(path + 'calculate/').status_code == 200
+    CalculationSnapshot.objects.update(created_date=now() - timedelta(days=settings.CALCULATION_SNAPSHOTS_MAX_AGE_DAYS + 1))
+    assert prune_snapshots() == 1
+    assert CalculationRun.objects.filter(project=budget_context['project']).count() == 2
+    latest = CalculationRun.objects.filter(project=budget_context['project']).first()
+    assert list(CalculationSnapshot.objects.values_list('run_id', flat=True)) == [latest.id]
+    assert client.get(path + f"calculation-runs/{runs[0]['id']}/output/").status_code == 404
+
+
+@pytest.mark.parametrize('size', ['small'])
+def test_calculation_runs_diff_returns_changes_beyond_tolerance(budget_context):
+    project = budget_context['project']
+    base, target = CalculationRun.objects.bulk_create([
+        CalculationRun(project=project, input_hash='a', status=CalculationRun.STATUS_SUCCEEDED),
+        CalculationRun(project=project, input_hash='b', status=CalculationRun.STATUS_SUCCEEDED),
+    ])
+    PileResult.objects.bulk_create([
+        PileResult(run=base, Pname='P1', R_d=100.0, Setzung=1.0),
+        PileResult(run=base, Pname='P2', R_d=100.0, Setzung=1.0),
+        PileResult(run=base, Pname='P3', R_d=100.0),
+        PileResult(run=base, Pname='P4', R_d=100.0),
+        PileResult(run=target, Pname='P1', R_d=90.0, Setzung=1.0),
+        PileResult(run=target, Pname='P2', R_d=100.0005, Setzung=1.0),
+        PileResult(run=target, Pname='P3', R_d=100.0, EzuR=0.5),
+        PileResult(run=target, Pname='P5', R_d=100.0),
+    ])
+    SoilLayerResult.objects.bulk_create([
+        SoilLayerResult(run=base, soil_profile='S1', position=0, usedQsk=1.0),
+        SoilLayerResult(run=target, soil_profile='S1', position=0, usedQsk=2.0),
+    ])
+    client = APIClient()
+    client.defaults['SERVER_NAME'] = 'localhost'
+    client.force_authenticate(budget_context['admin'])
+    path = PROJECT.format(**budget_context) + 'calculation-runs/diff/'
+
+    response = client.get(path, {'tolerance': 0.001})
+    assert response.status_code == 200
+    diff = response.json()
+    assert (diff['base'], diff['target']) == (base.id, target.id)
+    assert diff['piles']['added'] == ['P5'] and diff['piles']['removed'] == ['P4']
+    assert diff['piles']['changed'] == [
+        {'key': 'P1', 'fields': {'R_d': {'old': 100.0, 'new': 90.0, 'delta': -10.0}}},
+        {'key': 'P3', 'fields': {'EzuR': {'old': None, 'new': 0.5, 'delta': None}}},
+    ]
+    assert diff['piles']['unchanged'] == 1
+    assert diff['soil_layers']['changed'] == [
+        {'key': ['S1', 0], 'fields': {'usedQsk': {'old': 1.0, 'new': 2.0, 'delta': 1.0}}}
+    ]
+
+    diff = client.get(path, {'base': base.id, 'target': target.id, 'fields': 'Setzung,EzuR'}).json()
+    assert [row['key'] for row in diff['piles']['changed']] == ['P3']
+    assert diff['soil_layers']['unchanged'] == 1
+
+    assert client.get(path, {'relative_tolerance': 0.2}).json()['piles']['unchanged'] == 2
+    assert client.get(path, {'fields': 'Pname'}).status_code == 400
+    assert client.get(path, {'base': 0}).status_code == 404
+
+    # Failed and running runs are skipped by default and rejected when requested
+    failed, running = CalculationRun.objects.bulk_create([
+        CalculationRun(project=project, input_hash='c', status=CalculationRun.STATUS_FAILED),
+        CalculationRun(project=project, input_hash='d', status=CalculationRun.STATUS_RUNNING),
+    ])
+    diff = client.get(path).json()
+    assert (diff['base'], diff['target']) == (base.id, target.id)
+    assert client.get(path, {'target': running.id}).status_code == 400
+    assert client.get(path, {'base': failed.id, 'target': target.id}).status_code == 400
+
+
+def _unit_convert_project() -> dict:
+    project = build_project(piles=200, soil_layers=200, seed=3)
+    # Values next to .5 after the scaling, huge values, strings and columns
+    # without a number
+    project['settings'].update({'MaxLaengs': '12.5', 'MaxBuegel': 'abc', 'Betondeckung': 1e15})
+    project['piles'][:4] = [
+        {'prozentualerMantelAnteil': value} for value in (0.02675, 0.01005, 'nan', True)
+    ]
+    project['soil_profiles'].append({'soil_layers': [
+        {'qsk': value, 'qbk01': None, 'phi': 'NaN', 'ESoben': math.nan}
+        for value in (2675, 1005, 1015, 2345, -2675, 5e20)
+    ]})
+    project['soil_profiles'].append({'name': 'BP without layers'})
+    return project
+
+
+@pytest.mark.parametrize('numpy', [True, False], ids=['numpy', 'no numpy'])
+@pytest.mark.parametrize('reversed', [False, True], ids=['scale', 'revert'])
+def test_unit_convert_matches_the_value_by_value_conversion(reversed, numpy, monkeypatch):
+    if not numpy:
+        monkeypatch.setitem(sys.modules, 'numpy', None)
+    project = _unit_convert_project()
+
+    converted = input_xml_content_unit_convert(copy.deepcopy(project), reversed)
+
+    assert _same(value_by_value(copy.deepcopy(project), reversed), converted)
+    layers = converted['soil_profiles'][-2]['soil_layers']
+    assert all(layer['qbk01'] is None and layer['phi'] == 'NaN' for layer in layers)
+    assert all(math.isnan(layer['ESoben']) for layer in layers)
+    if reversed:
+        assert [layer['qsk'] for layer in layers] == [2.67, 1.0, 1.01, 2.35, -2.67, 5e17]
+        assert converted['settings']['MaxBuegel'] == 'abc'
+
+
+def test_spatial_index_pairs_match_brute_force():
+    np = pytest.importorskip('numpy')
+    rnd = np.random.default_rng(7)
+    xy = np.concatenate((rnd.uniform(0, 100, (400, 2)), [[5.0, 5.0], [5.0, 5.0]]))
+
+    i, j, distances = spatial_pairs(xy, 4.5)
+
+    found = {(min(a, b), max(a, b)): d for a, b, d in zip(i.tolist(), j.tolist(), distances.tolist())}
+    expected = {
+        (a, b) for a in range(len(xy)) for b in range(a + 1, len(xy))
+        if math.dist(xy[a], xy[b]) <= 4.5
+    }
+    assert found.keys() == expected and len(found) == len(i)
+
+    # Cell numbers of a tiny radius over 10 km don't fit into int64
+    xy = np.array([[0.0, 0.0], [1e-8, 0.0], [10000.0, 10000.0], [10000.0, 10000.0], [3.0, 7e-8]])
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        assert sorted(zip(*spatial_pairs(xy, 1e-7)[:2])) == [(0, 1), (2, 3)]
+        assert sorted(zip(*spatial_pairs(xy, 1e-16)[:2])) == [(2, 3)]
+
+
+@pytest.mark.parametrize('size', ['small'])
+def test_spatial_neighbours_clusters_and_spacings(budget_context):
+    project = budget_context['project']
+    upsert_piles(project, [
+        {'Pname': 'A', 'Rechtswert': 0.0, 'Hochwert': 0.0, 'SollDurchmesser': 1.0, 'PfahlAchsAbstandxD': 3},
+        {'Pname': 'B', 'Rechtswert': 2.0, 'Hochwert': 0.0, 'SollDurchmesser': 0.5, 'PfahlAchsAbstandxD': 3},
+        {'Pname': 'C', 'Rechtswert': 6.0, 'Hochwert': 0.0, 'SollDurchmesser': 0.5, 'PfahlAchsAbstandxD': 3},
+        {'Pname': 'D', 'Rechtswert': 50.0, 'Hochwert': 50.0},
+        {'Pname': 'E', 'Rechtswert': None, 'Hochwert': 1.0},
+    ])
+    project.piles.exclude(Pname__in='ABCDE').delete()
+    project.tables_changed()
+    client = APIClient()
+    client.defaults['SERVER_NAME'] = 'localhost'
+    client.force_authenticate(budget_context['admin'])
+    path = PROJECT.format(**budget_context) + 'spatial/'
+
+    data = client.get(path, {'radius': 5, 'cluster_radius': 4.5}).json()
+    piles = {pile['Pname']: pile for pile in data['piles']}
+    assert piles['A']['neighbours'] == [{'Pname': 'B', 'distance': 2.0}]
+    assert [neighbour['Pname'] for neighbour in piles['B']['neighbours']] == ['A', 'C']
+    assert piles['B']['min_axis_distance'] == 2.0 and piles['D']['min_axis_distance'] is None
+    assert data['clusters'] == [['A', 'B', 'C']]
+    assert data['invalid_spacings'] == [{'piles': ['A', 'B'], 'distance': 2.0, 'required': 3.0}]
+    assert data['missing_coordinates'] == ['E']
+
+    # A write of the pile table rebuilds the index
+    upsert_piles(project, [{'Pname': 'B', 'Rechtswert': 3.5, 'Hochwert': 0.0}])
+    data = client.get(path, {'radius': 5, 'cluster_radius': 2, 'piles': 'B'}).json()
+    assert data['tables_version'] == project.tables_version
+    assert [pile['Pname'] for pile in data['piles']] == ['B']
+    assert data['clusters'] == [] and data['invalid_spacings'] == []
+    assert client.get(path, {'radius': 0}).status_code == 400
+
+
+@pytest.mark.parametrize('size', ['small'])
+def test_import_diff_ignores_signed_zeros_and_integral_floats(budget_context):
+    project = budget_context['project']
+    first, second = Pile.objects.filter(project=project).order_by('row_index')[:2]
+    Pile.objects.filter(pk=first.pk).update(AEHoehe=0.0, PfahlAnzahl=1)
+    Pile.objects.filter(pk=second.pk).update(AEHoehe=1.0, PfahlAnzahl=2)
+
+    diff = diff_project_data(project, {'piles': [
+        {'Pname': first.Pname, 'AEHoehe': -0.0, 'PfahlAnzahl': 1.0},
+        {'Pname': second.Pname, 'AEHoehe': 1, 'PfahlAnzahl': '2'},
+    ]})['piles']
+
+    assert diff['changed'] == []
+    assert diff['unchanged'] == 2
+
+
+@pytest.mark.parametrize('size', ['small'])
+def test_preflight_reports_all_errors_and_blocks_calculate(budget_context, mocker):
+    project = budget_context['project']
+    client = APIClient()
+    client.defaults['SERVER_NAME'] = 'localhost'
+    client.force_authenticate(budget_context['admin'])
+    path = PROJECT.format(**budget_context)
+    assert client.get(path + 'preflight/').json() == {'valid': True, 'errors': [], 'warnings': []}
+
+    piles = list(project.piles.all())
+    piles[0].AEHoehe = None
+    piles[0].save()
+    piles[1].BodenProfil = 'missing'
+    piles[1].SollDurchmesser = -1
+    piles[1].save()
+    soil_profile = project.soil_profiles.first()
+    first_layer, second_layer = soil_profile.soil_layers.order_by('row_index')[:2]
+    second_layer.endKote = first_layer.endKote + 1
+    second_layer.save()
+    h_load = HorizontalLoadPile.objects.filter(project=project).first()
+    h_load.gkz = None
+    h_load.save()
+
+    report = client.get(path + 'preflight/').json()
+    assert not report['valid']
+    assert {(error['table'], str(error['row']), error['field']) for error in report['errors']} == {
+        ('piles', piles[0].Pname, 'AEHoehe'),
+        ('piles', piles[1].Pname, 'BodenProfil'),
+        ('piles', piles[1].Pname, 'SollDurchmesser'),
+        ('soil_layers', str([soil_profile.name, 1]), 'endKote'),
+        ('horizontal_loads', str([h_load.case.name, h_load.Pname]), 'gkz'),
+    }
+
+    proxy = mocker.patch('requests.Session.post')
+    response = client.get(path + 'calculate/')
+    assert response.status_code == 400 and len(response.json()['error']) == 5
+    assert not proxy.called and not CalculationRun.objects.filter(project=project).exists()
+
+
+@pytest.mark.parametrize('size', ['small'])
+def test_project_search_ranks_and_respects_assignments(budget_context):
+    company, admin = budget_context['company'], budget_context['admin']
+    for name, location, street in [
+        ('Harbour Bridge', 'Hamburg', 'Am Kai 1'),
+        ('Bridge North', 'Kiel', 'Nordweg 2'),
+        ('Tunnel', 'Bremen', 'Bridgestreet 3'),
+        ('Depot', 'Berlin', 'Hauptstrasse 4'),
+    ]:
+        project = Project.objects.create(name=name, company=company, created_by=admin, modified_by=admin)
+        ProjectSettings.objects.create(project=project, name=name, projektLocation=location, projektStreet=street)
+    client = APIClient()
+    client.defaults['SERVER_NAME'] = 'localhost'
+    client.force_authenticate(admin)
+    path = PROJECTS.format(**budget_context) + 'search/'
+
+    results = client.get(path, {'q': 'bridge'}).json()
+    assert [project['name'] for project in results['results']] == ['Bridge North', 'Harbour Bridge', 'Tunnel']
+    assert results['results'][0]['projektLocation'] == 'Kiel'
+    if trigram_available():
+        assert [project['name'] for project in client.get(path, {'q': 'Tunel'}).json()['results']] == ['Tunnel']
+
+    page = client.get(path, {'q': 'bridge', 'page_size': 2, 'page': 2}).json()
+    assert page['count'] == 3 and [project['name'] for project in page['results']] == ['Tunnel']
+    assert client.get(path).status_code == 400
+
+    # Employees only find the projects they are assigned to
+    employee = budget_context['employees'][0]
+    UserProjectRel.objects.create(user=employee, project=Project.objects.get(name='Tunnel'))
+    client.force_authenticate(employee)
+    assert [project['name'] for project in client.get(path, {'q': 'bridge'}).json()['results']] == ['Tunnel']
+
+
+@pytest.mark.parametrize('size', ['small'])
+def test_summary_aggregates_latest_results_and_follows_tables_version(budget_context):
+    project = budget_context['project']
+    piles = list(project.piles.values('Pname', 'PfahlTyp', 'BodenProfil'))
+    ProjectSettings.objects.filter(project=project).update(AuslastungProzent=100)
+    run = CalculationRun.objects.create(project=project, input_hash='a', status=CalculationRun.STATUS_SUCCEEDED)
+    # The last pile has no output
+    PileResult.objects.bulk_create([
+        PileResult(
+            run=run, Pname=pile['Pname'], Nachweisgruppe=float(index % 2),
+            PfahlVolumen=1.5, GesamtBohrLaenge=10.0, EzuR=50.0 + 40 * (index % 3)
+        )
+        for index, pile in enumerate(piles[:-1])
+    ])
+    client = APIClient()
+    client.defaults['SERVER_NAME'] = 'localhost'
+    client.force_authenticate(budget_context['admin'])
+    path = PROJECT.format(**budget_context) + 'summary/'
+
+    summary = client.get(path).json()
+    calculated = len(piles) - 1
+    assert summary['run'] == run.id and summary['limit'] == 100
+    assert summary['totals'] == {
+        'piles': len(piles),
+        'calculated': calculated,
+        'PfahlVolumen': pytest.approx(1.5 * calculated),
+        'GesamtBohrLaenge': pytest.approx(10.0 * calculated),
+        'EzuR': 130.0 if calculated > 2 else 90.0,
+        'over_limit': len(range(2, calculated, 3)),
+    }
+    assert sum(group['piles'] for group in summary['groups']) == len(piles)
+    assert {group['Nachweisgruppe'] for group in summary['groups']} <= {0.0, 1.0, None}
+
+    by_profile = client.get(path, {'group_by': 'BodenProfil'}).json()['groups']
+    expected = {}
+    for pile in piles:
+        expected[pile['BodenProfil']] = expected.get(pile['BodenProfil'], 0) + 1
+    assert {group['BodenProfil']: group['piles'] for group in by_profile} == expected
+    assert client.get(path, {'group_by': ''}).json()['groups'] == []
+    assert client.get(path, {'group_by': 'Pname'}).status_code == 400
+
+    # The summary is cached until the tables change
+    PileResult.objects.filter(run=run).update(PfahlVolumen=2.0)
+    assert client.get(path).json()['totals']['PfahlVolumen'] == pytest.approx(1.5 * calculated)
+    upsert_piles(project, [{'Pname': piles[0]['Pname'], 'PfahlTyp': 'vdp'}])
+    summary = client.get(path).json()
+    assert summary['totals']['PfahlVolumen'] == pytest.approx(2.0 * calculated)
+    assert 'vdp' in {group['PfahlTyp'] for group in summary['groups']}
+
+
+@pytest.mark.parametrize('size', ['small'])
+def test_expire_import_jobs_fails_lost_jobs(budget_context, tmp_path):
+    project = budget_context['project']
+    upload = tmp_path / 'import-lost.xlsx'
+    upload.write_bytes(b'upload')
+    lost = ImportJob.objects.create(
+        project=project, file_name='lost.xlsx', file_path=str(upload), status=ImportJob.STATUS_RUNNING,
+        modified_date=now() - timedelta(hours=2)
+    )
+    alive = ImportJob.objects.create(project=project, file_name='alive.xlsx', status=ImportJob.STATUS_RUNNING)
+
+    call_command('expire_import_jobs', timeout_minutes=60)
+    lost.refresh_from_db()
+    alive.refresh_from_db()
+    assert lost.status == ImportJob.STATUS_FAILED and lost.finished_date is not None
+    assert lost.file_path == '' and not upload.exists()
+    assert alive.status == ImportJob.STATUS_RUNNING
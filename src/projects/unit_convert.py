@@ -0,0 +1,140 @@
+"""
+Columnar unit conversion of project tables.
+
+The values of one column (e.g. qsk of all soil layers) are gathered into
+a NumPy array, scaled and rounded in one operation and written back.
+The results are the same as converting every value with
+services.scale_float_value: "NaN" strings, None and values which can't
+be converted to float are left as they are.
+
+NumPy is imported by the first conversion (see piledesigner.startup),
+workers which never convert don't pay for it. Without NumPy the columns
+are converted value by value with the same results.
+"""
+from math import pi
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+SETTING_SCALES = {
+    "AbtreppungsWinkelRad": pi/180,
+    "MaxLaengs"           : 0.001,
+    "MaxBuegel"           : 0.001,
+    "MinLaengsAbstand"    : 0.001,
+    "Betondeckung"        : 0.001,
+    "MvonMaxfuerSchub"    : 0.01
+}
+
+PILE_SCALES = {
+    "prozentualerMantelAnteil": 0.01
+}
+
+SOIL_LAYER_SCALES = {
+    "ESoben"         : 1000,
+    "ESunten"        : 1000,
+    "MaxElementWeite": 0.01,
+    "phi"            : pi/180,
+    "qsk"            : 1000,
+    "qskStern"       : 1000,
+    "qbk002"         : 1000,
+    "qbk003"         : 1000,
+    "qbk01"          : 1000
+}
+
+# Reverted values are rounded to this many decimal digits.
+REVERSED_DECIMAL_DIGITS = 2
+
+# Above this the scaled values have no reliable fraction digits left.
+_MAX_EXACT_SCALED = 1e9
+# Distance to .5 below which the scaled value might be rounded the other way.
+_HALF_TOLERANCE = 1e-6
+
+_NUMBER_TYPES = (float, int)
+_NUMBER_TYPE_SET = frozenset(_NUMBER_TYPES)
+
+
+def _gather(rows: list, key: str) -> tuple:
+    """
+    Collect the positions and float values of one column.
+    """
+    column = [row.get(key) for row in rows]
+    # Most columns hold numbers only
+    if set(map(type, column)) <= _NUMBER_TYPE_SET:
+        return range(len(rows)), column
+
+    positions = []
+    values = []
+    for position, value in enumerate(column):
+        if type(value) in _NUMBER_TYPES:
+            values.append(value)
+        elif value is None or str(value) == "NaN":
+            continue
+        else:
+            try:
+                values.append(float(value))
+            except (TypeError, ValueError):
+                continue
+        positions.append(position)
+    return positions, values
+
+
+def round_array(values: 'np.ndarray', digits: int) -> 'np.ndarray':
+    """
+    Round like the built-in round(), element by element.
+
+    np.round scales the values by 10**digits first, which can move a value
+    onto the other side of .5. These values (and very large ones) are
+    rounded with round() instead.
+    """
+    import numpy as np
+
+    factor = 10.0 ** digits
+    scaled = values * factor
+    rounded = np.rint(scaled) / factor
+
+    fraction = np.abs(scaled - np.trunc(scaled))
+    with np.errstate(invalid='ignore'):
+        unsure = np.isfinite(values) & (
+            (np.abs(fraction - 0.5) < _HALF_TOLERANCE)
+            | (np.abs(scaled) >= _MAX_EXACT_SCALED)
+        )
+    for position in np.flatnonzero(unsure):
+        rounded[position] = round(float(values[position]), digits)
+    return rounded
+
+
+def scale_columns(rows: list, scales: dict, reversed: bool = False) -> list:
+    """
+    The function scales the columns of a table in place.
+
+    Attributes:
+        - rows (list): table rows as dicts
+        - scales (dict): column -> scale
+        - reversed (bool): if True, divide by the scale and round
+          (import xml), otherwise multiply
+    Return: rows
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+
+    for key, scale in scales.items():
+        positions, values = _gather(rows, key)
+        if not positions:
+            continue
+
+        if np is None:
+            if reversed:
+                column = [round(float(value) / scale, REVERSED_DECIMAL_DIGITS) for value in values]
+            else:
+                column = [float(value) * scale for value in values]
+        elif reversed:
+            column = round_array(np.array(values, dtype=np.float64) / scale, REVERSED_DECIMAL_DIGITS).tolist()
+        else:
+            column = (np.array(values, dtype=np.float64) * scale).tolist()
+
+        for position, value in zip(positions, column):
+            rows[position][key] = value
+    return rows
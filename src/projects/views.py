@@ -1,11 +1,11 @@
+import time
 import xmltodict
-import pandas as pd
-import requests
 from io import BytesIO
 
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.models import User
-from django.http import HttpResponse
+from django.http import HttpResponse, FileResponse, StreamingHttpResponse
 
 from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
@@ -15,51 +15,61 @@ from rest_framework.exceptions import PermissionDenied
 
 from shared.permissions import IsAdminOrManager, IsAdminManagerOrAssigned
 from companies.models import Company
+from companies.stats import projects_changed
 from users.serializers import UserSerializer
 from .models import (
-    Project, ProjectSettings, Pile,
-    SoilProfile, SoilLayer, UserProjectRel,
-    HorizontalLoadCase, HorizontalLoadPile)
+    Project, ProjectSettings, UserProjectRel, ImportJob,
+    CalculationRun, CalculationSnapshot)
 from .serializers import (
     ProjectSerializer,
+    ProjectSearchSerializer,
     ProjectSettingsWithoutCompLogoSerializer,
     ProjectDetailSerializer,
     ProjectDetailCalculateSerializer,
     ProjectImportSerializer,
     ProjectCompanyLogoSerializer,
     ProjectTableSerializer,
-    ProjectTableNotValidateSerializer
-)
-from .mapping import (
-    PILE_OUTPUT_KEYS_MAPPING,
-    SOIL_LAYER_OUTPUT_KEYS_MAPPING,
-    HORIZONTAL_LOAD_POINT_OUTPUT_KEYS_MAPPING
+    ProjectTableNotValidateSerializer,
+    ImportJobSerializer,
+    CalculationRunSerializer,
+    TableImportSerializer
 )
 from .services import (
-    map_keys,
-    xml_to_json,
-    validate_input_xml_file,
     validate_calculate_xml_file,
     update_project_table_data,
     update_project_setting_data,
-    restructure_json_data,
     json_to_calculate_xml,
-    xlsx_to_json,
-    json_to_xlsx_structure,
-    delete_calculation_output_data,
-    input_xml_content_unit_convert,
-    output_xml_content_unit_convert,
-    process_driven_pile,
-    process_import_driven_pile,
-    output_xml_content_round_2_decimal_digits,
     resize_image,
-    remove_old_image
+    remove_old_image,
+    http_session
+)
+from .dhpd_serializer.mapper import DhpdSerializer
+from .calculation_runs import start_run, fail_run, abort_run, store_output
+from .calculation_snapshots import save_snapshot, iter_snapshot
+from .spatial_index import PileIndex
+from .preflight import preflight
+from .result_summary import SUMMARY_GROUPS, project_summary
+from .search import ProjectSearchPagination, search_projects
+from .run_diff import PILE_RUN_DIFF, SOIL_LAYER_RUN_DIFF, HORIZONTAL_LOAD_RUN_DIFF, diff_runs
+from .xlsx_export import export_project_xlsx
+from .imports import start_import_job, parse_import_file, ImportValidationError
+from .import_diff import diff_project_data
+from .table_exchange import (
+    CSV_FORMAT,
+    PARQUET_FORMAT,
+    FILE_FORMATS,
+    CONTENT_TYPES,
+    file_format_of,
+    import_table,
+    iter_csv_export,
+    export_parquet
 )
 from piledesigner.settings import (
     FASTAPI_SERVER_DOMAIN,
     DHPD_TOOL_DOMAIN,
     DHPD_SERVER_1,
-    DHPD_SERVER_2
+    DHPD_SERVER_2,
+    DHPD_VALIDATE_CALCULATE_XML
 )
 
 PREFIX_DELETED = " - deleted"
@@ -68,6 +78,9 @@ class ProjectViewSet(viewsets.ModelViewSet):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
     permission_classes = [IsAuthenticated]  # You can change this based on your permission logic
+    # GET actions which read from the primary database (see shared/db_router.py):
+    # calculate writes back what it read, the import progress is written by the import thread
+    primary_database_actions = ('calculate', 'import_job_progress')
 
     def get_queryset(self):
         """
@@ -119,17 +132,19 @@ class ProjectViewSet(viewsets.ModelViewSet):
         if user_profile.company != company or user_role not in ['Admin', 'Manager']:
             raise PermissionDenied("You must be an admin of the company to create a project.")
 
-        project = serializer.save(
-            company=company,
-            created_by=self.request.user,
-            modified_by=self.request.user
-        )
+        with transaction.atomic():
+            project = serializer.save(
+                company=company,
+                created_by=self.request.user,
+                modified_by=self.request.user
+            )
 
-        # Create default settings for the project
-        ProjectSettings.objects.create(
-            project=project,
-            name=project.name,  # Set settings name to project name
-        )
+            # Create default settings for the project
+            ProjectSettings.objects.create(
+                project=project,
+                name=project.name,  # Set settings name to project name
+            )
+            projects_changed(company.id, active=1)
 
     def perform_update(self, serializer):
         """
@@ -137,6 +152,32 @@ class ProjectViewSet(viewsets.ModelViewSet):
         """
         serializer.save(modified_by=self.request.user)
 
+    def perform_destroy(self, instance):
+        """
+        Delete the project and update the project counts of the company.
+        """
+        company_id, is_active = instance.company_id, instance.is_active
+        with transaction.atomic():
+            instance.delete()
+            projects_changed(company_id, active=-int(is_active), deleted=-int(not is_active))
+
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request, company_id=None):
+        """
+        Search the projects by name and address (?q=), ranked by prefix
+        matches and similarity, paginated (?page=, ?page_size=).
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "The search text (q) is missing."}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = search_projects(
+            self.get_queryset().select_related('basic_data_settings'), query
+        )
+        paginator = ProjectSearchPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        return paginator.get_paginated_response(ProjectSearchSerializer(page, many=True).data)
+
     @action(detail=True, methods=['get'], url_path='pdf', permission_classes=[IsAdminManagerOrAssigned])
     def pdf(self, request, pk=None, company_id=None):
         """
@@ -165,8 +206,6 @@ class ProjectViewSet(viewsets.ModelViewSet):
 
         user = self.request.user
         company = Company.objects.get(id=company_id)
-        xml_data = process_driven_pile(xml_data)
-        xml_data = input_xml_content_unit_convert(xml_data)
         xml_content = json_to_calculate_xml(xml_data, user, company)
 
         if not xml_content:
@@ -184,35 +223,15 @@ class ProjectViewSet(viewsets.ModelViewSet):
         Get xlsx file.
         """
         project = self.get_object()
-        serializer = ProjectDetailSerializer(project, context={'request': request})
-        xlsx_data = dict(serializer.data)
-        xlsx_data = json_to_xlsx_structure(xlsx_data)
+        xlsx_file = export_project_xlsx(project)
 
-        response = HttpResponse(
+        # The file is streamed in chunks and removed afterwards
+        return FileResponse(
+            xlsx_file,
+            as_attachment=True,
+            filename="data.xlsx",
             content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         )
-        response['Content-Disposition'] = 'attachment; filename="data.xlsx"'
-
-        # Write multiple DataFrames to different sheets
-        with pd.ExcelWriter(response, engine='xlsxwriter') as writer:
-            workbook  = writer.book
-            for sheet_name, records in xlsx_data.items():
-                # Convert each sheet's data to a DataFrame
-                df = pd.DataFrame(records)
-                df.to_excel(writer, index=False, sheet_name=sheet_name)
-
-                # Access the XlsxWriter workbook and worksheet objects.
-                worksheet = writer.sheets[sheet_name]
-
-                # Define a number format.
-                number_format = workbook.add_format({'num_format': '0.00'})
-
-                # Apply format only to numeric columns
-                for col_num, column in enumerate(df.columns):
-                    if pd.api.types.is_numeric_dtype(df[column]):  # Check if column is numeric
-                        worksheet.set_column(col_num, col_num, None, number_format)
-
-        return response
 
     @action(detail=True, methods=['get'], url_path='assigned-users', permission_classes=[IsAdminOrManager])
     def get_assigned_user(self, request, pk=None, company_id=None):
@@ -260,7 +279,9 @@ class ProjectViewSet(viewsets.ModelViewSet):
             project_name += PREFIX_DELETED
         project.name = project_name
         project.is_active = False
-        project.save()
+        with transaction.atomic():
+            project.save()
+            projects_changed(project.company_id, active=-1, deleted=1)
 
         return Response(
             {'detail': 'Project deleted successfully.'},
@@ -297,13 +318,15 @@ class ProjectViewSet(viewsets.ModelViewSet):
 
         # Perform the deletion
         # projects.delete() => We should only perform soft deletion
-        for project in projects:
-            project_name = f"{project.name}{PREFIX_DELETED}"
-            while Project.all_objects.filter(name=project_name).exists():
-                project_name += PREFIX_DELETED
-            project.name = project_name
-            project.is_active = False
-            project.save()
+        with transaction.atomic():
+            for project in projects:
+                project_name = f"{project.name}{PREFIX_DELETED}"
+                while Project.all_objects.filter(name=project_name).exists():
+                    project_name += PREFIX_DELETED
+                project.name = project_name
+                project.is_active = False
+                project.save()
+            projects_changed(company.id, active=-len(projects), deleted=len(projects))
 
         return Response({"detail": "Projects deleted successfully."}, status=status.HTTP_200_OK)
     
@@ -333,7 +356,10 @@ class ProjectViewSet(viewsets.ModelViewSet):
 
             # Perform the deletion
             for project in projects:
-                project.copy_project(self.request.user)
+                # Each copy is counted with its own commit
+                with transaction.atomic():
+                    project.copy_project(self.request.user)
+                    projects_changed(company.id, active=1)
 
             return Response({"detail": "Projects copy successfully."}, status=status.HTTP_200_OK)
 
@@ -613,7 +639,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
                 file = resize_image(file)
 
                 files = {"image": file}
-                response = requests.post(fastapi_url, files=files, timeout=20)
+                response = http_session().post(fastapi_url, files=files, timeout=20)
                 project.basic_data_settings.companyAltLogo = response.json()["file_name"]
             
             else:
@@ -638,6 +664,8 @@ class ProjectViewSet(viewsets.ModelViewSet):
     def import_project_data(self, request, pk=None, company_id=None):
         """
         Import project data from an XML or Excel file.
+        With ?dry_run=true nothing is stored, the response
+        lists the added, removed and changed rows.
         """
         serializer = ProjectImportSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -645,46 +673,228 @@ class ProjectViewSet(viewsets.ModelViewSet):
         project = self.get_object()
 
         try:
-            if file.name.endswith('.xml'):
-                errors = validate_input_xml_file(file)
-                if errors:
-                    return Response({"error": errors}, status=status.HTTP_400_BAD_REQUEST)
-                file.seek(0)
-                file_json_content = xml_to_json(file)
-                file.seek(0)
-                file_json_content = map_keys(file_json_content)
-                file_json_content = restructure_json_data(file_json_content)
+            # Only compare the file with the current data.
+            if str(request.query_params.get('dry_run', 'false')).lower() in ['true', '1']:
+                file_json_content = parse_import_file(file)
+                return Response(
+                    {"dry_run": True, **diff_project_data(project, file_json_content)},
+                    status=status.HTTP_200_OK
+                )
 
-                # Ignore Project name and Company Logo when import data
-                file_json_content["settings"].pop("name")
-                file_json_content["settings"].pop("companyAltLogo")
+            # The import runs in background, the progress is
+            # available under import-jobs/<job_id>
+            job = start_import_job(project, file, request.user)
+            return Response(
+                ImportJobSerializer(job).data,
+                status=status.HTTP_202_ACCEPTED
+            )
 
-                file_json_content = process_import_driven_pile(file_json_content)
-                file_json_content = input_xml_content_unit_convert(file_json_content, reversed=True)
-                update_project_setting_data(file_json_content, project)
+        except ImportValidationError as e:
+            return Response({"error": e.errors}, status=status.HTTP_400_BAD_REQUEST)
 
-            elif file.name.endswith('.xlsx'):
-                file_json_content = xlsx_to_json(file)
+        except Exception as e:
+            return Response({"error": f"An error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-            update_project_table_data(file_json_content, project, is_import_data=True)
+    @action(detail=True, methods=['get'], url_path=r'import-jobs/(?P<job_id>[0-9a-f-]+)', permission_classes=[IsAdminManagerOrAssigned])
+    def import_job_progress(self, request, pk=None, company_id=None, job_id=None):
+        """
+        Get the status, phase and processed rows of an import job.
+        """
+        project = self.get_object()
+        job = get_object_or_404(ImportJob, pk=job_id, project=project)
+        return Response(
+            ImportJobSerializer(job).data,
+            status=status.HTTP_200_OK
+        )
 
+    @action(detail=True, methods=['get', 'post'], url_path=r'tables/(?P<table>piles|soil-layers|horizontal-loads)', permission_classes=[IsAdminManagerOrAssigned])
+    def table_data(self, request, pk=None, company_id=None, table=None):
+        """
+        Bulk export (GET, ?file_format=csv|parquet) or import (POST)
+        of one project table. Imported rows are inserted or updated,
+        rows which are not in the file are kept.
+        """
+        project = self.get_object()
+
+        if request.method == 'GET':
+            file_format = request.query_params.get('file_format', CSV_FORMAT)
+            if file_format not in FILE_FORMATS:
+                return Response({"error": "Only CSV and Parquet files are supported."}, status=status.HTTP_400_BAD_REQUEST)
+
+            file_name = f"{table}.{file_format}"
+            if file_format == CSV_FORMAT:
+                response = StreamingHttpResponse(
+                    iter_csv_export(project, table),
+                    content_type=CONTENT_TYPES[CSV_FORMAT]
+                )
+                response['Content-Disposition'] = f'attachment; filename="{file_name}"'
+                return response
+
+            return FileResponse(
+                export_parquet(project, table),
+                as_attachment=True,
+                filename=file_name,
+                content_type=CONTENT_TYPES[PARQUET_FORMAT]
+            )
+
+        serializer = TableImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        file = serializer.validated_data['file']
+
+        try:
+            rows = import_table(project, table, file, file_format_of(file.name))
             return Response(
-                {"message": "Project entirely updated successfully."},
+                {"message": "Table updated successfully.", "rows": rows},
                 status=status.HTTP_200_OK
             )
 
-        #     if file.name.endswith('.xml'):
-        #         self.validate_input_xml(file_content)
-        #     elif file.name.endswith('.xlsx'):
-        #         self._import_from_excel(file_content)
-        #     else:
-        #         return Response({"error": "Unsupported file format."}, status=status.HTTP_400_BAD_REQUEST)
-
-        #     return Response({"message": "Project data imported successfully."}, status=status.HTTP_200_OK)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         except Exception as e:
             return Response({"error": f"An error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=True, methods=['get'], url_path='calculation-runs', permission_classes=[IsAdminManagerOrAssigned])
+    def calculation_runs(self, request, pk=None, company_id=None):
+        """
+        Get the calculation history of the project, newest first, with
+        the size and checksum of the stored proxy responses.
+        """
+        project = self.get_object()
+        runs = CalculationRun.objects.filter(project=project).select_related('snapshot').defer('snapshot__data')
+        return Response(
+            CalculationRunSerializer(runs, many=True).data,
+            status=status.HTTP_200_OK
+        )
+
+    @action(detail=True, methods=['get'], url_path='calculation-runs/diff', permission_classes=[IsAdminManagerOrAssigned])
+    def calculation_runs_diff(self, request, pk=None, company_id=None):
+        """
+        Compare the output of two succeeded calculation runs
+        (?base=<id>&target=<id>, default the latest succeeded run and the
+        succeeded run before it). Only the rows and fields which changed by
+        more than ?tolerance (absolute) and ?relative_tolerance are
+        returned, ?fields=R_d,Setzung limits the compared output fields.
+        """
+        project = self.get_object()
+        runs = CalculationRun.objects.filter(project=project)
+        succeeded = runs.filter(status=CalculationRun.STATUS_SUCCEEDED)
+        try:
+            tolerance = float(request.query_params.get('tolerance', 0))
+            relative_tolerance = float(request.query_params.get('relative_tolerance', 0))
+            target_id = request.query_params.get('target')
+            target = runs.get(id=int(target_id)) if target_id else succeeded.first()
+            base_id = request.query_params.get('base')
+            base = runs.get(id=int(base_id)) if base_id else succeeded.filter(id__lt=getattr(target, 'id', 0)).first()
+        except ValueError:
+            return Response({"error": "base and target must be run ids, tolerances numbers."}, status=status.HTTP_400_BAD_REQUEST)
+        except CalculationRun.DoesNotExist:
+            return Response({"error": "Calculation run not found."}, status=status.HTTP_404_NOT_FOUND)
+        if base is None or target is None:
+            return Response({"error": "The project has less than two succeeded calculation runs."}, status=status.HTTP_404_NOT_FOUND)
+        # A failed or running run has no (complete) output to compare
+        if not_succeeded := [run.id for run in (base, target) if run.status != CalculationRun.STATUS_SUCCEEDED]:
+            return Response(
+                {"error": f"Calculation runs did not succeed: {', '.join(map(str, not_succeeded))}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fields = None
+        if request.query_params.get('fields'):
+            fields = tuple(field.strip() for field in request.query_params['fields'].split(','))
+            known_fields = set(PILE_RUN_DIFF.fields + SOIL_LAYER_RUN_DIFF.fields + HORIZONTAL_LOAD_RUN_DIFF.fields)
+            if unknown := [field for field in fields if field not in known_fields]:
+                return Response({"error": f"Unknown output fields: {', '.join(unknown)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            diff_runs(base, target, fields, tolerance, relative_tolerance),
+            status=status.HTTP_200_OK
+        )
+
+    @action(detail=True, methods=['get'], url_path=r'calculation-runs/(?P<run_id>[0-9]+)/output', permission_classes=[IsAdminManagerOrAssigned])
+    def calculation_output(self, request, pk=None, company_id=None, run_id=None):
+        """
+        Stream the raw proxy response of a calculation run, decompressed.
+        """
+        project = self.get_object()
+        snapshot = get_object_or_404(CalculationSnapshot, run_id=run_id, run__project=project)
+        response = StreamingHttpResponse(iter_snapshot(snapshot), content_type='application/json')
+        response['Content-Length'] = snapshot.size
+        response['X-Checksum-SHA256'] = snapshot.checksum
+        response['Content-Disposition'] = f'attachment; filename="calculation-{snapshot.run_id}.json"'
+        return response
+
+    @action(detail=True, methods=['get'], url_path='spatial', permission_classes=[IsAdminManagerOrAssigned])
+    def spatial(self, request, pk=None, company_id=None):
+        """
+        Get the neighbours of the piles within ?radius (default the
+        Beeinflussungsweite), their minimum axis distances, the clusters
+        within ?cluster_radius (default the AchsabstandGleicherTiefe or
+        the radius) and the pile pairs closer than their required axis
+        distance. ?piles=P1,P2 limits the neighbour lists.
+        """
+        project = self.get_object()
+        project_settings = ProjectSettings.objects.filter(project=project).first()
+        try:
+            radius = float(request.query_params.get('radius', getattr(project_settings, 'Beeinflussungsweite', 0)))
+            cluster_radius = float(
+                request.query_params.get('cluster_radius')
+                or getattr(project_settings, 'AchsabstandGleicherTiefe', 0)
+                or radius
+            )
+        except ValueError:
+            return Response({"error": "radius and cluster_radius must be numbers."}, status=status.HTTP_400_BAD_REQUEST)
+        if not (radius > 0 and cluster_radius > 0):
+            return Response({"error": "radius and cluster_radius must be positive."}, status=status.HTTP_400_BAD_REQUEST)
+
+        names = None
+        if request.query_params.get('piles'):
+            names = {name.strip() for name in request.query_params['piles'].split(',')}
+
+        index = PileIndex.of_project(project)
+        return Response({
+            'tables_version': index.version,
+            'radius': radius,
+            'cluster_radius': cluster_radius,
+            'piles': index.neighbours(radius, names),
+            'clusters': index.clusters(cluster_radius),
+            'invalid_spacings': index.invalid_spacings(),
+            'missing_coordinates': index.missing_coordinates,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'], url_path='summary', permission_classes=[IsAdminManagerOrAssigned])
+    def summary(self, request, pk=None, company_id=None):
+        """
+        Get the pile count, total PfahlVolumen and GesamtBohrLaenge, the
+        maximum EzuR and the piles over the AuslastungProzent of the
+        latest calculation, grouped by ?group_by (default PfahlTyp,
+        BodenProfil, Nachweisgruppe; empty for the totals only).
+        """
+        project = self.get_object()
+        group_by = tuple(
+            field.strip()
+            for field in request.query_params.get('group_by', ','.join(SUMMARY_GROUPS)).split(',')
+            if field.strip()
+        )
+        unknown = [field for field in group_by if field not in SUMMARY_GROUPS]
+        if unknown:
+            return Response({"error": f"Unknown group_by fields: {', '.join(unknown)}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        limit = ProjectSettings.objects.filter(project=project).values_list('AuslastungProzent', flat=True).first()
+        return Response(
+            project_summary(project, 100 if limit is None else limit, group_by),
+            status=status.HTTP_200_OK
+        )
+
+    @action(detail=True, methods=['get'], url_path='preflight', permission_classes=[IsAdminManagerOrAssigned])
+    def preflight_report(self, request, pk=None, company_id=None):
+        """
+        Validate all table rows of the project for a calculation, the
+        errors block the calculation.
+        """
+        project = self.get_object()
+        return Response(preflight(project), status=status.HTTP_200_OK)
+
     @action(detail=True, methods=['get'], url_path='calculate', permission_classes=[IsAdminManagerOrAssigned])
     def calculate(self, request, pk=None, company_id=None):
         """
@@ -698,22 +908,45 @@ class ProjectViewSet(viewsets.ModelViewSet):
         dhpd_server = DHPD_SERVER_2 if int(dhpd_server)==1 else DHPD_SERVER_1
 
         project = self.get_object()
-        delete_calculation_output_data(project)
-        print("ALready deleted output data!")
+
+        # Broken projects don't go to the DHPD server.
+        report = preflight(project)
+        if not report['valid']:
+            return Response({"error": report['errors'], "warnings": report['warnings']}, status=status.HTTP_400_BAD_REQUEST)
+
         serializer = ProjectDetailCalculateSerializer(project, context={'request': request})
         xml_data = dict(serializer.data)
 
         user = self.request.user
         company = Company.objects.get(id=company_id)
-        xml_data = process_driven_pile(xml_data)
-        xml_data = input_xml_content_unit_convert(xml_data)
         xml_content = json_to_calculate_xml(xml_data, user, company)
+
+        # The output of the project is empty until the run succeeded.
+        run = start_run(project, user, dhpd_server, xml_content)
+
+        try:
+            return self._calculate_run(request, project, run, xml_content, dhpd_server)
+        except Exception as e:
+            # A run left running would be the current result of the project
+            abort_run(run, str(e))
+            raise
+
+    def _calculate_run(self, request, project, run, xml_content, dhpd_server):
+        """
+        Send the started run to the DHPD proxy and store its output.
+        """
+        if DHPD_VALIDATE_CALCULATE_XML:
+            errors = validate_calculate_xml_file(xml_content)
+            if errors:
+                fail_run(run, errors)
+                return Response({"error": errors}, status=status.HTTP_400_BAD_REQUEST)
         
         calculate_template_xml = xmltodict.parse(xml_content)
 
         fastapi_url = (f'{FASTAPI_SERVER_DOMAIN}'
                        f'project/calculateByXMLString/')
-        response = requests.post(
+        start = time.perf_counter()
+        response = http_session().post(
             fastapi_url,
             # json={'xml_content': {"InputDaten": xml_data}},
             json={
@@ -722,7 +955,11 @@ class ProjectViewSet(viewsets.ModelViewSet):
             },
             verify=False,
             timeout=500)
-        
+        proxy_ms = (time.perf_counter() - start) * 1000
+
+        # Keep the raw response, the result tables only have a part of it.
+        save_snapshot(run, response.content)
+
         print("Done request to Business Logic!")
         # Serialize the project with additional related data
 
@@ -730,6 +967,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
         if response.status_code == 200:
             data = response.json()
         else:
+            fail_run(run, "Failed to get data from DHPD proxy!", proxy_ms)
             return Response(
                 {"detail": "Failed to get data from DHPD proxy!"},
                 status=status.HTTP_400_BAD_REQUEST
@@ -749,7 +987,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
 
             # If DHPD Proxy receives "False" as xml_content input, it switches
             # into connection testing mode that will use known working project.
-            con_test = requests.post(
+            con_test = http_session().post(
                 fastapi_url,
                 json={'xml_content': False},
                 verify=False)
@@ -758,6 +996,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
                 self.error = {
                     'status_message': 'Calculate Connection Error'}
                 self.data = con_test.json()['error_msg']
+                fail_run(run, self.data, proxy_ms)
                 return Response(
                     self.data,
                     status=status.HTTP_400_BAD_REQUEST
@@ -769,6 +1008,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
                 self.error = {
                     'status_message': 'Calculate Connection Error'}
                 self.data = data['error_msg']
+                fail_run(run, self.data, proxy_ms)
                 return Response(
                     self.data,
                     status=status.HTTP_400_BAD_REQUEST
@@ -787,6 +1027,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
                 'data': (xml_output_data['ErrorData']
                             ['_errorList']['InfoInhalt'])
             }
+            fail_run(run, self.error['data'], proxy_ms)
             return Response(
                 data,
                 status=status.HTTP_400_BAD_REQUEST
@@ -803,135 +1044,15 @@ class ProjectViewSet(viewsets.ModelViewSet):
         except:
             ...
 
-        result = xml_output_data['OutputDaten']
-        # DHPD-Web tool unpacks singular items from list into dict. Thus, we
-        # do some ugly wrapping into list to unify behavior for below code.
-        try:
-            if (type(_ := result['pfaehle']['LastPunktOutputList']
-            ['LastPunktOutput']) is dict):
-
-                (result['pfaehle']['LastPunktOutputList']
-                ['LastPunktOutput']) = [_]
-        except:
-            ...
-
-        try:
-            if (type(_ := result['BodenNutzung']['BodenNutzungDict']
-            ['a:KeyValueOfstringBodenNutzungOutputDB_PsWP3v']) is dict):
-
-                (result['BodenNutzung']['BodenNutzungDict']
-                ['a:KeyValueOfstringBodenNutzungOutputDB_PsWP3v']) = [_]
-        except:
-            ...
-
-        try:
-            if (type(_ := result['hLasten']['LastPunktOutputDict']
-            ['a:KeyValueOfstringArrayOfHLastPunktHorOutputDB_PsWP3v']) is dict):
-
-                (result['hLasten']['LastPunktOutputDict']
-                ['a:KeyValueOfstringArrayOfHLastPunktHorOutputDB_PsWP3v']) = [_]
-        except:
-            ...
-
-        # Split calculation results into dicts to simplify processing
-        try:
-            result_piles = {
-                x['_Pname']: x
-                for x in result['pfaehle']['LastPunktOutputList']['LastPunktOutput']}
-        except:
-            ...
-
-        try:
-            result_soils = {
-                x['a:Key']: x['a:Value']
-                for x in result['BodenNutzung']['BodenNutzungDict']['a:KeyValueOfstringBodenNutzungOutputDB_PsWP3v']}
-        except:
-            ...
-
-        try:
-            result_hlcs = {
-                x['a:Key']: x['a:Value']
-                for x in result['hLasten']['LastPunktOutputDict']['a:KeyValueOfstringArrayOfHLastPunktHorOutputDB_PsWP3v']}
-        except:
-            ...
-
-        try:
-            result = output_xml_content_unit_convert(result)
-        except:
-            ...
-        try:
-            result = output_xml_content_round_2_decimal_digits(result)
-        except:
-            ...
-        
-        try:
-            for pile_name in result_piles.keys():
-                try:
-                    current_pile = Pile.objects.get(project=project, Pname=pile_name)
-                    for key,val in PILE_OUTPUT_KEYS_MAPPING.items():
-                        try:
-                            result_piles[pile_name][val] = None if str(result_piles[pile_name][val]) in ["NaN", "nan"] \
-                                else result_piles[pile_name][val]
-                            current_pile.__setattr__(key, result_piles[pile_name][val])
-                        except:
-                            ...
-                    current_pile.save()
-                except:
-                    ...
-        except:
-            ...
-
-        try:
-            for soil_prof_name, soil_profile_data in result_soils.items():
-                try:
-                    soil_prof = SoilProfile.objects.get(project=project,name=soil_prof_name)
-                    current_layers = SoilLayer.objects.filter(soil_profile=soil_prof).order_by("row_index")
-                    layers = soil_profile_data['_schichten']['BodenSchichtNutzung']
-                    layers = [layers] if not isinstance(layers, list) else layers
-                    for layer, current_layer in zip(layers, current_layers):
-                        try:
-                            for key,val in SOIL_LAYER_OUTPUT_KEYS_MAPPING.items():
-                                try:
-                                    layer[val] = None if str(layer[val]) in ["NaN", "nan"] else layer[val]
-                                    current_layer.__setattr__(key, layer[val])
-                                    current_layer.save()
-                                except Exception as e:
-                                    ...
-                        except:
-                            ...
-                except:
-                    ...
-        except:
-            ...
-
-        try:
-            for hcase_name, hcase_data in result_hlcs.items():
-                try:
-                    hcase = HorizontalLoadCase.objects.get(project=project,name=hcase_name)
-                    current_hloads = HorizontalLoadPile.objects.filter(case=hcase).order_by("row_index")
-                    hloads = hcase_data['HLastPunktHorOutput']
-                    hloads = [hloads] if not isinstance(hloads, list) else hloads
-                    for hload, current_hload in zip(hloads, current_hloads):
-                        try:
-                            for key,val in HORIZONTAL_LOAD_POINT_OUTPUT_KEYS_MAPPING.items():
-                                try:
-                                    hload[val] = None if str(hload[val]) in ["NaN", "nan"] else hload[val]
-                                    current_hload.__setattr__(key, hload[val])
-                                    current_hload.save()
-                                except Exception as e:
-                                    ...
-                        except:
-                            ...
-                except:
-                    ...
-        except:
-            ...
+        # Store the typed calculation result as output of the run, missing values stay empty.
+        output = DhpdSerializer.unserialize_output(xml_output_data['OutputDaten'])
+        store_output(run, output, proxy_ms)
 
         # 2. Check if Fehler (=Mistake) field is not empty. These are given by
         # calculation server.
         # XML→JSON serializer makes this field into dict if is it's empty,
         #   but if there is an error message, it will be a string.
-        if isinstance(error_text := xml_output_data['OutputDaten']['_fehlerText'], str):
+        if (error_text := output.error_text) is not None:
             self.error = {
                 'status_message': 'Calculation Error',
                 'data': error_text}
@@ -0,0 +1,113 @@
+"""
+Warm-up of a worker before its first request (WARM_UP setting).
+
+ProjectsConfig.ready() runs the steps once per process, the first
+request of a new worker doesn't pay for them:
+
+    - imports: conversion libraries (see piledesigner.startup)
+    - xml_schemas: compiles the import and calculate XSDs
+    - serializers: builds the fields of the nested project serializers
+    - key_plans: imports and applies the key plans and DHPD data maps
+    - http_pool: creates the session to the FastAPI-DHPD proxy
+
+No step opens a database or network connection, so the warm-up is safe
+with gunicorn preload_app: the master warms up and the forked workers
+share the result. Connections are opened by each worker.
+"""
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Step -> seconds of the last warm-up of the process
+WARM_UP_SECONDS = {}
+
+
+def _imports():
+    from piledesigner.startup import preload_heavy_modules
+
+    preload_heavy_modules()
+
+
+def _xml_schemas():
+    from .services import xml_schema, IMPORT_XSD, CALCULATE_XSD
+
+    xml_schema(IMPORT_XSD)
+    xml_schema(CALCULATE_XSD)
+
+
+def _serializers():
+    from .serializers import (
+        ProjectDetailSerializer,
+        ProjectDetailCalculateSerializer,
+        ProjectTableSerializer,
+        ProjectTableNotValidateSerializer,
+    )
+
+    def build_fields(serializer):
+        for field in serializer.fields.values():
+            child = getattr(field, 'child', field)
+            if hasattr(child, 'fields'):
+                build_fields(child)
+
+    for serializer_class in (
+        ProjectDetailSerializer,
+        ProjectDetailCalculateSerializer,
+        ProjectTableSerializer,
+        ProjectTableNotValidateSerializer,
+    ):
+        build_fields(serializer_class())
+
+
+def _key_plans():
+    from . import key_plans
+    from .dhpd_serializer import mapper
+
+    for plan in vars(key_plans).values():
+        if isinstance(plan, key_plans.KeyPlan):
+            plan.apply({})
+    for data_map in vars(mapper).values():
+        if isinstance(data_map, mapper.DhpdDataMap):
+            data_map.unmap({})
+
+
+def _http_pool():
+    from .services import http_session
+
+    http_session()
+
+
+STEPS = (
+    ('imports', _imports),
+    ('xml_schemas', _xml_schemas),
+    ('serializers', _serializers),
+    ('key_plans', _key_plans),
+    ('http_pool', _http_pool),
+)
+
+
+def warm_up() -> dict:
+    """
+    The function runs the warm-up steps, a failing step is logged and
+    left to the first request which needs it.
+
+    Return: {step: seconds}
+    """
+    from shared.metrics import REGISTRY
+
+    for name, step in STEPS:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            logger.exception("Warm-up step %s failed", name)
+            continue
+        WARM_UP_SECONDS[name] = time.perf_counter() - start
+
+    REGISTRY.set_warm_up(WARM_UP_SECONDS)
+    logger.info(
+        "Warm-up in %.0f ms (%s)",
+        sum(WARM_UP_SECONDS.values()) * 1000,
+        ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in WARM_UP_SECONDS.items())
+    )
+    return WARM_UP_SECONDS
@@ -0,0 +1,164 @@
+"""
+Streaming writer for the project Excel template.
+
+Rows are read from the database cursor and written straight into a
+XlsxWriter workbook in constant memory mode, every row is flushed to
+disk as soon as it is written. The column order and the number format
+of each sheet type is computed once (see SheetPlan).
+"""
+import math
+import tempfile
+
+from django.db import models
+
+from .mapping import (
+    PILE_KEY_XLSX_2_JSON_MAPPING,
+    SOIL_KEY_XLSX_2_JSON_MAPPING,
+    H_LOAD_KEY_XLSX_2_JSON_MAPPING,
+)
+from .models import Pile, SoilProfile, SoilLayer, HorizontalLoadCase, HorizontalLoadPile
+
+# Same look as the header written by pandas before.
+HEADER_FORMAT = {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+NUMBER_FORMAT = {'num_format': '0.00'}
+
+# Rows fetched from the database cursor at once.
+CHUNK_SIZE = 2000
+
+
+class SheetPlan:
+    """
+    Column plan of one sheet type.
+
+    Attributes:
+        - headers (tuple): Excel column titles in template order
+        - fields (tuple): model field names of the columns
+        - number_columns (tuple): indexes of numeric columns
+        - float_columns (tuple): indexes of float columns (NaN check)
+    """
+    def __init__(self, mapping: dict, model, skip: int = 0):
+        model_fields = {field.name: field for field in model._meta.concrete_fields}
+        headers, fields, number_columns, float_columns = [], [], [], []
+        for title, field_name in list(mapping.items())[skip:]:
+            field = model_fields.get(field_name)
+            if field is None:
+                continue
+            index = len(fields)
+            headers.append(title)
+            fields.append(field_name)
+            if isinstance(field, (models.FloatField, models.IntegerField)):
+                number_columns.append(index)
+            if isinstance(field, models.FloatField):
+                float_columns.append(index)
+
+        self.headers = tuple(headers)
+        self.fields = tuple(fields)
+        self.number_columns = tuple(number_columns)
+        self.float_columns = tuple(float_columns)
+
+    def clean_row(self, values: tuple) -> tuple:
+        """
+        NaN can not be written to a cell, it is left blank.
+        """
+        if not any(
+            values[index] is not None and math.isnan(values[index])
+            for index in self.float_columns
+        ):
+            return values
+        values = list(values)
+        for index in self.float_columns:
+            if values[index] is not None and math.isnan(values[index]):
+                values[index] = None
+        return values
+
+
+PILE_SHEET = SheetPlan(PILE_KEY_XLSX_2_JSON_MAPPING, Pile)
+# The first four keys belong to the soil profile itself.
+SOIL_LAYER_SHEET = SheetPlan(SOIL_KEY_XLSX_2_JSON_MAPPING, SoilLayer, skip=4)
+SOIL_PROFILE_INFO_SHEET = SheetPlan(
+    {"Grundwasserstand": "grundwasserStand", "Startkote": "startKote"}, SoilProfile
+)
+H_LOAD_SHEET = SheetPlan(H_LOAD_KEY_XLSX_2_JSON_MAPPING, HorizontalLoadPile)
+
+
+class XlsxProjectWriter:
+    """
+    Writer of the project Excel template, the counterpart
+    of xlsx_import.XlsxProjectReader.
+    """
+    def __init__(self, output):
+        # Imported here, the writer is only needed when exporting.
+        import xlsxwriter
+
+        self.workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+        # Formats are registered once per workbook, not per sheet.
+        self.header_format = self.workbook.add_format(HEADER_FORMAT)
+        self.number_format = self.workbook.add_format(NUMBER_FORMAT)
+
+    def write_sheet(self, sheet_name: str, plan: SheetPlan, rows):
+        worksheet = self.workbook.add_worksheet(sheet_name)
+        for index in plan.number_columns:
+            worksheet.set_column(index, index, None, self.number_format)
+        worksheet.write_row(0, 0, plan.headers, self.header_format)
+
+        for row_number, values in enumerate(rows, start=1):
+            worksheet.write_row(row_number, 0, plan.clean_row(values))
+
+    def write_project(self, project):
+        self.write_sheet(
+            'Pfahltabelle',
+            PILE_SHEET,
+            Pile.objects.filter(project=project)
+                .order_by('row_index')
+                .values_list(*PILE_SHEET.fields)
+                .iterator(chunk_size=CHUNK_SIZE)
+        )
+
+        soil_profiles = SoilProfile.objects.filter(project=project).order_by('id')
+        for soil_profile in soil_profiles:
+            self.write_sheet(
+                soil_profile.name,
+                SOIL_LAYER_SHEET,
+                SoilLayer.objects.filter(soil_profile=soil_profile)
+                    .order_by('row_index')
+                    .values_list(*SOIL_LAYER_SHEET.fields)
+                    .iterator(chunk_size=CHUNK_SIZE)
+            )
+            self.write_sheet(
+                soil_profile.name + "-Info",
+                SOIL_PROFILE_INFO_SHEET,
+                [(soil_profile.grundwasserStand, soil_profile.startKote)]
+            )
+
+        h_load_cases = HorizontalLoadCase.objects.filter(project=project).order_by('id')
+        for h_load_case in h_load_cases:
+            self.write_sheet(
+                h_load_case.name,
+                H_LOAD_SHEET,
+                HorizontalLoadPile.objects.filter(case=h_load_case)
+                    .order_by('row_index')
+                    .values_list(*H_LOAD_SHEET.fields)
+                    .iterator(chunk_size=CHUNK_SIZE)
+            )
+
+    def close(self):
+        self.workbook.close()
+
+
+def export_project_xlsx(project):
+    """
+    The function writes the project tables to a temporary xlsx file.
+
+    Return: file object positioned at the start, it is removed
+    when closed (FileResponse closes it after streaming).
+    """
+    output = tempfile.TemporaryFile(suffix='.xlsx')
+    try:
+        writer = XlsxProjectWriter(output)
+        writer.write_project(project)
+        writer.close()
+    except Exception:
+        output.close()
+        raise
+    output.seek(0)
+    return output
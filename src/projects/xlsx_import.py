@@ -0,0 +1,273 @@
+"""
+Streaming reader for the project Excel template.
+
+The workbook is opened in read-only mode, so openpyxl parses the sheets
+row by row instead of loading every cell into memory. The header row of
+each sheet is mapped to model fields once, every following row is
+converted straight into a typed dict that can be handed over to the
+table upsert (see table_upsert.replace_project_table_data).
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+
+from .mapping import (
+    PILE_KEY_XLSX_2_JSON_MAPPING,
+    SOIL_KEY_XLSX_2_JSON_MAPPING,
+    H_LOAD_KEY_XLSX_2_JSON_MAPPING,
+)
+from .models import Pile, SoilProfile, SoilLayer, HorizontalLoadPile
+from .table_upsert import to_bool
+
+# Sheets with soil profile information are suffixed with this.
+SOIL_PROFILE_INFO_SUFFIX = '-Info'
+
+# This field is hard coded for now. Need ask Dr. Hilla to clarify.
+DEFAULT_SOIL_PROFILE_PILE_TYPE = 4
+
+
+def _to_float(value):
+    if isinstance(value, str) and value.strip() == "":
+        return None
+    return float(value)
+
+
+def _to_int(value):
+    if isinstance(value, str):
+        if value.strip() == "":
+            return None
+        return int(float(value))
+    return int(value)
+
+
+def _to_str(value):
+    # Excel stores "1" typed into a text column as number 1.0
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+FIELD_CONVERTERS = {
+    models.FloatField: _to_float,
+    models.IntegerField: _to_int,
+    models.BooleanField: to_bool,
+    models.CharField: _to_str,
+}
+
+
+def _field_converter(model, field_name: str):
+    field = model._meta.get_field(field_name)
+    for field_class, converter in FIELD_CONVERTERS.items():
+        if isinstance(field, field_class):
+            return converter
+    return None
+
+
+class SheetPlan:
+    """
+    Column plan of one sheet type. It is built once per sheet from
+    the header row and tells which column goes into which model
+    field and how the cell value is converted.
+
+    Attributes:
+        - columns (tuple): (column index, field name, converter)
+        - key_field (str): rows with an empty key field are skipped
+    """
+    def __init__(self, columns: tuple, key_field: str):
+        self.columns = columns
+        self.key_field = key_field
+
+    @classmethod
+    def from_header(cls, header: tuple, mapping: dict, model, key_header: str):
+        columns = []
+        used_fields = set()
+        for index, title in enumerate(header):
+            field_name = mapping.get(title)
+            # Pandas renamed duplicated headers, first one wins here as well.
+            if field_name is None or field_name in used_fields:
+                continue
+            try:
+                converter = _field_converter(model, field_name)
+            except FieldDoesNotExist:
+                continue
+            used_fields.add(field_name)
+            columns.append((index, field_name, converter))
+        return cls(tuple(columns), mapping.get(key_header))
+
+    def rows(self, worksheet):
+        """
+        Yield typed row dicts of the sheet.
+        """
+        yield from self.convert_rows(worksheet.iter_rows(min_row=2, values_only=True))
+
+    def convert_rows(self, value_rows):
+        """
+        Yield typed row dicts of the given value tuples (one per row,
+        in header order). Rows which can not be converted are skipped
+        as the old import did with failing rows.
+        """
+        row_index = 0
+        key_field = self.key_field
+        for values in value_rows:
+            row = {}
+            try:
+                for index, field_name, converter in self.columns:
+                    value = values[index] if index < len(values) else None
+                    if value is not None and converter is not None:
+                        value = converter(value)
+                    row[field_name] = value
+            except (TypeError, ValueError):
+                continue
+
+            if key_field is not None and row.get(key_field) in (None, ''):
+                continue
+
+            row['row_index'] = row_index
+            row_index += 1
+            yield row
+
+
+def _header(worksheet) -> tuple:
+    for values in worksheet.iter_rows(min_row=1, max_row=1, values_only=True):
+        return values
+    return ()
+
+
+def iter_sheet_rows(worksheet, mapping: dict, model, key_header: str):
+    """
+    Yield typed row dicts of a worksheet for the given header mapping.
+    """
+    plan = SheetPlan.from_header(_header(worksheet), mapping, model, key_header)
+    if plan.key_field is None or not plan.columns:
+        return
+    yield from plan.rows(worksheet)
+
+
+def _soil_profile_info(worksheet) -> dict:
+    """
+    The info sheet holds one row with groundwater level and start level.
+    """
+    header = _header(worksheet)
+    info = {'grundwasserStand': None, 'startKote': None}
+    for row in iter_sheet_rows(
+        worksheet,
+        {key: SOIL_KEY_XLSX_2_JSON_MAPPING[key] for key in header
+         if key in ('Grundwasserstand', 'Startkote')},
+        SoilProfile,
+        'Grundwasserstand'
+    ):
+        info['grundwasserStand'] = row.get('grundwasserStand')
+        info['startKote'] = row.get('startKote')
+        break
+    return info
+
+
+class XlsxProjectReader:
+    """
+    Reader of the project Excel template:
+        - the first sheet holds the piles,
+        - the soil profiles follow as pairs of sheets
+          ("<name>" with layers and "<name>-Info"),
+        - every sheet after the last "-Info" sheet is a horizontal load case.
+
+    All table accessors are generators, nothing is read before
+    they are consumed.
+    """
+    def __init__(self, input_file):
+        # Imported here, the reader is only needed when importing.
+        from openpyxl import load_workbook
+
+        self.workbook = load_workbook(input_file, read_only=True, data_only=True)
+        self.sheet_names = self.workbook.sheetnames
+
+        # Get the last soil profile index
+        self.end_soil_profile_index = 0
+        sheet_len = len(self.sheet_names)
+        for idx, sheet in enumerate(reversed(self.sheet_names)):
+            if sheet.endswith(SOIL_PROFILE_INFO_SUFFIX):
+                self.end_soil_profile_index = sheet_len - idx - 1
+                break
+
+    def close(self):
+        self.workbook.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def validate(self) -> list:
+        """
+        Check the layout of the workbook before anything is imported.
+
+        Return: list of errors, empty if the workbook can be imported
+        """
+        if not self.sheet_names:
+            return [{'message': "The workbook has no sheets."}]
+
+        pile_sheet = self.sheet_names[0]
+        header = _header(self.workbook[pile_sheet])
+        if 'Lastpunkt' not in header:
+            return [{
+                'message': "Column 'Lastpunkt' is missing.",
+                'sheet': pile_sheet,
+            }]
+        return []
+
+    def piles(self):
+        if not self.sheet_names:
+            return
+        yield from iter_sheet_rows(
+            self.workbook[self.sheet_names[0]],
+            PILE_KEY_XLSX_2_JSON_MAPPING,
+            Pile,
+            'Lastpunkt'
+        )
+
+    def soil_profiles(self):
+        for sheet_index in range(1, self.end_soil_profile_index, 2):
+            layer_sheet = self.sheet_names[sheet_index]
+            info_sheet = self.sheet_names[sheet_index + 1]
+            soil_profile = _soil_profile_info(self.workbook[info_sheet])
+            soil_profile['name'] = layer_sheet
+            soil_profile['pfahlTyp'] = DEFAULT_SOIL_PROFILE_PILE_TYPE
+            soil_profile['soil_layers'] = iter_sheet_rows(
+                self.workbook[layer_sheet],
+                SOIL_KEY_XLSX_2_JSON_MAPPING,
+                SoilLayer,
+                'Endkote'
+            )
+            yield soil_profile
+
+    def horizontal_loadcases(self):
+        for sheet_name in self.sheet_names[self.end_soil_profile_index + 1:]:
+            yield {
+                'name': sheet_name,
+                'horizontal_loads': iter_sheet_rows(
+                    self.workbook[sheet_name],
+                    H_LOAD_KEY_XLSX_2_JSON_MAPPING,
+                    HorizontalLoadPile,
+                    'Lastpunkt'
+                ),
+            }
+
+    def to_json(self) -> dict:
+        """
+        Materialize the workbook into the project json structure
+        used by the rest of the services.
+        """
+        soil_profiles = []
+        for soil_profile in self.soil_profiles():
+            soil_profile['soil_layers'] = list(soil_profile['soil_layers'])
+            soil_profiles.append(soil_profile)
+
+        horizontal_loadcases = []
+        for h_load_case in self.horizontal_loadcases():
+            h_load_case['horizontal_loads'] = list(h_load_case['horizontal_loads'])
+            horizontal_loadcases.append(h_load_case)
+
+        return {
+            'piles': list(self.piles()),
+            'soil_profiles': soil_profiles,
+            'horizontal_loadcases': horizontal_loadcases,
+        }
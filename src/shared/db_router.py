@@ -0,0 +1,162 @@
+"""
+Reads of safe requests from a read replica (DATABASE_REPLICA setting).
+
+The heavy reads (retrieve, list, xml, export_excel, the user listings)
+don't have to compete with the write-back of calculate on the primary.
+ReplicaRoutingMiddleware marks the requests whose reads may go to the
+replica, PrimaryReplicaRouter routes them:
+
+    - only reads of GET, HEAD and OPTIONS requests go to the replica,
+      all writes and the reads of other requests go to the primary
+    - read-your-writes: the first write of a request pins the request
+      to the primary, the following reads see the written rows
+    - reads in a transaction (atomic block) go to the primary
+    - views which read rows to write them back (calculate) are pinned
+      from the start: primary_database_actions of a viewset or the
+      primary_database decorator of a function view
+    - without a replica (DATABASE_REPLICA = None) or while the replica
+      can't be connected, everything goes to the primary
+
+Reads outside of a request (management commands, threads started by a
+view) always go to the primary.
+
+The routing of a request is kept in a ContextVar, the sync_to_async
+calls of an async view (ASGI) see it as well. The middleware is sync and
+async capable, it doesn't move an async request into a thread.
+"""
+import logging
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Seconds the primary is used after the replica failed to connect
+REPLICA_RETRY_SECONDS = 30
+
+# Routing of the current request, None outside of a request
+_routing = ContextVar('replica_routing', default=None)
+
+_replica_down_until = 0.0
+
+
+class RequestRouting:
+    """
+    Routing state of a request, shared by the threads of sync_to_async.
+
+    Attributes:
+        - use_replica: reads may go to the replica
+        - pinned: the request wrote, reads go to the primary
+    """
+    __slots__ = ('use_replica', 'pinned')
+
+    def __init__(self, use_replica: bool):
+        self.use_replica = use_replica
+        self.pinned = False
+
+
+def primary_database(view):
+    """
+    Decorator of a function view whose reads must go to the primary.
+    """
+    view.primary_database = True
+    return view
+
+
+def _replica_available(alias: str) -> bool:
+    """
+    The function connects the replica, a failed connection is logged and
+    the replica isn't used for REPLICA_RETRY_SECONDS.
+    """
+    global _replica_down_until
+
+    if time.monotonic() < _replica_down_until:
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError:
+        _replica_down_until = time.monotonic() + REPLICA_RETRY_SECONDS
+        logger.warning("Replica %s unavailable, reading from the primary for %d s.",
+                       alias, REPLICA_RETRY_SECONDS, exc_info=True)
+        return False
+    return True
+
+
+class PrimaryReplicaRouter:
+    """
+    Database router of DATABASE_ROUTERS, see the module docstring.
+    """
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is None or not routing.use_replica or routing.pinned:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return settings.DATABASE_REPLICA or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            routing.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica has the rows of the primary
+        return True
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets the reads of safe requests go to the replica, see the module
+    docstring.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        alias = settings.DATABASE_REPLICA
+        use_replica = bool(alias) and request.method in SAFE_METHODS and _replica_available(alias)
+        token = _routing.set(RequestRouting(use_replica))
+        try:
+            return self.get_response(request)
+        finally:
+            _routing.reset(token)
+
+    async def __acall__(self, request):
+        alias = settings.DATABASE_REPLICA
+        use_replica = (
+            bool(alias) and request.method in SAFE_METHODS
+            and await sync_to_async(_replica_available)(alias)
+        )
+        token = _routing.set(RequestRouting(use_replica))
+        try:
+            return await self.get_response(request)
+        finally:
+            _routing.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        routing = _routing.get()
+        if routing is None or not routing.use_replica:
+            return None
+
+        # Viewsets: view_func.actions maps the method to the action
+        action = (getattr(view_func, 'actions', None) or {}).get(request.method.lower())
+        view_class = getattr(view_func, 'cls', None)
+        if getattr(view_func, 'primary_database', False) or (
+            action is not None and action in getattr(view_class, 'primary_database_actions', ())
+        ):
+            routing.pinned = True
+        return None
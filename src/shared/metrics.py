@@ -0,0 +1,273 @@
+"""
+Request metrics of the API in Prometheus text format.
+
+RequestMetricsMiddleware measures every request and adds it to the
+registry of the process:
+
+    - latency histogram per route (method and URL name)
+    - number and time of the SQL queries, recorded by a connection
+      execute wrapper
+    - response size histogram per route
+
+Requests slower than SLOW_REQUEST_MS are logged with their SQL, a part
+of them (SLOW_REQUEST_SAMPLE_RATE) to keep the log small.
+
+The middleware is sync and async capable. Under ASGI an async view
+(projects.async_calculate) is awaited without a thread, the execute
+wrapper is installed in the sync_to_async thread of the request, where
+its queries run.
+
+The registry lives in the memory of the process, every worker of the
+server (gunicorn, ...) has its own metrics. Prometheus scrapes the
+workers one by one or the sum of the scrapes is used.
+"""
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Length of a logged SQL statement
+SLOW_REQUEST_SQL_LENGTH = 1000
+
+
+class Histogram:
+    """
+    Cumulative Prometheus histogram, count per upper bucket bound.
+    """
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name: str, labels: str) -> list:
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum:.6f}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.query_seconds = 0.0
+        self.response_size = Histogram(SIZE_BUCKETS)
+        self.responses = {}
+
+
+class MetricsRegistry:
+    """
+    Metrics of all routes of the process.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+        self._warm_up = {}
+
+    def set_warm_up(self, seconds: dict):
+        with self._lock:
+            self._warm_up = dict(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._routes = {}
+
+    def record(self, method: str, route: str, status_code: int,
+               seconds: float, queries: int, query_seconds: float):
+        with self._lock:
+            metrics = self._routes.setdefault((method, route), RouteMetrics())
+            metrics.latency.observe(seconds)
+            metrics.queries.observe(queries)
+            metrics.query_seconds += query_seconds
+            metrics.responses[status_code] = metrics.responses.get(status_code, 0) + 1
+
+    def record_size(self, method: str, route: str, size: int):
+        with self._lock:
+            self._routes.setdefault((method, route), RouteMetrics()).response_size.observe(size)
+
+    def render(self) -> str:
+        """
+        Return: metrics in Prometheus text format (version 0.0.4)
+        """
+        families = {
+            'http_request_duration_seconds': ('histogram', "Request latency per route.", []),
+            'http_request_db_queries': ('histogram', "SQL queries per request.", []),
+            'http_request_db_query_seconds_total': ('counter', "Time of the SQL queries per route.", []),
+            'http_response_size_bytes': ('histogram', "Response size per route.", []),
+            'http_responses_total': ('counter', "Responses per route and status code.", []),
+            'process_warm_up_seconds': ('gauge', "Time of the warm-up steps of the process.", []),
+        }
+        with self._lock:
+            families['process_warm_up_seconds'][2].extend(
+                f'process_warm_up_seconds{{step="{step}"}} {seconds:.6f}'
+                for step, seconds in self._warm_up.items()
+            )
+            for (method, route), metrics in sorted(self._routes.items()):
+                labels = f'method="{method}",route="{_escape(route)}"'
+                families['http_request_duration_seconds'][2].extend(
+                    metrics.latency.samples('http_request_duration_seconds', labels))
+                families['http_request_db_queries'][2].extend(
+                    metrics.queries.samples('http_request_db_queries', labels))
+                families['http_request_db_query_seconds_total'][2].append(
+                    f'http_request_db_query_seconds_total{{{labels}}} {metrics.query_seconds:.6f}')
+                families['http_response_size_bytes'][2].extend(
+                    metrics.response_size.samples('http_response_size_bytes', labels))
+                families['http_responses_total'][2].extend(
+                    f'http_responses_total{{{labels},status="{status_code}"}} {count}'
+                    for status_code, count in sorted(metrics.responses.items())
+                )
+
+        lines = []
+        for name, (metric_type, help_text, samples) in families.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REGISTRY = MetricsRegistry()
+
+
+class QueryRecorder:
+    """
+    Connection execute wrapper, counts the queries of a request and
+    their time. The SQL is kept for the slow request log.
+    """
+    def __init__(self, keep_sql: bool):
+        self.keep_sql = keep_sql
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            seconds = time.perf_counter() - start
+            self.count += 1
+            self.seconds += seconds
+            if self.keep_sql:
+                self.statements.append((seconds, sql))
+
+
+def record_queries(stack: ExitStack, recorder) -> None:
+    """
+    The function adds the recorder to the connections of the current
+    thread until the stack is closed.
+    """
+    for connection in connections.all(initialized_only=False):
+        stack.enter_context(connection.execute_wrapper(recorder))
+
+
+def _route(request) -> str:
+    # URL name (project-calculate, ...), a label per URL would grow without bound.
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route
+
+
+def _counted(content, method: str, route: str):
+    # Streamed responses are measured when the server has sent them.
+    size = 0
+    try:
+        for chunk in content:
+            size += len(chunk)
+            yield chunk
+    finally:
+        REGISTRY.record_size(method, route, size)
+
+
+class RequestMetricsMiddleware:
+    """
+    Records the latency, SQL queries and response size of every request,
+    see the module docstring.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.slow_seconds = settings.SLOW_REQUEST_MS / 1000
+        self.sample_rate = settings.SLOW_REQUEST_SAMPLE_RATE
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        recorder = self._recorder()
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            record_queries(stack, recorder)
+            response = self.get_response(request)
+        return self._record(request, response, recorder, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        recorder = self._recorder()
+
+        start = time.perf_counter()
+        stack = ExitStack()
+        await sync_to_async(record_queries)(stack, recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self._record(request, response, recorder, time.perf_counter() - start)
+
+    def _recorder(self) -> QueryRecorder:
+        # Decide before the request if its SQL is kept for the slow request log.
+        keep_sql = self.sample_rate > 0 and random.random() < self.sample_rate
+        return QueryRecorder(keep_sql)
+
+    def _record(self, request, response, recorder: QueryRecorder, seconds: float):
+        method, route = request.method, _route(request)
+        REGISTRY.record(method, route, response.status_code, seconds, recorder.count, recorder.seconds)
+        if response.streaming and not response.is_async:
+            response.streaming_content = _counted(response.streaming_content, method, route)
+        elif not response.streaming:
+            REGISTRY.record_size(method, route, len(response.content))
+
+        if recorder.keep_sql and seconds >= self.slow_seconds:
+            logger.warning(
+                "Slow request %s %s (%s): %.0f ms, %d queries in %.0f ms\n%s",
+                method, request.get_full_path(), route, seconds * 1000,
+                recorder.count, recorder.seconds * 1000,
+                "\n".join(
+                    f"  {query_seconds * 1000:8.1f} ms  {sql[:SLOW_REQUEST_SQL_LENGTH]}"
+                    for query_seconds, sql in recorder.statements
+                )
+            )
+        return response
@@ -0,0 +1,38 @@
+# Generated by Django 5.1 on 2026-10-19 19:14
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('method', models.CharField(max_length=8, verbose_name='Method')),
+                ('path', models.CharField(max_length=1024, verbose_name='Path')),
+                ('status_code', models.IntegerField(verbose_name='Status code')),
+                ('duration_ms', models.FloatField(help_text='Time of the request in milliseconds.', verbose_name='Duration')),
+                ('sample_interval_ms', models.FloatField(help_text='Milliseconds between two stack samples.', verbose_name='Sample interval')),
+                ('samples', models.IntegerField(default=0, verbose_name='Samples')),
+                ('stacks', models.TextField(blank=True, default='', help_text='Collapsed stacks, one "frame;frame count" line per stack.', verbose_name='Stacks')),
+                ('sql', models.JSONField(default=list, help_text='Statements of the request with their time in milliseconds.', verbose_name='SQL')),
+                ('created_date', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='request_profiles', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_date'],
+            },
+        ),
+    ]
@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.db.models import Manager
 from django.utils.timezone import now
@@ -41,3 +43,26 @@ class BaseModel(models.Model):
 class ActiveManager(Manager):
     def get_queryset(self):
         return super().get_queryset().filter(is_active=True)
+
+
+class RequestProfile(models.Model):
+    """
+    Sampling profile of an API request (see shared.profiling).
+    """
+    id                 = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    method             = models.CharField('Method', max_length=8)
+    path               = models.CharField('Path', max_length=1024)
+    status_code        = models.IntegerField('Status code')
+    user               = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="request_profiles")
+    duration_ms        = models.FloatField('Duration', help_text='Time of the request in milliseconds.')
+    sample_interval_ms = models.FloatField('Sample interval', help_text='Milliseconds between two stack samples.')
+    samples            = models.IntegerField('Samples', default=0)
+    stacks             = models.TextField('Stacks', blank=True, default='', help_text='Collapsed stacks, one "frame;frame count" line per stack.')
+    sql                = models.JSONField('SQL', default=list, help_text='Statements of the request with their time in milliseconds.')
+    created_date       = models.DateTimeField(default=now, editable=False)
+
+    class Meta:
+        ordering = ['-created_date']
+
+    def __str__(self):
+        return f"Profile {self.method} {self.path}: {self.duration_ms} ms"
@@ -0,0 +1,163 @@
+"""
+Profiling of single API requests on demand.
+
+A staff user adds ?profile=1 or the header "X-Profile: 1" to a request.
+The request runs under a sampling profiler: a thread takes the stack of
+the request thread every PROFILE_SAMPLE_INTERVAL_MS milliseconds. The
+samples are stored as collapsed stacks (flamegraph.pl, speedscope) with
+the SQL statements of the request in a RequestProfile, its id is sent
+in the X-Profile-Id header of the response.
+
+Sampling doesn't slow down the request much, unlike a deterministic
+profiler, so the time spent in serializers, conversions and DB calls
+is close to the time of an unprofiled request.
+
+Under ASGI an async view is awaited without a thread. Its request thread
+is the sync_to_async thread of the request, where the ORM and the
+conversions run, the time it waits for I/O shows as the idle thread.
+"""
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .metrics import QueryRecorder, record_queries
+from .models import RequestProfile
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+
+
+class StackSampler:
+    """
+    Samples the stack of a thread until stopped.
+
+    Attributes:
+        - thread_id: threading.get_ident() of the sampled thread
+        - interval: seconds between two samples
+    """
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                names.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_qualname}")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        """
+        Return: one "frame;frame;frame count" line per stack
+        """
+        return '\n'.join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+def _profile_requested(request) -> bool:
+    return request.GET.get('profile') == '1' or request.META.get(PROFILE_HEADER) == '1'
+
+
+def _staff_user(request):
+    # The API authenticates with JWT in the views, the middleware authenticates itself.
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user if user.is_staff else None
+    try:
+        authenticated = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    if authenticated and authenticated[0].is_staff:
+        return authenticated[0]
+    return None
+
+
+class RequestProfilingMiddleware:
+    """
+    Profiles requests of staff users with ?profile=1 or "X-Profile: 1",
+    see the module docstring. Other requests are not touched.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.interval = settings.PROFILE_SAMPLE_INTERVAL_MS / 1000
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not _profile_requested(request):
+            return self.get_response(request)
+        user = _staff_user(request)
+        if user is None:
+            return self.get_response(request)
+
+        recorder = QueryRecorder(keep_sql=True)
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            record_queries(stack, recorder)
+            sampler = stack.enter_context(StackSampler(threading.get_ident(), self.interval))
+            response = self.get_response(request)
+        return self._save(request, response, user, time.perf_counter() - start, sampler, recorder)
+
+    async def __acall__(self, request):
+        if not _profile_requested(request):
+            return await self.get_response(request)
+        user = await sync_to_async(_staff_user)(request)
+        if user is None:
+            return await self.get_response(request)
+
+        recorder = QueryRecorder(keep_sql=True)
+        start = time.perf_counter()
+        stack = ExitStack()
+        await sync_to_async(record_queries)(stack, recorder)
+        try:
+            thread_id = await sync_to_async(threading.get_ident)()
+            with StackSampler(thread_id, self.interval) as sampler:
+                response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        duration = time.perf_counter() - start
+        return await sync_to_async(self._save)(request, response, user, duration, sampler, recorder)
+
+    def _save(self, request, response, user, duration: float, sampler: StackSampler, recorder: QueryRecorder):
+        profile = RequestProfile.objects.create(
+            method=request.method,
+            path=request.get_full_path()[:1024],
+            status_code=response.status_code,
+            user=user,
+            duration_ms=round(duration * 1000, 1),
+            sample_interval_ms=settings.PROFILE_SAMPLE_INTERVAL_MS,
+            samples=sum(sampler.stacks.values()),
+            stacks=sampler.collapsed(),
+            sql=[
+                {'ms': round(seconds * 1000, 2), 'sql': sql}
+                for seconds, sql in recorder.statements
+            ],
+        )
+        response['X-Profile-Id'] = str(profile.id)
+        return response
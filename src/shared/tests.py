@@ -1,3 +1,219 @@
-from django.test import TestCase
+import json
+import os
+import subprocess
+import sys
+import uuid
 
-# Create your tests here.
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.base import BaseHandler
+from django.db import OperationalError, connections, transaction
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from companies.models import Company
+from conftest import Endpoint, PROJECT_SIZES
+from projects.management.commands.bench_startup import WSGI_IMPORT, SRC_DIR
+from . import db_router
+from .metrics import REGISTRY
+from .models import RequestProfile
+
+ENDPOINTS = [
+    Endpoint('api root', 'get', '/', queries=0, authenticated=False),
+]
+
+
+@pytest.mark.parametrize('size', PROJECT_SIZES)
+@pytest.mark.parametrize('endpoint', ENDPOINTS, ids=lambda endpoint: endpoint.name)
+def test_shared_endpoint_budget(endpoint, size, endpoint_budget):
+    endpoint_budget(endpoint)
+
+
+@pytest.fixture
+def metrics_client(db, settings):
+    settings.METRICS_TOKEN = 'metrics-token'
+    settings.SLOW_REQUEST_MS = 0
+    settings.SLOW_REQUEST_SAMPLE_RATE = 1.0
+    REGISTRY.reset()
+    client = APIClient()
+    client.defaults['SERVER_NAME'] = 'localhost'
+    return client
+
+
+def test_metrics_require_staff_or_token(metrics_client):
+    user = User.objects.create(username='user@example.com')
+    metrics_client.force_authenticate(user)
+    assert metrics_client.get('/internal/metrics/').status_code == 403
+
+    user.is_staff = True
+    metrics_client.force_authenticate(user)
+    assert metrics_client.get('/internal/metrics/').status_code == 200
+
+    metrics_client.force_authenticate(None)
+    response = metrics_client.get('/internal/metrics/', HTTP_AUTHORIZATION='Bearer metrics-token')
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+
+
+def test_metrics_record_routes_and_slow_requests(metrics_client, caplog):
+    user = User.objects.create(username='user@example.com')
+    metrics_client.force_authenticate(user)
+    metrics_client.get('/v1/user/me/')
+    metrics_client.force_authenticate(None)
+
+    metrics = metrics_client.get('/internal/metrics/', HTTP_AUTHORIZATION='Bearer metrics-token').content.decode()
+    assert 'http_request_duration_seconds_count{method="GET",route="user-me"} 1' in metrics
+    assert 'http_responses_total{method="GET",route="user-me",status="200"} 1' in metrics
+    assert 'http_request_db_queries_bucket{method="GET",route="user-me",le="+Inf"} 1' in metrics
+    assert 'http_response_size_bytes_count{method="GET",route="user-me"} 1' in metrics
+
+    slow_requests = [record.getMessage() for record in caplog.records if record.name == 'shared.metrics']
+    assert any('/v1/user/me/' in message and 'SELECT' in message for message in slow_requests)
+
+
+def test_profile_staff_requests(metrics_client):
+    user = User.objects.create(username='user@example.com')
+    metrics_client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+    assert 'X-Profile-Id' not in metrics_client.get('/v1/user/me/?profile=1')
+
+    user.is_staff = True
+    user.save()
+    response = metrics_client.get('/v1/user/me/', HTTP_X_PROFILE='1')
+    assert response.status_code == 200
+    profile = RequestProfile.objects.get(id=response['X-Profile-Id'])
+    assert profile.user == user and profile.path == '/v1/user/me/'
+    assert any('auth_user' in query['sql'] for query in profile.sql)
+
+    response = metrics_client.get(f"/internal/profiles/{profile.id}/")
+    assert response.status_code == 200
+    assert response.json()['sql'] == profile.sql
+    assert metrics_client.get(f"/internal/profiles/{profile.id}/?stacks=1").content.decode() == profile.stacks
+
+
+@pytest.mark.django_db(transaction=True)
+def test_metrics_and_profile_of_async_requests(metrics_client):
+    user = User.objects.create(username='user@example.com', is_staff=True)
+    headers = {'Authorization': f"Bearer {RefreshToken.for_user(user).access_token}", 'X-Profile': '1'}
+
+    response = async_to_sync(AsyncClient().get)('/v1/user/me/', headers=headers, SERVER_NAME='localhost')
+    assert response.status_code == 200
+    # The queries of the sync_to_async thread of the request are recorded
+    profile = RequestProfile.objects.get(id=response['X-Profile-Id'])
+    assert any('auth_user' in query['sql'] for query in profile.sql)
+    metrics = metrics_client.get('/internal/metrics/', HTTP_AUTHORIZATION='Bearer metrics-token').content.decode()
+    assert 'http_responses_total{method="GET",route="user-me",status="200"} 1' in metrics
+    assert 'http_request_db_queries_bucket{method="GET",route="user-me",le="1"} 0' in metrics
+
+
+def test_startup_imports_no_heavy_modules():
+    output = subprocess.run(
+        [sys.executable, '-c', WSGI_IMPORT], cwd=SRC_DIR, capture_output=True, text=True, check=True,
+        env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'piledesigner.settings'}
+    ).stdout
+    assert json.loads(output.strip().splitlines()[-1])['heavy_modules'] == []
+
+
+@pytest.fixture
+def replica(settings):
+    """
+    Company 'primary' in the default database, the same company is named
+    'replica' in the replica database.
+    """
+    settings.DATABASE_REPLICA = 'replica'
+    company = Company.objects.create(name='primary')
+    Company(id=company.id, name='replica').save(using='replica')
+    yield company
+    db_router._replica_down_until = 0.0
+
+
+def _routed(view, method: str = 'get') -> str:
+    """
+    The function sends a request through ReplicaRoutingMiddleware.
+
+    Return: content of the response of the view
+    """
+    def get_response(request):
+        middleware.process_view(request, view, (), {})
+        return view(request)
+
+    middleware = db_router.ReplicaRoutingMiddleware(get_response)
+    return middleware(getattr(RequestFactory(), method)('/')).content.decode()
+
+
+def _company_names(request):
+    """
+    Name of the company before and after a write.
+    """
+    company = Company.objects.order_by('id').last()
+    before = Company.objects.get(id=company.id).name
+    User.objects.create(username=f"{uuid.uuid4()}@example.com")
+    return HttpResponse(f"{before},{Company.objects.get(id=company.id).name}")
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+def test_replica_reads_and_read_your_writes(replica):
+    # Safe request: reads from the replica until the first write
+    assert _routed(_company_names) == 'replica,primary'
+    # Other requests only use the primary
+    assert _routed(_company_names, 'post') == 'primary,primary'
+    # Views pinned to the primary and reads in a transaction
+    assert _routed(db_router.primary_database(_company_names)) == 'primary,primary'
+    with transaction.atomic():
+        assert _routed(lambda request: HttpResponse(Company.objects.get(id=replica.id).name)) == 'primary'
+    # Reads outside of a request
+    assert Company.objects.get(id=replica.id).name == 'primary'
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+def test_replica_fallback_to_primary(replica, settings, monkeypatch):
+    def read(request):
+        return HttpResponse(Company.objects.get(id=replica.id).name)
+
+    settings.DATABASE_REPLICA = None
+    assert _routed(read) == 'primary'
+
+    settings.DATABASE_REPLICA = 'replica'
+
+    def refuse_connection():
+        raise OperationalError("connection refused")
+
+    monkeypatch.setattr(connections['replica'], 'ensure_connection', refuse_connection)
+    assert _routed(read) == 'primary'
+    monkeypatch.undo()
+    # The replica isn't retried before REPLICA_RETRY_SECONDS
+    assert _routed(read) == 'primary'
+    db_router._replica_down_until = 0.0
+    assert _routed(read) == 'replica'
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+def test_replica_routing_of_async_requests(replica):
+    async def get_response(request):
+        return await sync_to_async(_company_names)(request)
+
+    middleware = db_router.ReplicaRoutingMiddleware(get_response)
+    assert iscoroutinefunction(middleware)
+    # The sync_to_async calls of the request see its routing
+    assert async_to_sync(middleware)(RequestFactory().get('/')).content.decode() == 'replica,primary'
+    assert async_to_sync(middleware)(RequestFactory().post('/')).content.decode() == 'primary,primary'
+    assert db_router._routing.get() is None
+
+
+def test_asgi_middleware_chain_stays_async(settings, mocker):
+    settings.METRICS_ENABLED = True
+    adapt = mocker.spy(BaseHandler, 'adapt_method_mode')
+
+    handler = ASGIHandler()
+
+    # (self, is_async, method, method_is_async): a sync middleware in
+    # the chain would be wrapped with sync_to_async / async_to_sync
+    adapted = [
+        call.kwargs.get('name') for call in adapt.call_args_list
+        if len(call.args) == 4 and call.args[1] != call.args[3]
+    ]
+    assert adapted == []
+    assert iscoroutinefunction(handler._middleware_chain)
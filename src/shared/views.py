@@ -1,5 +1,73 @@
+from secrets import compare_digest
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
 from rest_framework import viewsets
-from rest_framework.permissions import AllowAny
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import AllowAny, BasePermission, IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .metrics import REGISTRY
+from .models import RequestProfile
 
 class DefaultViewSet(viewsets.ViewSet):
     permission_classes = [AllowAny]
+
+
+class MetricsTokenAuthentication(BaseAuthentication):
+    """
+    Authenticates the Prometheus scraper with "Authorization: Bearer <METRICS_TOKEN>".
+    Other tokens are left to the JWT authentication.
+    """
+    def authenticate(self, request):
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        if settings.METRICS_TOKEN and compare_digest(header, f"Bearer {settings.METRICS_TOKEN}"):
+            return AnonymousUser(), 'metrics'
+        return None
+
+
+class IsStaffOrMetricsScraper(BasePermission):
+    def has_permission(self, request, view):
+        return request.auth == 'metrics' or bool(request.user and request.user.is_staff)
+
+
+class MetricsView(APIView):
+    """
+    Request metrics of this process in Prometheus text format.
+    """
+    authentication_classes = [MetricsTokenAuthentication, JWTAuthentication]
+    permission_classes = [IsStaffOrMetricsScraper]
+
+    def get(self, request):
+        return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class RequestProfileView(APIView):
+    """
+    Profile of a request (see shared.profiling), ?stacks=1 returns the
+    collapsed stacks as text for flamegraph.pl or speedscope.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, profile_id=None):
+        profile = get_object_or_404(RequestProfile, id=profile_id)
+        if request.query_params.get('stacks') == '1':
+            return HttpResponse(profile.stacks, content_type='text/plain; charset=utf-8')
+        return Response({
+            'id': profile.id,
+            'method': profile.method,
+            'path': profile.path,
+            'status_code': profile.status_code,
+            'user': profile.user_id,
+            'duration_ms': profile.duration_ms,
+            'sample_interval_ms': profile.sample_interval_ms,
+            'samples': profile.samples,
+            'created_date': profile.created_date,
+            'sql_ms': round(sum(query['ms'] for query in profile.sql), 1),
+            'sql': profile.sql,
+            'stacks': profile.stacks.splitlines(),
+        })
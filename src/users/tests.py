@@ -1,3 +1,66 @@
-from django.test import TestCase
+import pytest
+from django.contrib.auth.models import Group
+from rest_framework_simplejwt.tokens import RefreshToken
 
-# Create your tests here.
+from conftest import Endpoint, PROJECT_SIZES, PASSWORD
+
+USERS = '/v1/user/'
+EMPLOYEES = '/v1/companies/{company_id}/employees/'
+EMPLOYEE = EMPLOYEES + '{employee_id}/'
+
+
+def _project_ids(context):
+    return {'project_ids': [project.id for project in context['projects']]}
+
+
+def _manager_role(context):
+    Group.objects.get_or_create(name='Manager')
+    return {'role': 'Manager'}
+
+
+def _refresh_token(context):
+    return {'refresh_token': str(RefreshToken.for_user(context['admin']))}
+
+
+def _new_user(context):
+    return {'email': 'new-user@example.com', 'password': PASSWORD, 'full_name': 'New User', 'role': 'Employee'}
+
+
+# Password hashing takes a few hundred milliseconds (login, change-password, ...).
+ENDPOINTS = [
+    Endpoint('user list', 'get', USERS, queries={'small': 12, 'large': 51}),
+    Endpoint('user retrieve', 'get', USERS + '{employee_id}/', queries=6),
+    Endpoint('user me', 'get', USERS + 'me/', queries=3),
+    Endpoint('user partial update', 'patch', USERS + '{employee_id}/', queries=7,
+             data={'full_name': 'Renamed User'}),
+    Endpoint('user destroy', 'delete', USERS + '{employee_id}/', queries=16, status=(204,)),
+    Endpoint('user change-password', 'post', USERS + '{user_id}/change-password/', queries=4, ms=1500,
+             data={'old_password': PASSWORD, 'new_password': 'new-password'}),
+    Endpoint('employee list', 'get', EMPLOYEES, queries={'small': 12, 'large': 51}),
+    Endpoint('employee add-employee', 'post', EMPLOYEES + 'add-employee/', queries=9, ms=1000,
+             data=_new_user, status=(201,)),
+    Endpoint('employee update-info', 'put', EMPLOYEE + 'update-info/', queries=10,
+             data={'full_name': 'Renamed Employee'}),
+    Endpoint('employee update-role', 'patch', EMPLOYEE + 'update-role/', queries=6, data=_manager_role),
+    Endpoint('employee delete', 'delete', EMPLOYEE + 'delete/', queries=4),
+    Endpoint('employee assigned-projects', 'get', EMPLOYEE + 'assigned-projects/',
+             queries={'small': 14, 'large': 68}),
+    Endpoint('employee unassigned-projects', 'get', EMPLOYEE + 'unassigned-projects/', queries=9),
+    Endpoint('employee assign-projects', 'post', EMPLOYEE + 'assign-projects/',
+             queries={'small': 15, 'large': 51}, data=_project_ids),
+    Endpoint('employee unassign-projects', 'post', EMPLOYEE + 'unassign-projects/',
+             queries={'small': 17, 'large': 71}, data=_project_ids),
+    Endpoint('group list', 'get', '/group/', queries=3),
+    Endpoint('register', 'post', '/v1/users/register/', queries=15, ms=1000, authenticated=False, status=(201,),
+             data={'email': 'register@example.com', 'password': PASSWORD, 'full_name': 'New Admin',
+                   'company': {'name': 'New Company'}}),
+    Endpoint('login', 'post', '/v1/auth/login/', queries=8, ms=1000, authenticated=False,
+             data=lambda context: {'email': context['admin'].email, 'password': PASSWORD}),
+    Endpoint('logout', 'post', '/v1/auth/logout/', queries=8, authenticated=False, data=_refresh_token),
+]
+
+
+@pytest.mark.parametrize('size', PROJECT_SIZES)
+@pytest.mark.parametrize('endpoint', ENDPOINTS, ids=lambda endpoint: endpoint.name)
+def test_user_endpoint_budget(endpoint, size, endpoint_budget):
+    endpoint_budget(endpoint)